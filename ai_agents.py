@@ -2,69 +2,53 @@
 ai_agents.py - AI Agents for post classification and data extraction
 Agent 1: Classification (RELEVANT/SPAM/BROKER/etc) - with image support
 Agent 2: Extraction (fill missing price/city)
+Combined: Classification + extraction in a single call (default mode)
+
+ההנחיות הקבועות יושבות ב-system (עם cache_control) והפוסט עצמו בסוף ה-user message -
+כך ה-prefix זהה בכל הקריאות ונקרא מה-cache במקום להיות מחויב מחדש בכל פוסט.
+
+התשובה חוזרת דרך tool use (tool_choice מחייב כלי אחד) ונבדקת מול ה-input_schema שלו;
+תשובה לא תקינה מקבלת ניסיון תיקון אחד זול (אותו prefix מה-cache + הודעת השגיאה).
 """
 
 import os
-import json
-from anthropic import Anthropic
-from dotenv import load_dotenv
 import time
 
+from circuit_breaker import CircuitBreaker, AIUnavailableError, is_transient, retry_after
+import ai_recorder
 
-# טעינת API Key מ-.env
-load_dotenv()
+# --- מצבי עבודה (הגדרה: ai.mode) ---
+AI_MODE_COMBINED = 'combined'   # קריאה אחת: סיווג + חילוץ
+AI_MODE_TWO_CALL = 'two_call'   # Agent 1 ואז Agent 2 (ההתנהגות הישנה)
+AI_MODES = (AI_MODE_COMBINED, AI_MODE_TWO_CALL)
 
+# שדות שהמצב המשולב מחלץ בנוסף לסיווג
+EXTRACTED_FIELDS = ('price', 'city', 'location', 'rooms')
 
-class AIAgents:
-    def __init__(self):
-        """Initialize AI Agents with Anthropic API"""
-        api_key = os.getenv('ANTHROPIC_API_KEY')
-        if not api_key:
-            raise ValueError("❌ ANTHROPIC_API_KEY לא נמצא בקובץ .env")
+# שדות usage שנצברים במדדים (cache_* קיימים רק כשיש prompt caching)
+USAGE_FIELDS = ('input_tokens', 'output_tokens', 'cache_creation_input_tokens', 'cache_read_input_tokens')
 
-        self.client = Anthropic(api_key=api_key)
-        self.model = "claude-sonnet-4-20250514"  # Sonnet 4
+# ה-SDK מנסה שוב בעצמו (ומחכה) כברירת מחדל - כאן ה-backoff הוא של המפסק, בלי לעכב את מחזור הסריקה
+API_MAX_RETRIES = 0
+API_TIMEOUT = 60  # שניות (ברירת המחדל של ה-SDK היא 10 דקות)
 
-        self.last_call = 0
-        self.min_delay = 0.5  # 500ms בין קריאות
+# מוני איכות לכל סוג קריאה: תשובות לא תקינות, ניסיונות תיקון, נפילות לברירת מחדל, ושגיאות זמינות
+QUALITY_FIELDS = ('parse_failures', 'retries', 'fallbacks', 'unavailable')
 
-        print("✅ AI Agents initialized successfully")
+CATEGORIES = ('RELEVANT', 'AUCTION', 'BROKER', 'SPAM', 'WANTED', 'QUESTION')
 
-    def _wait_if_needed(self):
-        """ממתין אם עברו פחות מ-500ms מהקריאה האחרונה"""
-        now = time.time()
-        elapsed = now - self.last_call
-        if elapsed < self.min_delay:
-            time.sleep(self.min_delay - elapsed)
-        self.last_call = time.time()
+# נוסף לטקסט הפוסט כשמצורפות תמונות (ai_recorder מוריד אותו מהמפתח של ההקלטה)
+IMAGES_NOTE = "\nתמונות: מצורפות (קרא אותן!)"
 
-    # =========================================================
-    # Agent 1: Classification (סינון) - עם תמיכה בתמונות
-    # =========================================================
 
-    def classify_post(self, content, author, images=None):
-        """
-        Agent 1: מסווג פוסט לקטגוריה (עם תמיכה בתמונות!)
+# =========================================================
+# הנחיות קבועות (system) - בלי שום חלק שתלוי בפוסט!
+# שינוי בטקסט כאן = cache חדש (הכתיבה הראשונה אחרי שינוי משלמת cache_creation)
+# =========================================================
 
-        Args:
-            content: תוכן הפוסט
-            author: שם המפרסם
-            images: רשימת URLs של תמונות (אופציונלי)
+CLASSIFY_SYSTEM_PROMPT = """אתה מומחה לסיווג פוסטים בקבוצות פייסבוק של דירות יד שנייה.
 
-        Returns:
-            {
-                'category': 'RELEVANT' | 'BROKER' | 'SPAM' | 'AUCTION' | 'WANTED' | 'QUESTION',
-                'is_broker': True/False,
-                'confidence': 0.0-1.0,
-                'reason': 'הסבר קצר'
-            }
-        """
-
-        self._wait_if_needed()
-
-        prompt = f"""אתה מומחה לסיווג פוסטים בקבוצות פייסבוק של דירות יד שנייה.
-
-{"קרא את התמונות והפוסט" if images else "קרא את הפוסט הבא"} וסווג אותו לאחת מהקטגוריות:
+קרא את הפוסט (ואת התמונות, אם מצורפות) וסווג אותו לאחת מהקטגוריות:
 
 **RELEVANT** - דירה למכירה/השכרה (רלוונטי!)
 - יש תיאור דירה (חדרים, מטר, קומה וכו')
@@ -91,13 +75,6 @@ class AIAgents:
 
 ---
 
-**פוסט:**
-מפרסם: {author}
-תוכן: {content[:500]}
-{"תמונות: מצורפות (קרא אותן!)" if images else ""}
-
----
-
 **חשוב - תמונות:**
 - אם יש תמונה עם "כונס נכסים", "מכרז", "הזמנה להציע הצעות" → AUCTION
 - אם יש תמונה של פרסום (הובלות, שיפוצים, נקיון) → SPAM
@@ -112,13 +89,7 @@ class AIAgents:
 
 ---
 
-**החזר תשובה ב-JSON בדיוק בפורמט הזה (ללא טקסט נוסף):**
-{{
-    "category": "RELEVANT",
-    "is_broker": false,
-    "confidence": 0.95,
-    "reason": "דירה למכירה עם תיאור מפורט"
-}}
+**החזר את התשובה דרך הכלי classify_post בלבד (ללא טקסט נוסף).**
 
 **כללים:**
 1. אם זו דירה ממתווך → category: "RELEVANT", is_broker: true
@@ -128,59 +99,558 @@ class AIAgents:
 5. אם confidence < 0.5 → category: "RELEVANT" (במקרה ספק)
 """
 
+EXTRACT_SYSTEM_PROMPT = """אתה מומחה לחילוץ מידע מפוסטים בעברית.
+
+קרא את הפוסט וחלץ את הפרטים החסרים שמפורטים בהודעה (רק אותם).
+
+---
+
+**הנחיות קריטיות:**
+
+1. **מחיר (מחיר הדירה בלבד!)**:
+   - חפש מחיר של הדירה עצמה
+   - **התעלם ממחירים של:** מטבח, שיפוץ, ארונות, רהיטים, השקעה
+   - דוגמאות לא נכונות: "מטבח 100,000", "שיפוץ 50,000"
+   - אם אין מחיר דירה → null
+
+2. **עיר:**
+   - חפש עיר מפורשת: "בירושלים", "תל אביב", "חיפה"
+   - **אם יש שכונה ידועה → הסק את העיר!**
+     דוגמה: "דירה בקטמון" → city: "ירושלים" (כי קטמון זו שכונה בירושלים)
+     דוגמה: "דירה בפלורנטין" → city: "תל אביב" (כי פלורנטין זו שכונה בתל אביב)
+   - **אם אין עיר מפורשת ואין שכונה ידועה → null**
+
+3. **מיקום (שכונה/רחוב) - קריטי!**
+   - **זה השדה הכי חשוב - תמיד חפש אותו!**
+   - חפש שכונה ו/או רחוב בפוסט
+
+   **דוגמאות לשכונות:**
+   - ירושלים: קטמון, קריית יובל, פסגת זאב, גבעת שאול, תלפיות, ארנונה
+   - תל אביב: דיזנגוף, פלורנטין, נווה צדק, רמת אביב
+
+   **דוגמאות לרחובות:**
+   - "רחוב הרצל", "רח' בן יהודה", "דרך בגין"
+
+   **כללים:**
+   - אם יש **רק שכונה** → החזר שכונה
+   - אם יש **רק רחוב** → החזר רחוב
+   - אם יש **גם שכונה וגם רחוב** → החזר את שניהם בפורמט: "שכונה, רחוב"
+   - אם באמת אין → null
+
+   **דוגמאות:**
+   - "דירה בקריית יובל, רחוב ז'בוטינסקי" → location: "קריית יובל, רחוב ז'בוטינסקי"
+   - "דירה בקריית יובל" → location: "קריית יובל"
+   - "דירה ברחוב הרצל" → location: "רחוב הרצל"
+   - "דירה בירושלים" → location: null
+
+   **חשוב:** גם אם אין עיר, אם יש רחוב - החזר אותו ב-location!
+   דוגמה: "דירה ברחוב הארזים 12" → city: null, location: "רחוב הארזים"
+
+4. **כלל זהב: אם לא בטוח → null**
+
+---
+
+**חשוב - תגובות:**
+- הטקסט עלול להכיל תגובות של אנשים אחרים
+- **חלץ מידע רק מהפוסט המקורי, התעלם לגמרי מתגובות!**
+- דוגמה: אם בפוסט כתוב "7000 שח" ובתגובה "אני מוכן 5000" → החזר "7000"
+- דוגמה: אם בפוסט כתוב "בירושלים" ובתגובה "יש גם בתל אביב?" → החזר "ירושלים"
+
+---
+
+**דוגמאות חשובות:**
+
+✅ "דירה בירושלים ברחוב הרצל"
+   → city: "ירושלים", location: "רחוב הרצל"
+
+✅ "דירה בפסגת זאב ברחוב אלי תבין"
+   → city: "ירושלים", location: "פסגת זאב, רחוב אלי תבין" (שכונה ידועה → הסק עיר!)
+
+✅ "דירה בקטמונים ברחוב יוסי בן יועזר"
+   → city: "ירושלים", location: "קטמון, רחוב יוסי בן יועזר" (קטמון ידוע → הסק עיר!)
+
+❌ "דירה ברחוב הרצל"
+   → city: null, location: "רחוב הרצל" (אין שכונה ידועה - רק רחוב!)
+
+❌ "דירה ברחוב בגין בשכונה יפה"
+   → city: null, location: "רחוב בגין" ("שכונה יפה" לא שם שכונה אמיתי!)
+
+**דוגמאות מחיר:**
+
+✅ "דירה למכירה 2,500,000 ש״ח" → price: "2500000"
+✅ "מחיר מבוקש: 3.5 מיליון" → price: "3500000"
+❌ "מטבח חדש 100,000 ש״ח" → price: null (זה מחיר מטבח!)
+❌ "השקענו 200,000 בשיפוצים" → price: null (זה שיפוץ!)
+❌ "ארונות בהתאמה 80,000" → price: null (זה ריהוט!)
+
+**אם יש גם מחיר דירה וגם מחירים של שדרוגים - קח רק את מחיר הדירה!**
+דוגמה: "דירה 2,800,000 ש״ח, מטבח 100,000" → price: "2800000"
+
+---
+
+**החזר את התשובה דרך הכלי extract_details בלבד (ללא טקסט נוסף).**
+אם אין מידע → השתמש ב-null
+"""
+
+COMBINED_SYSTEM_PROMPT = """אתה מומחה לפוסטים בקבוצות פייסבוק של דירות יד שנייה.
+קרא את הפוסט (ואת התמונות, אם מצורפות), סווג אותו, ואם הוא רלוונטי - חלץ את פרטי הדירה.
+
+**שלב 1 - קטגוריה:**
+- **RELEVANT** - דירה למכירה/השכרה (יש תיאור דירה; עם או בלי מחיר; ממתווך או מבעלים)
+- **AUCTION** - מכרז/כונס נכסים/מכירה פומבית/"הזמנה להציע הצעות" (גם בתמונה)
+- **BROKER** - מתווך מחפש לקוחות ("תיק נכסים", "שירות תיווך") בלי דירה ספציפית
+- **SPAM** - פרסום לא קשור (שיפוצים, נקיון, הובלות - גם בתמונה)
+- **WANTED** - מחפש דירה ("מחפש דירה", "דרוש", "צריך")
+- **QUESTION** - שאלה ("מישהו יודע?", "איך...?")
+
+כללים: דירה ממתווך → RELEVANT + is_broker: true. מתווך מחפש לקוחות → BROKER + is_broker: true.
+confidence בין 0.5 ל-1.0; במקרה ספק → RELEVANT.
+
+**שלב 2 - פרטים (רק אם RELEVANT, אחרת null בכל השדות):**
+- **price**: מחיר הדירה בלבד, ספרות בלבד ("2,500,000 ש״ח" → "2500000", "3.5 מיליון" → "3500000").
+  התעלם ממחירי מטבח/שיפוץ/ריהוט/השקעה ("מטבח 100,000" → לא מחיר דירה).
+- **city**: עיר מפורשת, או עיר שמוסקת משכונה ידועה ("בקטמון" → "ירושלים", "בפלורנטין" → "תל אביב").
+- **location**: שכונה ו/או רחוב - "שכונה, רחוב" אם יש את שניהם ("קריית יובל, רחוב ז'בוטינסקי"),
+  אחרת רק מה שיש ("רחוב הרצל"). רק עיר בלי שכונה/רחוב → null.
+- **rooms**: מספר חדרים ("3 וחצי חדרים" → "3.5").
+- כלל זהב: אם לא בטוח → null.
+
+**תגובות:** הטקסט עלול להכיל תגובות של אחרים ("משה: יקר מדי") - התעלם מהן לגמרי,
+סווג וחלץ רק מהפוסט המקורי.
+
+---
+
+**החזר את התשובה דרך הכלי classify_and_extract בלבד (ללא טקסט נוסף).**
+"""
+
+
+# =========================================================
+# כלים (tool use) - החוזה של התשובה
+# =========================================================
+
+_CLASSIFY_PROPERTIES = {
+    "category": {"type": "string", "enum": list(CATEGORIES)},
+    "is_broker": {"type": "boolean"},
+    "confidence": {"type": "number", "minimum": 0, "maximum": 1},
+    "reason": {"type": "string", "description": "הסבר קצר"}
+}
+
+_DETAIL_PROPERTIES = {
+    "price": {"type": ["string", "number", "null"], "description": "מחיר הדירה בספרות בלבד"},
+    "city": {"type": ["string", "null"]},
+    "location": {"type": ["string", "null"], "description": "שכונה ו/או רחוב"},
+    "rooms": {"type": ["string", "number", "null"]}
+}
+
+CLASSIFY_TOOL = {
+    "name": "classify_post",
+    "description": "סיווג פוסט מקבוצת דירות",
+    "input_schema": {
+        "type": "object",
+        "properties": _CLASSIFY_PROPERTIES,
+        "required": list(_CLASSIFY_PROPERTIES)
+    }
+}
+
+EXTRACT_TOOL = {
+    "name": "extract_details",
+    "description": "הפרטים החסרים שחולצו מהפוסט (null אם לא נמצא)",
+    "input_schema": {
+        "type": "object",
+        "properties": {field: _DETAIL_PROPERTIES[field] for field in ('price', 'city', 'location')},
+        "required": ['price', 'city', 'location']
+    }
+}
+
+COMBINED_TOOL = {
+    "name": "classify_and_extract",
+    "description": "סיווג הפוסט + פרטי הדירה (null בכל הפרטים אם לא RELEVANT)",
+    "input_schema": {
+        "type": "object",
+        "properties": {**_CLASSIFY_PROPERTIES, **_DETAIL_PROPERTIES},
+        "required": list(_CLASSIFY_PROPERTIES) + list(EXTRACTED_FIELDS)
+    }
+}
+
+_JSON_TYPES = {
+    'string': str, 'boolean': bool, 'object': dict, 'array': list,
+    'number': (int, float), 'integer': int, 'null': type(None)
+}
+
+
+def schema_errors(schema, data):
+    """
+    בדיקה של dict מול input_schema (רק מה שהכלים כאן משתמשים בו:
+    type, properties, required, enum, minimum/maximum)
+
+    Returns:
+        list של שגיאות (ריק = תקין)
+    """
+    if not isinstance(data, dict):
+        return [f"expected object, got {type(data).__name__}"]
+
+    errors = [f"missing '{key}'" for key in schema.get('required', ()) if key not in data]
+    for key, rules in schema.get('properties', {}).items():
+        if key not in data:
+            continue
+        value = data[key]
+        types = rules.get('type', [])
+        types = [types] if isinstance(types, str) else types
+        # bool הוא int בפייתון - לא מקבלים true כמספר
+        if types and not any(isinstance(value, _JSON_TYPES[t]) and not (isinstance(value, bool) and t in ('number', 'integer'))
+                             for t in types):
+            errors.append(f"'{key}': expected {'/'.join(types)}, got {value!r}")
+            continue
+        if 'enum' in rules and value not in rules['enum']:
+            errors.append(f"'{key}': {value!r} not in {rules['enum']}")
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            if 'minimum' in rules and value < rules['minimum']:
+                errors.append(f"'{key}': {value} < {rules['minimum']}")
+            if 'maximum' in rules and value > rules['maximum']:
+                errors.append(f"'{key}': {value} > {rules['maximum']}")
+    return errors
+
+
+class StructuredOutputError(ValueError):
+    """התשובה לא הגיעה דרך הכלי, או לא עומדת ב-schema שלו"""
+
+
+class AIFailedError(Exception):
+    """
+    ה-API ענה אבל אין סיווג שמיש (בקשה שנדחתה, תשובה לא תקינה גם אחרי תיקון).
+    save_post שומר את הפוסט עם ai_failed = 1 (בלי סיווג מזויף) - ה-batch enricher ינסה שוב
+    """
+
+
+def _cached_system(prompt):
+    """
+    system block עם cache_control - נקרא מה-cache בקריאות הבאות (עד 5 דקות מהשימוש האחרון).
+    הערה: prefix קצר מהמינימום של המודל (~1024 טוקנים ב-Sonnet) פשוט לא נשמר ב-cache.
+    """
+    return [{"type": "text", "text": prompt, "cache_control": {"type": "ephemeral"}}]
+
+
+class AIAgents:
+    def __init__(self, mode=None):
+        """
+        Initialize AI Agents with Anthropic API
+
+        Args:
+            mode: 'combined' / 'two_call' (ברירת מחדל: ai.mode מההגדרות)
+        """
+        # טעינת API Key מ-.env (כאן ולא ב-import - כדי לא להאט את עליית התוכנה)
+        from dotenv import load_dotenv
+        load_dotenv()
+
+        api_key = os.getenv('ANTHROPIC_API_KEY')
+        if not api_key and ai_recorder.replay_enabled():
+            api_key = 'replay'  # השמעה מהקלטה - אין קריאות אמיתיות
+        if not api_key:
+            raise ValueError("❌ ANTHROPIC_API_KEY לא נמצא בקובץ .env")
+
+        self._api_key = api_key
+        self._client = None  # נוצר בקריאה הראשונה (ראה client)
+        self.model = "claude-sonnet-4-20250514"  # Sonnet 4
+
+        self.last_call = 0
+        self.min_delay = 0.5  # 500ms בין קריאות
+
+        if mode is None:
+            from settings_manager import SettingsManager
+            mode = SettingsManager().get('ai.mode', AI_MODE_COMBINED)
+        if mode not in AI_MODES:
+            print(f"⚠️ ai.mode לא מוכר ({mode}) - משתמש ב-{AI_MODE_COMBINED}")
+            mode = AI_MODE_COMBINED
+        self.mode = mode
+
+        # מדדים לכל סוג קריאה: כמות, טוקנים, זמן (ראה record_usage)
+        self.metrics = {}
+
+        # מפסק: כשה-API לא זמין קריאות נדחות מיד (AIUnavailableError) במקום להמתין
+        self.breaker = CircuitBreaker(on_state_change=self._on_breaker_change)
+
+        print(f"✅ AI Agents initialized successfully (mode: {self.mode})")
+
+    @property
+    def client(self):
+        """
+        Anthropic client - ה-import של anthropic (~1 שנייה) נדחה עד הקריאה הראשונה ל-API.
+        HOMERADAR_AI_RECORD / HOMERADAR_AI_REPLAY → עטוף ב-RecordingClient (ראה ai_recorder)
+        """
+        if self._client is None:
+            def create_client():
+                from anthropic import Anthropic
+                return Anthropic(api_key=self._api_key, max_retries=API_MAX_RETRIES, timeout=API_TIMEOUT)
+            self._client = ai_recorder.client_from_env(create_client)
+        return self._client
+
+    @client.setter
+    def client(self, value):
+        self._client = value
+
+    @property
+    def replaying(self):
+        """השמעה מהקלטה (משתנה סביבה או RecordingClient שהוצב ידנית) - אין רשת"""
+        if self._client is None:
+            return ai_recorder.replay_enabled()
+        return getattr(self._client, 'mode', None) == ai_recorder.MODE_REPLAY
+
+    def _wait_if_needed(self):
+        """ממתין אם עברו פחות מ-500ms מהקריאה האחרונה"""
+        now = time.time()
+        elapsed = now - self.last_call
+        if elapsed < self.min_delay:
+            time.sleep(self.min_delay - elapsed)
+        self.last_call = time.time()
+
+    # =========================================================
+    # מדדים (טוקנים, cache וזמן תגובה לכל סוג קריאה)
+    # =========================================================
+
+    def _create_message(self, kind, **params):
+        """
+        שולח בקשה ל-API ורושם מדדים תחת kind ('classify' / 'extract' / 'combined')
+
+        Raises:
+            AIUnavailableError: המפסק פתוח, או שגיאה זמנית (429 / 5xx / ניתוק)
+        """
+        if not self.breaker.allow():
+            retry_in = self.breaker.retry_in()
+            raise AIUnavailableError(f"AI unavailable (circuit open, retry in {retry_in:.0f}s)", retry_in)
+
+        self._wait_if_needed()
+        started = time.perf_counter()
         try:
-            # בניית message עם תמונות
-            message_content = []
-
-            # אם יש תמונות - הוסף אותן קודם
-            if images:
-                for image_url in images:
-                    message_content.append({
-                        "type": "image",
-                        "source": {
-                            "type": "url",
-                            "url": image_url
-                        }
-                    })
-
-            # הוסף את הטקסט
-            message_content.append({
-                "type": "text",
-                "text": prompt
-            })
-
-            # שלח ל-Claude
-            response = self.client.messages.create(
-                model=self.model,
-                max_tokens=200,
-                temperature=0,
-                messages=[{"role": "user", "content": message_content}]
-            )
-
-            # חילוץ התשובה
-            result_text = response.content[0].text.strip()
-
-            # ניקוי markdown backticks אם יש
-            result_text = result_text.replace('```json', '').replace('```', '').strip()
-
-            # המרה ל-JSON
-            result = json.loads(result_text)
-
-            # ולידציה
-            if result['confidence'] < 0.5:
-                result['category'] = 'RELEVANT'  # במקרה ספק
-
-            return result
+            response = self.client.messages.create(**params)
+        except ai_recorder.ReplayMissError:
+            self.breaker.release()  # לא נשלח כלום ל-API - לא הצלחה ולא כישלון
+            raise
+        except Exception as e:
+            if not is_transient(e):
+                self.breaker.record_success()  # ה-API ענה - הבעיה בבקשה, לא בזמינות
+                raise
+            self.breaker.record_failure(retry_after(e))
+            self._count(kind, 'unavailable')
+            raise AIUnavailableError(f"AI unavailable: {e}", self.breaker.retry_in()) from e
+
+        self.breaker.record_success()
+        self.record_usage(kind, response, time.perf_counter() - started)
+        return response
+
+    @staticmethod
+    def _on_breaker_change(old, new, retry_in):
+        if new == 'open':
+            print(f"⏸️ AI לא זמין - המפסק נפתח ל-{retry_in:.0f} שניות (פוסטים יסומנו ai_failed)")
+        elif new == 'half_open':
+            print("🔄 AI: קריאת ניסיון...")
+        else:
+            print("▶️ AI זמין שוב - המפסק נסגר")
+
+    @staticmethod
+    def _empty_metrics():
+        return {'calls': 0, 'seconds': 0.0,
+                **{field: 0 for field in USAGE_FIELDS}, **{field: 0 for field in QUALITY_FIELDS}}
+
+    def _count(self, kind, field):
+        """מונה איכות (parse_failures / retries / fallbacks) תחת kind"""
+        self.metrics.setdefault(kind, self._empty_metrics())[field] += 1
+
+    def record_usage(self, kind, response, seconds):
+        """רושם קריאה שהסתיימה (טוקנים + זמן) תחת kind - גם לתשובות שהגיעו מחוץ ל-client (batch)"""
+        entry = self.metrics.setdefault(kind, self._empty_metrics())
+        usage = getattr(response, 'usage', None)
+        entry['calls'] += 1
+        entry['seconds'] += seconds
+        for field in USAGE_FIELDS:
+            entry[field] += getattr(usage, field, 0) or 0
+
+    def get_metrics(self):
+        """
+        עותק של המדדים + סיכום כולל ('total').
+        cache_hit_rate = החלק מטוקני הקלט שנקרא מה-cache (0.0-1.0)
+        """
+        metrics = {kind: dict(entry) for kind, entry in self.metrics.items()}
+        total = self._empty_metrics()
+        for entry in metrics.values():
+            for key in total:
+                total[key] += entry[key]
+        metrics['total'] = total
+
+        for entry in metrics.values():
+            prompt_tokens = (entry['input_tokens'] + entry['cache_creation_input_tokens']
+                             + entry['cache_read_input_tokens'])
+            entry['cache_hit_rate'] = entry['cache_read_input_tokens'] / prompt_tokens if prompt_tokens else 0.0
+        return metrics
+
+    def reset_metrics(self):
+        self.metrics = {}
+
+    # =========================================================
+    # תשובה מובנית (tool use) + ניסיון תיקון אחד
+    # =========================================================
+
+    @staticmethod
+    def _tool_output(response, tool):
+        """
+        ה-input של קריאת הכלי מהתשובה, אחרי בדיקה מול ה-schema
 
+        Raises:
+            StructuredOutputError: אין קריאה לכלי, או שה-input לא תקין
+        """
+        for block in getattr(response, 'content', None) or []:
+            if getattr(block, 'type', None) == 'tool_use' and block.name == tool['name']:
+                errors = schema_errors(tool['input_schema'], block.input)
+                if errors:
+                    raise StructuredOutputError('; '.join(errors))
+                return block.input
+        raise StructuredOutputError(f"no {tool['name']} tool call in response")
+
+    @staticmethod
+    def _repair_params(params, response, tool, error):
+        """
+        הבקשה המקורית + התשובה השגויה + הודעת שגיאה.
+        ה-prefix (tools + system) זהה ונקרא מה-cache - משלמים רק על ההודעה הקצרה.
+        """
+        assistant, tool_use_id = [], None
+        for block in getattr(response, 'content', None) or []:
+            if getattr(block, 'type', None) == 'tool_use':
+                assistant.append({"type": "tool_use", "id": block.id, "name": block.name, "input": block.input})
+                tool_use_id = tool_use_id or block.id
+            elif getattr(block, 'type', None) == 'text' and block.text.strip():
+                assistant.append({"type": "text", "text": block.text})
+
+        message = f"התשובה לא תקינה: {error}. קרא שוב לכלי {tool['name']} עם ערכים תקינים בלבד."
+        if tool_use_id:
+            feedback = [{"type": "tool_result", "tool_use_id": tool_use_id, "is_error": True, "content": message}]
+        else:
+            feedback = [{"type": "text", "text": message}]
+
+        messages = list(params['messages'])
+        if assistant:
+            messages.append({"role": "assistant", "content": assistant})
+        messages.append({"role": "user", "content": feedback})
+        return {**params, 'messages': messages}
+
+    def _call_tool(self, kind, tool, params):
+        """
+        שולח בקשה ומחזיר את ה-input של הכלי.
+        תשובה לא תקינה → parse_failures, ניסיון תיקון אחד (retries); גם הוא נכשל → חריגה
+        (classify_post / classify_and_extract הופכים אותה ל-AIFailedError → הפוסט נשמר ai_failed)
+        """
+        response = self._create_message(kind, **params)
+        try:
+            return self._tool_output(response, tool)
+        except StructuredOutputError as e:
+            self._count(kind, 'parse_failures')
+            print(f"⚠️ {kind}: תשובה לא תקינה ({e}) - מנסה לתקן")
+            error = e
+
+        self._count(kind, 'retries')
+        response = self._create_message(kind, **self._repair_params(params, response, tool, error))
+        try:
+            return self._tool_output(response, tool)
+        except StructuredOutputError:
+            self._count(kind, 'parse_failures')
+            raise
+
+    @staticmethod
+    def _image_blocks(images):
+        """
+        תמונות → בלוקים של image ל-API.
+        כל פריט: URL, או source מוכן מ-ImagePipeline ({"type": "base64", ...} / {"type": "url", ...})
+        """
+        return [{"type": "image", "source": image if isinstance(image, dict) else {"type": "url", "url": image}}
+                for image in images or []]
+
+    @staticmethod
+    def _post_text(content, author, images, max_chars):
+        """החלק המשתנה - תמיד בסוף ההודעה, אחרי ה-prefix הקבוע"""
+        text = f"**פוסט:**\nמפרסם: {author}\nתוכן: {content[:max_chars]}"
+        if images:
+            text += IMAGES_NOTE
+        return text
+
+    # =========================================================
+    # בניית הבקשות (system קבוע + פוסט בסוף)
+    # =========================================================
+
+    def _build_classify_params(self, content, author, images=None):
+        message_content = self._image_blocks(images)
+        message_content.append({"type": "text", "text": self._post_text(content, author, images, 500)})
+        return {
+            'model': self.model,
+            'max_tokens': 200,
+            'temperature': 0,
+            'tools': [CLASSIFY_TOOL],
+            'tool_choice': {"type": "tool", "name": CLASSIFY_TOOL['name']},
+            'system': _cached_system(CLASSIFY_SYSTEM_PROMPT),
+            'messages': [{"role": "user", "content": message_content}]
+        }
+
+    def _build_extract_params(self, content, missing):
+        text = f"**פרטים חסרים לחילוץ:** {', '.join(missing)}\n\n**פוסט:**\n{content[:800]}"
+        return {
+            'model': self.model,
+            'max_tokens': 200,
+            'temperature': 0,
+            'tools': [EXTRACT_TOOL],
+            'tool_choice': {"type": "tool", "name": EXTRACT_TOOL['name']},
+            'system': _cached_system(EXTRACT_SYSTEM_PROMPT),
+            'messages': [{"role": "user", "content": text}]
+        }
+
+    def build_combined_params(self, content, author, images=None):
+        """פרמטרים של בקשת combined (סיווג + חילוץ) - לקריאה ישירה או כבקשה ב-batch"""
+        message_content = self._image_blocks(images)
+        message_content.append({"type": "text", "text": self._post_text(content, author, images, 800)})
+        return {
+            'model': self.model,
+            'max_tokens': 300,
+            'temperature': 0,
+            'tools': [COMBINED_TOOL],
+            'tool_choice': {"type": "tool", "name": COMBINED_TOOL['name']},
+            'system': _cached_system(COMBINED_SYSTEM_PROMPT),
+            'messages': [{"role": "user", "content": message_content}]
+        }
+
+    # =========================================================
+    # Agent 1: Classification (סינון) - עם תמיכה בתמונות
+    # =========================================================
+
+    def classify_post(self, content, author, images=None):
+        """
+        Agent 1: מסווג פוסט לקטגוריה (עם תמיכה בתמונות!)
+
+        Args:
+            content: תוכן הפוסט
+            author: שם המפרסם
+            images: רשימת URLs של תמונות (אופציונלי)
+
+        Returns:
+            {
+                'category': 'RELEVANT' | 'BROKER' | 'SPAM' | 'AUCTION' | 'WANTED' | 'QUESTION',
+                'is_broker': True/False,
+                'confidence': 0.0-1.0,
+                'reason': 'הסבר קצר'
+            }
+
+        Raises:
+            AIUnavailableError: המפסק פתוח / שגיאת זמינות (429, 5xx, 401/403)
+            AIFailedError: אין סיווג שמיש (בקשה שנדחתה, תשובה לא תקינה גם אחרי תיקון)
+        """
+
+        try:
+            # שלח ל-Claude (תמונות קודם, הטקסט של הפוסט אחרון)
+            result = self._call_tool('classify', CLASSIFY_TOOL,
+                                     self._build_classify_params(content, author, images))
+            return self._classification(result)
+
+        except (AIUnavailableError, ai_recorder.ReplayMissError):
+            raise  # save_post מסמן ai_failed - ה-batch enricher יטפל מאוחר יותר
         except Exception as e:
             print(f"❌ Agent 1 failed: {e}")
-            # ברירת מחדל: נניח שזה רלוונטי
-            return {
-                'category': 'RELEVANT',
-                'is_broker': False,
-                'confidence': 0.5,
-                'reason': f'AI failed: {str(e)}'
-            }
+            self._count('classify', 'fallbacks')
+            raise AIFailedError(f"AI failed: {e}") from e
 
     # =========================================================
     # Agent 2: Extraction (חילוץ)
@@ -209,8 +679,6 @@ class AIAgents:
             }
         """
 
-        self._wait_if_needed()
-
         # מה חסר?
         missing = []
         if not regex_found.get('price'):
@@ -224,141 +692,87 @@ class AIAgents:
             # אין מה למלא!
             return {'price': None, 'city': None, 'location': None}
 
-        missing_str = ', '.join(missing)
-
-        prompt = f"""אתה מומחה לחילוץ מידע מפוסטים בעברית.
-
-    קרא את הפוסט הבא וחלץ את הפרטים החסרים: **{missing_str}**
-
-    **פוסט:**
-    {content[:800]}
+        try:
+            result = self._call_tool('extract', EXTRACT_TOOL, self._build_extract_params(content, missing))
 
-    ---
+            # רק מחזירים מה שהיה חסר
+            return {field: self._detail(result[field])
+                    for field in ('price', 'city', 'location') if not regex_found.get(field)}
 
-    **הנחיות קריטיות:**
+        except (AIUnavailableError, ai_recorder.ReplayMissError):
+            raise  # save_post מסמן ai_failed - ה-batch enricher יטפל מאוחר יותר
+        except Exception as e:
+            print(f"❌ Agent 2 failed: {e}")
+            self._count('extract', 'fallbacks')
+            return {'price': None, 'city': None, 'location': None}
 
-1. **מחיר (מחיר הדירה בלבד!)**: 
-   - חפש מחיר של הדירה עצמה
-   - **התעלם ממחירים של:** מטבח, שיפוץ, ארונות, רהיטים, השקעה
-   - דוגמאות לא נכונות: "מטבח 100,000", "שיפוץ 50,000"
-   - אם אין מחיר דירה → null
-   
-   2. **עיר:**
-   - חפש עיר מפורשת: "בירושלים", "תל אביב", "חיפה"
-   - **אם יש שכונה ידועה → הסק את העיר!**
-     דוגמה: "דירה בקטמון" → city: "ירושלים" (כי קטמון זו שכונה בירושלים)
-     דוגמה: "דירה בפלורנטין" → city: "תל אביב" (כי פלורנטין זו שכונה בתל אביב)
-   - **אם אין עיר מפורשת ואין שכונה ידועה → null**
-   
-3. **מיקום (שכונה/רחוב) - קריטי!**
-   - **זה השדה הכי חשוב - תמיד חפש אותו!**
-   - חפש שכונה ו/או רחוב בפוסט
-   
-   **דוגמאות לשכונות:**
-   - ירושלים: קטמון, קריית יובל, פסגת זאב, גבעת שאול, תלפיות, ארנונה
-   - תל אביב: דיזנגוף, פלורנטין, נווה צדק, רמת אביב
-   
-   **דוגמאות לרחובות:**
-   - "רחוב הרצל", "רח' בן יהודה", "דרך בגין"
-   
-   **כללים:**
-   - אם יש **רק שכונה** → החזר שכונה
-   - אם יש **רק רחוב** → החזר רחוב
-   - אם יש **גם שכונה וגם רחוב** → החזר את שניהם בפורמט: "שכונה, רחוב"
-   - אם באמת אין → null
-   
-   **דוגמאות:**
-   - "דירה בקריית יובל, רחוב ז'בוטינסקי" → location: "קריית יובל, רחוב ז'בוטינסקי"
-   - "דירה בקריית יובל" → location: "קריית יובל"
-   - "דירה ברחוב הרצל" → location: "רחוב הרצל"
-   - "דירה בירושלים" → location: null
-   
-         **חשוב:** גם אם אין עיר, אם יש רחוב - החזר אותו ב-location!
-דוגמה: "דירה ברחוב הארזים 12" → city: null, location: "רחוב הארזים"         
-
-    4. **כלל זהב: אם לא בטוח → null**
-
-    ---
-
-    **חשוב - תגובות:**
-    - הטקסט עלול להכיל תגובות של אנשים אחרים
-    - **חלץ מידע רק מהפוסט המקורי, התעלם לגמרי מתגובות!**
-    - דוגמה: אם בפוסט כתוב "7000 שח" ובתגובה "אני מוכן 5000" → החזר "7000"
-    - דוגמה: אם בפוסט כתוב "בירושלים" ובתגובה "יש גם בתל אביב?" → החזר "ירושלים"
-
-    ---
-
-    **דוגמאות חשובות:**
-
-    ✅ "דירה בירושלים ברחוב הרצל" 
-       → city: "ירושלים", location: "רחוב הרצל"
-
-    ✅ "דירה בפסגת זאב ברחוב אלי תבין"
-       → city: "ירושלים", location: "פסגת זאב, רחוב אלי תבין" (שכונה ידועה → הסק עיר!)
-
-    ✅ "דירה בקטמונים ברחוב יוסי בן יועזר"
-       → city: "ירושלים", location: "קטמון, רחוב יוסי בן יועזר" (קטמון ידוע → הסק עיר!)
-
-    ❌ "דירה ברחוב הרצל"
-       → city: null, location: "רחוב הרצל" (אין שכונה ידועה - רק רחוב!)
-
-    ❌ "דירה ברחוב בגין בשכונה יפה"
-       → city: null, location: "רחוב בגין" ("שכונה יפה" לא שם שכונה אמיתי!)
-       
-               **דוגמאות מחיר:**
-        
-        ✅ "דירה למכירה 2,500,000 ש״ח" → price: "2500000"
-        ✅ "מחיר מבוקש: 3.5 מיליון" → price: "3500000"
-        ❌ "מטבח חדש 100,000 ש״ח" → price: null (זה מחיר מטבח!)
-        ❌ "השקענו 200,000 בשיפוצים" → price: null (זה שיפוץ!)
-        ❌ "ארונות בהתאמה 80,000" → price: null (זה ריהוט!)
-        
-        **אם יש גם מחיר דירה וגם מחירים של שדרוגים - קח רק את מחיר הדירה!**
-        דוגמה: "דירה 2,800,000 ש״ח, מטבח 100,000" → price: "2800000"
-        
-            ---
-
-    **החזר תשובה ב-JSON בדיוק בפורמט הזה (ללא טקסט נוסף):**
-    {{
-        "price": "7200",
-        "city": "ירושלים",
-        "location": "פסגת זאב"
-    }}
-
-    אם אין מידע → השתמש ב-null
-    """
+    # =========================================================
+    # Combined: סיווג + חילוץ בקריאה אחת
+    # =========================================================
 
-        try:
-            response = self.client.messages.create(
-                model=self.model,
-                max_tokens=200,
-                temperature=0,
-                messages=[{"role": "user", "content": prompt}]
-            )
+    def classify_and_extract(self, content, author, images=None):
+        """
+        סיווג + חילוץ פרטים בקריאה אחת (במקום Agent 1 ואז Agent 2)
 
-            # חילוץ התשובה
-            result_text = response.content[0].text.strip()
+        Args:
+            content: תוכן הפוסט
+            author: שם המפרסם
+            images: רשימת URLs של תמונות (אופציונלי)
 
-            # ניקוי markdown backticks
-            result_text = result_text.replace('```json', '').replace('```', '').strip()
+        Returns:
+            {
+                'category', 'is_broker', 'confidence', 'reason',   # כמו classify_post
+                'price', 'city', 'location', 'rooms'               # None אם לא נמצא / לא רלוונטי
+            }
 
-            # המרה ל-JSON
-            result = json.loads(result_text)
+        Raises:
+            AIUnavailableError / AIFailedError: כמו classify_post
+        """
 
-            # ולידציה: רק מחזירים מה שהיה חסר
-            output = {}
+        try:
+            result = self._call_tool('combined', COMBINED_TOOL,
+                                     self.build_combined_params(content, author, images))
+            return self._combined(result)
 
-            if not regex_found.get('price'):
-                output['price'] = result.get('price')
+        except (AIUnavailableError, ai_recorder.ReplayMissError):
+            raise  # save_post מסמן ai_failed - ה-batch enricher יטפל מאוחר יותר
+        except Exception as e:
+            print(f"❌ Combined agent failed: {e}")
+            self._count('combined', 'fallbacks')
+            raise AIFailedError(f"AI failed: {e}") from e
 
-            if not regex_found.get('city'):
-                output['city'] = result.get('city')
+    def parse_combined(self, response):
+        """
+        תשובה של בקשת combined (למשל מ-batch, בלי ניסיון תיקון) → dict מנורמל.
 
-            if not regex_found.get('location'):
-                output['location'] = result.get('location')
+        Raises:
+            StructuredOutputError: התשובה לא תקינה
+        """
+        return self._combined(self._tool_output(response, COMBINED_TOOL))
 
-            return output
+    # =========================================================
+    # נרמול התשובות (אחרי בדיקת ה-schema)
+    # =========================================================
 
-        except Exception as e:
-            print(f"❌ Agent 2 failed: {e}")
-            return {'price': None, 'city': None, 'location': None}
\ No newline at end of file
+    @staticmethod
+    def _detail(value):
+        """מחיר/עיר/מיקום/חדרים → טקסט או None"""
+        return str(value) if value not in (None, '') else None
+
+    @staticmethod
+    def _classification(result):
+        category = result['category']
+        if result['confidence'] < 0.5:
+            category = 'RELEVANT'  # במקרה ספק
+        return {
+            'category': category,
+            'is_broker': result['is_broker'],
+            'confidence': result['confidence'],
+            'reason': result['reason']
+        }
+
+    def _combined(self, result):
+        output = self._classification(result)
+        for field in EXTRACTED_FIELDS:
+            output[field] = self._detail(result[field])
+        return output
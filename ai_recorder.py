@@ -0,0 +1,336 @@
+"""
+ai_recorder.py - הקלטה והשמעה חוזרת של קריאות ה-AI
+RecordingClient עוטף את ה-client של Anthropic (AIAgents.client):
+  record - כל בקשה עוברת ל-API, והזוג בקשה/תשובה נשמר ב-JSONL לפי hash של הבקשה
+  replay - תשובות מוגשות מההקלטה, בלי רשת ובלי API key, עם זמן תגובה מלאכותי -
+           כך אפשר להריץ ולמדוד את כל המסלול listener → save_post → agents על מחשב בלי רשת
+
+הפעלה בלי לשנות קוד (משתני סביבה, נקראים כשה-client נוצר):
+  HOMERADAR_AI_RECORD=ai_recordings.jsonl   - הקלטה
+  HOMERADAR_AI_REPLAY=ai_recordings.jsonl   - השמעה
+  HOMERADAR_AI_LATENCY=0.8                  - זמן תגובה קבוע בהשמעה (ברירת מחדל: הזמן שהוקלט)
+  HOMERADAR_AI_ON_MISS=synthetic            - בקשה שלא הוקלטה: error (ברירת מחדל) / synthetic
+
+תמונות לא נכנסות למפתח: ה-thumbnails תלויים בהורדה (רשת) ובמצב ה"נראו כבר" של פוסטים קודמים,
+ובהשמעה save_post לא מוריד תמונות בכלל - כך פוסט עם תמונות נמצא בהקלטה גם בלי רשת ובכל סדר.
+
+הרצה:
+  python ai_recorder.py stats ai_recordings.jsonl
+  python ai_recorder.py replay ai_recordings.jsonl --posts 500 [--latency 0.8] [--profile]
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+from types import SimpleNamespace
+
+ENV_RECORD = 'HOMERADAR_AI_RECORD'
+ENV_REPLAY = 'HOMERADAR_AI_REPLAY'
+ENV_LATENCY = 'HOMERADAR_AI_LATENCY'
+ENV_ON_MISS = 'HOMERADAR_AI_ON_MISS'
+
+MODE_RECORD = 'record'
+MODE_REPLAY = 'replay'
+
+ON_MISS_ERROR = 'error'
+ON_MISS_SYNTHETIC = 'synthetic'
+
+
+class ReplayMissError(KeyError):
+    """בקשה שלא נמצאת בהקלטה (on_miss='error')"""
+
+
+def _without_images(params):
+    """הבקשה בלי בלוקי image ובלי שורת "תמונות: מצורפות" בטקסט"""
+    from ai_agents import IMAGES_NOTE
+
+    messages = []
+    for message in params.get('messages', []):
+        content = message.get('content')
+        if isinstance(content, list):
+            content = [
+                {**block, 'text': block['text'].replace(IMAGES_NOTE, '')} if block.get('type') == 'text' else block
+                for block in content if block.get('type') != 'image'
+            ]
+        messages.append({**message, 'content': content})
+    return {**params, 'messages': messages}
+
+
+def request_key(params):
+    """hash יציב של הבקשה (אותו פוסט + אותן הנחיות + אותו מודל = אותו מפתח; בלי תמונות)"""
+    canonical = json.dumps(_without_images(params), sort_keys=True, ensure_ascii=False,
+                           separators=(',', ':'), default=str)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+def _to_plain(value):
+    """תשובת SDK (pydantic) / SimpleNamespace → dict/list רגילים ל-JSON"""
+    if hasattr(value, 'model_dump'):
+        return value.model_dump(mode='json')
+    if isinstance(value, SimpleNamespace):
+        return {k: _to_plain(v) for k, v in vars(value).items()}
+    if isinstance(value, dict):
+        return {k: _to_plain(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_to_plain(v) for v in value]
+    return value
+
+
+def _to_response(value, key=None):
+    """
+    dict → אובייקט עם attributes (כמו תשובת ה-SDK).
+    input של tool_use נשאר dict - כמו ב-SDK.
+    """
+    if isinstance(value, dict) and key != 'input':
+        return SimpleNamespace(**{k: _to_response(v, k) for k, v in value.items()})
+    if isinstance(value, list):
+        return [_to_response(v) for v in value]
+    return value
+
+
+def synthetic_response(params):
+    """
+    תשובה מלאכותית לבקשה שלא הוקלטה: קריאה לכלי שנדרש, עם ערך ראשון/בטוח לכל שדה
+    (enum → הערך הראשון, nullable → null) - מספיק כדי להריץ עומס על פוסטים סינתטיים
+    """
+    tool_name = (params.get('tool_choice') or {}).get('name')
+    tool = next((t for t in params.get('tools', []) if t.get('name') == tool_name), None)
+    if tool is None:
+        content = [{'type': 'text', 'text': '{}'}]
+    else:
+        data = {}
+        for field, rules in tool['input_schema'].get('properties', {}).items():
+            types = rules.get('type', [])
+            types = [types] if isinstance(types, str) else types
+            if 'enum' in rules:
+                data[field] = rules['enum'][0]
+            elif 'null' in types:
+                data[field] = None
+            elif 'boolean' in types:
+                data[field] = False
+            elif 'number' in types or 'integer' in types:
+                data[field] = rules.get('maximum', 1)
+            else:
+                data[field] = 'synthetic'
+        content = [{'type': 'tool_use', 'id': 'toolu_synthetic', 'name': tool_name, 'input': data}]
+    return {
+        'content': content,
+        'usage': {'input_tokens': 0, 'output_tokens': 0,
+                  'cache_creation_input_tokens': 0, 'cache_read_input_tokens': 0}
+    }
+
+
+class RecordingClient:
+    """מחליף את ה-client של Anthropic: client.messages.create(**params)"""
+
+    def __init__(self, path, mode=MODE_REPLAY, inner=None, latency=None, jitter=0.0,
+                 on_miss=ON_MISS_ERROR, seed=None):
+        """
+        Args:
+            path: קובץ ההקלטה (JSONL)
+            mode: 'record' / 'replay'
+            inner: ה-client האמיתי (רק ב-record)
+            latency: בהשמעה - שניות קבועות לכל קריאה; None = הזמן שהוקלט
+            jitter: בהשמעה - סטייה אקראית (± חלק יחסי, למשל 0.2)
+            on_miss: 'error' / 'synthetic'
+        """
+        if mode == MODE_RECORD and inner is None:
+            raise ValueError("record mode needs the real client")
+
+        self.path = path
+        self.mode = mode
+        self.inner = inner
+        self.latency = latency
+        self.jitter = jitter
+        self.on_miss = on_miss
+        self.messages = self
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._entries = {}   # key → list של רשומות (אותה בקשה כמה פעמים → לפי הסדר, במעגל)
+        self._served = {}    # key → כמה פעמים הוגש
+        self.stats = {'hits': 0, 'misses': 0, 'recorded': 0}
+
+        if mode == MODE_REPLAY:
+            self._load()
+
+    def __len__(self):
+        return sum(len(entries) for entries in self._entries.values())
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            print(f"⚠️ אין הקלטה ב-{self.path}")
+            return
+        with open(self.path, encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    entry = json.loads(line)
+                    self._entries.setdefault(entry['key'], []).append(entry)
+        print(f"▶️ השמעת AI: {len(self)} תשובות מ-{self.path}")
+
+    # =========================================================
+    # messages.create
+    # =========================================================
+
+    def create(self, **params):
+        if self.mode == MODE_RECORD:
+            return self._record(params)
+        return self._replay(params)
+
+    def _record(self, params):
+        started = time.perf_counter()
+        response = self.inner.messages.create(**params)
+        latency = time.perf_counter() - started
+
+        entry = {
+            'key': request_key(params),
+            'model': params.get('model'),
+            'tool': (params.get('tool_choice') or {}).get('name'),
+            'latency': round(latency, 4),
+            'recorded_at': time.strftime('%Y-%m-%d %H:%M:%S'),
+            'response': _to_plain(response)
+        }
+        with self._lock:
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+            self.stats['recorded'] += 1
+        return response
+
+    def _replay(self, params):
+        key = request_key(params)
+        with self._lock:
+            entries = self._entries.get(key)
+            if entries:
+                index = self._served.get(key, 0)
+                self._served[key] = index + 1
+                entry = entries[index % len(entries)]
+                self.stats['hits'] += 1
+            else:
+                entry = None
+                self.stats['misses'] += 1
+
+        if entry is None:
+            if self.on_miss != ON_MISS_SYNTHETIC:
+                raise ReplayMissError(f"no recording for request {key[:12]} ({self.path})")
+            entry = {'latency': None, 'response': synthetic_response(params)}
+
+        self._sleep(entry.get('latency'))
+        return _to_response(entry['response'])
+
+    def _sleep(self, recorded):
+        delay = self.latency if self.latency is not None else (recorded or 0.0)
+        if self.jitter:
+            delay *= 1 + self._rng.uniform(-self.jitter, self.jitter)
+        if delay > 0:
+            time.sleep(delay)
+
+
+def replay_enabled():
+    return bool(os.getenv(ENV_REPLAY))
+
+
+def client_from_env(factory):
+    """
+    ה-client ש-AIAgents ישתמש בו לפי משתני הסביבה
+
+    Args:
+        factory: יוצר את ה-client האמיתי (נקרא רק אם צריך)
+    """
+    replay_path = os.getenv(ENV_REPLAY)
+    if replay_path:
+        latency = os.getenv(ENV_LATENCY)
+        return RecordingClient(replay_path, MODE_REPLAY,
+                               latency=float(latency) if latency else None,
+                               on_miss=os.getenv(ENV_ON_MISS, ON_MISS_ERROR))
+
+    record_path = os.getenv(ENV_RECORD)
+    if record_path:
+        print(f"⏺️ הקלטת AI ל-{record_path}")
+        return RecordingClient(record_path, MODE_RECORD, inner=factory())
+
+    return factory()
+
+
+# =========================================================
+#  CLI
+# =========================================================
+
+def print_stats(path):
+    with open(path, encoding='utf-8') as f:
+        entries = [json.loads(line) for line in f if line.strip()]
+    if not entries:
+        print("⚠️ הקלטה ריקה")
+        return
+
+    latencies = sorted(e['latency'] for e in entries)
+    tools = {}
+    for entry in entries:
+        tools[entry.get('tool')] = tools.get(entry.get('tool'), 0) + 1
+    print(f"📼 {len(entries)} תשובות, {len({e['key'] for e in entries})} בקשות שונות  {tools}")
+    print(f"  זמן תגובה: p50 {latencies[len(latencies) // 2]:.2f}s  "
+          f"p95 {latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]:.2f}s")
+
+
+def replay_bench(path, posts, latency, profile):
+    """מריץ פוסטים סינתטיים דרך save_post עם השמעה (בקשות שלא הוקלטו → synthetic)"""
+    import tempfile
+    from ai_agents import AIAgents
+    from database import PostDatabase
+    from synthetic_data import generate_posts, INSERT_COLUMNS
+
+    os.environ.setdefault(ENV_REPLAY, path)
+    index = {name: i for i, name in enumerate(INSERT_COLUMNS)}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = PostDatabase(os.path.join(tmp, 'replay.db'))
+        db.ai_agents = AIAgents()
+        db.ai_agents.min_delay = 0
+        db.ai_agents.client = RecordingClient(path, MODE_REPLAY, latency=latency, on_miss=ON_MISS_SYNTHETIC)
+        db.pre_classifier = None
+
+        def run():
+            for row in generate_posts(posts):
+                db.save_post({'post_url': row[index['post_url']], 'post_id': row[index['post_id']],
+                              'content': row[index['content']], 'author': row[index['author']],
+                              'group_name': row[index['group_name']]})
+
+        started = time.perf_counter()
+        if profile:
+            import cProfile
+            import pstats
+            profiler = cProfile.Profile()
+            profiler.runcall(run)
+            pstats.Stats(profiler).sort_stats('cumulative').print_stats(20)
+        else:
+            run()
+        elapsed = time.perf_counter() - started
+
+    print(f"📊 {posts} פוסטים ב-{elapsed:.2f}s ({posts / elapsed:.1f} פוסטים/שנייה)  "
+          f"השמעה: {db.ai_agents.client.stats}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="הקלטה והשמעה של קריאות AI")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    stats = sub.add_parser('stats', help='סיכום הקלטה')
+    stats.add_argument('path')
+
+    replay = sub.add_parser('replay', help='הרצת save_post עם השמעה (בלי רשת)')
+    replay.add_argument('path')
+    replay.add_argument('--posts', type=int, default=200)
+    replay.add_argument('--latency', type=float, default=None, help='שניות לקריאה (ברירת מחדל: כמו בהקלטה)')
+    replay.add_argument('--profile', action='store_true')
+
+    args = parser.parse_args()
+    if args.command == 'stats':
+        print_stats(args.path)
+    else:
+        replay_bench(args.path, args.posts, args.latency, args.profile)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,10 @@
 """
 analytics.py - אנליטיקס וסטטיסטיקות מתקדמות
+כל השאילתות רצות על טבלת הסיכומים daily_stats (ראה database.py) ולא על posts
 """
 
 import sqlite3
+from datetime import datetime, timezone
 
 
 class Analytics:
@@ -17,28 +19,38 @@ class Analytics:
         """
         self.db_path = db_path
 
-    def get_average_price_today(self):
+    def _get_today_by_city(self):
         """
-        מחזיר ממוצע מחירים של דירות היום
+        שורות הסיכום של היום (רלוונטיים בלבד) מקובצות לפי עיר - שאילתה אחת על daily_stats
 
         Returns:
-            int: ממוצע מחיר, או 0 אם אין נתונים
+            list של tuples: (city, count, price_sum, price_count, rooms_sum, rooms_count)
         """
         conn = sqlite3.connect(self.db_path)
         cursor = conn.cursor()
 
         cursor.execute('''
-            SELECT AVG(CAST(price AS INTEGER))
-            FROM posts 
-            WHERE DATE(scanned_at) = DATE('now')
-            AND price IS NOT NULL
+            SELECT city, SUM(posts_count), SUM(price_sum), SUM(price_count),
+                   SUM(rooms_sum), SUM(rooms_count)
+            FROM daily_stats
+            WHERE day = DATE('now')
             AND is_relevant = 1
+            GROUP BY city
         ''')
 
-        result = cursor.fetchone()[0]
+        rows = cursor.fetchall()
         conn.close()
 
-        return int(result) if result else 0
+        return rows
+
+    def get_average_price_today(self):
+        """
+        מחזיר ממוצע מחירים של דירות היום
+
+        Returns:
+            int: ממוצע מחיר, או 0 אם אין נתונים
+        """
+        return self._trends_from_rows(self._get_today_by_city())['avg_price']
 
     def get_average_rooms_today(self):
         """
@@ -47,21 +59,7 @@ class Analytics:
         Returns:
             float: ממוצע חדרים, או 0 אם אין נתונים
         """
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-
-        cursor.execute('''
-            SELECT AVG(CAST(rooms AS REAL))
-            FROM posts 
-            WHERE DATE(scanned_at) = DATE('now')
-            AND rooms IS NOT NULL
-            AND is_relevant = 1
-        ''')
-
-        result = cursor.fetchone()[0]
-        conn.close()
-
-        return round(result, 1) if result else 0
+        return self._trends_from_rows(self._get_today_by_city())['avg_rooms']
 
     def get_popular_city_today(self):
         """
@@ -70,26 +68,7 @@ class Analytics:
         Returns:
             str: שם העיר + כמות, או "אין נתונים"
         """
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-
-        cursor.execute('''
-            SELECT city, COUNT(*) as count
-            FROM posts 
-            WHERE DATE(scanned_at) = DATE('now')
-            AND city IS NOT NULL
-            AND is_relevant = 1
-            GROUP BY city
-            ORDER BY count DESC
-            LIMIT 1
-        ''')
-
-        result = cursor.fetchone()
-        conn.close()
-
-        if result:
-            return f"{result[0]} ({result[1]})"
-        return "אין נתונים"
+        return self._trends_from_rows(self._get_today_by_city())['popular_city']
 
     def get_apartments_per_hour_today(self):
         """
@@ -98,29 +77,34 @@ class Analytics:
         Returns:
             float: ממוצע דירות לשעה
         """
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-
-        # כמה דירות היום
-        cursor.execute('''
-            SELECT COUNT(*)
-            FROM posts 
-            WHERE DATE(scanned_at) = DATE('now')
-            AND is_relevant = 1
-        ''')
-        count = cursor.fetchone()[0]
-
-        # כמה שעות עברו מתחילת היום
-        cursor.execute('''
-            SELECT (JULIANDAY('now') - JULIANDAY(DATE('now'))) * 24
-        ''')
-        hours = cursor.fetchone()[0]
-
-        conn.close()
+        return self._trends_from_rows(self._get_today_by_city())['apartments_per_hour']
+
+    def _trends_from_rows(self, rows):
+        """מחשב את כל הטרנדים משורות הסיכום של היום"""
+        count = sum(r[1] for r in rows)
+        price_sum = sum(r[2] for r in rows)
+        price_count = sum(r[3] for r in rows)
+        rooms_sum = sum(r[4] for r in rows)
+        rooms_count = sum(r[5] for r in rows)
+
+        # עיר מובילה - בלי שורות ללא עיר ('')
+        cities = [(r[0], r[1]) for r in rows if r[0]]
+        if cities:
+            city, city_count = max(cities, key=lambda c: c[1])
+            popular_city = f"{city} ({city_count})"
+        else:
+            popular_city = "אין נתונים"
+
+        # כמה שעות עברו מתחילת היום (UTC - כמו DATE('now') של SQLite)
+        now = datetime.now(timezone.utc)
+        hours = now.hour + now.minute / 60 + now.second / 3600
 
-        if hours > 0:
-            return round(count / hours, 1)
-        return 0.0
+        return {
+            'avg_price': int(price_sum / price_count) if price_count else 0,
+            'avg_rooms': round(rooms_sum / rooms_count, 1) if rooms_count else 0,
+            'popular_city': popular_city,
+            'apartments_per_hour': round(count / hours, 1) if hours > 0 else 0.0
+        }
 
     def get_trends_today(self):
         """
@@ -134,11 +118,26 @@ class Analytics:
                 'apartments_per_hour': float
             }
         """
+        return self._trends_from_rows(self._get_today_by_city())
+
+    def get_today_breakdown(self):
+        """
+        מחזיר את הנתונים הגולמיים של היום (סכומים ולא ממוצעים) -
+        כדי שאפשר יהיה להמשיך לצבור אותם בזיכרון מאירועים
+
+        Returns:
+            dict: {
+                'price_sum': int,
+                'price_count': int,
+                'cities': {'ירושלים': 5, ...}
+            }
+        """
+        rows = self._get_today_by_city()
+
         return {
-            'avg_price': self.get_average_price_today(),
-            'avg_rooms': self.get_average_rooms_today(),
-            'popular_city': self.get_popular_city_today(),
-            'apartments_per_hour': self.get_apartments_per_hour_today()
+            'price_sum': sum(r[2] for r in rows),
+            'price_count': sum(r[3] for r in rows),
+            'cities': {r[0]: r[1] for r in rows if r[0]}
         }
 
     def get_city_neighborhood_stats(self, min_apartments=3):
@@ -164,13 +163,13 @@ class Analytics:
         conn = sqlite3.connect(self.db_path)
         cursor = conn.cursor()
 
-        # שליפת כל הדירות הרלוונטיות עם עיר ושכונה
+        # סיכום כל הדירות הרלוונטיות עם עיר ושכונה (מטבלת הסיכומים היומית)
         cursor.execute('''
-            SELECT city, location, COUNT(*) as count
-            FROM posts
+            SELECT city, location, SUM(posts_count) as count
+            FROM daily_stats
             WHERE is_relevant = 1
-            AND city IS NOT NULL
-            AND location IS NOT NULL
+            AND city != ''
+            AND location != ''
             GROUP BY city, location
             ORDER BY city, count DESC
         ''')
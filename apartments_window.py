@@ -0,0 +1,410 @@
+"""
+apartments_window.py - טבלת דירות מרוכזת (טעינה עצלה בגלילה)
+הנתונים נשלפים בדפים (keyset pagination) עם העמודות שמוצגות בלבד,
+והמיון/סינון נעשים ב-DB - כך שגם עשרות אלפי דירות נפתחות מיד.
+"""
+
+import tkinter as tk
+from tkinter import ttk, messagebox
+import webbrowser
+
+# צבעים - אותם כמו ב-main.py
+COLORS = {
+    'primary': '#2c3e50',
+    'secondary': '#34495e',
+    'accent': '#3498db',
+    'success': '#27ae60',
+    'danger': '#e74c3c',
+    'warning': '#f39c12',
+    'bg': '#ecf0f1',
+    'card': '#ffffff',
+    'text': '#2c3e50',
+    'text_light': '#7f8c8d',
+    'sub_text': '#95a5a6'
+}
+
+PAGE_SIZE = 100          # שורות לכל דף
+LOAD_MORE_AT = 0.9       # טוען דף נוסף כשהגלילה עוברת 90%
+SEARCH_LIMIT = 200       # תוצאות חיפוש (מדורגות - בלי דפדוף)
+
+ALL_CITIES = "כל הערים"
+
+# עמודה בטבלה → מפתח מיון ב-DB (ראה PostDatabase.get_posts_page)
+SORTABLE_COLUMNS = {
+    'date': 'scanned_at',
+    'price': 'price',
+    'rooms': 'rooms',
+    'city': 'city',
+}
+
+
+def split_location(loc):
+    """מפצל מיקום לשכונה ורחוב: 'קריית יובל, רחוב הרצל' → ('קריית יובל', 'רחוב הרצל')"""
+    neighborhood = "-"
+    street = "-"
+
+    if loc:
+        # בדיקה: האם יש פסיק? (שכונה + רחוב)
+        if ',' in loc:
+            parts = [p.strip() for p in loc.split(',', 1)]
+            if len(parts) >= 2 and parts[0] and parts[1]:
+                neighborhood = parts[0]
+                street = parts[1]
+            else:
+                # פסיק אבל חסר חלק - התייחס כשכונה בלבד
+                neighborhood = parts[0] if parts[0] else loc
+
+        # אם אין פסיק - בדוק אם זה רחוב או שכונה
+        elif 'רחוב' in loc or 'רח\'' in loc or 'רח"' in loc:
+            street = loc
+        else:
+            neighborhood = loc
+
+    return neighborhood, street
+
+
+def format_row(index, post):
+    """ממיר שורה מה-DB לערכים של הטבלה"""
+    author = post['author'] or "-"
+    city = post.get('city') or "-"
+    neighborhood, street = split_location(post.get('location', ''))
+
+    # מחיר עם פסיקים
+    price = "-"
+    if post['price']:
+        try:
+            clean_num = int(str(post['price']).replace(',', '').replace('.', ''))
+            price = f"₪{clean_num:,}"
+        except (ValueError, TypeError):
+            price = str(post['price'])
+
+    rooms = post['rooms'] or "-"
+    phone = post['phone'] or "-"
+
+    # קיצור שם קבוצה
+    full_group = post.get('group_name') or "-"
+    words = full_group.split()
+    if len(words) > 3:
+        group_display = " ".join(words[:3]) + "..."
+    else:
+        group_display = full_group
+
+    # קיצור תאריך
+    date_full = str(post.get('scanned_at') or "")
+    date_display = date_full[5:16] if len(date_full) > 16 else date_full
+
+    return (index, author, city, neighborhood, street, price, rooms, phone, group_display,
+            date_display, post['post_url'], post.get('id', 0))
+
+
+class ApartmentsWindow:
+    """חלון טבלת הדירות"""
+
+    def __init__(self, parent, db):
+        """
+        Args:
+            parent: החלון הראשי (root)
+            db: PostDatabase
+        """
+        self.db = db
+
+        # מצב הדפדוף
+        self.sort = 'scanned_at'
+        self.descending = True
+        self.city = None
+        self._cursor = None
+        self._exhausted = False
+        self._loaded = 0        # שורות שמוצגות כרגע (יורד במחיקה)
+        self._row_number = 0    # מונה רץ למספור ולפסים - לא יורד במחיקה, כדי שדף נוסף לא יחזור על מספר
+        self.query = None   # חיפוש פעיל (None = טבלה רגילה)
+
+        self.window = tk.Toplevel(parent)
+        self.window.title("📋 טבלת דירות מרוכזת")
+        self.window.geometry("1350x650")
+        self.window.configure(bg=COLORS['bg'])
+
+        self._create_toolbar()
+        self._create_table()
+        self._create_buttons()
+
+        self.reload()
+
+    # ==============================================================================
+    # בניית הממשק
+    # ==============================================================================
+    def _create_toolbar(self):
+        toolbar = tk.Frame(self.window, bg=COLORS['bg'])
+        toolbar.pack(fill='x', padx=15, pady=(15, 0))
+
+        tk.Label(toolbar, text="עיר:", font=('Segoe UI', 10),
+                 bg=COLORS['bg'], fg=COLORS['text']).pack(side='right')
+
+        self.city_var = tk.StringVar(value=ALL_CITIES)
+        city_box = ttk.Combobox(toolbar, textvariable=self.city_var, state='readonly', width=18,
+                                values=[ALL_CITIES] + self.db.get_cities())
+        city_box.pack(side='right', padx=5)
+        city_box.bind("<<ComboboxSelected>>", self._on_city_selected)
+
+        # --- חיפוש חופשי (FTS) ---
+        tk.Button(toolbar, text="✖", command=self.clear_search, bg='white', relief='flat',
+                  width=3).pack(side='left')
+        tk.Button(toolbar, text="🔍 חפש", command=self.run_search, bg=COLORS['accent'], fg='white',
+                  relief='flat', width=8).pack(side='left', padx=5)
+
+        self.search_var = tk.StringVar()
+        search_entry = tk.Entry(toolbar, textvariable=self.search_var, font=('Segoe UI', 10), width=35,
+                                justify='right', relief='flat')
+        search_entry.pack(side='left', padx=5, ipady=3)
+        search_entry.bind("<Return>", self.run_search)
+        search_entry.bind("<Escape>", self.clear_search)
+
+    def _create_table(self):
+        frame_table = tk.Frame(self.window, bg=COLORS['bg'])
+        frame_table.pack(fill='both', expand=True, padx=15, pady=15)
+
+        # --- עיצוב (כולל הסרגל המעוצב!) ---
+        style = ttk.Style()
+        style.theme_use('clam')
+        style.configure("Treeview.Heading", font=('Segoe UI', 10, 'bold'), background=COLORS['secondary'],
+                        foreground='white', relief='flat')
+        style.configure("Treeview", rowheight=30, font=('Segoe UI', 10), background='white', fieldbackground='white',
+                        borderwidth=0)
+        style.map("Treeview", background=[('selected', COLORS['accent'])], foreground=[('selected', 'white')])
+
+        style.configure("Vertical.TScrollbar", background='#bdc3c7', troughcolor=COLORS['bg'], bordercolor=COLORS['bg'],
+                        arrowcolor=COLORS['text'], relief='flat')
+        style.map("Vertical.TScrollbar", background=[('active', COLORS['accent'])])
+
+        self.scrollbar = ttk.Scrollbar(frame_table, orient="vertical", style="Vertical.TScrollbar")
+        self.scrollbar.pack(side='right', fill='y')
+
+        # --- הגדרת העמודות ---
+        columns = ('index', 'author', 'city', 'neighborhood', 'street', 'price', 'rooms', 'phone', 'group', 'date',
+                   'link', 'id', 'snippet')
+        # הגלילה עוברת דרך _on_scroll - שם מחליטים אם לטעון דף נוסף
+        tree = ttk.Treeview(frame_table, columns=columns, show='headings', yscrollcommand=self._on_scroll)
+        self.scrollbar.config(command=tree.yview)
+        self.tree = tree
+
+        tree.column('index', width=40, anchor='center')
+        tree.heading('index', text='#', anchor='center')
+
+        # כל שאר העמודות - יישור לימין גם בתוכן וגם בכותרת
+        headings = [
+            ('author', 'מפרסם', 120, 'e'),
+            ('city', 'עיר', 90, 'e'),
+            ('neighborhood', 'שכונה', 100, 'e'),
+            ('street', 'רחוב', 120, 'e'),
+            ('price', 'מחיר', 90, 'e'),
+            ('rooms', 'חדרים', 60, 'center'),  # חדרים נראה טוב יותר באמצע
+            ('phone', 'טלפון', 110, 'e'),
+            ('group', 'קבוצה', 160, 'e'),
+            ('date', 'תאריך', 110, 'e'),
+        ]
+        self.heading_texts = {}
+        for col, text, width, anchor in headings:
+            tree.column(col, width=width, anchor=anchor)
+            self.heading_texts[col] = text
+            if col in SORTABLE_COLUMNS:
+                # לחיצה על כותרת → מיון בצד ה-DB
+                tree.heading(col, text=text, anchor=anchor, command=lambda c=col: self._on_sort(c))
+            else:
+                tree.heading(col, text=text, anchor=anchor)
+
+        # עמודות נסתרות
+        tree.column('link', width=0, stretch=False)
+        tree.column('id', width=0, stretch=False)
+
+        # קטע מהפוסט עם המילים שנמצאו - מוצג רק בזמן חיפוש
+        tree.column('snippet', width=380, anchor='e')
+        tree.heading('snippet', text='קטע מהפוסט', anchor='e')
+        self.table_columns = columns[:-1]
+        self.search_columns = ('index', 'author', 'city', 'neighborhood', 'price', 'rooms', 'snippet', 'date')
+        tree.configure(displaycolumns=self.table_columns)
+
+        tree.pack(fill='both', expand=True)
+        tree.tag_configure('oddrow', background='white')
+        tree.tag_configure('evenrow', background='#f2f6f8')
+
+        # --- תפריט והקשרים ---
+        context_menu = tk.Menu(self.window, tearoff=0, font=('Segoe UI', 10))
+        context_menu.add_command(label="🌐 פתח בדפדפן", command=self.open_in_browser)
+        context_menu.add_separator()
+        context_menu.add_command(label="🗑️ מחק דירה", command=self.delete_selected_post)
+
+        def on_right_click(event):
+            row_id = tree.identify_row(event.y)
+            if row_id: tree.selection_set(row_id); context_menu.post(event.x_root, event.y_root)
+
+        tree.bind("<Button-3>", on_right_click)
+        tree.bind("<Double-1>", self.open_in_browser)
+        tree.bind("<Delete>", self.delete_selected_post)
+
+        self._update_heading_arrows()
+
+    def _create_buttons(self):
+        btn_frame = tk.Frame(self.window, bg=COLORS['bg'])
+        btn_frame.pack(fill='x', padx=20, pady=(0, 10))
+        tk.Button(btn_frame, text="סגור חלון", command=self.window.destroy, bg='white', relief='flat', width=12).pack(
+            side='left')
+        tk.Button(btn_frame, text="🔄 רענן", command=self.reload, bg=COLORS['accent'], fg='white', relief='flat',
+                  width=15).pack(side='right')
+
+        self.status_var = tk.StringVar()
+        status_bar = tk.Frame(self.window, bg='#e0e0e0', height=25)
+        status_bar.pack(side='bottom', fill='x')
+        tk.Label(status_bar, textvariable=self.status_var, bg='#e0e0e0', fg='#555').pack(side='right', padx=10)
+
+    # ==============================================================================
+    # טעינת נתונים
+    # ==============================================================================
+    def reload(self):
+        """מנקה את הטבלה וטוען את הדף הראשון (לפי המיון והסינון הנוכחיים)"""
+        if self.query:
+            self._show_search_results()
+            return
+
+        self.tree.delete(*self.tree.get_children())
+        self._cursor = None
+        self._exhausted = False
+        self._loaded = 0
+        self._row_number = 0
+        self._total = self.db.count_posts(relevant_only=True, city=self.city)
+
+        self.load_more()
+
+    def load_more(self):
+        """מוסיף את הדף הבא לסוף הטבלה"""
+        if self._exhausted:
+            return
+
+        posts, self._cursor = self.db.get_posts_page(
+            after=self._cursor, limit=PAGE_SIZE, sort=self.sort,
+            descending=self.descending, relevant_only=True, city=self.city)
+
+        for post in posts:
+            self._append_row(post)
+
+        if self._cursor is None:
+            self._exhausted = True
+
+        self._update_status()
+
+    def _append_row(self, post, *extra):
+        """שורה בסוף הטבלה - מספר ופס לפי המונה הרץ (לא לפי כמות השורות, שיורדת במחיקה)"""
+        self._row_number += 1
+        self._loaded += 1
+        row_tag = 'evenrow' if self._row_number % 2 == 1 else 'oddrow'
+        self.tree.insert('', 'end', values=format_row(self._row_number, post) + extra, tags=(row_tag,))
+
+    def _on_scroll(self, first, last):
+        """yscrollcommand: מעדכן את הסרגל, וקרוב לסוף - טוען דף נוסף"""
+        self.scrollbar.set(first, last)
+        if not self._exhausted and float(last) >= LOAD_MORE_AT:
+            # after_idle - לא מכניסים שורות מתוך callback של הגלילה עצמה
+            self.window.after_idle(self._load_more_if_needed)
+
+    def _load_more_if_needed(self):
+        if not self._exhausted and self.tree.yview()[1] >= LOAD_MORE_AT:
+            self.load_more()
+
+    def _update_status(self):
+        if self.query:
+            self.status_var.set(f"🔍 '{self.query}': {self._loaded:,} תוצאות (מהרלוונטית ביותר)")
+        else:
+            self.status_var.set(f"מוצגות: {self._loaded:,} מתוך {self._total:,} דירות")
+
+    # ==============================================================================
+    # חיפוש חופשי (PostDatabase.search - FTS5 + BM25)
+    # ==============================================================================
+    def run_search(self, event=None):
+        query = self.search_var.get().strip()
+        if not query:
+            self.clear_search()
+            return
+
+        self.query = query
+        self.tree.configure(displaycolumns=self.search_columns)
+        self._show_search_results()
+
+    def clear_search(self, event=None):
+        self.search_var.set("")
+        if self.query is None:
+            return
+
+        self.query = None
+        self.tree.configure(displaycolumns=self.table_columns)
+        self.reload()
+
+    def _show_search_results(self):
+        self.tree.delete(*self.tree.get_children())
+        self._exhausted = True   # תוצאות מדורגות - בלי טעינה בגלילה
+        self._loaded = 0
+        self._row_number = 0
+
+        filters = {'city': self.city} if self.city else None
+        for post in self.db.search(self.query, filters, limit=SEARCH_LIMIT):
+            self._append_row(post, post['snippet'].replace('\n', ' '))
+
+        self._update_status()
+
+    # ==============================================================================
+    # מיון וסינון (בצד ה-DB)
+    # ==============================================================================
+    def _on_sort(self, column):
+        if self.query:
+            return  # בחיפוש הסדר הוא לפי רלוונטיות
+
+        sort = SORTABLE_COLUMNS[column]
+        if sort == self.sort:
+            self.descending = not self.descending
+        else:
+            self.sort = sort
+            self.descending = True
+
+        self._update_heading_arrows()
+        self.reload()
+
+    def _update_heading_arrows(self):
+        for col, sort in SORTABLE_COLUMNS.items():
+            text = self.heading_texts[col]
+            if sort == self.sort:
+                text = f"{text} {'▼' if self.descending else '▲'}"
+            self.tree.heading(col, text=text)
+
+    def _on_city_selected(self, event=None):
+        selected = self.city_var.get()
+        self.city = None if selected == ALL_CITIES else selected
+        self.reload()
+
+    # ==============================================================================
+    # פעולות על שורה
+    # ==============================================================================
+    def delete_selected_post(self, event=None):
+        selected_item = self.tree.selection()
+        if not selected_item: return
+        item = selected_item[0]
+        values = self.tree.item(item, "values")
+        author = values[1]
+        post_id = values[11]
+
+        if not messagebox.askyesno("מחיקה", f"למחוק פוסט של {author}?"): return
+        try:
+            self.db.delete_post(int(post_id))
+            # מוחקים רק את השורה הזו - בלי לטעון את כל הטבלה מחדש
+            # (המספור נשאר עם חור; הדף הבא ממשיך מהמונה הרץ, בלי כפילות ובלי היפוך פסים)
+            self.tree.delete(item)
+            self._loaded -= 1
+            if not self.query:
+                self._total -= 1
+            self._update_status()
+            messagebox.showinfo("הצלחה", "הפוסט נמחק.")
+        except Exception as e:
+            messagebox.showerror("שגיאה", f"תקלה: {e}")
+
+    def open_in_browser(self, event=None):
+        selected_item = self.tree.selection()
+        if not selected_item: return
+        values = self.tree.item(selected_item[0], "values")
+        url = values[10]
+        if url and "http" in url: webbrowser.open(url)
@@ -0,0 +1,437 @@
+"""
+batch_enrichment.py - העשרת AI לפוסטים ישנים דרך Message Batches API
+אחרי השבתה ארוכה של ה-listener (או סיווג מחדש של ההיסטוריה) אין טעם לשלוח
+פוסט-פוסט בקצב של 2 בשנייה: שולחים את כל הפוסטים הממתינים ב-batch אחד,
+ממתינים לסיום, ומעדכנים את טבלת posts בבת אחת.
+
+פוסטים חדשים ממשיכים לעבור במסלול האינטראקטיבי (save_post) - כאן מטפלים רק בצבר.
+
+אידמפוטנטיות:
+  - כל batch נרשם ב-ai_batches (+ הפוסטים שלו ב-ai_batch_items) מיד אחרי השליחה
+  - פוסט שנמצא ב-batch שעוד לא הוחל לא נשלח שוב
+  - batch מוחל פעם אחת בלבד (applied_at), בטרנזקציה אחת עם העדכונים
+  - run() ממשיך קודם batches פתוחים מהרצה קודמת (שנקטעה) ורק אחר כך שולח חדשים
+
+הרצה:
+  python batch_enrichment.py run [--db posts.db] [--limit 10000] [--interval 60] [--reclassify]
+  python batch_enrichment.py status [--db posts.db]
+  python batch_enrichment.py run --mock    # בלי API (LocalBatchClient) - רק על עותק של ה-DB!
+"""
+
+import argparse
+import os
+import sqlite3
+import time
+from datetime import datetime
+from types import SimpleNamespace
+
+from ai_agents import EXTRACTED_FIELDS
+from database import PostDatabase
+
+# ה-API מגביל ל-100,000 בקשות ל-batch; מחזיקים batches קטנים יותר כדי שתוצאה תגיע מהר
+MAX_BATCH_REQUESTS = 10000
+
+BATCH_STATUS_ENDED = 'ended'
+
+BATCH_SCHEMA = '''
+    CREATE TABLE IF NOT EXISTS ai_batches (
+        batch_id TEXT PRIMARY KEY,
+        status TEXT NOT NULL,
+        request_count INTEGER NOT NULL DEFAULT 0,
+        created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+        ended_at DATETIME,
+        applied_at DATETIME
+    );
+
+    CREATE TABLE IF NOT EXISTS ai_batch_items (
+        batch_id TEXT NOT NULL,
+        post_id INTEGER NOT NULL,
+        PRIMARY KEY (batch_id, post_id)
+    );
+
+    CREATE INDEX IF NOT EXISTS idx_ai_batch_items_post ON ai_batch_items (post_id);
+'''
+
+# פוסטים שעוד לא קיבלו סיווג AI תקין: נשמרו בלי AI, או שהקריאה נכשלה
+PENDING_CONDITION = "(ai_failed = 1 OR ai_confidence IS NULL OR ai_reason LIKE 'AI failed:%')"
+
+# שדות הפרטים בטבלת posts: מה שה-AI מחלץ + טלפון (Regex בלבד)
+DETAIL_FIELDS = ('city', 'location', 'price', 'rooms', 'phone')
+
+# פוסטים שכבר יושבים ב-batch פתוח
+IN_FLIGHT_SQL = '''
+    SELECT i.post_id FROM ai_batch_items i
+    JOIN ai_batches b ON b.batch_id = i.batch_id
+    WHERE b.applied_at IS NULL
+'''
+
+
+def batch_status(db_path="posts.db"):
+    """כל ה-batches (החדשים קודם) - בלי AIAgents, לשורת הפקודה"""
+    conn = sqlite3.connect(db_path)
+    try:
+        conn.executescript(BATCH_SCHEMA)
+        return conn.execute('''
+            SELECT batch_id, status, request_count, created_at, applied_at
+            FROM ai_batches ORDER BY created_at DESC
+        ''').fetchall()
+    finally:
+        conn.close()
+
+
+def custom_id(post_id):
+    return f"post-{post_id}"
+
+
+def parse_custom_id(value):
+    """'post-17' → 17 (או None לערך זר)"""
+    prefix, _, number = (value or '').partition('-')
+    return int(number) if prefix == 'post' and number.isdigit() else None
+
+
+class BatchEnricher:
+    """שליחת פוסטים ממתינים ב-batch, המתנה לתוצאות, והחלה על טבלת posts"""
+
+    def __init__(self, db_path="posts.db", agents=None, client=None, db=None):
+        """
+        Args:
+            db_path: נתיב ה-DB
+            agents: AIAgents - בונה את הבקשות (system עם cache) ומפענח את התשובות
+            client: client עם messages.batches (ברירת מחדל: ה-client של agents)
+            db: PostDatabase לחילוץ Regex (ברירת מחדל: על אותו db_path)
+        """
+        if agents is None:
+            from ai_agents import AIAgents
+            agents = AIAgents()
+
+        self.db_path = db_path
+        self.agents = agents
+        self.client = client or agents.client
+        self.db = db or PostDatabase(db_path)
+        self._create_tables()
+
+    def _create_tables(self):
+        conn = sqlite3.connect(self.db_path)
+        try:
+            conn.executescript(BATCH_SCHEMA)
+            conn.commit()
+        finally:
+            conn.close()
+
+    # =========================================================
+    # שליחה
+    # =========================================================
+
+    def pending_posts(self, limit=MAX_BATCH_REQUESTS, reclassify=False):
+        """
+        הפוסטים שצריך לשלוח (בלי רשימה שחורה, בלי פוסטים שכבר ב-batch פתוח)
+
+        Args:
+            reclassify: True = כל הפוסטים, גם כאלה שכבר סווגו
+        """
+        sql = f'''
+            SELECT id, content, author FROM posts
+            WHERE blacklist_match IS NULL AND content != ''
+              AND id NOT IN ({IN_FLIGHT_SQL})
+        '''
+        if not reclassify:
+            sql += f' AND {PENDING_CONDITION}'
+        sql += ' ORDER BY id LIMIT ?'
+
+        conn = sqlite3.connect(self.db_path)
+        try:
+            return conn.execute(sql, (limit,)).fetchall()
+        finally:
+            conn.close()
+
+    def submit(self, limit=MAX_BATCH_REQUESTS, reclassify=False):
+        """
+        שולח batch חדש עם הפוסטים הממתינים
+
+        Returns:
+            batch_id, או None אם אין מה לשלוח
+        """
+        posts = self.pending_posts(min(limit, MAX_BATCH_REQUESTS), reclassify)
+        if not posts:
+            return None
+
+        requests = [
+            {'custom_id': custom_id(post_id),
+             'params': self.agents.build_combined_params(content, author or '')}
+            for post_id, content, author in posts
+        ]
+        batch = self.client.messages.batches.create(requests=requests)
+
+        # נרשם מיד - כדי שהרצה חוזרת לא תשלח את אותם פוסטים שוב
+        conn = sqlite3.connect(self.db_path)
+        try:
+            conn.execute('INSERT INTO ai_batches (batch_id, status, request_count) VALUES (?, ?, ?)',
+                         (batch.id, batch.processing_status, len(posts)))
+            conn.executemany('INSERT INTO ai_batch_items (batch_id, post_id) VALUES (?, ?)',
+                             [(batch.id, post_id) for post_id, _, _ in posts])
+            conn.commit()
+        finally:
+            conn.close()
+
+        print(f"📤 batch {batch.id}: {len(posts)} פוסטים נשלחו")
+        return batch.id
+
+    # =========================================================
+    # המתנה
+    # =========================================================
+
+    def poll(self, batch_id, interval=60, timeout=None):
+        """
+        ממתין עד שה-batch מסתיים (processing_status == 'ended')
+
+        Returns:
+            אובייקט ה-batch האחרון, או None אם עבר timeout
+        """
+        started = time.monotonic()
+        while True:
+            batch = self.client.messages.batches.retrieve(batch_id)
+            self._update_status(batch)
+            if batch.processing_status == BATCH_STATUS_ENDED:
+                return batch
+
+            if timeout is not None and time.monotonic() - started + interval > timeout:
+                print(f"⏳ batch {batch_id} עדיין רץ ({batch.processing_status})")
+                return None
+            time.sleep(interval)
+
+    def _update_status(self, batch):
+        ended_at = getattr(batch, 'ended_at', None)
+        conn = sqlite3.connect(self.db_path)
+        try:
+            conn.execute('UPDATE ai_batches SET status = ?, ended_at = ? WHERE batch_id = ?',
+                         (batch.processing_status, str(ended_at) if ended_at else None, batch.id))
+            conn.commit()
+        finally:
+            conn.close()
+
+    # =========================================================
+    # החלה על טבלת posts
+    # =========================================================
+
+    def apply(self, batch_id):
+        """
+        מחיל את תוצאות ה-batch על הפוסטים (פעם אחת בלבד)
+        - succeeded: קטגוריה, מתווך, confidence, סיבה; שדות חסרים מתמלאים (Regex קודם, כמו ב-save_post)
+        - errored / canceled / expired / JSON שבור: ai_failed = 1 (ייאסף ב-batch הבא)
+
+        Returns:
+            {'applied', 'filtered', 'failed'} - או None אם ה-batch כבר הוחל
+        """
+        conn = sqlite3.connect(self.db_path)
+        try:
+            row = conn.execute('SELECT applied_at FROM ai_batches WHERE batch_id = ?', (batch_id,)).fetchone()
+            if row is None:
+                raise ValueError(f"batch לא מוכר: {batch_id}")
+            if row[0]:
+                print(f"ℹ️ batch {batch_id} כבר הוחל ב-{row[0]}")
+                return None
+
+            contents = dict(conn.execute('''
+                SELECT p.id, p.content FROM posts p
+                JOIN ai_batch_items i ON i.post_id = p.id
+                WHERE i.batch_id = ?
+            ''', (batch_id,)))
+
+            updates, failed = [], []
+            for entry in self.client.messages.batches.results(batch_id):
+                post_id = parse_custom_id(entry.custom_id)
+                if post_id not in contents:
+                    continue
+
+                result = entry.result
+                if result.type != 'succeeded':
+                    failed.append((post_id,))
+                    continue
+
+                self.agents.record_usage('batch', result.message, 0.0)
+                try:
+                    parsed = self.agents.parse_combined(result.message)
+                except (ValueError, IndexError, AttributeError) as e:
+                    print(f"  ⚠️ {entry.custom_id}: תשובה לא תקינה ({e})")
+                    failed.append((post_id,))
+                    continue
+
+                relevant = parsed['category'] == 'RELEVANT'
+                details = dict.fromkeys(DETAIL_FIELDS)
+                if relevant:
+                    # כמו ב-save_post: Regex קודם, AI ממלא רק מה שחסר
+                    # (פוסט שסונן בזמן השמירה נשמר בלי פרטים בכלל)
+                    details = self.db.extract_details(contents[post_id])
+                    for field in EXTRACTED_FIELDS:
+                        if not details[field] and parsed[field]:
+                            details[field] = parsed[field]
+                fields = [details[field] for field in DETAIL_FIELDS]
+                updates.append((
+                    parsed['category'], 1 if parsed['is_broker'] else 0,
+                    parsed['confidence'], parsed['reason'], 1 if relevant else 0,
+                    *fields, post_id
+                ))
+
+            conn.executemany(f'''
+                UPDATE posts SET
+                    category = ?, is_broker = ?, ai_confidence = ?, ai_reason = ?,
+                    ai_failed = 0, is_relevant = ?,
+                    {', '.join(f"{field} = COALESCE(NULLIF({field}, ''), ?)" for field in DETAIL_FIELDS)}
+                WHERE id = ?
+            ''', updates)
+            conn.executemany('UPDATE posts SET ai_failed = 1 WHERE id = ?', failed)
+            conn.execute('UPDATE ai_batches SET applied_at = ? WHERE batch_id = ?',
+                         (datetime.now(), batch_id))
+            conn.commit()
+        finally:
+            conn.close()
+
+        summary = {
+            'applied': len(updates),
+            'filtered': sum(1 for u in updates if not u[4]),
+            'failed': len(failed)
+        }
+        print(f"✅ batch {batch_id}: {summary['applied']} עודכנו "
+              f"({summary['filtered']} סוננו), {summary['failed']} נכשלו")
+        return summary
+
+    # =========================================================
+    # הכל ביחד
+    # =========================================================
+
+    def open_batches(self):
+        """batches שנשלחו ועוד לא הוחלו (מהרצה הנוכחית או מהרצה שנקטעה)"""
+        conn = sqlite3.connect(self.db_path)
+        try:
+            return [batch_id for (batch_id,) in conn.execute(
+                'SELECT batch_id FROM ai_batches WHERE applied_at IS NULL ORDER BY rowid')]
+        finally:
+            conn.close()
+
+    def run(self, limit=MAX_BATCH_REQUESTS, reclassify=False, interval=60, timeout=None):
+        """
+        ממשיך batches פתוחים, שולח batch חדש לפוסטים הממתינים, וממתין להחלה
+
+        Returns:
+            dict מסכם (כמו apply) לכל ה-batches שהוחלו בהרצה
+        """
+        batch_ids = self.open_batches()
+        if batch_ids:
+            print(f"🔁 ממשיך {len(batch_ids)} batches פתוחים")
+
+        new_batch = self.submit(limit, reclassify)
+        if new_batch:
+            batch_ids.append(new_batch)
+
+        total = {'batches': 0, 'applied': 0, 'filtered': 0, 'failed': 0}
+        for batch_id in batch_ids:
+            if self.poll(batch_id, interval, timeout) is None:
+                continue
+            summary = self.apply(batch_id)
+            if summary:
+                total['batches'] += 1
+                for key in summary:
+                    total[key] += summary[key]
+        return total
+
+# =========================================================
+#  LocalBatchClient - מדמה את messages.batches בלי רשת
+# =========================================================
+class LocalBatchClient:
+    """
+    חיקוי מקומי של client.messages.batches (create / retrieve / results).
+    responder(params) מחזיר את ה-input של קריאת הכלי (dict), או זורק חריגה → תוצאת errored.
+    ה-batch מסתיים אחרי polls_until_done קריאות ל-retrieve.
+    """
+
+    def __init__(self, responder, polls_until_done=1):
+        self.responder = responder
+        self.polls_until_done = polls_until_done
+        self.messages = self
+        self.batches = self
+        self._batches = {}
+
+    def create(self, requests):
+        batch_id = f"msgbatch_local_{len(self._batches) + 1}"
+        self._batches[batch_id] = {'requests': list(requests), 'polls': 0, 'ended_at': None}
+        return self._batch(batch_id)
+
+    def retrieve(self, batch_id):
+        state = self._batches[batch_id]
+        state['polls'] += 1
+        if state['polls'] >= self.polls_until_done and not state['ended_at']:
+            state['ended_at'] = datetime.now()
+        return self._batch(batch_id)
+
+    def results(self, batch_id):
+        state = self._batches[batch_id]
+        if not state['ended_at']:
+            raise RuntimeError(f"batch {batch_id} עדיין לא הסתיים")
+        for request in state['requests']:
+            yield SimpleNamespace(custom_id=request['custom_id'], result=self._result(request['params']))
+
+    def _batch(self, batch_id):
+        state = self._batches[batch_id]
+        return SimpleNamespace(
+            id=batch_id,
+            processing_status=BATCH_STATUS_ENDED if state['ended_at'] else 'in_progress',
+            request_counts=SimpleNamespace(processing=0 if state['ended_at'] else len(state['requests'])),
+            ended_at=state['ended_at']
+        )
+
+    def _result(self, params):
+        try:
+            reply = self.responder(params)
+        except Exception as e:
+            return SimpleNamespace(type='errored', error=SimpleNamespace(type='api_error', message=str(e)))
+        usage = SimpleNamespace(input_tokens=0, output_tokens=0,
+                                cache_creation_input_tokens=0, cache_read_input_tokens=0)
+        block = SimpleNamespace(type='tool_use', id=f"toolu_{len(self._batches)}",
+                                name=params['tool_choice']['name'], input=reply)
+        return SimpleNamespace(type='succeeded', message=SimpleNamespace(content=[block], usage=usage))
+
+
+def _mock_responder(params):
+    """תשובה קבועה ל---mock (בדיקת הצנרת בלבד, לא סיווג אמיתי)"""
+    return {'category': 'RELEVANT', 'is_broker': False, 'confidence': 0.5, 'reason': 'mock batch',
+            **{field: None for field in EXTRACTED_FIELDS}}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="העשרת AI בצובר (Message Batches)")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    run = sub.add_parser('run', help='שליחה, המתנה והחלה')
+    run.add_argument('--db', default='posts.db')
+    run.add_argument('--limit', type=int, default=MAX_BATCH_REQUESTS)
+    run.add_argument('--interval', type=float, default=60, help='שניות בין בדיקות סטטוס')
+    run.add_argument('--timeout', type=float, default=None, help='להפסיק להמתין אחרי X שניות (להמשיך בהרצה הבאה)')
+    run.add_argument('--reclassify', action='store_true', help='לסווג מחדש גם פוסטים שכבר סווגו')
+    run.add_argument('--mock', action='store_true', help='LocalBatchClient במקום ה-API')
+
+    status = sub.add_parser('status', help='רשימת ה-batches')
+    status.add_argument('--db', default='posts.db')
+
+    args = parser.parse_args()
+
+    if args.command == 'status':
+        rows = batch_status(args.db)
+        for batch_id, state, count, created_at, applied_at in rows:
+            print(f"  {batch_id:<40} {state:<12} {count:>6}  {created_at}  "
+                  f"{'הוחל ' + str(applied_at) if applied_at else 'לא הוחל'}")
+        return
+
+    from ai_agents import AIAgents
+    if args.mock:
+        os.environ.setdefault('ANTHROPIC_API_KEY', 'mock')  # אין קריאות אמיתיות
+    agents = AIAgents()
+    client = LocalBatchClient(_mock_responder) if args.mock else None
+    enricher = BatchEnricher(args.db, agents, client)
+    total = enricher.run(args.limit, args.reclassify, 0 if args.mock else args.interval, args.timeout)
+    print(f"📊 {total['batches']} batches, {total['applied']} פוסטים עודכנו, "
+          f"{total['filtered']} סוננו, {total['failed']} נכשלו")
+    print(f"📊 טוקנים: {agents.get_metrics()['total']}")
+
+
+if __name__ == "__main__":
+    main()
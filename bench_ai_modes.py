@@ -0,0 +1,175 @@
+"""
+bench_ai_modes.py - השוואה בין מצב combined (קריאה אחת) למצב two_call (Agent 1 + Agent 2)
+
+שני שלבים:
+  record - מריץ את שני המצבים על אותם פוסטים מול ה-API ושומר כל תוצאה ל-JSONL
+           (זמן תגובה, טוקנים, תשובות לא תקינות, קטגוריה ופרטים - אחרי מיזוג עם Regex, כמו ב-save_post)
+  report - מנתח הקלטה קיימת בלי API: זמנים (p50/p95), טוקנים (כולל cache), והתאמה בין המצבים
+
+הרצה:
+  python bench_ai_modes.py record --db posts.db --limit 50 --out ai_modes.jsonl
+  python bench_ai_modes.py report ai_modes.jsonl
+"""
+
+import argparse
+import json
+import sqlite3
+import statistics
+import time
+
+from ai_agents import AIAgents, AIFailedError, AI_MODE_COMBINED, AI_MODE_TWO_CALL, EXTRACTED_FIELDS, QUALITY_FIELDS
+from database import PostDatabase
+
+MODES = (AI_MODE_TWO_CALL, AI_MODE_COMBINED)
+
+
+# =========================================================
+#  record
+# =========================================================
+
+def _load_posts(db_path, limit):
+    """הפוסטים האחרונים מה-DB (כל הקטגוריות - כדי לבדוק גם סיווג)"""
+    conn = sqlite3.connect(db_path)
+    try:
+        return conn.execute(
+            "SELECT post_id, author, content FROM posts WHERE content != '' "
+            "ORDER BY scanned_at DESC LIMIT ?", (limit,)).fetchall()
+    finally:
+        conn.close()
+
+
+def _run_mode(ai, db, content, author):
+    """מריץ מצב אחד כמו ב-save_post ומחזיר תוצאה + מדדים"""
+    ai.reset_metrics()
+    started = time.perf_counter()
+
+    try:
+        if ai.mode == AI_MODE_COMBINED:
+            result = ai.classify_and_extract(content, author)
+            extracted = result
+        else:
+            result = ai.classify_post(content, author)
+            extracted = {}
+    except AIFailedError:
+        result, extracted = {'category': None, 'is_broker': False}, {}  # נספר ב-fallbacks
+
+    details = db.extract_details(content)
+    if result['category'] == 'RELEVANT':
+        if ai.mode == AI_MODE_TWO_CALL and not all(details[f] for f in EXTRACTED_FIELDS):
+            extracted = ai.extract_missing_details(content, details)
+        for field in EXTRACTED_FIELDS:
+            if not details[field] and extracted.get(field):
+                details[field] = extracted[field]
+
+    elapsed = time.perf_counter() - started
+    total = ai.get_metrics()['total']
+
+    return {
+        'category': result['category'],
+        'is_broker': bool(result['is_broker']),
+        **{field: details[field] for field in EXTRACTED_FIELDS},
+        'calls': total['calls'],
+        'api_seconds': round(total['seconds'], 3),
+        'wall_seconds': round(elapsed, 3),
+        'input_tokens': total['input_tokens'],
+        'output_tokens': total['output_tokens'],
+        'cache_creation_input_tokens': total['cache_creation_input_tokens'],
+        'cache_read_input_tokens': total['cache_read_input_tokens'],
+        **{field: total[field] for field in QUALITY_FIELDS},
+    }
+
+
+def record(db_path, limit, out_path):
+    posts = _load_posts(db_path, limit)
+    if not posts:
+        print(f"⚠️ אין פוסטים ב-{db_path}")
+        return
+
+    db = PostDatabase(db_path)
+    db.ai_agents = None
+    agents = {mode: AIAgents(mode=mode) for mode in MODES}
+
+    with open(out_path, 'w', encoding='utf-8') as f:
+        for i, (post_id, author, content) in enumerate(posts, 1):
+            row = {'post_id': post_id, 'preview': content[:80]}
+            for mode in MODES:
+                row[mode] = _run_mode(agents[mode], db, content, author or '')
+            f.write(json.dumps(row, ensure_ascii=False) + '\n')
+            print(f"  [{i}/{len(posts)}] {row[AI_MODE_TWO_CALL]['category']:<9} / "
+                  f"{row[AI_MODE_COMBINED]['category']:<9} {content[:40]!r}")
+
+    print(f"✅ הקלטה נשמרה ב-{out_path}")
+
+
+# =========================================================
+#  report (offline)
+# =========================================================
+
+def _percentile(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct))] if values else 0
+
+
+def _same(a, b):
+    """השוואת ערכים מחולצים (מחיר "2,500,000" == "2500000", רווחים)"""
+    norm = lambda v: str(v).replace(',', '').strip() if v not in (None, '') else None
+    return norm(a) == norm(b)
+
+
+def report(in_path):
+    with open(in_path, encoding='utf-8') as f:
+        rows = [json.loads(line) for line in f if line.strip()]
+    if not rows:
+        print("⚠️ הקלטה ריקה")
+        return
+
+    print("=" * 90)
+    print(f"📊 {len(rows)} פוסטים")
+    print(f"  {'מצב':<10} {'קריאות':>7} {'p50':>8} {'p95':>8} {'טוקני קלט':>11} {'טוקני פלט':>11} "
+          f"{'כתיבה ל-cache':>14} {'קריאה מ-cache':>14}")
+    for mode in MODES:
+        results = [row[mode] for row in rows]
+        latencies = [r['wall_seconds'] for r in results]
+        total = lambda key: sum(r.get(key, 0) for r in results)  # הקלטות ישנות - בלי שדות cache
+        print(f"  {mode:<10} {total('calls'):>7} "
+              f"{statistics.median(latencies):7.2f}s {_percentile(latencies, 0.95):7.2f}s "
+              f"{total('input_tokens'):>11,} {total('output_tokens'):>11,} "
+              f"{total('cache_creation_input_tokens'):>14,} {total('cache_read_input_tokens'):>14,}")
+        print(f"  {'':<10} תשובות לא תקינות {total('parse_failures')}, "
+              f"ניסיונות תיקון {total('retries')}, ברירות מחדל {total('fallbacks')}")
+
+    pairs = [(row[AI_MODE_TWO_CALL], row[AI_MODE_COMBINED]) for row in rows]
+    category = sum(a['category'] == b['category'] for a, b in pairs) / len(pairs)
+    broker = sum(a['is_broker'] == b['is_broker'] for a, b in pairs) / len(pairs)
+    print(f"\n  התאמה: קטגוריה {category:.0%}, מתווך {broker:.0%}")
+
+    relevant = [(a, b) for a, b in pairs if a['category'] == b['category'] == 'RELEVANT']
+    if relevant:
+        fields = ', '.join(
+            f"{field} {sum(_same(a[field], b[field]) for a, b in relevant) / len(relevant):.0%}"
+            for field in EXTRACTED_FIELDS)
+        print(f"  שדות ({len(relevant)} פוסטים רלוונטיים בשני המצבים): {fields}")
+    print("=" * 90)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="השוואת מצבי AI")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    rec = sub.add_parser('record', help='הרצה מול ה-API ושמירת תוצאות')
+    rec.add_argument('--db', default='posts.db')
+    rec.add_argument('--limit', type=int, default=50)
+    rec.add_argument('--out', default='ai_modes.jsonl')
+
+    rep = sub.add_parser('report', help='ניתוח הקלטה (בלי API)')
+    rep.add_argument('path', nargs='?', default='ai_modes.jsonl')
+
+    args = parser.parse_args()
+    if args.command == 'record':
+        record(args.db, args.limit, args.out)
+    else:
+        report(args.path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+bench_export.py - בנצ'מרק לייצוא: זיכרון ותפוקה על DB סינתטי גדול
+משווה את הייצוא בזרימה (CSV / Parquet) לשיטה הישנה (רשימת dicts → pandas → CSV).
+
+הרצה: python bench_export.py [--rows 200000] [--db bench_export.db]
+"""
+
+import argparse
+import os
+import sqlite3
+import tempfile
+import time
+import tracemalloc
+
+from exporter import export_posts, CSV_COLUMNS
+from synthetic_data import make_synthetic_db
+
+
+def _legacy_export(db_path, filename):
+    """הייצוא הישן: כל השורות לרשימת dicts, DataFrame, ואז כתיבה אחת"""
+    import pandas as pd
+
+    conn = sqlite3.connect(db_path)
+    cursor = conn.execute('SELECT * FROM posts WHERE is_relevant = 1 ORDER BY scanned_at DESC')
+    columns = [d[0] for d in cursor.description]
+    posts = [dict(zip(columns, row)) for row in cursor.fetchall()]
+    conn.close()
+
+    df = pd.DataFrame(posts)[CSV_COLUMNS]
+    df.to_csv(filename, index=False, encoding='utf-8-sig')
+    return len(df)
+
+
+def measure(label, func):
+    """מריץ פונקציה ומחזיר (שורות, שניות, שיא זיכרון MB)"""
+    tracemalloc.start()
+    start = time.perf_counter()
+    rows = func()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    rate = rows / elapsed if elapsed else 0
+    print(f"  {label:<22} {rows:>10,} שורות  {elapsed:7.2f}s  {rate:>10,.0f} שורות/ש'  "
+          f"שיא זיכרון {peak / 1024 / 1024:8.1f}MB")
+    return rows, elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description="בנצ'מרק ייצוא")
+    parser.add_argument('--rows', type=int, default=200000, help='כמות פוסטים סינתטיים')
+    parser.add_argument('--db', default=None, help='קובץ DB (ברירת מחדל: זמני)')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = args.db or os.path.join(tmp, 'bench_export.db')
+        if not os.path.exists(db_path):
+            print(f"🛠️ יוצר DB סינתטי עם {args.rows:,} פוסטים...")
+            make_synthetic_db(db_path, args.rows)
+
+        print("=" * 90)
+        measure("streaming CSV", lambda: export_posts(db_path, os.path.join(tmp, 'out.csv')))
+
+        try:
+            measure("streaming Parquet", lambda: export_posts(db_path, os.path.join(tmp, 'out.parquet')))
+        except ImportError as e:
+            print(f"  ⚠️ {e}")
+
+        try:
+            measure("legacy pandas CSV", lambda: _legacy_export(db_path, os.path.join(tmp, 'legacy.csv')))
+        except ImportError:
+            print("  ⚠️ pandas לא מותקן - מדלג על השוואה לשיטה הישנה")
+        print("=" * 90)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+bench_percolator.py - בנצ'מרק להתאמת פוסטים לחיפושים שמורים
+משווה את ה-Percolator (דליים) לבדיקה נאיבית של כל חיפוש מול כל פוסט,
+ומוודא ששתי השיטות מחזירות בדיוק את אותן התאמות.
+
+הרצה: python bench_percolator.py [--searches 1000 5000 20000] [--posts 5000]
+"""
+
+import argparse
+import random
+import time
+
+from saved_searches import SavedSearch, Percolator, neighborhood_key, _to_number
+from synthetic_data import generate_posts, INSERT_COLUMNS, _load_places
+
+
+def make_searches(count, seed=7):
+    """חיפושים אקראיים: עיר (רוב הזמן), שכונה (חצי), טווח מחיר וחדרים (רוב הזמן)"""
+    rng = random.Random(seed)
+    places = _load_places()
+    searches = []
+
+    for i in range(count):
+        city, hoods = rng.choice(places)
+        search = {'name': f"חיפוש {i}"}
+
+        if rng.random() < 0.9:
+            search['city'] = city
+            if rng.random() < 0.5:
+                search['location'] = rng.choice(hoods)
+
+        if rng.random() < 0.8:
+            if rng.random() < 0.4:
+                low = rng.randrange(2000, 8000, 500)           # שכירות
+                search['min_price'], search['max_price'] = low, low + rng.randrange(1000, 5000, 500)
+            else:
+                high = rng.randrange(1000000, 5000000, 100000)  # קנייה
+                search['min_price'], search['max_price'] = int(high * 0.7), high
+
+        if rng.random() < 0.7:
+            low = rng.choice([1, 2, 3, 4, 5])
+            search['min_rooms'], search['max_rooms'] = low, low + rng.choice([0, 0.5, 1, 2])
+
+        searches.append(SavedSearch(id=i + 1, **search))
+    return searches
+
+
+def make_posts(count):
+    """פוסטים רלוונטיים מהמחולל הסינתטי, בפורמט של enriched_data"""
+    index = {name: i for i, name in enumerate(INSERT_COLUMNS)}
+    posts = []
+    for row in generate_posts(count * 2):
+        if row[index['is_relevant']]:
+            posts.append({key: row[index[key]] for key in ('post_url', 'city', 'location', 'price', 'rooms')})
+        if len(posts) == count:
+            break
+    return posts
+
+
+def naive_match(searches, post):
+    """הדרך הישנה: כל חיפוש מול כל פוסט"""
+    city = post.get('city') or None
+    location = neighborhood_key(post.get('location'))
+    price = _to_number(post.get('price'))
+    rooms = _to_number(post.get('rooms'), float)
+    return [s for s in searches if s.matches(city, location, price, rooms)]
+
+
+def bench(search_count, posts):
+    searches = make_searches(search_count)
+
+    start = time.perf_counter()
+    percolator = Percolator(searches)
+    build_ms = (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    fast = [percolator.match(post) for post in posts]
+    fast_us = (time.perf_counter() - start) / len(posts) * 1e6
+
+    start = time.perf_counter()
+    slow = [naive_match(searches, post) for post in posts]
+    slow_us = (time.perf_counter() - start) / len(posts) * 1e6
+
+    same = all(sorted(s.id for s in a) == sorted(s.id for s in b) for a, b in zip(fast, slow))
+    matches = sum(len(m) for m in fast) / len(posts)
+
+    print(f"  {search_count:>7,} חיפושים  בנייה {build_ms:7.1f}ms  "
+          f"percolator {fast_us:8.1f}µs/פוסט  נאיבי {slow_us:9.1f}µs/פוסט  "
+          f"פי {slow_us / fast_us:5.0f}  התאמות/פוסט {matches:5.2f}  {'✅' if same else '❌ שונה!'}")
+    return same
+
+
+def main():
+    parser = argparse.ArgumentParser(description="בנצ'מרק חיפושים שמורים")
+    parser.add_argument('--searches', type=int, nargs='+', default=[1000, 5000, 20000])
+    parser.add_argument('--posts', type=int, default=5000)
+    args = parser.parse_args()
+
+    posts = make_posts(args.posts)
+    print("=" * 110)
+    print(f"📊 {len(posts):,} פוסטים")
+    ok = all([bench(count, posts) for count in args.searches])
+    print("=" * 110)
+    if not ok:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+bench_search.py - בנצ'מרק לחיפוש חופשי: FTS5 (BM25) מול סריקת LIKE
+מודד זמני תגובה (p50 / p95) על DB סינתטי, ברירת מחדל: 100k ו-1M פוסטים.
+
+הרצה: python bench_search.py [--sizes 100000 1000000] [--repeat 20] [--keep-dir DIR]
+"""
+
+import argparse
+import os
+import sqlite3
+import statistics
+import tempfile
+import time
+
+from synthetic_data import make_synthetic_db
+
+# שאילתות טיפוסיות: מילה נפוצה, שכונה עם אות שימוש, צירוף, ומילה נדירה
+QUERIES = [
+    "דירה",
+    "בקטמון",
+    "מרפסת שמש",
+    "להשכרה משופצת",
+    "הובלות",
+]
+
+
+def _like_search(db_path, query, limit=50):
+    """החיפוש ה"ישן": content LIKE '%מילה%' לכל מילה, בלי דירוג"""
+    words = query.split()
+    sql = "SELECT id FROM posts WHERE is_relevant = 1"
+    sql += ''.join(" AND content LIKE ?" for _ in words)
+    sql += " ORDER BY scanned_at DESC LIMIT ?"
+
+    conn = sqlite3.connect(db_path)
+    try:
+        return conn.execute(sql, [f'%{w}%' for w in words] + [limit]).fetchall()
+    finally:
+        conn.close()
+
+
+def _timed(func, repeat):
+    """מריץ repeat פעמים ומחזיר (p50, p95) במילישניות + תוצאת ההרצה האחרונה"""
+    times = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        times.append((time.perf_counter() - start) * 1000)
+    times.sort()
+    p95 = times[min(len(times) - 1, int(len(times) * 0.95))]
+    return statistics.median(times), p95, result
+
+
+def bench_size(db_path, size, repeat):
+    if not os.path.exists(db_path):
+        print(f"🛠️ יוצר DB סינתטי עם {size:,} פוסטים...")
+        start = time.perf_counter()
+        db = make_synthetic_db(db_path, size)
+        print(f"   נוצר תוך {time.perf_counter() - start:.1f}s "
+              f"({os.path.getsize(db_path) / 1024 / 1024:.0f}MB כולל אינדקס חיפוש)")
+    else:
+        from database import PostDatabase
+        db = PostDatabase(db_path)
+    db.ai_agents = None
+
+    print(f"\n📊 {size:,} פוסטים")
+    print(f"  {'שאילתה':<18} {'FTS p50':>9} {'FTS p95':>9} {'LIKE p50':>9} {'LIKE p95':>9} {'תוצאות':>7}")
+    for query in QUERIES:
+        fts50, fts95, results = _timed(lambda: db.search(query, limit=50), repeat)
+        like50, like95, _ = _timed(lambda: _like_search(db_path, query), max(3, repeat // 5))
+        print(f"  {query:<18} {fts50:8.1f}ms {fts95:8.1f}ms {like50:8.1f}ms {like95:8.1f}ms {len(results):>7}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="בנצ'מרק חיפוש")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100000, 1000000], help='גדלי DB')
+    parser.add_argument('--repeat', type=int, default=20, help='חזרות לכל שאילתה')
+    parser.add_argument('--keep-dir', default=None, help='תיקייה לשמירת ה-DB בין הרצות')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        directory = args.keep_dir or tmp
+        print("=" * 80)
+        for size in args.sizes:
+            bench_size(os.path.join(directory, f'bench_search_{size}.db'), size, args.repeat)
+        print("=" * 80)
+
+
+if __name__ == "__main__":
+    main()
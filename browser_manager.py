@@ -0,0 +1,320 @@
+"""
+browser_manager.py - מחזור החיים של הדפדפן (undetected_chromedriver) של ה-listener
+במקום לבדוק driver.current_url בתחילת כל מחזור ולבנות Chrome מחדש באמצע הסריקה:
+  - בדיקת בריאות ברקע (כל health_interval שניות, רק כשהדפדפן לא באמצע סריקה)
+  - מחזור (recycle) אחרי max_pages דפים או max_rss_mb זיכרון - נגד זחילת זיכרון של Chrome
+  - standby אופציונלי: דפדפן שני שמחומם מראש, להחלפה מיידית כשהראשי נופל / ממוחזר.
+    Chrome נועל את תיקיית הפרופיל, ולכן ה-standby רץ על פרופיל נפרד
+    (browser.standby_profile_path - צריך להתחבר בו לפייסבוק פעם אחת).
+    אחרי failover ה-standby הופך לראשי על הפרופיל שלו - וה-standby הבא מתחמם על הפרופיל שהתפנה
+  - מדדים: זמן פעילות, אתחולים, מחזורים, החלפות, RSS
+
+ה-manager לא מייבא selenium - ה-factory יוצר את הסורק (import כבד רק כשצריך).
+RSS נמדד עם psutil אם מותקן; בלעדיו - מחזור לפי מספר דפים בלבד.
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+
+# --- ברירות מחדל (הגדרות: browser.*) ---
+MAX_PAGES = 150
+MAX_RSS_MB = 1500
+HEALTH_INTERVAL = 60
+
+# פרופילי Chrome (לא תפקידים - אחרי failover הראשי רץ על STANDBY)
+PRIMARY = 'primary'
+STANDBY = 'standby'
+
+
+def _import_psutil():
+    try:
+        import psutil
+        return psutil
+    except ImportError:
+        return None
+
+
+def driver_rss_mb(scraper):
+    """
+    זיכרון (RSS, MB) של chromedriver וכל תהליכי Chrome שלו, או None אם אי אפשר למדוד
+    """
+    psutil = _import_psutil()
+    service = getattr(getattr(scraper, 'driver', None), 'service', None)
+    pid = getattr(getattr(service, 'process', None), 'pid', None)
+    if psutil is None or pid is None:
+        return None
+    try:
+        root = psutil.Process(pid)
+        processes = [root] + root.children(recursive=True)
+    except psutil.Error:
+        return None
+
+    total = 0
+    for process in processes:
+        try:
+            total += process.memory_info().rss
+        except psutil.Error:
+            continue  # תהליך שנסגר בינתיים
+    return total / (1024 * 1024)
+
+
+def is_alive(scraper):
+    """הדפדפן עונה? (current_url הוא הקריאה הזולה ביותר ל-WebDriver)"""
+    if scraper is None or getattr(scraper, 'driver', None) is None:
+        return False
+    try:
+        _ = scraper.driver.current_url
+        return True
+    except Exception:
+        return False
+
+
+class BrowserManager:
+    """מחזיק דפדפן ראשי (ו-standby אופציונלי) ומספק אותו ל-listener"""
+
+    def __init__(self, factory, max_pages=MAX_PAGES, max_rss_mb=MAX_RSS_MB, health_interval=HEALTH_INTERVAL,
+                 standby=False, rss_reader=driver_rss_mb, clock=time.monotonic, log=print):
+        """
+        Args:
+            factory: factory(profile) → סורק עם driver פתוח על הפרופיל ('primary' / 'standby')
+            max_pages: מחזור אחרי כמה דפים (0 = בלי)
+            max_rss_mb: מחזור מעל כמה MB (0 = בלי)
+            health_interval: שניות בין בדיקות ברקע (0 = בלי thread)
+            standby: להחזיק דפדפן שני מחומם
+        """
+        self.factory = factory
+        self.max_pages = max_pages
+        self.max_rss_mb = max_rss_mb
+        self.health_interval = health_interval
+        self.standby_enabled = standby
+        self.rss_reader = rss_reader
+        self.clock = clock
+        self.log = log
+
+        self.scraper = None
+        self.standby = None
+        self._primary_profile = PRIMARY       # הפרופיל שהראשי מחזיק; ה-standby תמיד על השני
+        self._pages = 0
+        self._started_at = None
+        self._lock = threading.RLock()        # מוחזק לאורך שימוש בדפדפן הראשי (session)
+        self._standby_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._warming = False
+
+        self.stats = {'starts': 0, 'restarts': 0, 'recycles': 0, 'failovers': 0,
+                      'health_checks': 0, 'health_failures': 0, 'standby_starts': 0,
+                      'last_rss_mb': None}
+
+    @classmethod
+    def from_settings(cls, factory, settings=None, log=print):
+        if settings is None:
+            from settings_manager import SettingsManager
+            settings = SettingsManager()
+        return cls(
+            factory,
+            max_pages=settings.get('browser.max_pages', MAX_PAGES),
+            max_rss_mb=settings.get('browser.max_rss_mb', MAX_RSS_MB),
+            health_interval=settings.get('browser.health_interval_sec', HEALTH_INTERVAL),
+            standby=settings.get('browser.standby', False),
+            log=log
+        )
+
+    # =========================================================
+    # שימוש בדפדפן
+    # =========================================================
+
+    def start(self):
+        """
+        מוודא שיש דפדפן ראשי חי ומפעיל את ה-thread של הבדיקות.
+        דפדפן קיים שעדיין עונה - נשאר (לא סוגרים ופותחים סתם).
+        """
+        if self._stop.is_set() and self._thread is not None:
+            self._thread.join(timeout=5)  # ה-thread מ-close() הקודם
+        self._stop.clear()
+
+        scraper = self.acquire()
+        if self.health_interval and (self._thread is None or not self._thread.is_alive()):
+            self._thread = threading.Thread(target=self._health_loop, daemon=True)
+            self._thread.start()
+        return scraper
+
+    def acquire(self):
+        """
+        הדפדפן הראשי, חי - או None אם לא הצלחנו ליצור.
+        לא עונה → standby אם יש (מיידי), אחרת דפדפן חדש.
+        """
+        with self._lock:
+            if is_alive(self.scraper):
+                return self.scraper
+
+            if self.scraper is not None:
+                self.log("⚠️ דפדפן לא מגיב - מחליף...")
+                self.stats['restarts'] += 1
+                self._close(self.scraper)
+                self.scraper = None
+
+            self.scraper = self._take_standby() or self._create(self._primary_profile, primary=True)
+            if self.scraper is not None:
+                self._pages = 0
+                self._started_at = self.clock()
+            self._warm_standby_async()
+            return self.scraper
+
+    @contextmanager
+    def session(self):
+        """
+        with manager.session() as scraper: ...
+        בזמן ה-session בדיקת הרקע לא נוגעת בדפדפן הראשי (WebDriver לא thread-safe)
+        """
+        with self._lock:
+            yield self.acquire()
+
+    def page_loaded(self):
+        """נקרא אחרי כל דף שנטען (קבוצה שנסרקה)"""
+        with self._lock:
+            self._pages += 1
+
+    def maybe_recycle(self):
+        """
+        בנקודה בטוחה (בין מחזורים): מחזור אם עברנו את תקרת הדפים / הזיכרון
+
+        Returns:
+            סיבת המחזור או None
+        """
+        with self._lock:
+            if self.scraper is None:
+                return None
+            reason = None
+            if self.max_pages and self._pages >= self.max_pages:
+                reason = f"{self._pages} דפים"
+            else:
+                rss = self.rss_reader(self.scraper)
+                self.stats['last_rss_mb'] = round(rss, 1) if rss is not None else None
+                if self.max_rss_mb and rss is not None and rss >= self.max_rss_mb:
+                    reason = f"{rss:.0f}MB זיכרון"
+            if reason is None:
+                return None
+
+            self.log(f"♻️ ממחזר דפדפן ({reason})")
+            self.stats['recycles'] += 1
+            old, self.scraper = self.scraper, None
+            self._close(old)
+            self.acquire()
+            return reason
+
+    def close(self):
+        """סוגר הכל (ראשי + standby) ועוצר את ה-thread"""
+        self._stop.set()
+        with self._lock:
+            self._close(self.scraper)
+            self.scraper = None
+            self._started_at = None
+        with self._standby_lock:
+            self._close(self.standby)
+            self.standby = None
+
+    # =========================================================
+    # מדדים
+    # =========================================================
+
+    def metrics(self):
+        with self._lock:
+            uptime = self.clock() - self._started_at if self._started_at is not None else 0.0
+            return {
+                'uptime_sec': round(uptime, 1),
+                'pages': self._pages,
+                'standby_ready': self.standby is not None,
+                'primary_profile': self._primary_profile,
+                **self.stats
+            }
+
+    # =========================================================
+    # פנימי
+    # =========================================================
+
+    def _create(self, profile, primary=False):
+        try:
+            scraper = self.factory(profile)
+        except Exception as e:
+            self.log(f"❌ נכשל ליצור דפדפן ({profile}): {e}")
+            return None
+        self.stats['starts' if primary else 'standby_starts'] += 1
+        return scraper
+
+    def _free_profile(self):
+        """הפרופיל שהראשי לא מחזיק - שם רץ ה-standby"""
+        return STANDBY if self._primary_profile == PRIMARY else PRIMARY
+
+    def _close(self, scraper):
+        if scraper is None:
+            return
+        try:
+            scraper.close()
+        except Exception as e:
+            self.log(f"⚠️ שגיאה בסגירת דפדפן: {e}")
+        scraper.driver = None
+
+    def _take_standby(self):
+        """מעביר את ה-standby להיות הראשי (אם הוא חי)"""
+        with self._standby_lock:
+            standby, self.standby = self.standby, None
+        if standby is None:
+            return None
+        if not is_alive(standby):
+            self._close(standby)
+            return None
+        self._primary_profile = self._free_profile()  # הראשי עכשיו על הפרופיל של ה-standby
+        self.stats['failovers'] += 1
+        self.log("⚡ עובר לדפדפן ה-standby")
+        return standby
+
+    def _warm_standby_async(self):
+        """מחמם standby ברקע (אם מופעל וחסר) - הסריקה לא מחכה ל-Chrome"""
+        if not self.standby_enabled or self._stop.is_set():
+            return
+        with self._standby_lock:
+            if self.standby is not None or self._warming:
+                return
+            self._warming = True
+        threading.Thread(target=self._warm_standby, args=(self._free_profile(),), daemon=True).start()
+
+    def _warm_standby(self, profile):
+        try:
+            standby = self._create(profile)
+            with self._standby_lock:
+                if self._stop.is_set() or self.standby is not None:
+                    self._close(standby)
+                else:
+                    self.standby = standby
+        finally:
+            self._warming = False
+
+    def _health_loop(self):
+        while not self._stop.wait(self.health_interval):
+            self.check_health()
+
+    def check_health(self):
+        """
+        בדיקה אחת: ראשי (רק אם לא באמצע session) + standby.
+        ראשי שלא עונה מוחלף עכשיו - לא בתחילת המחזור הבא.
+        """
+        self.stats['health_checks'] += 1
+        if self._lock.acquire(blocking=False):
+            try:
+                if self.scraper is not None and not is_alive(self.scraper):
+                    self.stats['health_failures'] += 1
+                    self.acquire()
+            finally:
+                self._lock.release()
+
+        with self._standby_lock:
+            standby = self.standby
+        if standby is not None and not is_alive(standby):
+            self.stats['health_failures'] += 1
+            with self._standby_lock:
+                if self.standby is standby:
+                    self.standby = None
+            self._close(standby)
+        self._warm_standby_async()
@@ -0,0 +1,197 @@
+"""
+circuit_breaker.py - מפסק (circuit breaker) לקריאות ל-API של Anthropic
+כשה-API למטה או מגביל קצב, אין טעם שכל פוסט בכל מחזור ימתין לבקשה שתיכשל:
+  CLOSED    - הכל תקין; סופרים הצלחות/כישלונות בחלון מתגלגל
+  OPEN      - אחוז השגיאות בחלון עבר את הסף (או שה-API ביקש retry-after) →
+              קריאות נדחות מיד עד שעובר זמן ההמתנה (אקספוננציאלי, לפחות retry-after)
+  HALF_OPEN - ההמתנה עברה: קריאת ניסיון אחת עוברת; הצלחה → CLOSED, כישלון → OPEN עם המתנה כפולה
+"""
+
+import threading
+import time
+from collections import deque
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+# --- ברירות מחדל ---
+WINDOW_CALLS = 20        # גודל החלון המתגלגל (קריאות אחרונות)
+WINDOW_SECONDS = 120     # תוצאות ישנות מזה לא נספרות
+MIN_CALLS = 4            # פחות קריאות בחלון → לא מחליטים
+ERROR_RATE = 0.5         # אחוז שגיאות שפותח את המפסק
+BASE_DELAY = 5.0         # המתנה אחרי הפתיחה הראשונה (שניות)
+MAX_DELAY = 300.0        # תקרת ההמתנה
+
+
+class AIUnavailableError(Exception):
+    """ה-API לא זמין כרגע (המפסק פתוח, או שגיאה זמנית) - לנסות שוב מאוחר יותר"""
+
+    def __init__(self, message, retry_in=None):
+        super().__init__(message)
+        self.retry_in = retry_in
+
+
+# מפתח שגוי / מבוטל / בלי הרשאה - כל קריאה תיכשל עד שהמפתח יתוקן, אז זה "לא זמין" ולא בקשה שגויה
+AUTH_STATUSES = (401, 403)
+
+
+def is_transient(error):
+    """
+    שגיאה שאומרת שה-API לא זמין לנו (ולא שהבקשה הספציפית שגויה):
+    429, 5xx (כולל 529 overloaded), 401/403 (מפתח), timeout וניתוק
+    """
+    status = getattr(error, 'status_code', None)
+    if status is not None:
+        return status == 429 or status >= 500 or status in AUTH_STATUSES
+    names = {cls.__name__ for cls in type(error).__mro__}
+    return bool(names & {'APIConnectionError', 'APITimeoutError', 'ConnectionError', 'TimeoutError'})
+
+
+def retry_after(error):
+    """כותרת retry-after מהתשובה (שניות), או None"""
+    response = getattr(error, 'response', None)
+    headers = getattr(response, 'headers', None) or {}
+    value = headers.get('retry-after')
+    try:
+        return max(float(value), 0.0) if value is not None else None
+    except (TypeError, ValueError):
+        return None  # תאריך HTTP - לא נפוץ ב-API הזה, נשארים עם ה-backoff
+
+
+class CircuitBreaker:
+    """מפסק עם חלון שגיאות מתגלגל, backoff אקספוננציאלי וקריאת ניסיון ב-half-open"""
+
+    def __init__(self, window_calls=WINDOW_CALLS, window_seconds=WINDOW_SECONDS, min_calls=MIN_CALLS,
+                 error_rate=ERROR_RATE, base_delay=BASE_DELAY, max_delay=MAX_DELAY,
+                 clock=time.monotonic, on_state_change=None):
+        self.window_seconds = window_seconds
+        self.min_calls = min_calls
+        self.error_rate = error_rate
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.clock = clock
+        self.on_state_change = on_state_change  # callback(old, new, retry_in)
+
+        self.state = CLOSED
+        self._outcomes = deque(maxlen=window_calls)  # (זמן, הצליח?)
+        self._opened = 0            # פתיחות רצופות (בלי הצלחה באמצע) → גודל ה-backoff
+        self._open_until = 0.0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+        self.stats = {'rejected': 0, 'opened': 0, 'probes': 0}
+
+    # =========================================================
+    # לפני קריאה
+    # =========================================================
+
+    def allow(self):
+        """
+        האם מותר לשלוח עכשיו?
+        ב-OPEN שזמנו עבר - עובר ל-HALF_OPEN ומאשר קריאת ניסיון אחת בלבד.
+        """
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+
+            if self.state == OPEN and self.clock() >= self._open_until:
+                self._set_state(HALF_OPEN)
+
+            if self.state == HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                self.stats['probes'] += 1
+                return True
+
+            self.stats['rejected'] += 1
+            return False
+
+    def accepting(self):
+        """
+        כמו allow() בלי לתפוס את קריאת הניסיון - לבדיקה לפני עבודה יקרה שקודמת לקריאה
+        (הורדת תמונות): False כשהקריאה תידחה בכל מקרה
+        """
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            if self.state == OPEN:
+                return self.clock() >= self._open_until
+            return not self._probe_in_flight
+
+    def retry_in(self):
+        """שניות עד שמותר לנסות שוב (0 אם סגור)"""
+        with self._lock:
+            if self.state == CLOSED:
+                return 0.0
+            return max(self._open_until - self.clock(), 0.0)
+
+    # =========================================================
+    # אחרי קריאה
+    # =========================================================
+
+    def record_success(self):
+        with self._lock:
+            if self.state == HALF_OPEN:
+                self._outcomes.clear()
+                self._opened = 0
+                self._probe_in_flight = False
+                self._set_state(CLOSED)
+            self._outcomes.append((self.clock(), True))
+
+    def release(self):
+        """קריאה שלא הגיעה ל-API (למשל השמעה בלי הקלטה) - משחרר את קריאת הניסיון בלי לספור תוצאה"""
+        with self._lock:
+            self._probe_in_flight = False
+
+    def record_failure(self, retry_after=None):
+        """
+        Args:
+            retry_after: שניות שה-API ביקש להמתין (429) - פותח מיד, לפחות לזמן הזה
+        """
+        with self._lock:
+            now = self.clock()
+            self._outcomes.append((now, False))
+
+            if self.state == HALF_OPEN:
+                self._probe_in_flight = False
+                self._open(now, retry_after)
+            elif self.state == CLOSED and (retry_after is not None or self._should_trip(now)):
+                self._open(now, retry_after)
+
+    # =========================================================
+    # פנימי
+    # =========================================================
+
+    def _should_trip(self, now):
+        while self._outcomes and now - self._outcomes[0][0] > self.window_seconds:
+            self._outcomes.popleft()
+        if len(self._outcomes) < self.min_calls:
+            return False
+        failures = sum(1 for _, ok in self._outcomes if not ok)
+        return failures / len(self._outcomes) >= self.error_rate
+
+    def _open(self, now, retry_after):
+        self._opened += 1
+        delay = min(self.base_delay * 2 ** (self._opened - 1), self.max_delay)
+        if retry_after is not None:
+            delay = max(delay, retry_after)
+        self._open_until = now + delay
+        self.stats['opened'] += 1
+        self._set_state(OPEN, delay)
+
+    def _set_state(self, state, retry_in=None):
+        old, self.state = self.state, state
+        if old != state and self.on_state_change:
+            self.on_state_change(old, state, retry_in)
+
+    def snapshot(self):
+        """מצב נוכחי (למדדים / לוג)"""
+        with self._lock:
+            failures = sum(1 for _, ok in self._outcomes if not ok)
+            return {
+                'state': self.state,
+                'window_calls': len(self._outcomes),
+                'window_errors': failures,
+                'retry_in': max(self._open_until - self.clock(), 0.0) if self.state != CLOSED else 0.0,
+                **self.stats
+            }
@@ -8,26 +8,292 @@ from datetime import datetime
 import re
 import json
 import os
-from dotenv import load_dotenv  # ← הוסף כאן!
 
-load_dotenv()  # ← הוסף!
-
-from ai_agents import AIAgents
+from events import get_event_bus, POST_SAVED, POST_FILTERED
+from ai_agents import AI_MODE_COMBINED, AIFailedError
+from circuit_breaker import AIUnavailableError
+from ai_recorder import ReplayMissError
+
+# שדות שנטענים בעצלתיים מ-locations.json (בגישה הראשונה, לא ב-__init__)
+_LAZY_LOCATION_ATTRS = frozenset({
+    'cities', 'neighborhoods', 'landmarks', 'neighborhood_context',
+    'cities_regex', 'neighborhoods_regex', 'landmarks_regex'
+})
+
+# מטמון ברמת המודול - כל ה-instances חולקים את אותם patterns מקומפלים
+_locations_cache = None
+
+
+# =================================================================
+#   daily_stats - טבלת סיכומים יומית (יום × עיר × מיקום × קטגוריה)
+#   מתוחזקת ע"י triggers על posts, כך שכל מסלול כתיבה (שמירה, מחיקה מהטבלה,
+#   ניקוי ישנים) מעדכן אותה. Analytics קורא רק ממנה.
+# =================================================================
+DAILY_STATS_KEY = 'day, city, location, category, is_relevant'
+
+
+def _rollup_values_sql(row):
+    """הערכים של שורת posts (NEW/OLD) בעמודות של daily_stats"""
+    return f'''
+        COALESCE(DATE({row}.scanned_at), DATE({row}.created_at)),
+        COALESCE({row}.city, ''),
+        COALESCE({row}.location, ''),
+        COALESCE({row}.category, ''),
+        COALESCE({row}.is_relevant, 0),
+        1,
+        COALESCE(CAST({row}.price AS INTEGER), 0),
+        {row}.price IS NOT NULL,
+        COALESCE(CAST({row}.rooms AS REAL), 0),
+        {row}.rooms IS NOT NULL,
+        COALESCE({row}.is_broker, 0) != 0,
+        {row}.blacklist_match IS NOT NULL'''
+
+
+def _rollup_add_sql(row):
+    """מוסיף שורת posts לסיכום (UPSERT)"""
+    return f'''
+        INSERT INTO daily_stats (
+            {DAILY_STATS_KEY}, posts_count, price_sum, price_count,
+            rooms_sum, rooms_count, broker_count, blacklisted_count
+        )
+        VALUES ({_rollup_values_sql(row)})
+        ON CONFLICT ({DAILY_STATS_KEY}) DO UPDATE SET
+            posts_count = posts_count + excluded.posts_count,
+            price_sum = price_sum + excluded.price_sum,
+            price_count = price_count + excluded.price_count,
+            rooms_sum = rooms_sum + excluded.rooms_sum,
+            rooms_count = rooms_count + excluded.rooms_count,
+            broker_count = broker_count + excluded.broker_count,
+            blacklisted_count = blacklisted_count + excluded.blacklisted_count;'''
+
+
+def _rollup_remove_sql(row):
+    """מוריד שורת posts מהסיכום (ומוחק קבוצה שהתרוקנה)"""
+    key_match = f'''
+            day = COALESCE(DATE({row}.scanned_at), DATE({row}.created_at))
+            AND city = COALESCE({row}.city, '')
+            AND location = COALESCE({row}.location, '')
+            AND category = COALESCE({row}.category, '')
+            AND is_relevant = COALESCE({row}.is_relevant, 0)'''
+    return f'''
+        UPDATE daily_stats SET
+            posts_count = posts_count - 1,
+            price_sum = price_sum - COALESCE(CAST({row}.price AS INTEGER), 0),
+            price_count = price_count - ({row}.price IS NOT NULL),
+            rooms_sum = rooms_sum - COALESCE(CAST({row}.rooms AS REAL), 0),
+            rooms_count = rooms_count - ({row}.rooms IS NOT NULL),
+            broker_count = broker_count - (COALESCE({row}.is_broker, 0) != 0),
+            blacklisted_count = blacklisted_count - ({row}.blacklist_match IS NOT NULL)
+        WHERE {key_match};
+        DELETE FROM daily_stats WHERE {key_match} AND posts_count <= 0;'''
+
+
+DAILY_STATS_SCHEMA = f'''
+    CREATE TABLE IF NOT EXISTS daily_stats (
+        day TEXT NOT NULL,
+        city TEXT NOT NULL DEFAULT '',
+        location TEXT NOT NULL DEFAULT '',
+        category TEXT NOT NULL DEFAULT '',
+        is_relevant INTEGER NOT NULL DEFAULT 0,
+        posts_count INTEGER NOT NULL DEFAULT 0,
+        price_sum INTEGER NOT NULL DEFAULT 0,
+        price_count INTEGER NOT NULL DEFAULT 0,
+        rooms_sum REAL NOT NULL DEFAULT 0,
+        rooms_count INTEGER NOT NULL DEFAULT 0,
+        broker_count INTEGER NOT NULL DEFAULT 0,
+        blacklisted_count INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY ({DAILY_STATS_KEY})
+    );
+
+    CREATE TRIGGER IF NOT EXISTS posts_daily_stats_insert AFTER INSERT ON posts
+    BEGIN {_rollup_add_sql('NEW')}
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS posts_daily_stats_delete AFTER DELETE ON posts
+    BEGIN {_rollup_remove_sql('OLD')}
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS posts_daily_stats_update AFTER UPDATE OF
+        scanned_at, city, location, category, is_relevant, price, rooms, is_broker, blacklist_match
+    ON posts
+    BEGIN {_rollup_remove_sql('OLD')} {_rollup_add_sql('NEW')}
+    END;
+'''
+
+
+# =================================================================
+#   דפדוף בטבלת הדירות (keyset pagination)
+# =================================================================
+
+# העמודות שהטבלה בממשק מציגה - בלי content (הכבד)
+APARTMENT_COLUMNS = ('id', 'post_url', 'author', 'city', 'location', 'price', 'rooms',
+                     'phone', 'group_name', 'scanned_at')
+
+# מפתחות מיון אפשריים → ביטוי SQL (בלי NULL, כדי שהשוואת (key, id) תעבוד)
+# הביטויים של scanned_at ו-price זהים לאלה שבאינדקסים למטה
+PAGE_SORT_KEYS = {
+    'scanned_at': "COALESCE(scanned_at, '')",
+    'price': 'COALESCE(CAST(price AS INTEGER), -1)',
+    'rooms': 'COALESCE(CAST(rooms AS REAL), -1)',
+    'city': "COALESCE(city, '')",
+}
+
+PAGE_INDEXES = '''
+    CREATE INDEX IF NOT EXISTS idx_posts_page_scanned
+        ON posts (is_relevant, COALESCE(scanned_at, ''), id);
+    CREATE INDEX IF NOT EXISTS idx_posts_page_price
+        ON posts (is_relevant, COALESCE(CAST(price AS INTEGER), -1), id);
+'''
+
+
+# =================================================================
+#   posts_fts - אינדקס חיפוש מלא (FTS5) על תוכן הפוסטים
+#   external content: הטקסט נשמר רק ב-posts, האינדקס מתעדכן ב-triggers.
+#   אותיות השימוש (ב/ל/ה/ו/מ/ש) מטופלות בצד השאילתה - ראה build_search_query.
+# =================================================================
+POSTS_FTS_SCHEMA = '''
+    CREATE VIRTUAL TABLE IF NOT EXISTS posts_fts USING fts5(
+        content,
+        content = 'posts',
+        content_rowid = 'id',
+        tokenize = 'unicode61 remove_diacritics 2'
+    );
+
+    CREATE TRIGGER IF NOT EXISTS posts_fts_insert AFTER INSERT ON posts
+    BEGIN
+        INSERT INTO posts_fts (rowid, content) VALUES (NEW.id, NEW.content);
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS posts_fts_delete AFTER DELETE ON posts
+    BEGIN
+        INSERT INTO posts_fts (posts_fts, rowid, content) VALUES ('delete', OLD.id, OLD.content);
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS posts_fts_update AFTER UPDATE OF content ON posts
+    BEGIN
+        INSERT INTO posts_fts (posts_fts, rowid, content) VALUES ('delete', OLD.id, OLD.content);
+        INSERT INTO posts_fts (rowid, content) VALUES (NEW.id, NEW.content);
+    END;
+'''
+
+# אותיות שימוש בתחילת מילה, וצירופים נפוצים שלהן ("ובירושלים", "שבשכונה")
+HEBREW_PREFIXES = ('ב', 'ל', 'ה', 'ו', 'מ', 'ש')
+HEBREW_PREFIX_COMBOS = HEBREW_PREFIXES + (
+    'וב', 'ול', 'וה', 'ומ', 'וש', 'שב', 'של', 'שה', 'שמ', 'מה'
+)
+
+# ניקוד וטעמים - לא חלק מהמילה בחיפוש
+_NIQQUD_RE = re.compile(r'[\u0591-\u05BD\u05BF\u05C1\u05C2\u05C4\u05C5\u05C7]')
+_SEARCH_TOKEN_RE = re.compile(r'\w+')
+
+# מסננים שאפשר להעביר ל-search (מעבר לשאילתה)
+SEARCH_FILTERS = ('relevant_only', 'city', 'category', 'date_from', 'date_to')
+
+# BM25 מחושב רק על N ההתאמות האחרונות (לפי id) - כך מילה נפוצה כמו "דירה"
+# עולה אותו דבר ב-100k וב-1M פוסטים. התאמות ישנות יותר לא נכנסות לדירוג.
+SEARCH_RANK_WINDOW = 5000
+
+
+def hebrew_variants(term):
+    """
+    כל הצורות של מילה עם/בלי אותיות שימוש: 'בירושלים' → ירושלים, בירושלים, לירושלים, מירושלים...
+    מחיקת תחילית רק כשנשאר בסיס של 3 אותיות לפחות ('בית' לא הופך ל'ית').
+    """
+    stems = {term}
+    for prefix in HEBREW_PREFIX_COMBOS:
+        if term.startswith(prefix) and len(term) - len(prefix) >= 3:
+            stems.add(term[len(prefix):])
+
+    variants = set(stems)
+    for stem in stems:
+        if any('א' <= ch <= 'ת' for ch in stem):
+            variants.update(prefix + stem for prefix in HEBREW_PREFIX_COMBOS)
+    return sorted(variants)
+
+
+def build_search_query(query):
+    """
+    ממיר טקסט חופשי לשאילתת FTS5: כל מילה → (צורה1 OR צורה2 ...), והמילים ב-AND.
+    כל צורה בגרשיים - כך שתווים מיוחדים של FTS5 לא שוברים את השאילתה.
+
+    Returns:
+        str, או None אם אין מילים לחיפוש
+    """
+    tokens = _SEARCH_TOKEN_RE.findall(_NIQQUD_RE.sub('', query or ''))
+    if not tokens:
+        return None
+
+    groups = []
+    for token in tokens:
+        variants = ' OR '.join(f'"{v}"' for v in hebrew_variants(token))
+        groups.append(f'({variants})')
+    return ' AND '.join(groups)
 
 
 class PostDatabase:
-    def __init__(self, db_path="posts.db"):
+    def __init__(self, db_path="posts.db", event_bus=None):
         self.db_path = db_path
+        self.events = event_bus or get_event_bus()
         self._create_tables()
-        self._load_locations()
-        self._compile_location_patterns()
 
-        # אתחול AI Agents ← הוסף את זה!
+        # ⚡ locations.json ו-AI Agents נטענים רק בשימוש הראשון (ראה __getattr__)
+        # כך פתיחת החלון לא מחכה ל-anthropic / dotenv / קומפילציית regex
+
+    def __getattr__(self, name):
+        """
+        טעינה עצלה: נקרא רק כשה-attribute עדיין לא קיים.
+        - שדות מיקום (cities_regex וכו') → טוען ומקמפל את locations.json
+        - ai_agents → מייבא את ai_agents ויוצר client רק עכשיו
+        - pre_classifier → טוען את הסיווג המקומי (חוקים + מודל) לפי ההגדרות
+        - image_pipeline → הכנת תמונות ל-AI (Pillow נטען רק כאן)
+        """
+        if name in _LAZY_LOCATION_ATTRS:
+            self._ensure_locations()
+            return self.__dict__[name]
+
+        if name == 'ai_agents':
+            self.ai_agents = self._create_ai_agents()
+            return self.ai_agents
+
+        if name == 'pre_classifier':
+            self.pre_classifier = self._create_pre_classifier()
+            return self.pre_classifier
+
+        if name == 'image_pipeline':
+            from image_pipeline import ImagePipeline
+            self.image_pipeline = ImagePipeline.from_settings()
+            return self.image_pipeline
+
+        raise AttributeError(f"'{type(self).__name__}' object has no attribute '{name}'")
+
+    def _create_ai_agents(self):
+        """יוצר AI Agents (import כבד - נעשה רק כשצריך)"""
         try:
-            self.ai_agents = AIAgents()
+            from ai_agents import AIAgents
+            return AIAgents()
         except Exception as e:
             print(f"⚠️ AI Agents לא זמינים: {e}")
-            self.ai_agents = None
+            return None
+
+    def _create_pre_classifier(self):
+        """סיווג מקומי לפני ה-LLM (None אם כבוי בהגדרות)"""
+        try:
+            from pre_classifier import PreClassifier
+            return PreClassifier.from_settings()
+        except Exception as e:
+            print(f"⚠️ סיווג מקומי לא זמין: {e}")
+            return None
+
+    def _ensure_locations(self):
+        """טוען ומקמפל את רשימות המיקומים - פעם אחת לכל התהליך"""
+        global _locations_cache
+
+        if _locations_cache is None:
+            self._load_locations()
+            self._compile_location_patterns()
+            _locations_cache = {attr: self.__dict__[attr] for attr in _LAZY_LOCATION_ATTRS}
+        else:
+            self.__dict__.update(_locations_cache)
 
     def _create_tables(self):
         conn = sqlite3.connect(self.db_path)
@@ -60,9 +326,82 @@ class PostDatabase:
             )
         ''')
         cursor.execute('CREATE TABLE IF NOT EXISTS settings (key TEXT PRIMARY KEY, value TEXT)')
+
+        # טבלת סיכומים יומית - אם היא חדשה ב-DB קיים, ממלאים אותה מהפוסטים הקיימים
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'daily_stats'")
+        is_new_rollup = cursor.fetchone() is None
+        cursor.executescript(DAILY_STATS_SCHEMA)
+        cursor.executescript(PAGE_INDEXES)
+
+        # אינדקס חיפוש - אם SQLite בלי FTS5, החיפוש נופל ל-LIKE
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'posts_fts'")
+        is_new_fts = cursor.fetchone() is None
+        try:
+            cursor.executescript(POSTS_FTS_SCHEMA)
+            self.fts_enabled = True
+        except sqlite3.OperationalError as e:
+            print(f"⚠️ FTS5 לא זמין ({e}) - חיפוש איטי ב-LIKE")
+            self.fts_enabled = False
+
         conn.commit()
         conn.close()
 
+        if is_new_rollup:
+            self.rebuild_daily_stats()
+        if is_new_fts and self.fts_enabled:
+            self.rebuild_search_index()
+
+    # =================================================================
+    #              בנייה מחדש של טבלת הסיכומים היומית
+    # =================================================================
+    def rebuild_daily_stats(self):
+        """
+        מחשב את daily_stats מאפס מתוך posts (בטרנזקציה אחת).
+        בשימוש רגיל ה-triggers מעדכנים אותה - זה לתיקון / מיגרציה.
+
+        Returns:
+            int: כמות שורות סיכום שנוצרו
+        """
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        try:
+            cursor.execute('DELETE FROM daily_stats')
+            cursor.execute(f'''
+                INSERT INTO daily_stats (
+                    {DAILY_STATS_KEY}, posts_count, price_sum, price_count,
+                    rooms_sum, rooms_count, broker_count, blacklisted_count
+                )
+                SELECT
+                    COALESCE(DATE(scanned_at), DATE(created_at)) AS d,
+                    COALESCE(city, '') AS c,
+                    COALESCE(location, '') AS l,
+                    COALESCE(category, '') AS cat,
+                    COALESCE(is_relevant, 0) AS rel,
+                    COUNT(*),
+                    COALESCE(SUM(CAST(price AS INTEGER)), 0),
+                    COUNT(price),
+                    COALESCE(SUM(CAST(rooms AS REAL)), 0),
+                    COUNT(rooms),
+                    SUM(COALESCE(is_broker, 0) != 0),
+                    COUNT(blacklist_match)
+                FROM posts
+                GROUP BY d, c, l, cat, rel
+            ''')
+            rows = cursor.rowcount
+            conn.commit()
+            return rows
+        finally:
+            conn.close()
+
+    def rebuild_search_index(self):
+        """בונה את posts_fts מחדש מתוך posts (מיגרציה / תיקון)"""
+        conn = sqlite3.connect(self.db_path)
+        try:
+            conn.execute("INSERT INTO posts_fts (posts_fts) VALUES ('rebuild')")
+            conn.commit()
+        finally:
+            conn.close()
+
     # =================================================================
     #              טוען רשימות ערים, שכונות ו-landmarks מקובץ JSON
     # =================================================================
@@ -127,6 +466,11 @@ class PostDatabase:
         print(f"✅ קומפלו {len(self.cities)} ערים, {len(self.neighborhoods_regex)} קבוצות שכונות")
 
     def save_post(self, post_data):
+        """
+        Returns:
+            dict של הפרטים שנשמרו בפועל (city, location, price, rooms, phone - אחרי Regex + AI),
+            או False אם הפוסט כבר קיים / סונן ע"י ה-AI / השמירה נכשלה
+        """
         conn = sqlite3.connect(self.db_path)
         cursor = conn.cursor()
         try:
@@ -145,14 +489,40 @@ class PostDatabase:
 
             # =========================================
             # Agent 1: סינון (תמיד רץ!) - עם תמונות
+            # במצב combined אותה קריאה גם מחלצת פרטים (ואז Agent 2 לא רץ)
             # =========================================
             ai_result = None
+            ai_failed = False  # ה-API לא זמין → נשמר בלי סיווג, batch_enrichment ישלים
             images = post_data.get('images', [])  # ← חדש! תפיסת תמונות
+            combined = bool(self.ai_agents) and self.ai_agents.mode == AI_MODE_COMBINED
+
+            # ⚡ פוסט "ברור" (מחפש דירה / ספאם / שאלה) - בלי קריאה ל-API
+            pre_result = self.pre_classifier.classify(content) if self.pre_classifier else None
+            if pre_result:
+                ai_result = pre_result
+                print(f"  ⚡ סיווג מקומי: {ai_result['category']} (confidence: {ai_result['confidence']:.2f})")
+
+            elif self.ai_agents:
+                # תמונות: הגבלת כמות, בלי אייקונים וכפולות, thumbnails מוקטנים.
+                # מפסק פתוח → הקריאה תידחה בכל מקרה, אז לא מורידים תמונות (עד FETCH_TIMEOUT לכל אחת)
+                # השמעה מהקלטה → אין רשת, ותמונות לא חלק מהמפתח (ראה ai_recorder)
+                image_hashes = []
+                if images and self.image_pipeline:
+                    if self.ai_agents.breaker.accepting() and not self.ai_agents.replaying:
+                        images = self.image_pipeline.prepare(images, pending=image_hashes)
+                    else:
+                        images = []
 
-            if self.ai_agents:
                 try:
                     # שליחת תמונות ל-AI
-                    ai_result = self.ai_agents.classify_post(content, author, images)  # ← חדש!
+                    if combined:
+                        ai_result = self.ai_agents.classify_and_extract(content, author, images)
+                    else:
+                        ai_result = self.ai_agents.classify_post(content, author, images)  # ← חדש!
+
+                    # רק עכשיו התמונות "נשלחו" - כישלון לא נועל אותן כפולות לתמיד
+                    if image_hashes:
+                        self.image_pipeline.commit(image_hashes)
 
                     # הצגת תוצאה
                     if images:
@@ -161,6 +531,15 @@ class PostDatabase:
                     else:
                         print(f"  🤖 Agent 1: {ai_result['category']} (confidence: {ai_result['confidence']:.2f})")
 
+                except AIUnavailableError as e:
+                    ai_failed = True
+                    print(f"  ⏸️ AI לא זמין - נשמר עם ai_failed ({e})")
+                except ReplayMissError as e:
+                    ai_failed = True
+                    print(f"  ⏸️ אין הקלטה לפוסט - נשמר עם ai_failed ({e})")
+                except AIFailedError as e:
+                    ai_failed = True  # בלי סיווג מזויף - ה-batch enricher יסווג מחדש
+                    print(f"  ❌ אין סיווג AI - נשמר עם ai_failed ({e})")
                 except Exception as e:
                     print(f"  ❌ Agent 1 failed: {e}")
 
@@ -196,6 +575,13 @@ class PostDatabase:
                 ))
 
                 conn.commit()
+
+                self.events.publish(POST_FILTERED, {
+                    'post_url': post_data.get('post_url'),
+                    'group_name': post_data.get('group_name'),
+                    'category': ai_result['category'],
+                    'is_relevant': 0
+                })
                 return False  # ← חשוב! מחזירים False כדי שלא יופיע כ"חדש"
 
             # =========================================
@@ -214,7 +600,14 @@ class PostDatabase:
                     not details['rooms']  # ← הוסף את זה!
             )
 
-            if needs_ai and self.ai_agents:
+            if needs_ai and combined and ai_result:
+                # הפרטים כבר הגיעו בקריאה המשולבת - AI ממלא רק מה ש-Regex לא מצא
+                for field in ('price', 'city', 'location', 'rooms'):
+                    if not details[field] and ai_result.get(field):
+                        details[field] = ai_result[field]
+                        print(f"    ✅ {field} מ-AI: {details[field]}")
+
+            elif needs_ai and self.ai_agents and not ai_failed:
                 try:
                     print(f"  🤖 Agent 2: ממלא חסרים...")
                     ai_details = self.ai_agents.extract_missing_details(content, details)
@@ -232,6 +625,9 @@ class PostDatabase:
                         details['location'] = ai_details['location']
                         print(f"    ✅ מיקום מ-AI: {details['location']}")
 
+                except (AIUnavailableError, ReplayMissError) as e:
+                    ai_failed = True
+                    print(f"  ⏸️ AI לא זמין - נשמר עם ai_failed ({e})")
                 except Exception as e:
                     print(f"  ❌ Agent 2 failed: {e}")
 
@@ -243,10 +639,10 @@ class PostDatabase:
                     post_url, post_id, content, author, 
                     city, location, price, rooms, phone,
                     group_name, blacklist_match, is_relevant,
-                    category, is_broker, ai_confidence, ai_reason,
+                    category, is_broker, ai_confidence, ai_reason, ai_failed,
                     scanned_at
                 )
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
             ''', (
                 post_data.get('post_url'),
                 post_data.get('post_id'),
@@ -266,12 +662,26 @@ class PostDatabase:
                 1 if (ai_result and ai_result['is_broker']) else 0,
                 ai_result['confidence'] if ai_result else None,
                 ai_result['reason'] if ai_result else None,
+                1 if ai_failed else 0,
 
                 post_data.get('scanned_at', datetime.now())
             ))
 
             conn.commit()
-            return True
+
+            self.events.publish(POST_SAVED, {
+                'post_url': post_data.get('post_url'),
+                'group_name': post_data.get('group_name'),
+                'city': details['city'],
+                'location': details['location'],
+                'price': details['price'],
+                'rooms': details['rooms'],
+                'category': ai_result['category'] if ai_result else 'RELEVANT',
+                'blacklist_match': post_data.get('blacklist_match'),
+                'is_relevant': 0 if is_filtered else post_data.get('is_relevant', 1),
+                'ai_failed': ai_failed
+            })
+            return {field: details[field] for field in ('city', 'location', 'price', 'rooms', 'phone')}
 
 
         except Exception as e:
@@ -333,29 +743,204 @@ class PostDatabase:
         # המרת התוצאות למילון (כדי שנוכל לגשת לנתונים לפי שם העמודה)
         return [dict(zip(columns, row)) for row in rows]
 
+    # =========================================================
+    #  דף אחד בטבלת הדירות - keyset pagination על (מפתח מיון, id)
+    #  לא משנה באיזה עמוד אנחנו - כל דף עולה אותו דבר (בלי OFFSET)
+    # =========================================================
+    def get_posts_page(self, after=None, limit=100, sort='scanned_at', descending=True,
+                       relevant_only=True, city=None):
+        """
+        Args:
+            after: הסמן שהוחזר מהדף הקודם (None = דף ראשון)
+            limit: כמות שורות בדף
+            sort: מפתח מיון (ראה PAGE_SORT_KEYS)
+            descending: סדר יורד
+            relevant_only: רק is_relevant = 1
+            city: סינון לפי עיר
+
+        Returns:
+            (rows, next_cursor) - rows כ-list של dicts עם APARTMENT_COLUMNS,
+            next_cursor=None כשאין עוד שורות
+        """
+        if sort not in PAGE_SORT_KEYS:
+            raise ValueError(f"מיון לא נתמך: {sort}")
+
+        sort_expr = PAGE_SORT_KEYS[sort]
+        op = '<' if descending else '>'
+        direction = 'DESC' if descending else 'ASC'
+
+        conditions = []
+        params = []
+        if relevant_only:
+            conditions.append('is_relevant = 1')
+        if city:
+            conditions.append('city = ?')
+            params.append(city)
+        if after is not None:
+            # שקול ל-(key, id) < (?, ?), אבל בצורה שהאינדקס יודע לחפש בה טווח
+            last_key, last_id = after
+            conditions.append(f'{sort_expr} {op}= ? AND ({sort_expr} {op} ? OR id {op} ?)')
+            params.extend([last_key, last_key, last_id])
+
+        sql = f"SELECT {', '.join(APARTMENT_COLUMNS)}, {sort_expr} FROM posts"
+        if conditions:
+            sql += ' WHERE ' + ' AND '.join(conditions)
+        sql += f' ORDER BY {sort_expr} {direction}, id {direction} LIMIT ?'
+        params.append(int(limit))
+
+        conn = sqlite3.connect(self.db_path)
+        try:
+            rows = conn.execute(sql, params).fetchall()
+        finally:
+            conn.close()
+
+        posts = [dict(zip(APARTMENT_COLUMNS, row[:-1])) for row in rows]
+
+        # הסמן לדף הבא: (ערך המיון, id) של השורה האחרונה
+        next_cursor = (rows[-1][-1], rows[-1][0]) if len(rows) == int(limit) else None
+        return posts, next_cursor
+
+    def count_posts(self, relevant_only=True, city=None):
+        """ספירת דירות לשורת הסטטוס - מטבלת הסיכומים (לא סופר את posts)"""
+        conditions = []
+        params = []
+        if relevant_only:
+            conditions.append('is_relevant = 1')
+        if city:
+            conditions.append('city = ?')
+            params.append(city)
+
+        sql = 'SELECT COALESCE(SUM(posts_count), 0) FROM daily_stats'
+        if conditions:
+            sql += ' WHERE ' + ' AND '.join(conditions)
+
+        conn = sqlite3.connect(self.db_path)
+        try:
+            return conn.execute(sql, params).fetchone()[0]
+        finally:
+            conn.close()
+
+    def get_cities(self, relevant_only=True):
+        """רשימת הערים שיש להן דירות (לתיבת הסינון) - מטבלת הסיכומים"""
+        sql = "SELECT city FROM daily_stats WHERE city != ''"
+        if relevant_only:
+            sql += ' AND is_relevant = 1'
+        sql += ' GROUP BY city ORDER BY SUM(posts_count) DESC'
+
+        conn = sqlite3.connect(self.db_path)
+        try:
+            return [row[0] for row in conn.execute(sql).fetchall()]
+        finally:
+            conn.close()
+
+    def delete_post(self, post_id):
+        """מוחק פוסט לפי id (טבלת הסיכומים מתעדכנת ב-trigger)"""
+        conn = sqlite3.connect(self.db_path)
+        try:
+            cursor = conn.execute('DELETE FROM posts WHERE id = ?', (post_id,))
+            conn.commit()
+            return cursor.rowcount > 0
+        finally:
+            conn.close()
+
+    # =========================================================
+    #  חיפוש חופשי בתוכן הפוסטים (FTS5 + דירוג BM25)
+    # =========================================================
+    def search(self, query, filters=None, limit=50, highlight=('«', '»')):
+        """
+        Args:
+            query: טקסט חופשי ("דירה בירושלים מרפסת") - כל המילים חייבות להופיע
+                   (מעל SEARCH_RANK_WINDOW התאמות - מדורגות רק האחרונות שבהן)
+            filters: dict עם relevant_only (ברירת מחדל True), city, category, date_from, date_to
+            limit: כמות תוצאות מקסימלית
+            highlight: סימון לפני/אחרי מילה שנמצאה ב-snippet
+
+        Returns:
+            list של dicts עם APARTMENT_COLUMNS + 'snippet', מהרלוונטי ביותר
+        """
+        filters = dict(filters or {})
+        unknown = set(filters) - set(SEARCH_FILTERS)
+        if unknown:
+            raise ValueError(f"מסננים לא מוכרים: {sorted(unknown)}")
+
+        match = build_search_query(query)
+        if not match:
+            return []
+
+        conditions = []
+        params = []
+        if filters.get('relevant_only', True):
+            conditions.append('p.is_relevant = 1')
+        if filters.get('city'):
+            conditions.append('p.city = ?')
+            params.append(filters['city'])
+        if filters.get('category'):
+            conditions.append('p.category = ?')
+            params.append(filters['category'])
+        if filters.get('date_from'):
+            conditions.append('DATE(p.scanned_at) >= DATE(?)')
+            params.append(str(filters['date_from']))
+        if filters.get('date_to'):
+            conditions.append('DATE(p.scanned_at) <= DATE(?)')
+            params.append(str(filters['date_to']))
+
+        columns = ', '.join(f'p.{c}' for c in APARTMENT_COLUMNS)
+        start, end = highlight
+
+        conn = sqlite3.connect(self.db_path)
+        try:
+            if self.fts_enabled:
+                base = 'FROM posts_fts JOIN posts p ON p.id = posts_fts.rowid WHERE posts_fts MATCH ?'
+                filters_sql = ''.join(f' AND {c}' for c in conditions)
+
+                # חלון דירוג: ה-id של ההתאמה ה-N מהסוף (אם יש יותר מ-N התאמות)
+                cutoff = conn.execute(
+                    f'SELECT p.id {base}{filters_sql} ORDER BY posts_fts.rowid DESC LIMIT 1 OFFSET ?',
+                    [match] + params + [SEARCH_RANK_WINDOW - 1]).fetchone()
+                if cutoff:
+                    conditions.append('posts_fts.rowid >= ?')
+                    params.append(cutoff[0])
+
+                sql = f"SELECT {columns}, snippet(posts_fts, 0, ?, ?, '…', 12) {base}"
+                params = [start, end, match] + params
+                order = 'ORDER BY bm25(posts_fts)'
+            else:
+                # גיבוי בלי FTS5: LIKE על כל מילה (סריקה מלאה, בלי דירוג)
+                tokens = _SEARCH_TOKEN_RE.findall(_NIQQUD_RE.sub('', query))
+                sql = f"SELECT {columns}, substr(p.content, 1, 120) FROM posts p WHERE 1 = 1"
+                conditions = ['p.content LIKE ?' for _ in tokens] + conditions
+                params = [f'%{t}%' for t in tokens] + params
+                order = 'ORDER BY p.scanned_at DESC'
+
+            if conditions:
+                sql += ' AND ' + ' AND '.join(conditions)
+            sql += f' {order} LIMIT ?'
+            params.append(int(limit))
+
+            rows = conn.execute(sql, params).fetchall()
+        finally:
+            conn.close()
+
+        return [dict(zip(APARTMENT_COLUMNS + ('snippet',), row)) for row in rows]
+
     def get_stats(self):
         # =========================================================
         #  הפקת דוח סטטיסטיקות (כמה פוסטים נאספו, כמה רלוונטיים וכו')
+        #  נקרא מטבלת הסיכומים daily_stats ולא סופר את posts
         # =========================================================
         conn = sqlite3.connect(self.db_path)
         cursor = conn.cursor()
 
         try:
-            # 1. סה"כ פוסטים במערכת
-            cursor.execute('SELECT COUNT(*) FROM posts')
-            total = cursor.fetchone()[0]
-
-            # 2. כמה מסומנים כרלוונטיים (לא נמחקו/סוננו ידנית)
-            cursor.execute('SELECT COUNT(*) FROM posts WHERE is_relevant = 1')
-            relevant = cursor.fetchone()[0]
-
-            # 3. כמה סוננו אוטומטית ע"י המילים השחורות
-            cursor.execute('SELECT COUNT(*) FROM posts WHERE blacklist_match IS NOT NULL')
-            blacklisted = cursor.fetchone()[0]
-
-            # 4. כמה פוסטים חדשים נאספו היום
-            cursor.execute("SELECT COUNT(*) FROM posts WHERE DATE(scanned_at) = DATE('now')")
-            today = cursor.fetchone()[0]
+            cursor.execute('''
+                SELECT
+                    COALESCE(SUM(posts_count), 0),                                       -- 1. סה"כ
+                    COALESCE(SUM(CASE WHEN is_relevant = 1 THEN posts_count END), 0),    -- 2. רלוונטיים
+                    COALESCE(SUM(blacklisted_count), 0),                                 -- 3. נתפסו ב-blacklist
+                    COALESCE(SUM(CASE WHEN day = DATE('now') THEN posts_count END), 0)   -- 4. היום
+                FROM daily_stats
+            ''')
+            total, relevant, blacklisted, today = cursor.fetchone()
 
             # החזרת כל הנתונים כמילון מסודר
             return {
@@ -368,6 +953,27 @@ class PostDatabase:
         finally:
             conn.close()
 
+    def get_relevant_per_day(self, days=7):
+        # =========================================================
+        #  כמות רלוונטיים לכל יום בתקופה - לזריעת המונים של הדשבורד
+        #  מחזיר: {'2025-01-31': 12, ...}
+        # =========================================================
+        days = int(days)
+
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+
+        try:
+            cursor.execute(
+                "SELECT day, SUM(posts_count) FROM daily_stats "
+                "WHERE day >= DATE('now', ?) AND is_relevant = 1 "
+                "GROUP BY day",
+                (f'-{days} days',))
+            return {day: count for day, count in cursor.fetchall()}
+
+        finally:
+            conn.close()
+
     def get_week_stats(self): return self._get_period_stats(7)
     def get_month_stats(self): return self._get_period_stats(30)
 
@@ -375,6 +981,7 @@ class PostDatabase:
         # =========================================================
         #  פונקציית עזר פנימית לחישוב סטטיסטיקה לפי תקופת זמן
         #  מקבלת מספר ימים (days) ומחזירה כמה רלוונטיים וכמה נחסמו
+        #  עלות: O(ימים × ערים) מטבלת הסיכומים, לא O(פוסטים)
         # =========================================================
         # וידוא שdays הוא מספר שלם (הגנה מפני SQL injection)
         days = int(days)
@@ -386,17 +993,13 @@ class PostDatabase:
             # בניית מחרוזת התאריך בצורה בטוחה
             date_modifier = f'-{days} days'
 
-            # 1. ספירת רלוונטיים בתקופה
-            cursor.execute(
-                "SELECT COUNT(*) FROM posts WHERE DATE(scanned_at) >= DATE('now', ?) AND is_relevant = 1",
-                (date_modifier,))
-            relevant = cursor.fetchone()[0]
-
-            # 2. ספירת חסומים בתקופה
             cursor.execute(
-                "SELECT COUNT(*) FROM posts WHERE DATE(scanned_at) >= DATE('now', ?) AND blacklist_match IS NOT NULL",
+                "SELECT "
+                "  COALESCE(SUM(CASE WHEN is_relevant = 1 THEN posts_count END), 0), "
+                "  COALESCE(SUM(blacklisted_count), 0) "
+                "FROM daily_stats WHERE day >= DATE('now', ?)",
                 (date_modifier,))
-            blacklisted = cursor.fetchone()[0]
+            relevant, blacklisted = cursor.fetchone()
 
             return {'relevant': relevant, 'blacklisted': blacklisted}
 
@@ -427,32 +1030,28 @@ class PostDatabase:
     def export_to_csv(self, filename="apartments_export.csv", relevant_only=True):
 
         try:
-            import pandas as pd  # טוענים את ספריית הנתונים רק כשצריך אותה
-
-            # 1. שליפת הנתונים
-            posts = self.get_all_posts(relevant_only=relevant_only, limit=10000)
-            if not posts:
-                return False
-
-            # 2. המרה לטבלה של פנדס
-            df = pd.DataFrame(posts)
-
-            # 3. סידור עמודות (כדי שהחשובות יהיו בהתחלה)
-            columns_order = ['id', 'content', 'post_url', 'author', 'group_name', 'blacklist_match', 'scanned_at']
-            # הטריק הזה (List Comprehension) מוודא שאנחנו לא מבקשים עמודה שלא קיימת וגורמים לקריסה
-            existing_cols = [c for c in columns_order if c in df.columns]
-            df = df[existing_cols]
-
-            # 4. שמירה לקובץ
-            # index=False: לא שומר את המספרים הסידוריים של פנדס (0,1,2...) בצד
-            df.to_csv(filename, index=False, encoding='utf-8-sig')
-            return True
+            # ייצוא בזרימה - בלי תקרת 10,000 שורות ובלי לטעון הכל לזיכרון
+            return self.export(filename, fmt='csv', relevant_only=relevant_only) > 0
 
         except Exception as e:
             # זה קורה בדרך כלל אם הקובץ פתוח כבר באקסל והמחשב לא נותן לשמור עליו
             print(f"שגיאה בייצוא לקובץ: {e}")
             return False
 
+    def export(self, filename, fmt=None, **filters):
+        """
+        ייצוא בזרימה ל-CSV / Parquet / Arrow (ראה exporter.py)
+
+        Args:
+            filename: קובץ יעד (הפורמט נקבע לפי הסיומת אם fmt לא הועבר)
+            **filters: relevant_only, date_from, date_to, city, category, columns
+
+        Returns:
+            int: כמות שורות שנכתבו
+        """
+        from exporter import export_posts  # טוענים רק כשצריך
+        return export_posts(self.db_path, filename, fmt=fmt, **filters)
+
     # =================================================================
     #              יצירת תצוגה מקוצרת ("כותרת") עבור הטבלה בממשק
     # =================================================================
@@ -684,3 +1283,22 @@ class PostDatabase:
 
         return details  # ← הוסף את זה!
 
+
+# ==========================================
+#              הרצה ישירה
+# ==========================================
+
+if __name__ == "__main__":
+    import sys
+
+    if len(sys.argv) > 1 and sys.argv[1] == 'rebuild-stats':
+        # python database.py rebuild-stats [posts.db]
+        db = PostDatabase(sys.argv[2] if len(sys.argv) > 2 else "posts.db")
+        print(f"✅ daily_stats נבנתה מחדש: {db.rebuild_daily_stats()} שורות סיכום")
+    elif len(sys.argv) > 1 and sys.argv[1] == 'rebuild-search':
+        # python database.py rebuild-search [posts.db]
+        db = PostDatabase(sys.argv[2] if len(sys.argv) > 2 else "posts.db")
+        db.rebuild_search_index()
+        print("✅ אינדקס החיפוש נבנה מחדש")
+    else:
+        print("שימוש: python database.py rebuild-stats|rebuild-search [posts.db]")
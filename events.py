@@ -0,0 +1,68 @@
+"""
+events.py - Event Bus פנימי (בתוך התהליך)
+מסלול הקליטה (save_post, מחזור סריקה) מפרסם אירועים, והממשק/סטטיסטיקות נרשמים אליהם
+במקום לשאול את הדאטאבייס כל שנייה.
+"""
+
+import threading
+
+# --- שמות האירועים ---
+POST_SAVED = 'post_saved'            # פוסט נשמר ב-DB (רלוונטי או שנתפס ב-blacklist)
+POST_FILTERED = 'post_filtered'      # פוסט סונן ע"י ה-AI (נשמר עם is_relevant=0)
+CYCLE_FINISHED = 'cycle_finished'    # מחזור סריקה הסתיים
+CHECK_SCHEDULED = 'check_scheduled'  # נקבע זמן לבדיקה הבאה
+SEARCH_MATCHED = 'search_matched'    # פוסט חדש מתאים לחיפוש שמור (התראה)
+
+
+class EventBus:
+    """
+    Pub/Sub פשוט ו-thread-safe.
+    הקריאה ל-callbacks מתבצעת ב-thread של המפרסם - מי שנוגע ב-Tk צריך להעביר ל-root.after.
+    """
+
+    def __init__(self):
+        self._subscribers = {}
+        self._lock = threading.Lock()
+
+    def subscribe(self, event_name, callback):
+        """
+        נרשם לאירוע
+
+        Args:
+            event_name: שם האירוע (למשל POST_SAVED)
+            callback: פונקציה שתקרא עם payload (dict)
+        """
+        with self._lock:
+            callbacks = self._subscribers.setdefault(event_name, [])
+            if callback not in callbacks:
+                callbacks.append(callback)
+
+    def unsubscribe(self, event_name, callback):
+        """מסיר רישום"""
+        with self._lock:
+            callbacks = self._subscribers.get(event_name, [])
+            if callback in callbacks:
+                callbacks.remove(callback)
+
+    def publish(self, event_name, payload=None):
+        """
+        מפרסם אירוע לכל הנרשמים.
+        שגיאה אצל נרשם אחד לא עוצרת את האחרים (ולא את מסלול הקליטה).
+        """
+        with self._lock:
+            callbacks = list(self._subscribers.get(event_name, []))
+
+        for callback in callbacks:
+            try:
+                callback(payload or {})
+            except Exception as e:
+                print(f"⚠️ שגיאה ב-subscriber של {event_name}: {e}")
+
+
+# Event Bus משותף לכל התוכנה
+_default_bus = EventBus()
+
+
+def get_event_bus():
+    """מחזיר את ה-EventBus המשותף (קיצור דרך)"""
+    return _default_bus
@@ -0,0 +1,241 @@
+"""
+exporter.py - ייצוא פוסטים בזרימה (streaming) ל-CSV / Parquet / Arrow
+קורא מה-cursor של SQLite בחבילות (fetchmany) וכותב כל חבילה מיד לקובץ -
+הזיכרון תלוי בגודל החבילה ולא בכמות הפוסטים, ואין תקרת שורות.
+"""
+
+import csv
+import os
+import sqlite3
+from datetime import date, datetime
+
+# עמודות ברירת מחדל ל-CSV (אותו סדר כמו הייצוא הישן)
+CSV_COLUMNS = ['id', 'content', 'post_url', 'author', 'group_name', 'blacklist_match', 'scanned_at']
+
+# עמודות ל-Parquet/Arrow עם טיפוס לכל עמודה
+TYPED_COLUMNS = {
+    'id': 'int64',
+    'post_url': 'string',
+    'post_id': 'string',
+    'author': 'string',
+    'content': 'string',
+    'city': 'string',
+    'location': 'string',
+    'price': 'int64',          # ב-DB נשמר כטקסט - מומר למספר
+    'rooms': 'float64',        # "2.5" → 2.5
+    'phone': 'string',
+    'group_name': 'string',
+    'category': 'string',
+    'is_broker': 'bool',
+    'ai_confidence': 'float64',
+    'blacklist_match': 'string',
+    'is_relevant': 'bool',
+    'scanned_at': 'timestamp',
+}
+
+FORMATS = ('csv', 'parquet', 'arrow')
+
+
+def detect_format(filename):
+    """מזהה פורמט לפי סיומת הקובץ (ברירת מחדל: csv)"""
+    ext = os.path.splitext(filename)[1].lower()
+    if ext in ('.parquet', '.pq'):
+        return 'parquet'
+    if ext in ('.arrow', '.feather', '.ipc'):
+        return 'arrow'
+    return 'csv'
+
+
+def build_query(columns, relevant_only=True, date_from=None, date_to=None, city=None, category=None):
+    """
+    בונה SELECT עם מסננים
+
+    Args:
+        columns: עמודות לשליפה
+        relevant_only: רק is_relevant = 1
+        date_from / date_to: טווח תאריכים (כולל), 'YYYY-MM-DD' או date
+        city: עיר מדויקת
+        category: קטגוריית AI (RELEVANT, BROKER, ...)
+
+    Returns:
+        (sql, params)
+    """
+    unknown = [c for c in columns if c not in TYPED_COLUMNS]
+    if unknown:
+        raise ValueError(f"עמודות לא מוכרות: {unknown}")
+
+    conditions = []
+    params = []
+
+    if relevant_only:
+        conditions.append('is_relevant = 1')
+    if date_from:
+        conditions.append('DATE(scanned_at) >= DATE(?)')
+        params.append(str(date_from))
+    if date_to:
+        conditions.append('DATE(scanned_at) <= DATE(?)')
+        params.append(str(date_to))
+    if city:
+        conditions.append('city = ?')
+        params.append(city)
+    if category:
+        conditions.append('category = ?')
+        params.append(category)
+
+    sql = f"SELECT {', '.join(columns)} FROM posts"
+    if conditions:
+        sql += ' WHERE ' + ' AND '.join(conditions)
+    sql += ' ORDER BY scanned_at DESC, id DESC'
+
+    return sql, params
+
+
+def iter_chunks(db_path, columns, chunk_size=1000, **filters):
+    """
+    מחזיר חבילות שורות (list של tuples) ישירות מה-cursor - בלי לטעון הכל לזיכרון
+    """
+    sql, params = build_query(columns, **filters)
+
+    conn = sqlite3.connect(db_path)
+    try:
+        cursor = conn.execute(sql, params)
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                break
+            yield rows
+    finally:
+        conn.close()
+
+
+def export_posts(db_path, filename, fmt=None, columns=None, chunk_size=None, **filters):
+    """
+    מייצא פוסטים לקובץ בזרימה
+
+    Args:
+        db_path: נתיב ל-posts.db
+        filename: קובץ יעד
+        fmt: 'csv' / 'parquet' / 'arrow' (ברירת מחדל: לפי הסיומת)
+        columns: עמודות (ברירת מחדל: CSV_COLUMNS ל-CSV, כל TYPED_COLUMNS לעמודתי)
+        chunk_size: שורות לחבילה (ברירת מחדל: 1000 ל-CSV, 10000 לעמודתי = row group)
+        **filters: relevant_only, date_from, date_to, city, category
+
+    Returns:
+        int: כמות שורות שנכתבו (0 = אין נתונים, והקובץ לא נוצר)
+    """
+    fmt = fmt or detect_format(filename)
+    if fmt not in FORMATS:
+        raise ValueError(f"פורמט לא נתמך: {fmt}")
+
+    if fmt == 'csv':
+        columns = columns or CSV_COLUMNS
+        chunks = iter_chunks(db_path, columns, chunk_size or 1000, **filters)
+        return _write_csv(filename, columns, chunks)
+
+    columns = columns or list(TYPED_COLUMNS)
+    chunks = iter_chunks(db_path, columns, chunk_size or 10000, **filters)
+    return _write_columnar(filename, columns, chunks, fmt)
+
+
+# =========================================================
+#  CSV
+# =========================================================
+
+def _write_csv(filename, columns, chunks):
+    # מציצים בחבילה הראשונה לפני פתיחת הקובץ - כדי לא להשאיר קובץ ריק
+    first = next(chunks, None)
+    if first is None:
+        return 0
+
+    written = 0
+    # utf-8-sig: כדי שאקסל יזהה עברית
+    with open(filename, 'w', newline='', encoding='utf-8-sig') as f:
+        writer = csv.writer(f)
+        writer.writerow(columns)
+
+        for rows in _chain(first, chunks):
+            writer.writerows(rows)
+            written += len(rows)
+
+    return written
+
+
+# =========================================================
+#  Parquet / Arrow (אופציונלי - דורש pyarrow)
+# =========================================================
+
+def _import_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+        import pyarrow.ipc
+        return pyarrow
+    except ImportError:
+        raise ImportError("ייצוא Parquet/Arrow דורש pyarrow (pip install pyarrow)")
+
+
+def _arrow_schema(pa, columns):
+    types = {
+        'int64': pa.int64(),
+        'float64': pa.float64(),
+        'string': pa.string(),
+        'bool': pa.bool_(),
+        'timestamp': pa.timestamp('us'),
+    }
+    return pa.schema([(c, types[TYPED_COLUMNS[c]]) for c in columns])
+
+
+def _convert(value, type_name):
+    """ממיר ערך מה-DB לטיפוס של העמודה (ערך לא תקין → None)"""
+    if value is None or value == '':
+        return None
+    try:
+        if type_name == 'int64':
+            return int(str(value).replace(',', '').split('.')[0])
+        if type_name == 'float64':
+            return float(value)
+        if type_name == 'bool':
+            return bool(int(value))
+        if type_name == 'timestamp':
+            if isinstance(value, (datetime, date)):
+                return value
+            return datetime.fromisoformat(str(value))
+        return str(value)
+    except (ValueError, TypeError):
+        return None
+
+
+def _write_columnar(filename, columns, chunks, fmt):
+    pa = _import_pyarrow()
+
+    first = next(chunks, None)
+    if first is None:
+        return 0
+
+    schema = _arrow_schema(pa, columns)
+    types = [TYPED_COLUMNS[c] for c in columns]
+
+    if fmt == 'parquet':
+        writer = pa.parquet.ParquetWriter(filename, schema, compression='snappy')
+    else:
+        writer = pa.ipc.new_file(filename, schema)
+
+    written = 0
+    try:
+        for rows in _chain(first, chunks):
+            # שורות → עמודות, כל חבילה = row group / record batch אחד
+            data = {
+                col: [_convert(row[i], types[i]) for row in rows]
+                for i, col in enumerate(columns)
+            }
+            writer.write_table(pa.Table.from_pydict(data, schema=schema))
+            written += len(rows)
+    finally:
+        writer.close()
+
+    return written
+
+
+def _chain(first, rest):
+    yield first
+    yield from rest
@@ -4,9 +4,8 @@ groups_dialog.py - חלון ניהול קבוצות (עיצוב שורה חכמ
 
 import tkinter as tk
 from tkinter import ttk, messagebox
-import json
-import os
 import webbrowser
+from settings_manager import SettingsManager
 
 # --- צבעים מודרניים ---
 COLORS = {
@@ -22,10 +21,19 @@ COLORS = {
     'text_light': '#7f8c8d',
 }
 
+# --- תצוגת בריאות קבוצה (groups_store) ---
+HEALTH_LABELS = {
+    'failing': ("⚠️ נכשלה {failures} פעמים ברצף", COLORS['warning']),
+    'quarantined': ("🚫 בהסגר עד {until} ({failures} כישלונות)", COLORS['danger']),
+    'probe': ("🔁 ממתינה לבדיקה חוזרת", COLORS['warning']),
+}
+
+
 class GroupsDialog:
-    def __init__(self, parent, read_only=False):
+    def __init__(self, parent, read_only=False, group_store=None):
         self.window = tk.Toplevel(parent)
         self.read_only = read_only
+        self.group_store = group_store  # מצב הסריקה של הקבוצות (אופציונלי)
 
         title = "👀 צפייה בקבוצות" if read_only else "👥 ניהול קבוצות"
         self.window.title(title)
@@ -33,7 +41,7 @@ class GroupsDialog:
         self.window.configure(bg=COLORS['bg'])
         self.window.resizable(False, False)
 
-        self.config_path = "config.json"
+        self.settings = SettingsManager()
         self.groups_urls = []
         self.groups_names = []
         self.groups_active = []
@@ -45,30 +53,19 @@ class GroupsDialog:
         self.window.grab_set()
 
     def _load_groups(self):
-        """טוען קבוצות מ-config.json"""
-        if os.path.exists(self.config_path):
-            with open(self.config_path, 'r', encoding='utf-8') as f:
-                config = json.load(f)
-                self.groups_urls = config.get('groups_urls', [])
-                self.groups_names = config.get('groups_names', [])
-                self.groups_active = config.get('groups_active', [True] * len(self.groups_urls))
-
-                # השלמות
-                while len(self.groups_names) < len(self.groups_urls):
-                    self.groups_names.append(f"קבוצה {len(self.groups_names) + 1}")
-                while len(self.groups_active) < len(self.groups_urls):
-                    self.groups_active.append(True)
+        """טוען קבוצות מה-SettingsManager (שמות ומצב חסרים מושלמים שם)"""
+        groups = self.settings.get_groups()
+        self.groups_urls = [g['url'] for g in groups]
+        self.groups_names = [g['name'] for g in groups]
+        self.groups_active = [g['active'] for g in groups]
 
     def _save_groups(self):
+        """שומר דרך ה-SettingsManager - ה-listener רואה את השינוי מיד, בלי לקרוא את הקובץ"""
         try:
-            with open(self.config_path, 'r', encoding='utf-8') as f:
-                config = json.load(f)
-            config['groups_urls'] = self.groups_urls
-            config['groups_names'] = self.groups_names
-            config['groups_active'] = self.groups_active
-            with open(self.config_path, 'w', encoding='utf-8') as f:
-                json.dump(config, f, ensure_ascii=False, indent=2)
-            return True
+            return self.settings.set_groups([
+                {'url': url, 'name': name, 'active': active}
+                for url, name, active in zip(self.groups_urls, self.groups_names, self.groups_active)
+            ])
         except Exception as e:
             messagebox.showerror("שגיאה", f"נכשל לשמור:\n{str(e)}")
             return False
@@ -164,6 +161,12 @@ class GroupsDialog:
         url_lbl.pack(anchor='e')
         url_lbl.bind("<Button-1>", lambda e: webbrowser.open(url))
 
+        health_text = self._health_text(url)
+        if health_text:
+            text, color = health_text
+            tk.Label(text_area, text=text, font=('Segoe UI', 9),
+                     bg=COLORS['card'], fg=color).pack(anchor='e')
+
         # 4. אזור הכפתורים (שמאל) - רק אם לא במצב צפייה
         if not self.read_only:
             btn_area = tk.Frame(card, bg=COLORS['card'])
@@ -194,6 +197,18 @@ class GroupsDialog:
             # כפתור עריכה
             make_btn("✎", COLORS['accent'], lambda: self._edit_group(idx))
 
+    def _health_text(self, url):
+        """שורת בריאות לכרטיס (None לקבוצה תקינה / בלי group_store)"""
+        if self.group_store is None:
+            return None
+        health = self.group_store.health(url)
+        if health not in HEALTH_LABELS:
+            return None
+        state = self.group_store.get(url)
+        template, color = HEALTH_LABELS[health]
+        until = (state.get('quarantined_until') or '')[11:16]  # HH:MM
+        return template.format(failures=state.get('consecutive_failures') or 0, until=until), color
+
     # --- לוגיקה ---
     def _add_group(self):
         AddGroupDialog(self.window, self._on_group_added)
@@ -0,0 +1,276 @@
+"""
+groups_store.py - מצב הסריקה של כל קבוצה (טבלת groups)
+הרשימה עצמה (url, שם, פעיל) מגיעה מההגדרות - config.json נשאר מקור האמת.
+כאן נשמר מה שההגדרות לא יודעות: מתי נסרקה, הפוסט האחרון שנראה (cursor),
+כישלונות רצופים וזמן סריקה ממוצע.
+
+ה-cursor מחליף את get_last_post_id (ORDER BY scanned_at על posts) - המצב מוחזק בזיכרון,
+ונכתב ל-DB פעם אחת בסוף כל מחזור (flush).
+
+בריאות: קבוצה שנכשלת QUARANTINE_AFTER פעמים ברצף (חומת התחברות, קבוצה שנמחקה, דף איטי)
+נכנסת להסגר עם backoff אקספוננציאלי - לא נסרקת ולא משלמת page_load_wait בכל מחזור.
+כשההסגר נגמר היא לא חוזרת מיד: עד PROBES_PER_CYCLE קבוצות כאלה נבדקות בכל מחזור (probe);
+הצלחה → חוזרת לסריקה רגילה, כישלון → הסגר כפול.
+"""
+
+import sqlite3
+import threading
+from datetime import datetime, timedelta
+
+SCAN_TIME_ALPHA = 0.3  # משקל הסריקה האחרונה בממוצע הנע של זמן הסריקה
+
+# --- הסגר ---
+QUARANTINE_AFTER = 3                 # כישלונות רצופים עד הסגר
+QUARANTINE_BASE_MINUTES = 30         # הסגר ראשון
+QUARANTINE_MAX_MINUTES = 24 * 60     # תקרה
+PROBES_PER_CYCLE = 1                 # כמה קבוצות מההסגר נבדקות בכל מחזור
+
+HEALTHY = 'healthy'
+FAILING = 'failing'          # נכשלה לאחרונה, עדיין נסרקת
+QUARANTINED = 'quarantined'  # בהסגר - מדלגים
+PROBE = 'probe'              # ההסגר נגמר - מחכה ל-probe
+
+GROUPS_SCHEMA = '''
+    CREATE TABLE IF NOT EXISTS groups (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        url TEXT UNIQUE NOT NULL,
+        name TEXT,
+        active INTEGER DEFAULT 1,
+        last_scanned_at DATETIME,
+        last_post_id TEXT,
+        consecutive_failures INTEGER DEFAULT 0,
+        avg_scan_seconds REAL,
+        scans INTEGER DEFAULT 0,
+        quarantined_until DATETIME,
+        last_error TEXT,
+        created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+    )
+'''
+
+STATE_FIELDS = ('id', 'url', 'name', 'active', 'last_scanned_at', 'last_post_id',
+                'consecutive_failures', 'avg_scan_seconds', 'scans', 'quarantined_until', 'last_error')
+
+# עמודות שנוספו אחרי הגרסה הראשונה של הטבלה
+_MIGRATIONS = {
+    'quarantined_until': 'ALTER TABLE groups ADD COLUMN quarantined_until DATETIME',
+    'last_error': 'ALTER TABLE groups ADD COLUMN last_error TEXT',
+}
+
+
+def quarantine_minutes(failures):
+    """משך ההסגר לפי מספר הכישלונות הרצופים (30, 60, 120... עד יממה)"""
+    exponent = max(failures - QUARANTINE_AFTER, 0)
+    return min(QUARANTINE_BASE_MINUTES * 2 ** exponent, QUARANTINE_MAX_MINUTES)
+
+
+def _format_time(moment):
+    return moment.isoformat(sep=' ', timespec='seconds')
+
+
+class GroupStore:
+    """טבלת groups + עותק בזיכרון (url → dict מצב)"""
+
+    def __init__(self, db_path="posts.db", clock=datetime.now):
+        self.db_path = db_path
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._dirty = set()
+        self._create_table()
+        self._states = {row['url']: row for row in self._load()}
+
+    def _create_table(self):
+        conn = sqlite3.connect(self.db_path)
+        try:
+            conn.execute(GROUPS_SCHEMA)
+            columns = {row[1] for row in conn.execute('PRAGMA table_info(groups)')}
+            for column, sql in _MIGRATIONS.items():
+                if column not in columns:
+                    conn.execute(sql)
+            conn.commit()
+        finally:
+            conn.close()
+
+    def _load(self):
+        conn = sqlite3.connect(self.db_path)
+        conn.row_factory = sqlite3.Row
+        try:
+            rows = conn.execute(f"SELECT {', '.join(STATE_FIELDS)} FROM groups").fetchall()
+            return [dict(row) for row in rows]
+        finally:
+            conn.close()
+
+    # =========================================================
+    # סנכרון מול ההגדרות
+    # =========================================================
+
+    def sync(self, groups):
+        """
+        מיישר את הטבלה מול רשימת הקבוצות מההגדרות (SettingsManager.get_groups()).
+        קבוצה חדשה מקבלת cursor התחלתי מהפוסט האחרון שלה ב-posts (פעם אחת),
+        כדי ש-DB קיים לא יסרוק מחדש פוסטים שכבר נשמרו.
+
+        Returns:
+            list של dict מצב - לפי סדר ההגדרות (כולל קבוצות לא פעילות)
+        """
+        conn = sqlite3.connect(self.db_path)
+        try:
+            with self._lock:
+                result = []
+                for group in groups:
+                    state = self._states.get(group['url'])
+                    active = 1 if group.get('active', True) else 0
+
+                    if state is None:
+                        cursor = conn.execute(
+                            'SELECT post_id FROM posts WHERE group_name = ? ORDER BY scanned_at DESC LIMIT 1',
+                            (group['name'],)).fetchone()
+                        row_id = conn.execute(
+                            'INSERT INTO groups (url, name, active, last_post_id) VALUES (?, ?, ?, ?)',
+                            (group['url'], group['name'], active, cursor[0] if cursor else None)).lastrowid
+                        state = {field: None for field in STATE_FIELDS}
+                        state.update(id=row_id, url=group['url'], name=group['name'], active=active,
+                                     last_post_id=cursor[0] if cursor else None,
+                                     consecutive_failures=0, scans=0)
+                        self._states[group['url']] = state
+
+                    elif state['name'] != group['name'] or state['active'] != active:
+                        conn.execute('UPDATE groups SET name = ?, active = ? WHERE url = ?',
+                                     (group['name'], active, group['url']))
+                        state['name'], state['active'] = group['name'], active
+
+                    result.append(dict(state))
+            conn.commit()
+        finally:
+            conn.close()
+        return result
+
+    def get(self, url):
+        """מצב של קבוצה (עותק) או None"""
+        with self._lock:
+            state = self._states.get(url)
+            return dict(state) if state else None
+
+    def all(self):
+        with self._lock:
+            return [dict(state) for state in self._states.values()]
+
+    # =========================================================
+    # עדכון אחרי סריקה
+    # =========================================================
+
+    def record_scan(self, url, seconds, ok=True, last_post_id=None, error=None):
+        """
+        מעדכן את המצב בזיכרון (נכתב ל-DB ב-flush)
+
+        Args:
+            seconds: כמה זמן לקחה הסריקה
+            ok: הסריקה הצליחה?
+            last_post_id: הפוסט החדש ביותר שנראה (ה-cursor לסריקה הבאה)
+            error: תיאור השגיאה (כשנכשלה)
+        """
+        with self._lock:
+            state = self._states.get(url)
+            if state is None:
+                return
+            now = self.clock()
+            state['last_scanned_at'] = _format_time(now)
+            state['scans'] = (state['scans'] or 0) + 1
+            if state['avg_scan_seconds'] is None:
+                state['avg_scan_seconds'] = seconds
+            else:
+                state['avg_scan_seconds'] += SCAN_TIME_ALPHA * (seconds - state['avg_scan_seconds'])
+
+            if ok:
+                state['consecutive_failures'] = 0
+                state['quarantined_until'] = None
+                state['last_error'] = None
+                if last_post_id:
+                    state['last_post_id'] = last_post_id
+            else:
+                failures = (state['consecutive_failures'] or 0) + 1
+                state['consecutive_failures'] = failures
+                state['last_error'] = (error or '')[:200] or None
+                if failures >= QUARANTINE_AFTER:
+                    until = now + timedelta(minutes=quarantine_minutes(failures))
+                    state['quarantined_until'] = _format_time(until)
+            self._dirty.add(url)
+
+    # =========================================================
+    # בריאות והסגר
+    # =========================================================
+
+    def _health(self, state, now):
+        until = state.get('quarantined_until')
+        if until:
+            return QUARANTINED if datetime.fromisoformat(until) > now else PROBE
+        return FAILING if state.get('consecutive_failures') else HEALTHY
+
+    def health(self, url):
+        """healthy / failing / quarantined / probe (None לקבוצה לא מוכרת)"""
+        with self._lock:
+            state = self._states.get(url)
+            return self._health(state, self.clock()) if state else None
+
+    def plan(self, groups):
+        """
+        מה לסרוק במחזור הזה
+
+        Args:
+            groups: קבוצות פעילות מההגדרות ({'url', 'name', ...})
+
+        Returns:
+            (to_scan, skipped): to_scan - קבוצות רגילות + עד PROBES_PER_CYCLE probes
+            (הוותיקות ביותר בהמתנה קודם), skipped - קבוצות בהסגר / probes שלא נכנסו
+        """
+        now = self.clock()
+        regular, probes, skipped = [], [], []
+        with self._lock:
+            for group in groups:
+                state = self._states.get(group['url'])
+                health = self._health(state, now) if state else HEALTHY
+                if health == QUARANTINED:
+                    skipped.append(group)
+                elif health == PROBE:
+                    probes.append((state['quarantined_until'], group))
+                else:
+                    regular.append(group)
+
+        probes.sort(key=lambda item: item[0])
+        chosen = [group for _, group in probes[:PROBES_PER_CYCLE]]
+        skipped.extend(group for _, group in probes[PROBES_PER_CYCLE:])
+        return regular + chosen, skipped
+
+    def health_summary(self, urls=None):
+        """
+        Returns:
+            dict: health → כמות (רק הקבוצות ב-urls, אם ניתן)
+        """
+        now = self.clock()
+        summary = {HEALTHY: 0, FAILING: 0, QUARANTINED: 0, PROBE: 0}
+        with self._lock:
+            for url, state in self._states.items():
+                if urls is None or url in urls:
+                    summary[self._health(state, now)] += 1
+        return summary
+
+    def flush(self):
+        """כותב את כל הקבוצות שהשתנו - טרנזקציה אחת לכל מחזור"""
+        with self._lock:
+            rows = [(s['last_scanned_at'], s['last_post_id'], s['consecutive_failures'],
+                     s['avg_scan_seconds'], s['scans'], s['quarantined_until'], s['last_error'], s['url'])
+                    for url, s in self._states.items() if url in self._dirty]
+            self._dirty.clear()
+        if not rows:
+            return 0
+
+        conn = sqlite3.connect(self.db_path)
+        try:
+            conn.executemany('''
+                UPDATE groups SET last_scanned_at = ?, last_post_id = ?, consecutive_failures = ?,
+                                  avg_scan_seconds = ?, scans = ?, quarantined_until = ?, last_error = ?
+                WHERE url = ?
+            ''', rows)
+            conn.commit()
+        finally:
+            conn.close()
+        return len(rows)
@@ -0,0 +1,226 @@
+"""
+image_pipeline.py - הכנת תמונות לפני שליחה ל-AI
+הסורק אוסף כל תמונת 'scontent' בפוסט - בלי הגבלה, בגודל מלא, ואותן תמונות חוזרות
+בפרסומים חוזרים ובפוסטים שהועלו לכמה קבוצות. כאן:
+  1. מגבילים את מספר התמונות לפוסט (ai.images.max_per_post)
+  2. מורידים אייקונים/אימוג'י לפי מידות (צלע קצרה < min_side)
+  3. dHash (hash תפיסתי, 64 ביט) - תמונה שכבר נשלחה (או כמעט זהה: מרחק Hamming קטן) לא נשלחת שוב.
+     "נשלחה" = הסיווג הצליח: save_post אוסף את ה-hashes (pending) ורושם אותם (commit) רק אחרי הקריאה
+  4. שולחים thumbnail מוקטן ב-base64 במקום ה-URL המלא (פחות טוקני vision, פחות זמן)
+
+Pillow אופציונלי (pip install Pillow): בלעדיו - רק הגבלת כמות, וה-URLs נשלחים כמו שהם.
+"""
+
+import base64
+import io
+import threading
+import urllib.request
+from collections import OrderedDict
+from urllib.parse import urlparse
+
+# --- ברירות מחדל (הגדרות: ai.images.*) ---
+MAX_PER_POST = 3
+MIN_SIDE = 120            # צלע קצרה מתחת → אייקון / אימוג'י / תמונת פרופיל קטנה
+THUMBNAIL_SIDE = 512      # צלע ארוכה מקסימלית של ה-thumbnail
+JPEG_QUALITY = 80
+HAMMING_THRESHOLD = 4     # עד כמה ביטים שונים = "אותה תמונה" (דחיסה מחדש, שינוי גודל)
+SEEN_CAPACITY = 5000      # כמה hashes זוכרים (LRU)
+
+FETCH_TIMEOUT = 5
+MAX_IMAGE_BYTES = 5 * 1024 * 1024
+
+SEND_THUMBNAIL = 'thumbnail'
+SEND_URL = 'url'
+
+
+def _import_pil():
+    """Pillow אם מותקן, אחרת None (הצנרת עובדת במצב מצומצם)"""
+    try:
+        from PIL import Image
+        return Image
+    except ImportError:
+        return None
+
+
+def fetch_url(url):
+    """הורדת תמונה (http/https בלבד, עם תקרת גודל)"""
+    if urlparse(url).scheme not in ('http', 'https'):
+        raise ValueError(f"unsupported image url: {url[:40]}")
+    with urllib.request.urlopen(url, timeout=FETCH_TIMEOUT) as response:
+        data = response.read(MAX_IMAGE_BYTES + 1)
+    if len(data) > MAX_IMAGE_BYTES:
+        raise ValueError("image too large")
+    return data
+
+
+def dhash(image, size=8):
+    """
+    difference hash: גווני אפור, הקטנה ל-(size+1)×size, ביט לכל זוג פיקסלים שכנים.
+    עמיד לשינוי גודל ודחיסה; 64 ביט ל-size=8.
+    """
+    Image = _import_pil()
+    small = image.convert('L').resize((size + 1, size), Image.LANCZOS)
+    pixels = small.tobytes()  # מצב L: בייט לפיקסל
+    value = 0
+    for row in range(size):
+        for col in range(size):
+            left = pixels[row * (size + 1) + col]
+            right = pixels[row * (size + 1) + col + 1]
+            value = (value << 1) | (left > right)
+    return value
+
+
+def hamming(a, b):
+    return bin(a ^ b).count('1')
+
+
+class SeenHashes:
+    """
+    hashes של תמונות שכבר נשלחו (LRU), עם חיפוש לפי מרחק Hamming.
+    ה-hash מחולק ל-HAMMING_THRESHOLD+1 רצועות: שני hashes במרחק ≤ הסף זהים לפחות ברצועה אחת
+    (שובך היונים) - אז בודקים רק את המועמדים מאותן רצועות ולא את כל ה-LRU.
+    """
+
+    def __init__(self, capacity=SEEN_CAPACITY, threshold=HAMMING_THRESHOLD, bits=64):
+        self.capacity = capacity
+        self.threshold = threshold
+        self.bands = threshold + 1
+        self.band_bits = -(-bits // self.bands)
+        self._hashes = OrderedDict()
+        self._index = {}  # (band, value) → set של hashes
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._hashes)
+
+    def _band_keys(self, value):
+        mask = (1 << self.band_bits) - 1
+        return [(band, (value >> (band * self.band_bits)) & mask) for band in range(self.bands)]
+
+    def find(self, value):
+        """hash קרוב שכבר נראה (או None)"""
+        with self._lock:
+            for key in self._band_keys(value):
+                for candidate in self._index.get(key, ()):
+                    if hamming(candidate, value) <= self.threshold:
+                        self._hashes.move_to_end(candidate)
+                        return candidate
+        return None
+
+    def add(self, value):
+        with self._lock:
+            if value in self._hashes:
+                self._hashes.move_to_end(value)
+                return
+            self._hashes[value] = True
+            for key in self._band_keys(value):
+                self._index.setdefault(key, set()).add(value)
+
+            while len(self._hashes) > self.capacity:
+                old, _ = self._hashes.popitem(last=False)
+                for key in self._band_keys(old):
+                    bucket = self._index[key]
+                    bucket.discard(old)
+                    if not bucket:
+                        del self._index[key]
+
+
+class ImagePipeline:
+    """URLs מהסורק → מקורות תמונה ל-API (base64 thumbnail או URL)"""
+
+    def __init__(self, max_per_post=MAX_PER_POST, min_side=MIN_SIDE, thumbnail_side=THUMBNAIL_SIDE,
+                 send=SEND_THUMBNAIL, fetcher=fetch_url, seen=None):
+        self.max_per_post = max_per_post
+        self.min_side = min_side
+        self.thumbnail_side = thumbnail_side
+        self.send = send
+        self.fetcher = fetcher
+        self.seen = seen if seen is not None else SeenHashes()
+        self.Image = _import_pil()
+
+        self.stats = {'images_in': 0, 'sent': 0, 'capped': 0, 'icons': 0, 'duplicates': 0,
+                      'errors': 0, 'bytes_in': 0, 'bytes_out': 0}
+
+    @classmethod
+    def from_settings(cls, settings=None):
+        if settings is None:
+            from settings_manager import SettingsManager
+            settings = SettingsManager()
+        return cls(
+            max_per_post=settings.get('ai.images.max_per_post', MAX_PER_POST),
+            min_side=settings.get('ai.images.min_side', MIN_SIDE),
+            thumbnail_side=settings.get('ai.images.thumbnail_side', THUMBNAIL_SIDE),
+            send=settings.get('ai.images.send', SEND_THUMBNAIL)
+        )
+
+    def prepare(self, urls, pending=None):
+        """
+        Args:
+            urls: list של URLs מהסורק
+            pending: list - אם ניתן, ה-hashes של התמונות שנבחרו נאספים אליו ולא נרשמים כ"נשלחו";
+                     הקורא מעביר אותם ל-commit() רק אחרי שהקריאה ל-AI הצליחה
+
+        Returns:
+            list של מקורות תמונה: {"type": "base64", ...} או {"type": "url", ...}
+            (לכל היותר max_per_post; ריק אם כל התמונות כבר נשלחו בעבר)
+        """
+        urls = list(dict.fromkeys(urls or []))  # אותו URL פעמיים בפוסט
+        self.stats['images_in'] += len(urls)
+
+        if self.Image is None:
+            sources = [{"type": "url", "url": url} for url in urls[:self.max_per_post]]
+            self.stats['capped'] += max(len(urls) - self.max_per_post, 0)
+            self.stats['sent'] += len(sources)
+            return sources
+
+        sources = []
+        for i, url in enumerate(urls):
+            if len(sources) == self.max_per_post:
+                self.stats['capped'] += len(urls) - i
+                break
+            source = self._prepare_one(url, pending)
+            if source:
+                sources.append(source)
+        self.stats['sent'] += len(sources)
+        return sources
+
+    def commit(self, hashes):
+        """רושם תמונות שנשלחו בהצלחה (ה-pending מ-prepare)"""
+        for value in hashes:
+            self.seen.add(value)
+
+    def _prepare_one(self, url, pending=None):
+        try:
+            data = self.fetcher(url)
+            image = self.Image.open(io.BytesIO(data))
+            image.load()
+        except Exception as e:
+            print(f"  ⚠️ תמונה לא נטענה ({e})")
+            self.stats['errors'] += 1
+            return None
+        self.stats['bytes_in'] += len(data)
+
+        if min(image.size) < self.min_side:
+            self.stats['icons'] += 1
+            return None
+
+        value = dhash(image)
+        in_post = pending is not None and any(hamming(value, other) <= self.seen.threshold for other in pending)
+        if in_post or self.seen.find(value) is not None:
+            self.stats['duplicates'] += 1
+            return None
+        if pending is None:
+            self.seen.add(value)
+        else:
+            pending.append(value)
+
+        if self.send == SEND_URL:
+            return {"type": "url", "url": url}
+
+        image = image.convert('RGB')
+        image.thumbnail((self.thumbnail_side, self.thumbnail_side), self.Image.LANCZOS)
+        buffer = io.BytesIO()
+        image.save(buffer, format='JPEG', quality=JPEG_QUALITY, optimize=True)
+        thumbnail = buffer.getvalue()
+        self.stats['bytes_out'] += len(thumbnail)
+        return {"type": "base64", "media_type": "image/jpeg", "data": base64.b64encode(thumbnail).decode('ascii')}
@@ -7,11 +7,14 @@ import time
 import random
 from datetime import datetime, time as dt_time
 import threading
-from scraper import FacebookScraper
 from database import PostDatabase
+from events import get_event_bus, CYCLE_FINISHED, CHECK_SCHEDULED, SEARCH_MATCHED
+from saved_searches import SavedSearchStore, alert_payload
+from groups_store import GroupStore, HEALTHY, QUARANTINED, PROBE
+from browser_manager import BrowserManager, STANDBY
 import json
 import os
-from settings_manager import SettingsManager
+from settings_manager import SettingsManager, lowered
 
 
 class FacebookListener:
@@ -21,8 +24,13 @@ class FacebookListener:
         """אתחול המאזין"""
         self.settings = SettingsManager(config_path)
 
-        self.db = PostDatabase()
+        self.events = get_event_bus()
+        self.db = PostDatabase(event_bus=self.events)
+        self.saved_searches = SavedSearchStore(self.db.db_path)
+        self.group_store = GroupStore(self.db.db_path)
+        self._groups_version = None  # גרסת ההגדרות שמולה סונכרנה טבלת groups
         self.scraper = None
+        self.browser = BrowserManager.from_settings(self._create_browser, self.settings, log=self._log)
         self.is_listening = False
         self.is_cleaning = False
         self.stats = {
@@ -30,12 +38,20 @@ class FacebookListener:
             'new_posts': 0,
             'blacklisted': 0,
             'last_check': None,
-            'next_check': None
+            'next_check': None,
+            'groups_health': {},     # healthy / failing / quarantined / probe → כמות (קבוצות פעילות)
+            'browser': {}            # מדדי BrowserManager (uptime, restarts, RSS...)
         }
         self.status_callback = None
         self.new_post_callback = None
         self.settings.on_change(self._on_settings_changed)
 
+        # מפתחות שנקראים בכל פוסט / בכל סיבוב - handles מקומפלים
+        self._active_start = self.settings.accessor('listener.active_hours_start', 8, int)
+        self._active_end = self.settings.accessor('listener.active_hours_end', 23, int)
+        self._whitelist = self.settings.accessor('search_settings.whitelist', [], lowered)
+        self._blacklist = self.settings.accessor('search_settings.blacklist', [], lowered)
+
     def set_status_callback(self, callback):
         """מגדיר פונקציה לעדכון סטטוס בממשק"""
         self.status_callback = callback
@@ -55,24 +71,24 @@ class FacebookListener:
         else:
             print(full_message)
 
-    def _on_settings_changed(self, key, value):
+    def _on_settings_changed(self, changes):
         """
-        נקרא אוטומטית כשהגדרה משתנתה
+        נקרא אוטומטית כשהגדרות משתנות (פעם אחת לכל שמירה, גם אם השתנו כמה מפתחות)
 
         Args:
-            key: המפתח שהשתנה (למשל: 'listener.check_interval_min')
-            value: הערך החדש
+            changes: dict של מפתח → ערך חדש (למשל: {'listener.check_interval_min': 300})
         """
-        self._log(f"🔄 הגדרה עודכנה: {key} = {value}")
+        for key, value in changes.items():
+            self._log(f"🔄 הגדרה עודכנה: {key} = {value}")
 
         # טיפול ספציפי לפי סוג ההגדרה
-        if key.startswith('listener.'):
+        if any(key.startswith('listener.') for key in changes):
             self._log("✅ הגדרות ההאזנה עודכנו - ייכנסו לתוקף בבדיקה הבאה")
 
-        elif key.startswith('search_settings.blacklist'):
+        if any(key.startswith('search_settings.blacklist') for key in changes):
             self._log("✅ Blacklist עודכן - ייכנס לתוקף בבדיקה הבאה")
 
-        elif key == 'groups_urls':
+        if any(key.startswith('groups_') for key in changes):
             self._log("✅ רשימת קבוצות עודכנה - ייכנס לתוקף בבדיקה הבאה")
 
         # אפשר להוסיף לוגיקה נוספת כאן...
@@ -82,16 +98,8 @@ class FacebookListener:
         """בודק אם אנחנו בשעות פעילות"""
         now = datetime.now().time()
 
-        # חדש - משתמשים ב-settings
-        start_hour = self.settings.get('listener.active_hours_start', 8)
-        end_hour = self.settings.get('listener.active_hours_end', 23)
-
-        # ישן - מוערת
-        # start_hour = self.config['listener']['active_hours_start']
-        # end_hour = self.config['listener']['active_hours_end']
-
-        start_time = dt_time(start_hour, 0)
-        end_time = dt_time(end_hour, 0)
+        start_time = dt_time(self._active_start(), 0)
+        end_time = dt_time(self._active_end(), 0)
 
         return start_time <= now <= end_time
 
@@ -105,160 +113,201 @@ class FacebookListener:
         content_lower = content.lower()
 
         # שלב 1: בדוק whitelist - אם יש התאמה, אל תסנן!
-        whitelist = self.settings.get('search_settings.whitelist', [])
-        for phrase in whitelist:
-            if phrase.lower() in content_lower:
+        for _, phrase in self._whitelist():
+            if phrase in content_lower:
                 # נמצאה ביטוי מה-whitelist - זה פוסט לגיטימי!
                 return None
 
         # שלב 2: רק עכשיו בדוק blacklist
-        blacklist = self.settings.get('search_settings.blacklist', [])
-        for word in blacklist:
-            if word.lower() in content_lower:
+        for word, word_lower in self._blacklist():
+            if word_lower in content_lower:
                 return word  # נמצאה מילה אסורה
 
         return None
 
-    def _process_posts(self, posts, group_name):
-        """מעבד רשימת פוסטים - בודק blacklist ושומר ב-DB"""
-        last_known_id = self.db.get_last_post_id(group_name)
+    def _update_group_health(self, groups):
+        """סיכום בריאות הקבוצות הפעילות לסטטיסטיקות"""
+        urls = {g['url'] for g in groups if g['active']}
+        self.stats['groups_health'] = self.group_store.health_summary(urls)
+
+    def _use_deep_read(self, state):
+        """
+        scraper.read_mode: quick / deep / auto (ברירת מחדל).
+        auto → קריאה עמוקה לקבוצה שלא נסרקה עדיין, או שלא נסרקה יותר מ-after_idle_min דקות
+        (הפסקה ארוכה = ייתכן שפוסטים כבר ירדו מתחת למסך הראשון)
+        """
+        mode = self.settings.get('scraper.read_mode', 'auto')
+        if mode != 'auto':
+            return mode == 'deep'
+        last_scanned = state.get('last_scanned_at')
+        if not last_scanned:
+            return True
+        idle = datetime.now() - datetime.fromisoformat(last_scanned)
+        return idle.total_seconds() > self.settings.get('scraper.deep_read.after_idle_min', 30) * 60
+
+    def _deep_read_options(self):
+        """תקציב הקריאה העמוקה מההגדרות"""
+        options = {}
+        for key, name in (('max_posts', 'max_posts'), ('max_scrolls', 'max_scrolls'),
+                          ('time_budget_sec', 'time_budget'), ('scroll_pause', 'scroll_pause')):
+            value = self.settings.get(f'scraper.deep_read.{key}')
+            if value is not None:
+                options[name] = value
+        return options
+
+    def _process_posts(self, posts, group_name, last_known_id=None):
+        """
+        מעבד פוסטים - בודק blacklist ושומר ב-DB.
+        posts יכול להיות רשימה או generator (קריאה עמוקה) - כל פוסט מעובד כשהוא מגיע.
+
+        Args:
+            last_known_id: ה-cursor של הקבוצה - הפוסט החדש ביותר מהסריקה הקודמת (עוצרים בו)
+
+        Returns:
+            (new_count, blacklisted_count, read_count, newest_id) - newest_id הוא ה-cursor הבא
+        """
 
         new_count = 0
         blacklisted_count = 0
+        read_count = 0
+        newest_id = None
 
-        for post in posts:
-            if post['post_id'] == last_known_id:
-                break
-
-            blacklist_match = self._check_blacklist(post['content'])
-
-            post_data = {
-                'post_url': post['post_url'],
-                'post_id': post['post_id'],
-                'content': post['content'],
-                'author': post['author'],
-                'price': post.get('price'),
-                'rooms': post.get('rooms'),
-                'city': post.get('city'),
-                'group_name': group_name,
-                'blacklist_match': blacklist_match,
-                'is_relevant': 1 if blacklist_match is None else 0,
-                'scanned_at': datetime.now()
-            }
-
-            saved = self.db.save_post(post_data)
-
-            if saved:
-                new_count += 1
-                if blacklist_match:
-                    blacklisted_count += 1
-                    self._log(f"  🔴 סונן: '{post['content'][:50]}...' (מילה: {blacklist_match})")
-                else:
-                    self._log(f"  🟢 חדש: '{post['content'][:50]}...'")
-
-                    if self.new_post_callback:
-                        details = self.db.extract_details(post['content'])
-                        enriched_data = {
-                            **post_data,
-                            'price': details.get('price'),
-                            'rooms': details.get('rooms'),
-                            'city': details.get('city'),
-                            'location': details.get('location')
-                        }
-                        self.new_post_callback(enriched_data)
-
-        return new_count, blacklisted_count  # ← וודא שזה קיים!
-
-    def _ensure_browser_ready(self):
-        """מוודא שהדפדפן פתוח ופעיל"""
-        if not self.scraper:
-            self._log("⚠️ אין scraper - יוצר חדש...")
-            try:
-                self.scraper = FacebookScraper()
-                self.scraper.create_driver()
-                self._log("✓ דפדפן נוצר בהצלחה")
-                return True
-            except Exception as e:
-                self._log(f"❌ נכשל ליצור דפדפן: {str(e)}")
-                return False
+        try:
+            for post in posts:
+                read_count += 1
+                if newest_id is None:
+                    newest_id = post['post_id']
+                if post['post_id'] == last_known_id:
+                    break
+
+                new, blacklisted = self._process_post(post, group_name)
+                new_count += new
+                blacklisted_count += blacklisted
+        finally:
+            close = getattr(posts, 'close', None)
+            if close:
+                close()  # generator: עוצר את הגלילה
 
-        if not self.scraper.driver:
-            self._log("⚠️ אין driver - יוצר חדש...")
-            try:
-                self.scraper.create_driver()
-                self._log("✓ driver נוצר בהצלחה")
-                return True
-            except Exception as e:
-                self._log(f"❌ נכשל ליצור driver: {str(e)}")
-                return False
+        return new_count, blacklisted_count, read_count, newest_id
 
-        try:
-            _ = self.scraper.driver.current_url
-            return True
-        except Exception:
-            self._log("⚠️ דפדפן לא מגיב - פותח מחדש...")
-            try:
-                self.scraper.close()
-                self.scraper = FacebookScraper()
-                self.scraper.create_driver()
-                self._log("✓ דפדפן נפתח מחדש בהצלחה")
-                return True
-            except Exception as e:
-                self._log(f"❌ נכשל לפתוח דפדפן מחדש: {str(e)}")
-                self.scraper = None
-                return False
+    def _process_post(self, post, group_name):
+        """
+        פוסט אחד: blacklist → save_post → התראות וכרטיסייה
 
-    def _single_check(self):
-        """מבצע בדיקה בודדת - סורק את כל הקבוצות"""
+        Returns:
+            (נשמר?, סונן?) כ-0/1
+        """
+        blacklist_match = self._check_blacklist(post['content'])
+
+        post_data = {
+            'post_url': post['post_url'],
+            'post_id': post['post_id'],
+            'content': post['content'],
+            'author': post['author'],
+            'price': post.get('price'),
+            'rooms': post.get('rooms'),
+            'city': post.get('city'),
+            'images': post.get('images', []),
+            'group_name': group_name,
+            'blacklist_match': blacklist_match,
+            'is_relevant': 1 if blacklist_match is None else 0,
+            'scanned_at': datetime.now()
+        }
 
-        self.settings.reload()
+        # הפרטים כפי שנשמרו (Regex + מה שה-AI השלים) - אותם ערכים להתראות, לכרטיסייה ול-DB
+        stored = self.db.save_post(post_data)
 
-        print("\n" + "=" * 70)
-        print(f"🔄 מחזור סריקה חדש - {datetime.now().strftime('%H:%M:%S')}")
-        print("=" * 70)
+        if not stored:
+            return 0, 0
 
-        # טעינת רשימת קבוצות
-        groups_urls = self.settings.get('groups_urls', [])
-        groups_names = self.settings.get('groups_names', [])
-        posts_to_read = self.settings.get('listener.posts_to_read', 3)
+        if blacklist_match:
+            self._log(f"  🔴 סונן: '{post['content'][:50]}...' (מילה: {blacklist_match})")
+            return 1, 1
 
-        if not groups_urls:
-            self._log("❌ לא הוגדרו קבוצות ב-config!")
-            return
+        self._log(f"  🟢 חדש: '{post['content'][:50]}...'")
 
-        # ודא שיש מספר שווה של שמות
-        if len(groups_names) < len(groups_urls):
-            # השלם שמות חסרים
-            for i in range(len(groups_names), len(groups_urls)):
-                groups_names.append(f"קבוצה {i + 1}")
+        enriched_data = {
+            **post_data,
+            'price': stored.get('price'),
+            'rooms': stored.get('rooms'),
+            'city': stored.get('city'),
+            'location': stored.get('location')
+        }
 
-        if not self._ensure_browser_ready():
-            self._log("❌ אין דפדפן פעיל - מדלג על בדיקה זו")
-            return
+        # התראות: בדיקה רק מול החיפושים השמורים שבדליים של הפוסט
+        for search in self.saved_searches.match(enriched_data):
+            self._log(f"  🔔 מתאים לחיפוש '{search.name}'")
+            self.events.publish(SEARCH_MATCHED, alert_payload(search, enriched_data))
+
+        if self.new_post_callback:
+            self.new_post_callback(enriched_data)
 
-        # ========================================
-        # לולאה על כל הקבוצות! ← חדש!
-        # ========================================
+        return 1, 0
+
+    def _create_scraper(self):
+        """
+        יוצר FacebookScraper (או ReplayScraper - השמעת צילומים, ראה snapshot.py).
+        ה-import כאן ולא בראש הקובץ: selenium + undetected_chromedriver כבדים,
+        ואין סיבה שהחלון הראשי יחכה להם לפני שמתחילים להאזין.
+        """
+        from scraper import create_scraper
+        return create_scraper()
+
+    def _create_browser(self, profile):
+        """
+        factory ל-BrowserManager: סורק עם דפדפן פתוח על הפרופיל שה-manager ביקש
+        (Chrome נועל פרופיל; אחרי failover הראשי רץ על פרופיל ה-standby והתפקידים מתחלפים)
+        """
+        scraper = self._create_scraper()
+        profile_path = None
+        if profile == STANDBY:
+            profile_path = (self.settings.get('browser.standby_profile_path', '')
+                            or os.path.join(os.getcwd(), "fb_bot_profile_standby"))
+        scraper.create_driver(profile_path=profile_path)
+        return scraper
+
+    def _scan_groups(self, groups, posts_to_read):
+        """
+        לולאה על כל הקבוצות (הדפדפן כבר מוכן)
+
+        Returns:
+            (total_new, total_filtered)
+        """
         total_new = 0
         total_filtered = 0
 
-        for idx, group_url in enumerate(groups_urls):
-            group_name = groups_names[idx]
+        for group in groups:
+            group_url = group['url']
+            group_name = group['name']
 
-            self._log(f"🔍 סורק קבוצה: {group_name}")
+            state = self.group_store.get(group_url) or {}
+            probe = self.group_store.health(group_url) == PROBE
+            self._log(f"🔍 {'בודק שוב (probe)' if probe else 'סורק'} קבוצה: {group_name}")
+            started = time.perf_counter()
 
             try:
-                # סריקת הקבוצה
-                posts = self.scraper.quick_read_posts(group_url, max_posts=posts_to_read)
+                # סריקת הקבוצה: מהירה (מסך ראשון) או עמוקה (גלילה עד ה-cursor - השלמה אחרי הפסקה)
+                cursor = state.get('last_post_id')
+                if self._use_deep_read(state):
+                    self._log("📜 קריאה עמוקה עד הפוסט המוכר האחרון")
+                    posts = self.scraper.deep_read_posts(group_url, stop_ids={cursor}, **self._deep_read_options())
+                else:
+                    posts = self.scraper.quick_read_posts(group_url, max_posts=posts_to_read)
 
-                if not posts:
+                # עיבוד פוסטים (עד ה-cursor של הקבוצה) - בקריאה עמוקה תוך כדי גלילה
+                new_count, blacklisted_count, read_count, newest_id = self._process_posts(posts, group_name, cursor)
+                self.browser.page_loaded()
+
+                if not read_count:
+                    # דף בלי פוסטים בכלל = בדרך כלל חומת התחברות או קבוצה שנמחקה
                     self._log(f"⚠️ לא נמצאו פוסטים בקבוצה '{group_name}'")
+                    self.group_store.record_scan(group_url, time.perf_counter() - started,
+                                                 ok=False, error="no posts on page")
                     continue
 
-                self._log(f"📊 נמצאו {len(posts)} פוסטים בקבוצה '{group_name}'")
-
-                # עיבוד פוסטים
-                new_count, blacklisted_count = self._process_posts(posts, group_name)
+                self._log(f"📊 נקראו {read_count} פוסטים בקבוצה '{group_name}'")
+                self.group_store.record_scan(group_url, time.perf_counter() - started,
+                                             last_post_id=newest_id)
 
                 # צבירת סטטיסטיקות
                 total_new += new_count
@@ -268,27 +317,90 @@ class FacebookListener:
 
             except Exception as e:
                 self._log(f"❌ שגיאה בסריקת '{group_name}': {str(e)}")
+                self.group_store.record_scan(group_url, time.perf_counter() - started,
+                                             ok=False, error=str(e))
                 continue
 
+            finally:
+                health = self.group_store.health(group_url)
+                if health == QUARANTINED:
+                    until = self.group_store.get(group_url)['quarantined_until']
+                    self._log(f"🚫 '{group_name}' נכנסה להסגר עד {until}")
+                elif probe and health == HEALTHY:
+                    self._log(f"✅ '{group_name}' חזרה לסריקה רגילה")
+
+        return total_new, total_filtered
+
+    def _single_check(self):
+        """מבצע בדיקה בודדת - סורק את כל הקבוצות"""
+
+        self.settings.reload()  # קורא את הקובץ רק אם נערך מבחוץ
+
+        print("\n" + "=" * 70)
+        print(f"🔄 מחזור סריקה חדש - {datetime.now().strftime('%H:%M:%S')}")
+        print("=" * 70)
+
+        # טעינת רשימת קבוצות (מהזיכרון; שמות חסרים מושלמים, קבוצות מושהות מדולגות)
+        all_groups = self.settings.get_groups()
+        groups = [g for g in all_groups if g['active']]
+        if self._groups_version != self.settings.version:
+            self.group_store.sync(all_groups)  # רק כשההגדרות השתנו
+            self._groups_version = self.settings.version
+        posts_to_read = self.settings.get('listener.posts_to_read', 3)
+
+        if not all_groups:
+            self._log("❌ לא הוגדרו קבוצות ב-config!")
+            return
+
+        if not groups:
+            self._log("⏸ כל הקבוצות מושהות - אין מה לסרוק")
+            return
+
+        if len(groups) < len(all_groups):
+            self._log(f"⏸ {len(all_groups) - len(groups)} קבוצות מושהות - מדלג עליהן")
+
+        # קבוצות שנכשלות שוב ושוב בהסגר; כשההסגר נגמר - probe אחד למחזור
+        groups, quarantined = self.group_store.plan(groups)
+        for group in quarantined:
+            self._log(f"🚫 '{group['name']}' בהסגר - מדלג")
+        if not groups:
+            self._log("🚫 כל הקבוצות הפעילות בהסגר - אין מה לסרוק")
+            self._update_group_health(all_groups)
+            return
+
+        # בזמן הסריקה בדיקת הבריאות ברקע לא נוגעת בדפדפן (WebDriver לא thread-safe)
+        with self.browser.session() as scraper:
+            self.scraper = scraper
+            if scraper is None:
+                self._log("❌ אין דפדפן פעיל - מדלג על בדיקה זו")
+                return
+            total_new, total_filtered = self._scan_groups(groups, posts_to_read)
+
+        self.group_store.flush()  # כתיבה אחת של כל ה-cursors במחזור
+        self._update_group_health(all_groups)
+
         # עדכון סטטיסטיקות כלליות
         self.stats['new_posts'] += total_new
         self.stats['blacklisted'] += total_filtered
         self.stats['checks_today'] += 1
         self.stats['last_check'] = datetime.now()
 
+        self.events.publish(CYCLE_FINISHED, {
+            'checks_today': self.stats['checks_today'],
+            'groups_health': self.stats['groups_health'],
+            'new_posts': total_new,
+            'filtered': total_filtered,
+            'last_check': self.stats['last_check']
+        })
+
         print("\n" + "=" * 70)
         self._log(f"🎯 סיום מחזור: {total_new} פוסטים חדשים סה״כ ({total_filtered} סוננו)")
         print("=" * 70)
 
-        # טיפול בשגיאות דפדפן
-        if not self.scraper or not self.scraper.driver:
-            try:
-                if self.scraper:
-                    self.scraper.close()
-                self.scraper = None
-                self._log("🔄 דפדפן אופס - יפתח מחדש בבדיקה הבאה")
-            except Exception:
-                pass
+        # בין מחזורים: מחזור הדפדפן אם עבר את תקרת הדפים / הזיכרון
+        self.browser.maybe_recycle()
+        self.scraper = self.browser.scraper
+        self.stats['browser'] = self.browser.metrics()
 
     def start_listening(self):
         """מתחיל האזנה רציפה"""
@@ -300,32 +412,25 @@ class FacebookListener:
             self._log("⚠️ מנקה משאבים - חכה קצת...")
             return False
 
-        if self.scraper and self.scraper.driver:
-            self._log("🧹 מוצא דפדפן ישן - סוגר...")
-            try:
-                self.scraper.close()
-            except Exception:
-                pass
-            self.scraper = None
-
         self.is_listening = True
         self.stats = {
             'checks_today': 0,
             'new_posts': 0,
             'blacklisted': 0,
             'last_check': None,
-            'next_check': None
+            'next_check': None,
+            'groups_health': {},     # healthy / failing / quarantined / probe → כמות (קבוצות פעילות)
+            'browser': {}            # מדדי BrowserManager (uptime, restarts, RSS...)
         }
 
-        self._log("🚀 פותח דפדפן חדש...")
-        try:
-            self.scraper = FacebookScraper()
-            self.scraper.create_driver()
-            self._log("✓ דפדפן נפתח בהצלחה")
-        except Exception as e:
-            self._log(f"❌ שגיאה בפתיחת דפדפן: {str(e)}")
+        # דפדפן שעדיין פתוח ועונה - ממשיכים איתו; אחרת standby / חדש
+        self._log("🚀 מכין דפדפן...")
+        self.scraper = self.browser.start()
+        if self.scraper is None:
+            self._log("❌ שגיאה בפתיחת דפדפן")
             self.is_listening = False
             return False
+        self._log("✓ דפדפן מוכן")
 
         thread = threading.Thread(target=self._listen_loop, daemon=True)
         thread.start()
@@ -338,13 +443,7 @@ class FacebookListener:
         try:
             while self.is_listening:
                 if not self._is_active_hours():
-                    # חדש - משתמשים ב-settings
-                    start_hour = self.settings.get('listener.active_hours_start', 8)
-
-                    # ישן - מוערת
-                    # start_hour = self.config['listener']['active_hours_start']
-
-                    self._log(f"😴 מחוץ לשעות פעילות - ישן עד {start_hour}:00")
+                    self._log(f"😴 מחוץ לשעות פעילות - ישן עד {self._active_start()}:00")
                     time.sleep(3600)
                     continue
 
@@ -360,6 +459,7 @@ class FacebookListener:
 
                 wait_time = random.randint(min_interval, max_interval)
                 self.stats['next_check'] = datetime.now().timestamp() + wait_time
+                self.events.publish(CHECK_SCHEDULED, {'next_check': self.stats['next_check']})
 
                 minutes = wait_time // 60
                 self._log(f"⏰ ממתין {minutes} דקות עד הבדיקה הבאה...")
@@ -381,15 +481,10 @@ class FacebookListener:
         """ניקוי משאבים"""
         self.is_cleaning = True
 
-        if self.scraper:
-            try:
-                self._log("🔒 סוגר דפדפן...")
-                self.scraper.close()
-                self._log("✓ דפדפן נסגר בהצלחה")
-            except Exception as e:
-                self._log(f"⚠️ שגיאה בסגירת דפדפן: {str(e)}")
-            finally:
-                self.scraper = None
+        self._log("🔒 סוגר דפדפן...")
+        self.browser.close()
+        self.scraper = None
+        self._log(f"✓ דפדפן נסגר ({self.browser.metrics()})")
 
         time.sleep(1)
         self.is_cleaning = False
@@ -0,0 +1,147 @@
+"""
+live_stats.py - מונים רצים בזיכרון עבור הדשבורד
+נזרעים מה-DB פעם אחת (בעלייה / ברענון ידני) ומשם מתעדכנים רק מאירועים של ה-EventBus.
+"""
+
+import threading
+from datetime import date, timedelta
+
+from events import POST_SAVED, POST_FILTERED, CYCLE_FINISHED, CHECK_SCHEDULED
+
+# חלון "שבוע" - זהה ל-PostDatabase.get_week_stats
+WEEK_DAYS = 7
+
+
+class LiveStats:
+    """מונים לדשבורד: היום, שבוע, מחיר ממוצע, עיר מובילה, בדיקות"""
+
+    def __init__(self, event_bus):
+        """
+        Args:
+            event_bus: ה-EventBus שממנו מגיעים האירועים
+        """
+        self._lock = threading.Lock()
+        self._reset_counters()
+
+        event_bus.subscribe(POST_SAVED, self._on_post)
+        event_bus.subscribe(POST_FILTERED, self._on_post)
+        event_bus.subscribe(CYCLE_FINISHED, self._on_cycle_finished)
+        event_bus.subscribe(CHECK_SCHEDULED, self._on_check_scheduled)
+
+    def _reset_counters(self):
+        self.day = date.today()
+        self.today_total = 0          # כל הפוסטים שנשמרו היום (כמו get_stats()['today'])
+        self.relevant_per_day = {}    # date → כמות רלוונטיים (לחלון השבועי)
+        self.price_sum = 0            # מחירי היום (רלוונטיים)
+        self.price_count = 0
+        self.city_counts = {}         # עיר → כמות היום (רלוונטיים)
+        self.checks_today = 0
+        self.next_check = None
+
+    # =========================================================
+    #  זריעה מה-DB (עלייה + רענון ידני בלבד!)
+    # =========================================================
+    def seed(self, db, analytics):
+        """
+        טוען ערכי פתיחה מהדאטאבייס
+
+        Args:
+            db: PostDatabase
+            analytics: Analytics
+        """
+        today_total = db.get_stats()['today']
+        relevant_per_day = db.get_relevant_per_day(WEEK_DAYS)
+        breakdown = analytics.get_today_breakdown()
+
+        with self._lock:
+            self.day = date.today()
+            self.today_total = today_total
+            self.relevant_per_day = {date.fromisoformat(d): c for d, c in relevant_per_day.items()}
+            self.price_sum = breakdown['price_sum']
+            self.price_count = breakdown['price_count']
+            self.city_counts = dict(breakdown['cities'])
+
+    def reset_session(self):
+        """איפוס מוני הסשן (בדיקות) - בהתחלת האזנה חדשה"""
+        with self._lock:
+            self.checks_today = 0
+            self.next_check = None
+
+    # =========================================================
+    #  טיפול באירועים
+    # =========================================================
+    def _roll_day_if_needed(self):
+        """מעבר יום: מאפס את מוני "היום" (נקרא תחת lock)"""
+        today = date.today()
+        if today != self.day:
+            self.day = today
+            self.today_total = 0
+            self.price_sum = 0
+            self.price_count = 0
+            self.city_counts = {}
+
+    def _on_post(self, post):
+        with self._lock:
+            self._roll_day_if_needed()
+            self.today_total += 1
+
+            if not post.get('is_relevant'):
+                return
+
+            self.relevant_per_day[self.day] = self.relevant_per_day.get(self.day, 0) + 1
+
+            price = _to_int(post.get('price'))
+            if price is not None:
+                self.price_sum += price
+                self.price_count += 1
+
+            city = post.get('city')
+            if city:
+                self.city_counts[city] = self.city_counts.get(city, 0) + 1
+
+    def _on_cycle_finished(self, payload):
+        with self._lock:
+            self.checks_today = payload.get('checks_today', self.checks_today + 1)
+
+    def _on_check_scheduled(self, payload):
+        with self._lock:
+            self.next_check = payload.get('next_check')
+
+    # =========================================================
+    #  קריאה (מה-main loop של Tk)
+    # =========================================================
+    def snapshot(self):
+        """
+        Returns:
+            dict: {'today', 'week', 'avg_price', 'popular_city', 'checks_today', 'next_check'}
+        """
+        with self._lock:
+            self._roll_day_if_needed()
+
+            week_start = self.day - timedelta(days=WEEK_DAYS)
+            week = sum(c for d, c in self.relevant_per_day.items() if d >= week_start)
+
+            if self.city_counts:
+                city, count = max(self.city_counts.items(), key=lambda item: item[1])
+                popular_city = f"{city} ({count})"
+            else:
+                popular_city = "אין נתונים"
+
+            return {
+                'today': self.today_total,
+                'week': week,
+                'avg_price': int(self.price_sum / self.price_count) if self.price_count else 0,
+                'popular_city': popular_city,
+                'checks_today': self.checks_today,
+                'next_check': self.next_check
+            }
+
+
+def _to_int(value):
+    """ממיר מחיר (טקסט מה-DB) למספר - כמו CAST(price AS INTEGER)"""
+    if value is None or value == '':
+        return None
+    try:
+        return int(str(value).replace(',', '').strip())
+    except (ValueError, TypeError):
+        return None
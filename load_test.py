@@ -0,0 +1,409 @@
+"""
+load_test.py - בדיקת עומס למחזור של FacebookListener (_single_check) מקצה לקצה
+כמה קבוצות ופוסטים למחזור המערכת מחזיקה לפני שמחזור חורג מ-check_interval_min?
+
+המחזור רץ כמו שהוא (settings → groups_store → BrowserManager → _process_posts → save_post → AI),
+רק שני הקצוות מוחלפים:
+  LoadScraper  - N קבוצות × M פוסטים (תוכן מ-synthetic_data), פיד שמתקדם בכל מחזור:
+                 dup_rate = החלק מהפיד שכבר נראה במחזור קודם (ה-cursor עוצר בו)
+  AI           - RecordingClient בהשמעה (ai_recorder) עם זמן תגובה מוגדר; בקשה שלא הוקלטה → synthetic
+
+לכל מחזור: זמן כולל, פירוק לשלבים (scrape / filters / save_post / ai / groups / other),
+גודל ה-DB ו-RSS. בסוף: עקומת קיבולת - זמן מחזור יציב כפונקציה של מספר הקבוצות
+(התאמה לינארית לכל M) ומספר הקבוצות המקסימלי שעוד נכנס במרווח הבדיקה.
+
+הרצה:
+  python load_test.py --groups 5,10,20,40 --posts 3,10 --cycles 3 --dup-rate 0.7 --ai-latency 0.8
+  python load_test.py --groups 10 --posts 5 --profile
+"""
+
+import argparse
+import contextlib
+import csv
+import io
+import json
+import os
+import statistics
+import tempfile
+import time
+from functools import wraps
+from types import SimpleNamespace
+
+import ai_recorder
+from synthetic_data import generate_posts, INSERT_COLUMNS
+
+STAGES = ('scrape', 'filters', 'save_post', 'ai', 'groups', 'other')
+
+_CONTENT = INSERT_COLUMNS.index('content')
+_AUTHOR = INSERT_COLUMNS.index('author')
+
+
+def _import_psutil():
+    try:
+        import psutil
+        return psutil
+    except ImportError:
+        return None
+
+
+def rss_mb():
+    """RSS של התהליך (MB) - psutil אם מותקן, אחרת שיא ה-RSS (resource), אחרת None"""
+    psutil = _import_psutil()
+    if psutil is not None:
+        return psutil.Process().memory_info().rss / (1024 * 1024)
+    try:
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # Linux: KB
+    except ImportError:
+        return None
+
+
+def db_size_mb(db_path):
+    """posts.db + קובץ ה-WAL (אם יש)"""
+    total = 0
+    for path in (db_path, db_path + '-wal'):
+        if os.path.exists(path):
+            total += os.path.getsize(path)
+    return total / (1024 * 1024)
+
+
+# =========================================================
+#  מדידת שלבים
+# =========================================================
+
+class StageTimer:
+    """זמן מצטבר לכל שלב - עוטף מתודות של אובייקטים חיים (בלי לשנות את הקוד שלהם)"""
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.seconds = dict.fromkeys(STAGES, 0.0)
+        self.calls = dict.fromkeys(STAGES, 0)
+
+    def add(self, stage, seconds):
+        self.seconds[stage] += seconds
+        self.calls[stage] += 1
+
+    def wrap(self, obj, name, stage):
+        original = getattr(obj, name)
+
+        @wraps(original)
+        def timed(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return original(*args, **kwargs)
+            finally:
+                self.add(stage, time.perf_counter() - started)
+
+        setattr(obj, name, timed)
+
+    def breakdown(self, total):
+        """
+        save_post כולל את קריאות ה-AI - מוצג בלעדיהן; other = מה שלא נמדד (אירועים, חיפושים שמורים...)
+        """
+        stages = dict(self.seconds)
+        stages['save_post'] = max(stages['save_post'] - stages['ai'], 0.0)
+        stages['other'] = max(total - sum(v for k, v in stages.items() if k != 'other'), 0.0)
+        return {k: round(v, 4) for k, v in stages.items()}
+
+
+# =========================================================
+#  סורק מדומה
+# =========================================================
+
+class LoadFeed:
+    """הפיד של כל הקבוצות: advance() מוסיף פוסטים חדשים בראש כל קבוצה (חדש → ישן)"""
+
+    def __init__(self, group_urls, posts_per_group, dup_rate, seed=42):
+        self.group_urls = group_urls
+        self.posts_per_group = posts_per_group
+        self.dup_rate = dup_rate
+        self.feeds = {url: [] for url in group_urls}
+        self._contents = generate_posts(10 ** 9, seed=seed)  # generator - רק מה שנצרך
+        self._next_id = 0
+
+    def advance(self):
+        """
+        מחזור חדש: במחזור הראשון כל M הפוסטים חדשים, אחר כך M × (1 - dup_rate) לכל קבוצה
+
+        Returns:
+            כמה פוסטים חדשים נוספו (בכל הקבוצות)
+        """
+        first = not any(self.feeds.values())
+        fresh = self.posts_per_group if first else round(self.posts_per_group * (1 - self.dup_rate))
+        for url, feed in self.feeds.items():
+            new_posts = [self._make_post(url) for _ in range(fresh)]
+            feed[:0] = reversed(new_posts)  # האחרון שנוצר הוא החדש ביותר
+        return fresh * len(self.feeds)
+
+    def _make_post(self, group_url):
+        row = next(self._contents)
+        self._next_id += 1
+        post_id = str(self._next_id)
+        return {'post_url': f"{group_url}/posts/{post_id}", 'post_id': post_id,
+                'content': row[_CONTENT], 'author': row[_AUTHOR], 'images': []}
+
+    def top(self, group_url, count):
+        return [dict(post) for post in self.feeds[group_url][:count]]
+
+
+class LoadScraper:
+    """אותו ממשק כמו FacebookScraper, מעל LoadFeed (page_load = המתנה מדומה לכל קבוצה)"""
+
+    def __init__(self, feed, timer, page_load=0.0):
+        self.feed = feed
+        self.timer = timer
+        self.page_load = page_load
+        self.driver = SimpleNamespace(current_url='about:blank')
+
+    def quick_read_posts(self, group_url, max_posts=3):
+        started = time.perf_counter()
+        if self.page_load:
+            time.sleep(self.page_load)
+        posts = self.feed.top(group_url, max_posts)
+        self.timer.add('scrape', time.perf_counter() - started)
+        return posts
+
+    def deep_read_posts(self, group_url, stop_ids=(), max_posts=60, **budget):
+        """generator כמו ב-FacebookScraper: עוצר בפוסט מוכר (ומחזיר אותו) או בתקרה"""
+        posts = self.quick_read_posts(group_url, max_posts)
+        for post in posts:
+            yield post
+            if post['post_id'] in stop_ids:
+                return
+
+    def close(self):
+        self.driver = None
+
+
+# =========================================================
+#  תרחיש
+# =========================================================
+
+def _write_config(path, groups, posts, read_mode, interval):
+    config = {
+        'groups_urls': [f"https://www.facebook.com/groups/load{i}" for i in range(groups)],
+        'groups_names': [f"קבוצת עומס {i + 1}" for i in range(groups)],
+        'groups_active': [True] * groups,
+        'search_settings': {'cities': [], 'blacklist': ['הובלות'], 'whitelist': []},
+        'listener': {'check_interval_min': interval, 'check_interval_max': interval, 'posts_to_read': posts},
+        'scraper': {'page_load_wait': 0, 'read_mode': read_mode},
+        'browser': {'health_interval_sec': 0, 'standby': False}
+    }
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(config, f, ensure_ascii=False, indent=2)
+    return config['groups_urls']
+
+
+def run_scenario(groups, posts, cycles=3, dup_rate=0.7, ai_latency=0.8, ai_jitter=0.0, ai_min_delay=None,
+                 page_load=0.0, read_mode='quick', recording=None, interval=360, verbose=False):
+    """
+    מריץ cycles מחזורים של _single_check על N קבוצות × M פוסטים, בתיקייה זמנית (DB ו-config משלה)
+
+    Args:
+        ai_latency: שניות לכל קריאת AI (None = הזמן שהוקלט ב-recording)
+        ai_min_delay: ההמתנה המינימלית בין קריאות AI (None = כמו ב-AIAgents)
+        page_load: שניות "טעינת דף" לכל קבוצה
+        recording: הקלטת AI (ai_recorder) - בלעדיה כל התשובות synthetic
+
+    Returns:
+        list של dict לכל מחזור: seconds, stages, fed_posts (חדשים בפיד), processed_posts (הגיעו ל-save_post),
+        new_posts (נשמרו כחדשים - בלי מסוננים), db_mb, rss_mb
+    """
+    from settings_manager import SettingsManager
+    from ai_agents import AIAgents
+    from browser_manager import BrowserManager
+    from listener import FacebookListener
+
+    saved_cwd = os.getcwd()
+    saved_instance = SettingsManager._instance
+    saved_env = os.environ.get(ai_recorder.ENV_REPLAY)
+    tmp = tempfile.TemporaryDirectory()
+    listener = None
+    output = contextlib.nullcontext() if verbose else contextlib.redirect_stdout(io.StringIO())
+
+    try:
+        os.chdir(tmp.name)  # posts.db של ה-listener נוצר כאן
+        config_path = os.path.join(tmp.name, 'config.json')
+        group_urls = _write_config(config_path, groups, posts, read_mode, interval)
+        recording = os.path.abspath(os.path.join(saved_cwd, recording)) if recording else os.path.join(tmp.name, 'none.jsonl')
+        os.environ[ai_recorder.ENV_REPLAY] = recording  # AIAgents בלי API key
+
+        timer = StageTimer()
+        feed = LoadFeed(group_urls, posts, dup_rate)
+        results = []
+
+        with output:
+            SettingsManager._instance = None
+            SettingsManager(config_path)
+            listener = FacebookListener(config_path)
+            listener.browser = BrowserManager(lambda role: LoadScraper(feed, timer, page_load),
+                                              health_interval=0, rss_reader=lambda scraper: None,
+                                              log=listener._log)
+
+            ai = AIAgents()
+            if ai_min_delay is not None:
+                ai.min_delay = ai_min_delay
+            ai.client = ai_recorder.RecordingClient(recording, ai_recorder.MODE_REPLAY, latency=ai_latency,
+                                                    jitter=ai_jitter, on_miss=ai_recorder.ON_MISS_SYNTHETIC)
+            listener.db.ai_agents = ai
+
+            timer.wrap(ai.client, 'create', 'ai')
+            timer.wrap(listener.db, 'save_post', 'save_post')
+            timer.wrap(listener, '_check_blacklist', 'filters')
+            for name in ('sync', 'plan', 'flush'):
+                timer.wrap(listener.group_store, name, 'groups')
+
+            for cycle in range(1, cycles + 1):
+                fed = feed.advance()
+                timer.reset()
+                before = listener.stats['new_posts']
+                started = time.perf_counter()
+                listener._single_check()
+                seconds = time.perf_counter() - started
+                memory = rss_mb()
+
+                results.append({
+                    'cycle': cycle,
+                    'seconds': round(seconds, 4),
+                    'stages': timer.breakdown(seconds),
+                    'fed_posts': fed,
+                    'processed_posts': timer.calls['save_post'],
+                    'new_posts': listener.stats['new_posts'] - before,
+                    'db_mb': round(db_size_mb(listener.db.db_path), 3),
+                    'rss_mb': round(memory, 1) if memory is not None else None
+                })
+        return results
+
+    finally:
+        if listener is not None:
+            listener.browser.close()
+        SettingsManager._instance = saved_instance
+        if saved_env is None:
+            os.environ.pop(ai_recorder.ENV_REPLAY, None)
+        else:
+            os.environ[ai_recorder.ENV_REPLAY] = saved_env
+        os.chdir(saved_cwd)
+        tmp.cleanup()
+
+
+# =========================================================
+#  עקומת קיבולת
+# =========================================================
+
+def steady_seconds(results):
+    """זמן מחזור יציב (חציון המחזורים אחרי הראשון - הראשון "קר": כל הפוסטים חדשים)"""
+    steady = results[1:] or results
+    return statistics.median(r['seconds'] for r in steady)
+
+
+def fit_capacity(points, interval):
+    """
+    התאמה לינארית seconds ≈ base + per_group × groups
+
+    Args:
+        points: list של (groups, seconds)
+        interval: מרווח הבדיקה (שניות)
+
+    Returns:
+        (base, per_group, max_groups) - max_groups = None אם אי אפשר להעריך
+    """
+    if len(points) == 1:
+        groups, seconds = points[0]
+        base, per_group = 0.0, seconds / groups
+    else:
+        mean_x = statistics.mean(g for g, _ in points)
+        mean_y = statistics.mean(s for _, s in points)
+        var_x = sum((g - mean_x) ** 2 for g, _ in points)
+        per_group = sum((g - mean_x) * (s - mean_y) for g, s in points) / var_x if var_x else 0.0
+        base = mean_y - per_group * mean_x
+
+    if per_group <= 0:
+        return base, per_group, None
+    return base, per_group, max(int((interval - base) / per_group), 0)
+
+
+def run_sweep(group_counts, post_counts, interval, csv_path=None, **options):
+    rows = []
+    print(f"{'קבוצות':>7} {'פוסטים':>7} {'קר':>8} {'יציב':>8} {'max':>8} "
+          + ' '.join(f"{s:>9}" for s in STAGES) + f" {'DB MB':>7} {'RSS MB':>7}")
+
+    for posts in post_counts:
+        points = []
+        for groups in group_counts:
+            results = run_scenario(groups, posts, interval=interval, **options)
+            steady = steady_seconds(results)
+            last = results[-1]
+            points.append((groups, steady))
+            rows.append({'groups': groups, 'posts': posts, 'cold_seconds': results[0]['seconds'],
+                         'steady_seconds': round(steady, 4),
+                         'max_seconds': max(r['seconds'] for r in results),
+                         **{f"{s}_seconds": last['stages'][s] for s in STAGES},
+                         'processed_posts': last['processed_posts'], 'db_mb': last['db_mb'], 'rss_mb': last['rss_mb'],
+                         'fits': steady <= interval})
+            row = rows[-1]
+            mark = '✅' if row['fits'] else '❌'
+            print(f"{groups:>7} {posts:>7} {row['cold_seconds']:>8.2f} {steady:>8.2f} {row['max_seconds']:>8.2f} "
+                  + ' '.join(f"{last['stages'][s]:>9.3f}" for s in STAGES)
+                  + f" {last['db_mb']:>7.2f} {last['rss_mb'] or 0:>7.1f} {mark}")
+
+        base, per_group, max_groups = fit_capacity(points, interval)
+        print(f"📈 {posts} פוסטים/קבוצה: מחזור ≈ {base:.2f}s + {per_group:.3f}s × קבוצות"
+              f" → עד {max_groups if max_groups is not None else '∞'} קבוצות ב-{interval}s")
+
+    if csv_path:
+        with open(csv_path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+            writer.writeheader()
+            writer.writerows(rows)
+        print(f"💾 {csv_path}")
+    return rows
+
+
+def _int_list(text):
+    return [int(part) for part in text.split(',') if part.strip()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="בדיקת עומס למחזור ה-listener")
+    parser.add_argument('--groups', type=_int_list, default=[5, 10, 20], help='מספרי קבוצות (פסיקים)')
+    parser.add_argument('--posts', type=_int_list, default=[3], help='פוסטים לקבוצה (פסיקים)')
+    parser.add_argument('--cycles', type=int, default=3)
+    parser.add_argument('--dup-rate', type=float, default=0.7, help='חלק הפיד שכבר נראה (0-1)')
+    parser.add_argument('--ai-latency', type=float, default=0.8, help='שניות לקריאת AI')
+    parser.add_argument('--ai-jitter', type=float, default=0.0)
+    parser.add_argument('--ai-min-delay', type=float, default=None, help='המתנה בין קריאות AI (ברירת מחדל: כמו ב-AIAgents)')
+    parser.add_argument('--page-load', type=float, default=0.0, help='שניות טעינת דף לקבוצה')
+    parser.add_argument('--read-mode', choices=('quick', 'deep', 'auto'), default='quick')
+    parser.add_argument('--recording', default=None, help='הקלטת AI (ai_recorder) במקום תשובות synthetic')
+    parser.add_argument('--interval', type=int, default=None, help='תקציב המחזור בשניות (ברירת מחדל: check_interval_min)')
+    parser.add_argument('--csv', default=None)
+    parser.add_argument('--profile', action='store_true', help='cProfile על התרחיש הראשון')
+    parser.add_argument('--verbose', action='store_true', help='להציג את הלוג של ה-listener')
+    args = parser.parse_args()
+
+    interval = args.interval
+    if interval is None:
+        from settings_manager import SettingsManager
+        interval = SettingsManager().get('listener.check_interval_min', 360)
+
+    options = dict(cycles=args.cycles, dup_rate=args.dup_rate, ai_latency=args.ai_latency,
+                   ai_jitter=args.ai_jitter, ai_min_delay=args.ai_min_delay, page_load=args.page_load,
+                   read_mode=args.read_mode, recording=args.recording, verbose=args.verbose)
+
+    if args.profile:
+        import cProfile
+        import pstats
+        profiler = cProfile.Profile()
+        results = profiler.runcall(run_scenario, args.groups[0], args.posts[0], interval=interval, **options)
+        pstats.Stats(profiler).sort_stats('cumulative').print_stats(25)
+        for result in results:
+            print(result)
+        return
+
+    run_sweep(args.groups, args.posts, interval, csv_path=args.csv, **options)
+
+
+if __name__ == "__main__":
+    main()
@@ -7,11 +7,12 @@ from tkinter import ttk, messagebox, filedialog
 from listener import FacebookListener
 from database import PostDatabase
 from analytics import Analytics
+from events import get_event_bus, POST_SAVED, POST_FILTERED, CYCLE_FINISHED, CHECK_SCHEDULED
+from live_stats import LiveStats
 import threading
 from datetime import datetime
 import os
 import time
-import webbrowser
 import re
 
 # --- הגדרות צבעים ועיצוב ---
@@ -29,6 +30,40 @@ COLORS = {
     'sub_text': '#95a5a6'    # צבע טקסט קטן
 }
 
+# --- כרטיסיות עיר-שכונה ---
+ALLOWED_CITIES = ['ירושלים', 'בית שמש', 'בני ברק']
+BORDER_COLORS = ['#27ae60', '#2980b9', '#8e44ad', '#2c3e50', '#d35400', '#16a085']  # צבעים למסגרות
+COLS_PER_CITY = 4             # 4 עמודות בתוך כל עיר - כדי לנצל את הרוחב
+CITY_CARDS_DEBOUNCE_MS = 300  # פוסטים שמגיעים בתוך החלון → עדכון אחד
+DASHBOARD_POLL_MS = 250       # ה-main loop בודק אם הגיעו אירועים מה-listener
+
+
+def diff_neighborhood_cards(cards, stats):
+    """
+    משווה בין הכרטיסים המוצגים לנתונים העדכניים
+
+    Args:
+        cards: {(עיר, שכונה): {'index', 'count', ...}} - מה שמוצג עכשיו
+        stats: {עיר: {שכונה: כמות}} - לפי סדר התצוגה (כמות יורדת בתוך עיר)
+
+    Returns:
+        (added, updated, removed): added/updated = {(עיר, שכונה): (מיקום, כמות)},
+        removed = רשימת מפתחות שכבר לא בנתונים
+    """
+    added, updated = {}, {}
+    for city, neighborhoods in stats.items():
+        for index, (neighborhood, count) in enumerate(neighborhoods.items()):
+            key = (city, neighborhood)
+            card = cards.get(key)
+            if card is None:
+                added[key] = (index, count)
+            elif card['index'] != index or card['count'] != count:
+                updated[key] = (index, count)
+
+    removed = [key for key in cards
+               if key[0] not in stats or key[1] not in stats[key[0]]]
+    return added, updated, removed
+
 class GuardianGUI:
     def __init__(self, root):
         self.root = root
@@ -45,6 +80,12 @@ class GuardianGUI:
         self.analytics = Analytics()
         self.session_start_time = None
 
+        # מונים בזיכרון - DB נשאל רק כאן וברענון ידני, השאר מגיע מאירועים
+        self.events = get_event_bus()
+        self.live_stats = LiveStats(self.events)
+        self.live_stats.seed(self.db, self.analytics)
+        self._dashboard_dirty = threading.Event()  # נקבע מה-thread של ה-listener, נקרא רק מ-Tk
+
         self.root.protocol("WM_DELETE_WINDOW", self.on_closing)
 
         # בניית הממשק
@@ -56,7 +97,7 @@ class GuardianGUI:
         self._create_recent_cards_area()
 
         # הצגה ראשונית של כרטיסיות עיר-שכונה
-        self._create_city_neighborhood_cards()
+        self._create_city_cards_area()
 
         self._start_stats_updater()
 
@@ -215,7 +256,7 @@ class GuardianGUI:
         refresh_btn = tk.Button(header_frame, text="🔄 רענן", font=('Segoe UI', 10),
                                bg=COLORS['accent'], fg='white', bd=0,
                                padx=15, pady=5, cursor='hand2',
-                               command=self._create_city_neighborhood_cards)
+                               command=self.refresh_from_db)
         refresh_btn.pack(side='left', padx=10)
 
         # === 3. אזור הכרטיסיות ===
@@ -279,95 +320,146 @@ class GuardianGUI:
 
     # ==============================================================================
     # כרטיסיות עיר-שכונה (עיצוב קומפקטי - שורה אחת)
+    # מודל שמור: הווידג'טים נבנים פעם אחת ומתעדכנים לפי diff - רק מספר שהשתנה,
+    # שכונה חדשה / שהתרוקנה, או כרטיס שזז במיקום. פרץ פוסטים → עדכון אחד.
     # ==============================================================================
-    def _create_city_neighborhood_cards(self):
-        """מציג כרטיסיות עיר-שכונה בעיצוב סופר-קומפקטי (שם ומספר באותה שורה)"""
-        # 1. ניקוי הקונטיינר
-        for widget in self.cards_container.winfo_children():
-            widget.destroy()
+    def _schedule_city_cards_refresh(self):
+        """נקרא גם מה-thread של ה-listener - מתזמן עדכון אחד לכל פרץ"""
+        if self._city_cards_refresh_pending:
+            return
+        self._city_cards_refresh_pending = True
+        self.root.after(CITY_CARDS_DEBOUNCE_MS, self._update_city_neighborhood_cards)
 
-        # 2. שליפת הנתונים
-        all_stats = self.analytics.get_city_neighborhood_stats(min_apartments=1)
+    def _update_city_neighborhood_cards(self):
+        """מיישר את הכרטיסיות מול הנתונים העדכניים - בלי לבנות מחדש את מה שלא השתנה"""
+        self._city_cards_refresh_pending = False
 
-        ALLOWED_CITIES = ['ירושלים', 'בית שמש', 'בני ברק']
+        all_stats = self.analytics.get_city_neighborhood_stats(min_apartments=1)
         stats = {city: neighborhoods for city, neighborhoods in all_stats.items()
                  if city in ALLOWED_CITIES}
 
-        if not stats:
-            tk.Label(self.cards_container,
-                     text="אין דירות בערים: ירושלים, בית שמש, בני ברק",
-                     font=('Segoe UI', 12), bg=COLORS['bg'], fg=COLORS['text_light']).pack(pady=50)
+        added, updated, removed = diff_neighborhood_cards(self._neighborhood_cards, stats)
+        if not (added or updated or removed) and self._city_frames:
             return
 
-        # צבעים למסגרות
-        BORDER_COLORS = ['#27ae60', '#2980b9', '#8e44ad', '#2c3e50', '#d35400', '#16a085']
-
-        # 4 עמודות בתוך כל עיר - כדי לנצל את הרוחב
-        COLS_PER_CITY = 4
-
-        # 3. יצירת המבנה הראשי
-        main_frame = tk.Frame(self.cards_container, bg=COLORS['bg'])
-        main_frame.pack(fill='both', expand=True)
-
-        # לולאה על הערים (יוצרת עמודות דינמיות - אם תהיה בני ברק היא תתווסף לבד)
-        for city, neighborhoods in stats.items():
-            # --- מסגרת ראשית לעיר ---
-            city_container = tk.Frame(main_frame, bg='white', bd=0)
-            # expand=True מבטיח שכל עיר תקבל רוחב שווה
-            city_container.pack(side='right', fill='both', expand=True, padx=6, pady=0)
-
-            # --- כותרת העיר (עיצוב חדש: נקי, דק, בלי אייקון) ---
-            # מסגרת לכותרת
-            header_frame = tk.Frame(city_container, bg='white', pady=0)
-            header_frame.pack(fill='x')
-
-            # הטקסט עצמו (דק יותר, צבע כהה על רקע לבן)
-            tk.Label(header_frame, text=city,
-                     font=('Segoe UI', 13, 'bold'),
-                     bg='white', fg=COLORS['primary']).pack(side='right', padx=10, pady=(8, 4))
-
-            # פס הפרדה צבעוני עדין מתחת לשם העיר
-            tk.Frame(city_container, bg=COLORS['accent'], height=2).pack(fill='x', pady=(0, 8))
-
-            # --- קונטיינר לשכונות ---
-            neighborhoods_grid = tk.Frame(city_container, bg='white', padx=2)
-            neighborhoods_grid.pack(fill='both', expand=True)
-
-            items = list(neighborhoods.items())
-
-            # הגדרת משקלים לעמודות
-            for c in range(COLS_PER_CITY):
-                neighborhoods_grid.columnconfigure(c, weight=1)
-
-            for i, (neighborhood, count) in enumerate(items):
-                row = i // COLS_PER_CITY
-                col = (COLS_PER_CITY - 1) - (i % COLS_PER_CITY)
-
-                border_color = BORDER_COLORS[i % len(BORDER_COLORS)]
-
-                # --- כרטיס שכונה (Single Line) ---
-                # גובה מינימלי נמוך יותר ועיצוב צפוף
-                card = tk.Frame(neighborhoods_grid, bg='white',
-                                highlightbackground=border_color,
-                                highlightthickness=1,  # מסגרת דקה יותר
-                                bd=0)
-
-                card.grid(row=row, column=col, padx=3, pady=3, sticky='ew')
-
-                # תוכן הכרטיס: שם מימין, מספר משמאל - באותה שורה!
-
-                # שם השכונה (מימין) - קיצור אם ארוך מדי
-                disp_neigh = neighborhood
-                if len(disp_neigh) > 12: disp_neigh = disp_neigh[:11] + ".."
-
-                tk.Label(card, text=disp_neigh,
-                         font=('Segoe UI', 10, 'bold'),
-                         bg='white', fg='#2c3e50').pack(side='right', padx=(5, 2), pady=6)
-
-                # המספר (משמאל) - מודגש בצבע המסגרת
-                tk.Label(card, text=str(count),
-                         font=('Segoe UI', 11, 'bold'),
-                         bg='white', fg=border_color).pack(side='left', padx=(5, 5), pady=6)
+        # 1. שכונות שהתרוקנו
+        for key in removed:
+            self._neighborhood_cards.pop(key)['frame'].destroy()
+
+        # 2. ערים שהתרוקנו / ערים חדשות
+        for city in [c for c in self._city_frames if c not in stats]:
+            self._city_frames.pop(city)['container'].destroy()
+
+        new_cities = [city for city in stats if city not in self._city_frames]
+        for city in new_cities:
+            self._city_frames[city] = self._create_city_frame(city)
+        if new_cities:
+            # הסדר בין הערים נקבע ב-pack - אורזים מחדש רק כשנוספה עיר
+            for city in stats:
+                container = self._city_frames[city]['container']
+                container.pack_forget()
+                container.pack(side='right', fill='both', expand=True, padx=6, pady=0)
+
+        # 3. כרטיסים חדשים / שהשתנו
+        for key, (index, count) in added.items():
+            self._neighborhood_cards[key] = self._create_neighborhood_card(key, index, count)
+        for key, (index, count) in updated.items():
+            self._update_neighborhood_card(self._neighborhood_cards[key], index, count)
+
+        # 4. מצב ריק
+        if stats:
+            self._city_cards_empty_label.pack_forget()
+        elif not self._city_cards_empty_label.winfo_ismapped():
+            self._city_cards_empty_label.pack(pady=50)
+
+    def _create_city_cards_area(self):
+        """שלד קבוע לכרטיסיות עיר-שכונה (נבנה פעם אחת)"""
+        self._city_frames = {}         # עיר → {'container', 'grid'}
+        self._neighborhood_cards = {}  # (עיר, שכונה) → {'frame', 'count_label', 'index', 'count'}
+        self._city_cards_refresh_pending = False
+
+        self._city_cards_main = tk.Frame(self.cards_container, bg=COLORS['bg'])
+        self._city_cards_main.pack(fill='both', expand=True)
+
+        self._city_cards_empty_label = tk.Label(
+            self.cards_container,
+            text="אין דירות בערים: " + ", ".join(ALLOWED_CITIES),
+            font=('Segoe UI', 12), bg=COLORS['bg'], fg=COLORS['text_light'])
+
+        self._update_city_neighborhood_cards()
+
+    def _create_city_frame(self, city):
+        """מסגרת לעיר: כותרת, פס הפרדה וגריד שכונות"""
+        # --- מסגרת ראשית לעיר ---
+        city_container = tk.Frame(self._city_cards_main, bg='white', bd=0)
+
+        # --- כותרת העיר (עיצוב חדש: נקי, דק, בלי אייקון) ---
+        header_frame = tk.Frame(city_container, bg='white', pady=0)
+        header_frame.pack(fill='x')
+
+        tk.Label(header_frame, text=city,
+                 font=('Segoe UI', 13, 'bold'),
+                 bg='white', fg=COLORS['primary']).pack(side='right', padx=10, pady=(8, 4))
+
+        # פס הפרדה צבעוני עדין מתחת לשם העיר
+        tk.Frame(city_container, bg=COLORS['accent'], height=2).pack(fill='x', pady=(0, 8))
+
+        # --- קונטיינר לשכונות ---
+        neighborhoods_grid = tk.Frame(city_container, bg='white', padx=2)
+        neighborhoods_grid.pack(fill='both', expand=True)
+
+        # הגדרת משקלים לעמודות
+        for c in range(COLS_PER_CITY):
+            neighborhoods_grid.columnconfigure(c, weight=1)
+
+        return {'container': city_container, 'grid': neighborhoods_grid}
+
+    def _create_neighborhood_card(self, key, index, count):
+        """כרטיס שכונה (Single Line): שם מימין, מספר משמאל"""
+        city, neighborhood = key
+        border_color = BORDER_COLORS[index % len(BORDER_COLORS)]
+
+        card = tk.Frame(self._city_frames[city]['grid'], bg='white',
+                        highlightbackground=border_color,
+                        highlightthickness=1,  # מסגרת דקה
+                        bd=0)
+
+        # שם השכונה (מימין) - קיצור אם ארוך מדי
+        disp_neigh = neighborhood
+        if len(disp_neigh) > 12: disp_neigh = disp_neigh[:11] + ".."
+
+        tk.Label(card, text=disp_neigh,
+                 font=('Segoe UI', 10, 'bold'),
+                 bg='white', fg='#2c3e50').pack(side='right', padx=(5, 2), pady=6)
+
+        # המספר (משמאל) - מודגש בצבע המסגרת
+        count_label = tk.Label(card, text=str(count),
+                               font=('Segoe UI', 11, 'bold'),
+                               bg='white', fg=border_color)
+        count_label.pack(side='left', padx=(5, 5), pady=6)
+
+        entry = {'frame': card, 'count_label': count_label, 'index': None, 'count': count}
+        self._place_neighborhood_card(entry, index)
+        return entry
+
+    def _update_neighborhood_card(self, entry, index, count):
+        """מספר חדש → רק טקסט; מיקום חדש → grid + צבע"""
+        if count != entry['count']:
+            entry['count_label'].config(text=str(count))
+            entry['count'] = count
+        if index != entry['index']:
+            self._place_neighborhood_card(entry, index)
+
+    def _place_neighborhood_card(self, entry, index):
+        row = index // COLS_PER_CITY
+        col = (COLS_PER_CITY - 1) - (index % COLS_PER_CITY)
+        border_color = BORDER_COLORS[index % len(BORDER_COLORS)]
+
+        entry['frame'].grid(row=row, column=col, padx=3, pady=3, sticky='ew')
+        if entry['index'] is not None:
+            entry['frame'].config(highlightbackground=border_color)
+            entry['count_label'].config(fg=border_color)
+        entry['index'] = index
 
     # ==============================================================================
     # קבלת נתונים מה-Listener
@@ -423,8 +515,8 @@ class GuardianGUI:
 
         display_rooms = str(rooms) if "חד" in str(rooms) else f"{rooms} חד'"
 
-        # רענון כרטיסיות עיר-שכונה (במקום כרטיסייה בודדת)
-        self.root.after(0, lambda: self._create_city_neighborhood_cards())
+        # רענון כרטיסיות עיר-שכונה (במקום כרטיסייה בודדת) - מאוחד לפרץ
+        self._schedule_city_cards_refresh()
 
     def log_status(self, message, level='INFO'):
         """לוג לקונסול בלבד"""
@@ -436,7 +528,7 @@ class GuardianGUI:
         """פותח חלון ניהול קבוצות"""
         from groups_dialog import GroupsDialog
         read_only = self.listener.is_listening
-        GroupsDialog(self.root, read_only=read_only)
+        GroupsDialog(self.root, read_only=read_only, group_store=self.listener.group_store)
 
     def open_settings(self):
         """פותח חלון הגדרות"""
@@ -451,6 +543,7 @@ class GuardianGUI:
         self.card_status.sub_label.config(text="מתחבר...")
         self.log_status("מאתחל מנוע האזנה...", "INFO")
         self.session_start_time = time.time()
+        self.live_stats.reset_session()
 
         def run():
             success = self.listener.start_listening()
@@ -479,278 +572,116 @@ class GuardianGUI:
         self.card_status.value_label.config(text="ממתין", fg=COLORS['text_light'])
         self.card_status.sub_label.config(text="לא פעיל")
         self.session_start_time = None
+        self.live_stats.reset_session()
         self.card_checks.value_label.config(text="0")
         self.card_checks.sub_label.config(text="הבאה: --:--")
 
     def _start_stats_updater(self):
-        def update():
-            while True:
-                try:
-                    if self.session_start_time:
-                        uptime = int(time.time() - self.session_start_time)
-                        h, m, s = uptime // 3600, (uptime % 3600) // 60, uptime % 60
-                        self.card_time.value_label.config(text=f"{h:02}:{m:02}:{s:02}")
-
-                    listener_stats = self.listener.get_stats()
-                    checks = listener_stats.get('checks_today', 0)
-                    next_check = listener_stats.get('next_check')
-                    self.card_checks.value_label.config(text=str(checks))
-                    if next_check:
-                        now = time.time()
-                        if next_check > now:
-                            remaining = int(next_check - now)
-                            rm, rs = remaining // 60, remaining % 60
-                            self.card_checks.sub_label.config(text=f"הבאה: עוד {rm}:{rs:02}")
-                        else:
-                            self.card_checks.sub_label.config(text="הבאה: כעת...")
-                    else:
-                         self.card_checks.sub_label.config(text="הבאה: --:--")
-
-                    today_stats = self.db.get_stats()
-                    week_stats = self.db.get_week_stats()
-                    self.card_apartments.value_label.config(text=str(today_stats.get('today', 0)))
-                    self.card_apartments.sub_label.config(text=f"שבוע: {week_stats.get('relevant', 0)}")
-
-                    try:
-                        trends = self.analytics.get_trends_today()
-                        avg_price = trends.get('avg_price', 0)
-                        pop_city = trends.get('popular_city', 'אין')
-                        clean_city = re.sub(r'[^\w\s\(\)\'\"]', '', pop_city).strip()
-                        if avg_price > 0:
-                            self.card_trends.value_label.config(text=f"₪{avg_price:,}")
-                        else:
-                            self.card_trends.value_label.config(text="--")
-                        self.card_trends.sub_label.config(text=f"עיר מובילה: {clean_city}")
-                    except Exception:
-                        pass
-                except Exception:
-                    pass
-                time.sleep(1)
-        threading.Thread(target=update, daemon=True).start()
+        """
+        הדשבורד מתעדכן על ה-main loop של Tk:
+        - אירועים מה-listener (פוסט נשמר/סונן, סוף מחזור) → דגל; poll על ה-main loop מרענן
+          את הכרטיסים מהמונים בזיכרון (פעם אחת לכל פרץ, בלי קריאות Tk מה-thread של ה-listener)
+        - טיימר של שנייה → רק השעון והספירה לאחור (בלי DB)
+        """
+        for event_name in (POST_SAVED, POST_FILTERED, CYCLE_FINISHED, CHECK_SCHEDULED):
+            self.events.subscribe(event_name, self._on_stats_event)
+
+        self._refresh_dashboard()
+        self._poll_dashboard()
+        self._tick_clock()
+
+    def _on_stats_event(self, payload):
+        """נקרא מה-thread של ה-listener - רק מסמן שיש מה לרענן (בלי לגעת ב-Tk)"""
+        self._dashboard_dirty.set()
+
+    def _poll_dashboard(self):
+        """רץ על ה-main loop: אם הגיעו אירועים מאז הבדיקה הקודמת - רענון אחד"""
+        if self._dashboard_dirty.is_set():
+            self._dashboard_dirty.clear()  # לפני הרענון - אירוע שמגיע באמצע ייתפס בבדיקה הבאה
+            try:
+                self._refresh_dashboard()
+            except tk.TclError:
+                return  # החלון נסגר
+
+        self.root.after(DASHBOARD_POLL_MS, self._poll_dashboard)
+
+    def refresh_from_db(self):
+        """רענון ידני: זורע מחדש את המונים מה-DB ומצייר את מפת הדירות"""
+        self.live_stats.seed(self.db, self.analytics)
+        self._refresh_dashboard()
+        self._update_city_neighborhood_cards()
+
+    def _refresh_dashboard(self):
+        """מעדכן את כרטיסי הדשבורד מהמונים בזיכרון"""
+        stats = self.live_stats.snapshot()
+
+        self.card_checks.value_label.config(text=str(stats['checks_today']))
+        self.card_apartments.value_label.config(text=str(stats['today']))
+        self.card_apartments.sub_label.config(text=f"שבוע: {stats['week']}")
+
+        avg_price = stats['avg_price']
+        clean_city = re.sub(r'[^\w\s\(\)\'\"]', '', stats['popular_city']).strip()
+        if avg_price > 0:
+            self.card_trends.value_label.config(text=f"₪{avg_price:,}")
+        else:
+            self.card_trends.value_label.config(text="--")
+        self.card_trends.sub_label.config(text=f"עיר מובילה: {clean_city}")
+
+    def _tick_clock(self):
+        """שעון זמן פעילות + ספירה לאחור לבדיקה הבאה - כל שנייה"""
+        try:
+            if self.session_start_time:
+                uptime = int(time.time() - self.session_start_time)
+                h, m, s = uptime // 3600, (uptime % 3600) // 60, uptime % 60
+                self.card_time.value_label.config(text=f"{h:02}:{m:02}:{s:02}")
+
+            next_check = self.live_stats.snapshot()['next_check'] if self.listener.is_listening else None
+            if next_check:
+                now = time.time()
+                if next_check > now:
+                    remaining = int(next_check - now)
+                    rm, rs = remaining // 60, remaining % 60
+                    self.card_checks.sub_label.config(text=f"הבאה: עוד {rm}:{rs:02}")
+                else:
+                    self.card_checks.sub_label.config(text="הבאה: כעת...")
+            else:
+                self.card_checks.sub_label.config(text="הבאה: --:--")
+        except tk.TclError:
+            return  # החלון נסגר
+
+        self.root.after(1000, self._tick_clock)
 
     def show_apartments(self):
         # 1. סגירת חלון קודם
         if hasattr(self, 'apartments_window') and self.apartments_window and self.apartments_window.winfo_exists():
             self.apartments_window.destroy()
 
-        # 2. שליפת נתונים
-        posts = self.db.get_all_posts(relevant_only=True, limit=50)
-        if not posts:
+        # 2. בדיקה שיש נתונים (ספירה מטבלת הסיכום - בלי לשלוף פוסטים)
+        if not self.db.count_posts(relevant_only=True):
             messagebox.showinfo("אין דירות", "עדיין לא נמצאו דירות חדשות")
             return
 
-        # 3. יצירת החלון
-        window = tk.Toplevel(self.root)
-        self.apartments_window = window
-        window.title("📋 טבלת דירות מרוכזת")
-        window.geometry("1350x650")
-        window.configure(bg=COLORS['bg'])
-
-        frame_table = tk.Frame(window, bg=COLORS['bg'])
-        frame_table.pack(fill='both', expand=True, padx=15, pady=15)
-
-        # --- עיצוב (כולל החזרת הסרגל המעוצב!) ---
-        style = ttk.Style()
-        style.theme_use('clam')
-        style.configure("Treeview.Heading", font=('Segoe UI', 10, 'bold'), background=COLORS['secondary'],
-                        foreground='white', relief='flat')
-        style.configure("Treeview", rowheight=30, font=('Segoe UI', 10), background='white', fieldbackground='white',
-                        borderwidth=0)
-        style.map("Treeview", background=[('selected', COLORS['accent'])], foreground=[('selected', 'white')])
-
-        # החזרת עיצוב סרגל הגלילה
-        style.configure("Vertical.TScrollbar", background='#bdc3c7', troughcolor=COLORS['bg'], bordercolor=COLORS['bg'],
-                        arrowcolor=COLORS['text'], relief='flat')
-        style.map("Vertical.TScrollbar", background=[('active', COLORS['accent'])])
-
-        # גלילה מעוצבת
-        scrollbar = ttk.Scrollbar(frame_table, orient="vertical", style="Vertical.TScrollbar")
-        scrollbar.pack(side='right', fill='y')
-
-        # --- הגדרת העמודות ---
-        columns = ('index', 'author', 'city', 'neighborhood', 'street', 'price', 'rooms', 'phone', 'group', 'date',
-                   'link', 'id')
-        tree = ttk.Treeview(frame_table, columns=columns, show='headings', yscrollcommand=scrollbar.set)
-        scrollbar.config(command=tree.yview)
-
-        # --- כותרות ויישור (הוספנו anchor='e' גם לכותרות!) ---
-
-        # עמודת האינדקס נשארת באמצע
-        tree.column('index', width=40, anchor='center')
-        tree.heading('index', text='#', anchor='center')
-
-        # כל שאר העמודות - יישור לימין גם בתוכן וגם בכותרת
-        tree.column('author', width=120, anchor='e')
-        tree.heading('author', text='מפרסם', anchor='e')  # <--- הוספנו anchor='e'
-
-        tree.column('city', width=90, anchor='e')
-        tree.heading('city', text='עיר', anchor='e')  # <--- הוספנו anchor='e'
-
-        tree.column('neighborhood', width=100, anchor='e')
-        tree.heading('neighborhood', text='שכונה', anchor='e')  # <--- הוספנו anchor='e'
-
-        tree.column('street', width=120, anchor='e')
-        tree.heading('street', text='רחוב', anchor='e')  # <--- הוספנו anchor='e'
-
-        tree.column('price', width=90, anchor='e')
-        tree.heading('price', text='מחיר', anchor='e')  # <--- הוספנו anchor='e'
-
-        tree.column('rooms', width=60, anchor='center')  # חדרים נראה טוב יותר באמצע
-        tree.heading('rooms', text='חדרים', anchor='center')
-
-        tree.column('phone', width=110, anchor='e')
-        tree.heading('phone', text='טלפון', anchor='e')  # <--- הוספנו anchor='e'
-
-        tree.column('group', width=160, anchor='e')
-        tree.heading('group', text='קבוצה', anchor='e')  # <--- הוספנו anchor='e'
-
-        tree.column('date', width=110, anchor='e')
-        tree.heading('date', text='תאריך', anchor='e')  # <--- הוספנו anchor='e'
-
-        # עמודות נסתרות
-        tree.column('link', width=0, stretch=False)
-        tree.column('id', width=0, stretch=False)
-
-        tree.pack(fill='both', expand=True)
-        tree.tag_configure('oddrow', background='white')
-        tree.tag_configure('evenrow', background='#f2f6f8')
-
-        status_var = tk.StringVar()
-
-        # --- מילוי נתונים ---
-        def populate_tree():
-            for item in tree.get_children():
-                tree.delete(item)
-
-            current_posts = self.db.get_all_posts(relevant_only=True, limit=50)
-
-            for i, post in enumerate(current_posts):
-                author = post['author'] or "-"
-
-                # פיצול מיקום לשלושה שדות
-                city = post.get('city') or "-"
-                neighborhood = "-"
-                street = "-"
-
-                loc = post.get('location', '')
-                if loc:
-                    # בדיקה: האם יש פסיק? (שכונה + רחוב)
-                    if ',' in loc:
-                        parts = [p.strip() for p in loc.split(',', 1)]
-                        if len(parts) >= 2 and parts[0] and parts[1]:  # ← הוסף בדיקה!
-                            neighborhood = parts[0]
-                            street = parts[1]
-                        else:
-                            # פסיק אבל חסר חלק - התייחס כשכונה בלבד
-                            neighborhood = parts[0] if parts[0] else loc
-
-                    # אם אין פסיק - בדוק אם זה רחוב או שכונה
-                    elif 'רחוב' in loc or 'רח\'' in loc or 'רח"' in loc:
-                        street = loc
-                    else:
-                        neighborhood = loc
-
-                # מחיר עם פסיקים
-                price = "-"
-                if post['price']:
-                    try:
-                        clean_num = int(str(post['price']).replace(',', '').replace('.', ''))
-                        price = f"₪{clean_num:,}"
-                    except (ValueError, TypeError):
-                        price = str(post['price'])
-
-                rooms = post['rooms'] or "-"
-                phone = post['phone'] or "-"
-
-                # קיצור שם קבוצה
-                full_group = post.get('group_name') or "-"
-                words = full_group.split()
-                if len(words) > 3:
-                    group_display = " ".join(words[:3]) + "..."
-                else:
-                    group_display = full_group
-
-                # קיצור תאריך
-                date_full = post.get('scanned_at') or ""
-                date_display = date_full[5:16] if len(date_full) > 16 else date_full
-
-                link = post['post_url']
-                post_id = post.get('id', 0)
-
-                row_tag = 'evenrow' if i % 2 == 0 else 'oddrow'
-
-                tree.insert('', 'end',
-                            values=(i + 1, author, city, neighborhood, street, price, rooms, phone, group_display,
-                                    date_display, link, post_id),
-                            tags=(row_tag,))
-
-            status_var.set(f"סה\"כ מוצגות: {len(current_posts)} דירות")
-
-        populate_tree()
-
-        # --- פונקציות עזר ---
-        def delete_selected_post(event=None):
-            selected_item = tree.selection()
-            if not selected_item: return
-            item = selected_item[0]
-            values = tree.item(item, "values")
-            author = values[1]
-            post_url = values[10]
+        # 3. יצירת החלון (טעינה עצלה - הדפים נשלפים בגלילה)
+        from apartments_window import ApartmentsWindow
+        self.apartments_window = ApartmentsWindow(self.root, self.db).window
 
-            if not messagebox.askyesno("מחיקה", f"למחוק פוסט של {author}?"): return
+    def export_csv(self):
+        filename = filedialog.asksaveasfilename(defaultextension=".csv",
+                                                filetypes=[("CSV", "*.csv"), ("Parquet", "*.parquet")])
+        if filename:
             try:
-                import sqlite3
-                conn = sqlite3.connect(self.db.db_path)
-                cursor = conn.cursor()
-                cursor.execute('DELETE FROM posts WHERE post_url = ?', (post_url,))
-                conn.commit()
-                conn.close()
-                tree.delete(item)
-                populate_tree()
-                messagebox.showinfo("הצלחה", "הפוסט נמחק.")
+                rows = self.db.export(filename)
+            except ImportError as e:
+                messagebox.showerror("שגיאה", str(e))
+                return
             except Exception as e:
-                messagebox.showerror("שגיאה", f"תקלה: {e}")
-
-        def open_in_browser(event=None):
-            selected_item = tree.selection()
-            if not selected_item: return
-            values = tree.item(selected_item[0], "values")
-            url = values[10]
-            if url and "http" in url: webbrowser.open(url)
-
-        context_menu = tk.Menu(window, tearoff=0, font=('Segoe UI', 10))
-        context_menu.add_command(label="🌐 פתח בדפדפן", command=open_in_browser)
-        context_menu.add_separator()
-        context_menu.add_command(label="🗑️ מחק דירה", command=delete_selected_post)
-
-        def on_right_click(event):
-            row_id = tree.identify_row(event.y)
-            if row_id: tree.selection_set(row_id); context_menu.post(event.x_root, event.y_root)
-
-        tree.bind("<Button-3>", on_right_click)
-        tree.bind("<Double-1>", open_in_browser)
-        tree.bind("<Delete>", delete_selected_post)
-
-        # כפתורים למטה
-        btn_frame = tk.Frame(window, bg=COLORS['bg'])
-        btn_frame.pack(fill='x', padx=20, pady=(0, 10))
-        tk.Button(btn_frame, text="סגור חלון", command=window.destroy, bg='white', relief='flat', width=12).pack(
-            side='left')
-        tk.Button(btn_frame, text="🔄 רענן", command=populate_tree, bg=COLORS['accent'], fg='white', relief='flat',
-                  width=15).pack(side='right')
-
-        status_bar = tk.Frame(window, bg='#e0e0e0', height=25)
-        status_bar.pack(side='bottom', fill='x')
-        tk.Label(status_bar, textvariable=status_var, bg='#e0e0e0', fg='#555').pack(side='right', padx=10)
-
+                messagebox.showerror("שגיאה", f"נכשל לייצא:\n{e}")
+                return
 
-    def export_csv(self):
-        filename = filedialog.asksaveasfilename(defaultextension=".csv", filetypes=[("CSV", "*.csv")])
-        if filename:
-            if self.db.export_to_csv(filename):
-                messagebox.showinfo("הצלחה", "נשמר בהצלחה!")
+            if rows:
+                messagebox.showinfo("הצלחה", f"נשמרו {rows:,} דירות בהצלחה!")
                 try: os.startfile(os.path.dirname(filename))
-                except OSError: pass
+                except (OSError, AttributeError): pass
             else: messagebox.showwarning("שגיאה", "אין נתונים לייצוא")
 
 def main():
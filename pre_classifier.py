@@ -0,0 +1,349 @@
+"""
+pre_classifier.py - סיווג מקומי מהיר לפני הקריאה ל-LLM
+פוסטים "ברורים" (מחפש דירה, הובלות/שיפוצים, שאלות) לא צריכים קריאה ל-API:
+  1. חוקי מילות מפתח (עם וטו: "למכירה"/"להשכרה" מבטל כל חוק - גם "מחפשים דירה?" בראש מודעה)
+  2. מודל TF-IDF + רגרסיה לוגיסטית (פייתון טהור) שמאומן על התוויות של ה-LLM מטבלת posts
+
+רק קטגוריות שאינן RELEVANT עוקפות את ה-LLM, ורק מעל סף הביטחון (ai.pre_classifier.threshold) -
+פוסט רלוונטי תמיד ממשיך ל-LLM, כי שם גם מחלצים את פרטי הדירה.
+חוק לבד (בלי מודל שמסכים) מקבל ביטחון מתחת לסף ברירת המחדל - מודעה לא נזרקת בגלל מילת מפתח.
+
+הרצה:
+  python pre_classifier.py train [--db posts.db] [--out pre_classifier_model.json]
+  python pre_classifier.py evaluate [--db posts.db] [--model pre_classifier_model.json] [--threshold 0.9]
+"""
+
+import argparse
+import json
+import math
+import os
+import random
+import re
+import sqlite3
+import time
+from collections import Counter
+from datetime import datetime
+
+DEFAULT_MODEL_PATH = 'pre_classifier_model.json'
+DEFAULT_THRESHOLD = 0.9
+
+# סיבה שנשמרת ב-ai_reason - כדי שהאימון לא ילמד מהתוויות של עצמו
+PRE_REASON_PREFIX = 'pre-classifier'
+
+RULE_CONFIDENCE = 0.95          # חוק + מודל שמסכימים
+RULES_ONLY_CONFIDENCE = 0.8     # חוק בלי מודל - מתחת ל-DEFAULT_THRESHOLD (דילוג רק אם הורידו את הסף)
+
+# --- חוקים: (קטגוריה, ביטוי) ---
+KEYWORD_RULES = [
+    ('WANTED', re.compile(r'(מחפש|מחפשת|מחפשים|דרוש|דרושה|מעוניין|מעוניינת)\s+(לשכור\s+|לקנות\s+)?(דירה|דירת|יחידת)')),
+    ('SPAM', re.compile(r'הובלות|מוביל(ים)?\s+מקצועי|שיפוצים\s+(כלליים|במחירים)|ניקיון\s+(דירות|משרדים)|'
+                        r'חברת\s+(ניקיון|שיפוצים|הובלות)|אינסטלטור|הדברה|משכנתא\s+בריבית')),
+    ('QUESTION', re.compile(r'^\s*(מישהו|מישהי|מישהם)\s+(יודע|יודעת|מכיר|מכירה|ממליץ|ממליצה)|'
+                            r'^\s*שאלה\b|מה\s+דעתכם|אשמח\s+להמלצ')),
+]
+
+# מילים שמעידות על מודעת דירה - מבטלות כל חוק (גם WANTED: "מחפשים דירה? ... להשכרה")
+APARTMENT_VETO = re.compile(r'למכירה|להשכרה|להשכיר|למכור|משכיר|מוכר(ת|ים)?\s+דירה')
+
+_TOKEN_RE = re.compile(r'[א-תa-zA-Z]+|\d+')
+_HEBREW_PREFIXES = 'והבלמשכ'
+
+
+def tokenize(text):
+    """
+    מילים + צמדי מילים; מספרים → NUM; מילה עם תחילית → גם בלי התחילית ('בקטמון' → 'קטמון')
+    """
+    words = ['NUM' if token.isdigit() else token.lower() for token in _TOKEN_RE.findall(text or '')]
+    features = list(words)
+    features += [w[1:] for w in words if len(w) > 3 and w[0] in _HEBREW_PREFIXES]
+    features += [f"{a}_{b}" for a, b in zip(words, words[1:])]
+    return features
+
+
+# =========================================================
+#  מודל: TF-IDF + רגרסיה לוגיסטית רב-מחלקתית
+# =========================================================
+class TfidfLogistic:
+    """מודל קטן בפייתון טהור - בלי numpy/sklearn, כדי לא להכביד על התוכנה"""
+
+    def __init__(self, classes=(), idf=None, weights=None, bias=None, meta=None):
+        self.classes = list(classes)
+        self.idf = idf or {}
+        self.weights = weights or {c: {} for c in self.classes}
+        self.bias = bias or {c: 0.0 for c in self.classes}
+        self.meta = meta or {}
+
+    # ---------- וקטור ----------
+
+    def vectorize(self, text):
+        counts = Counter(f for f in tokenize(text) if f in self.idf)
+        vector = {f: (1 + math.log(n)) * self.idf[f] for f, n in counts.items()}
+        norm = math.sqrt(sum(v * v for v in vector.values())) or 1.0
+        return {f: v / norm for f, v in vector.items()}
+
+    # ---------- חיזוי ----------
+
+    def predict_proba(self, text):
+        """dict קטגוריה → הסתברות"""
+        vector = self.vectorize(text)
+        scores = {}
+        for c in self.classes:
+            w = self.weights[c]
+            scores[c] = self.bias[c] + sum(v * w.get(f, 0.0) for f, v in vector.items())
+        top = max(scores.values())
+        exp = {c: math.exp(s - top) for c, s in scores.items()}
+        total = sum(exp.values())
+        return {c: e / total for c, e in exp.items()}
+
+    def predict(self, text):
+        """(קטגוריה, הסתברות)"""
+        proba = self.predict_proba(text)
+        category = max(proba, key=proba.get)
+        return category, proba[category]
+
+    # ---------- אימון ----------
+
+    @classmethod
+    def train(cls, texts, labels, epochs=8, learning_rate=0.5, l2=1e-5, min_df=2, seed=13):
+        """
+        SGD על softmax. texts ו-labels באותו אורך.
+        """
+        classes = sorted(set(labels))
+        df = Counter()
+        for text in texts:
+            df.update(set(tokenize(text)))
+        n = len(texts)
+        idf = {f: math.log((1 + n) / (1 + d)) + 1 for f, d in df.items() if d >= min_df}
+
+        model = cls(classes, idf)
+        samples = list(zip([model.vectorize(t) for t in texts], labels))
+        rng = random.Random(seed)
+
+        for epoch in range(epochs):
+            rng.shuffle(samples)
+            rate = learning_rate / (1 + epoch)
+            for vector, label in samples:
+                scores = {c: model.bias[c] + sum(v * model.weights[c].get(f, 0.0) for f, v in vector.items())
+                          for c in classes}
+                top = max(scores.values())
+                exp = {c: math.exp(s - top) for c, s in scores.items()}
+                total = sum(exp.values())
+                for c in classes:
+                    grad = exp[c] / total - (1.0 if c == label else 0.0)
+                    if abs(grad) < 1e-4:
+                        continue
+                    w = model.weights[c]
+                    for f, v in vector.items():
+                        w[f] = w.get(f, 0.0) * (1 - rate * l2) - rate * grad * v
+                    model.bias[c] -= rate * grad
+
+        # משקלים זניחים לא נשמרים (קובץ קטן, חיזוי מהיר)
+        for c in classes:
+            model.weights[c] = {f: round(w, 5) for f, w in model.weights[c].items() if abs(w) > 1e-3}
+        model.meta = {'trained_at': datetime.now().isoformat(timespec='seconds'), 'samples': n,
+                      'labels': dict(Counter(labels))}
+        return model
+
+    # ---------- שמירה ----------
+
+    def save(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'classes': self.classes, 'idf': self.idf, 'weights': self.weights,
+                       'bias': self.bias, 'meta': self.meta}, f, ensure_ascii=False)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        return cls(data['classes'], data['idf'], data['weights'], data['bias'], data.get('meta'))
+
+
+# =========================================================
+#  PreClassifier - חוקים + מודל
+# =========================================================
+class PreClassifier:
+    """
+    classify(content) מחזיר ai_result (כמו classify_post) כשבטוחים שהפוסט לא רלוונטי,
+    או None - ואז הפוסט ממשיך ל-LLM כרגיל
+    """
+
+    def __init__(self, model=None, threshold=DEFAULT_THRESHOLD):
+        self.model = model
+        self.threshold = threshold
+        self.stats = {'checked': 0, 'skipped': 0}
+
+    @classmethod
+    def from_settings(cls, settings=None):
+        """
+        לפי ai.pre_classifier בהגדרות; None אם כבוי.
+        בלי קובץ מודל - חוקים בלבד.
+        """
+        if settings is None:
+            from settings_manager import SettingsManager
+            settings = SettingsManager()
+        if not settings.get('ai.pre_classifier.enabled', True):
+            return None
+
+        path = settings.get('ai.pre_classifier.model_path', DEFAULT_MODEL_PATH)
+        model = None
+        if os.path.exists(path):
+            try:
+                model = TfidfLogistic.load(path)
+            except (OSError, ValueError, KeyError) as e:
+                print(f"⚠️ מודל סיווג מקומי לא נטען ({e}) - חוקים בלבד")
+        return cls(model, settings.get('ai.pre_classifier.threshold', DEFAULT_THRESHOLD))
+
+    @staticmethod
+    def rule_category(content):
+        """הקטגוריה של החוק הראשון שתפס (או None)"""
+        for category, pattern in KEYWORD_RULES:
+            if pattern.search(content):
+                if APARTMENT_VETO.search(content):
+                    return None
+                return category
+        return None
+
+    def predict(self, content):
+        """
+        (קטגוריה, ביטחון, מקור) - מקור: 'rules' / 'model' / 'rules+model'.
+        חוק ומודל שלא מסכימים → RELEVANT עם ביטחון 0 (נשלח ל-LLM).
+        """
+        rule = self.rule_category(content)
+        if self.model is None:
+            return (rule, RULES_ONLY_CONFIDENCE, 'rules') if rule else ('RELEVANT', 0.0, 'rules')
+
+        category, proba = self.model.predict(content)
+        if rule is None:
+            return category, proba, 'model'
+        if rule == category:
+            return category, max(proba, RULE_CONFIDENCE), 'rules+model'
+        return 'RELEVANT', 0.0, 'rules+model'
+
+    def classify(self, content):
+        """ai_result לדילוג על ה-LLM, או None"""
+        self.stats['checked'] += 1
+        category, confidence, source = self.predict(content)
+        if category == 'RELEVANT' or confidence < self.threshold:
+            return None
+
+        self.stats['skipped'] += 1
+        return {
+            'category': category,
+            'is_broker': False,
+            'confidence': round(confidence, 3),
+            'reason': f'{PRE_REASON_PREFIX} ({source})'
+        }
+
+    def skip_rate(self):
+        return self.stats['skipped'] / self.stats['checked'] if self.stats['checked'] else 0.0
+
+
+# =========================================================
+#  אימון והערכה מול תוויות ה-LLM
+# =========================================================
+
+def load_labeled(db_path):
+    """
+    פוסטים שסווגו ע"י ה-LLM (לא ע"י ה-pre-classifier, לא כישלונות, לא רשימה שחורה)
+
+    Returns:
+        list של (id, content, category)
+    """
+    conn = sqlite3.connect(db_path)
+    try:
+        return conn.execute(f'''
+            SELECT id, content, category FROM posts
+            WHERE ai_confidence IS NOT NULL AND ai_failed = 0 AND blacklist_match IS NULL
+              AND content != '' AND category IS NOT NULL
+              AND COALESCE(ai_reason, '') NOT LIKE '{PRE_REASON_PREFIX}%'
+              AND COALESCE(ai_reason, '') NOT LIKE 'AI failed:%'
+            ORDER BY id
+        ''').fetchall()
+    finally:
+        conn.close()
+
+
+def split_holdout(rows, every=5):
+    """חלוקה דטרמיניסטית: כל פוסט חמישי (לפי id) בצד לבדיקה"""
+    train = [row for row in rows if row[0] % every]
+    test = [row for row in rows if not row[0] % every]
+    return train, test
+
+
+def evaluate(classifier, rows):
+    """
+    אחוז דילוג, התאמה ל-LLM בפוסטים שדולגו, ורלוונטיים שדולגו בטעות (הטעות היקרה)
+
+    Returns:
+        dict
+    """
+    skipped = agreed = relevant_skipped = 0
+    per_category = Counter()
+    started = time.perf_counter()
+    for _, content, label in rows:
+        result = classifier.classify(content)
+        if result is None:
+            continue
+        skipped += 1
+        per_category[result['category']] += 1
+        if result['category'] == label:
+            agreed += 1
+        elif label == 'RELEVANT':
+            relevant_skipped += 1
+    elapsed = time.perf_counter() - started
+
+    return {
+        'posts': len(rows),
+        'skipped': skipped,
+        'skip_rate': skipped / len(rows) if rows else 0.0,
+        'agreement': agreed / skipped if skipped else 1.0,
+        'relevant_skipped': relevant_skipped,
+        'per_category': dict(per_category),
+        'us_per_post': elapsed / len(rows) * 1e6 if rows else 0.0
+    }
+
+
+def print_report(report, title):
+    print("=" * 70)
+    print(f"📊 {title}: {report['posts']} פוסטים")
+    print(f"  דילוג על ה-LLM: {report['skipped']} ({report['skip_rate']:.1%})  {report['per_category']}")
+    print(f"  התאמה ל-LLM בפוסטים שדולגו: {report['agreement']:.1%}")
+    print(f"  רלוונטיים שדולגו בטעות: {report['relevant_skipped']}")
+    print(f"  זמן: {report['us_per_post']:.1f}µs לפוסט")
+    print("=" * 70)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="סיווג מקומי לפני ה-LLM")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    train = sub.add_parser('train', help='אימון על תוויות ה-LLM + דוח על סט בדיקה')
+    train.add_argument('--db', default='posts.db')
+    train.add_argument('--out', default=DEFAULT_MODEL_PATH)
+    train.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD)
+
+    ev = sub.add_parser('evaluate', help='דוח על סט הבדיקה עם מודל קיים')
+    ev.add_argument('--db', default='posts.db')
+    ev.add_argument('--model', default=DEFAULT_MODEL_PATH)
+    ev.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD)
+
+    args = parser.parse_args()
+    rows = load_labeled(args.db)
+    train_rows, test_rows = split_holdout(rows)
+    if not test_rows:
+        print(f"⚠️ אין מספיק פוסטים מסווגים ב-{args.db}")
+        return
+
+    if args.command == 'train':
+        model = TfidfLogistic.train([r[1] for r in train_rows], [r[2] for r in train_rows])
+        model.save(args.out)
+        print(f"✅ מודל נשמר ב-{args.out} ({len(train_rows)} פוסטים, {len(model.idf)} מאפיינים)")
+    else:
+        model = TfidfLogistic.load(args.model)
+
+    print_report(evaluate(PreClassifier(None, args.threshold), test_rows), "חוקים בלבד")
+    print_report(evaluate(PreClassifier(model, args.threshold), test_rows), "חוקים + מודל")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,324 @@
+"""
+saved_searches.py - חיפושים שמורים והתראות ("ירושלים, קטמון, 3-4 חדרים, עד 2.5 מיליון")
+SavedSearchStore שומר את החיפושים ב-DB, ו-Percolator מחזיק אינדקס הפוך בזיכרון:
+כל חיפוש נרשם בדליים לפי (עיר, שכונה, טווח מחיר, חדרים), וכל פוסט חדש
+נבדק רק מול החיפושים שבדליים שלו - ולא מול כל החיפושים.
+"""
+
+import math
+import sqlite3
+import threading
+from datetime import datetime
+
+# --- דליי מחיר: סקאלה לוגריתמית (כל דלי = פי PRICE_BAND_RATIO מהקודם) ---
+PRICE_BAND_RATIO = 1.5
+PRICE_FLOOR = 500              # מחירים מתחת → הדלי הראשון
+PRICE_CEILING = 50_000_000     # טווח פתוח למעלה נחתך כאן
+
+# --- דליי חדרים: חצאי חדרים (2.5 → 5), חדרים מעל ROOMS_CEILING → הדלי האחרון ---
+ROOMS_CEILING = 10
+
+_ANY = None  # מפתח "כל ערך" בכל ממד
+
+
+def price_band(price):
+    """מספר הדלי של מחיר (לוגריתמי)"""
+    price = min(max(price, PRICE_FLOOR), PRICE_CEILING)
+    return int(math.log(price / PRICE_FLOOR, PRICE_BAND_RATIO))
+
+
+def rooms_slot(rooms):
+    """מספר הדלי של כמות חדרים (חצאי חדרים)"""
+    return int(min(max(rooms, 0), ROOMS_CEILING) * 2)
+
+
+def neighborhood_key(location):
+    """'קטמון, רחוב הרצל' → 'קטמון' (השכונה בלבד, כמו בטבלת הדירות)"""
+    if not location:
+        return None
+    return location.split(',', 1)[0].strip() or None
+
+
+def _to_number(value, cast=int):
+    """מחיר/חדרים מה-DB (טקסט) → מספר, או None"""
+    if value is None or value == '':
+        return None
+    try:
+        return cast(str(value).replace(',', '').strip())
+    except (ValueError, TypeError):
+        return None
+
+
+class SavedSearch:
+    """חיפוש שמור אחד (כל שדה None = לא מגביל)"""
+
+    FIELDS = ('id', 'name', 'city', 'location', 'min_price', 'max_price', 'min_rooms', 'max_rooms')
+
+    def __init__(self, id=None, name='', city=None, location=None,
+                 min_price=None, max_price=None, min_rooms=None, max_rooms=None):
+        self.id = id
+        self.name = name
+        self.city = city or None
+        self.location = neighborhood_key(location)
+        self.min_price = _to_number(min_price)
+        self.max_price = _to_number(max_price)
+        self.min_rooms = _to_number(min_rooms, float)
+        self.max_rooms = _to_number(max_rooms, float)
+
+    def __repr__(self):
+        return f"SavedSearch({self.id}, {self.name!r})"
+
+    @property
+    def has_price(self):
+        return self.min_price is not None or self.max_price is not None
+
+    @property
+    def has_rooms(self):
+        return self.min_rooms is not None or self.max_rooms is not None
+
+    def matches(self, city, location, price, rooms):
+        """
+        בדיקה מדויקת מול פוסט (אחרי שהאינדקס צמצם את המועמדים).
+        חיפוש עם טווח מחיר/חדרים לא מתאים לפוסט שלא ציין מחיר/חדרים.
+        """
+        if self.city and self.city != city:
+            return False
+        if self.location and self.location != location:
+            return False
+
+        if self.has_price:
+            if price is None:
+                return False
+            if self.min_price is not None and price < self.min_price:
+                return False
+            if self.max_price is not None and price > self.max_price:
+                return False
+
+        if self.has_rooms:
+            if rooms is None:
+                return False
+            if self.min_rooms is not None and rooms < self.min_rooms:
+                return False
+            if self.max_rooms is not None and rooms > self.max_rooms:
+                return False
+
+        return True
+
+
+# =========================================================
+#  Percolator - אינדקס הפוך של חיפושים
+# =========================================================
+class Percolator:
+    """
+    מפתח דלי = (עיר, שכונה, דלי מחיר, דלי חדרים), כשבכל ממד None = "כל ערך".
+    חיפוש נרשם בכל הדליים שהטווח שלו חוצה; פוסט נופל בדלי אחד בכל ממד,
+    ולכן בודקים רק 2×2×2×2 = 16 מפתחות - וכל חיפוש מופיע בהם לכל היותר פעם אחת.
+    """
+
+    def __init__(self, searches=()):
+        self._buckets = {}    # key → list של SavedSearch
+        self._keys = {}       # search id → המפתחות שלו (להסרה)
+        self._lock = threading.Lock()
+
+        # טעינה ראשונית: append ישיר (אין עדיין קוראים מקבילים)
+        for search in searches:
+            keys = self._bucket_keys(search)
+            for key in keys:
+                self._buckets.setdefault(key, []).append(search)
+            self._keys[search.id] = keys
+
+    def __len__(self):
+        return len(self._keys)
+
+    def _bucket_keys(self, search):
+        if search.has_price:
+            low = price_band(search.min_price if search.min_price is not None else PRICE_FLOOR)
+            high = price_band(search.max_price if search.max_price is not None else PRICE_CEILING)
+            price_keys = range(low, high + 1)
+        else:
+            price_keys = (_ANY,)
+
+        if search.has_rooms:
+            low = rooms_slot(search.min_rooms if search.min_rooms is not None else 0)
+            high = rooms_slot(search.max_rooms if search.max_rooms is not None else ROOMS_CEILING)
+            rooms_keys = range(low, high + 1)
+        else:
+            rooms_keys = (_ANY,)
+
+        return [(search.city, search.location, p, r) for p in price_keys for r in rooms_keys]
+
+    def add(self, search):
+        """רושם חיפוש באינדקס (id קיים → מחליף)"""
+        with self._lock:
+            self._remove_locked(search.id)
+            keys = self._bucket_keys(search)
+            for key in keys:
+                self._buckets[key] = self._buckets.get(key, []) + [search]
+            self._keys[search.id] = keys
+
+    def remove(self, search_id):
+        """מוציא חיפוש מהאינדקס"""
+        with self._lock:
+            self._remove_locked(search_id)
+
+    def _remove_locked(self, search_id):
+        for key in self._keys.pop(search_id, ()):
+            bucket = [s for s in self._buckets[key] if s.id != search_id]
+            if bucket:
+                self._buckets[key] = bucket
+            else:
+                del self._buckets[key]
+
+    def match(self, post):
+        """
+        Args:
+            post: dict עם city, location, price, rooms (כמו enriched_data של ה-listener)
+
+        Returns:
+            list של SavedSearch שהפוסט מתאים להם
+        """
+        city = post.get('city') or None
+        location = neighborhood_key(post.get('location'))
+        price = _to_number(post.get('price'))
+        rooms = _to_number(post.get('rooms'), float)
+
+        cities = (_ANY, city) if city else (_ANY,)
+        locations = (_ANY, location) if location else (_ANY,)
+        prices = (_ANY, price_band(price)) if price is not None else (_ANY,)
+        rooms_keys = (_ANY, rooms_slot(rooms)) if rooms is not None else (_ANY,)
+
+        # קריאה בלי lock: add/remove מחליפים רשימות ולא משנים אותן באמצע איטרציה
+        matched = []
+        buckets = self._buckets
+        for c in cities:
+            for l in locations:
+                for p in prices:
+                    for r in rooms_keys:
+                        for search in buckets.get((c, l, p, r), ()):
+                            if search.matches(city, location, price, rooms):
+                                matched.append(search)
+        return matched
+
+
+# =========================================================
+#  שמירה ב-DB
+# =========================================================
+class SavedSearchStore:
+    """טבלת saved_searches + Percolator מעודכן"""
+
+    def __init__(self, db_path="posts.db"):
+        self.db_path = db_path
+        self._create_table()
+        self.percolator = Percolator(self.list())
+
+    def _create_table(self):
+        conn = sqlite3.connect(self.db_path)
+        try:
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS saved_searches (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    name TEXT NOT NULL,
+                    city TEXT,
+                    location TEXT,
+                    min_price INTEGER,
+                    max_price INTEGER,
+                    min_rooms REAL,
+                    max_rooms REAL,
+                    active INTEGER DEFAULT 1,
+                    created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+                )
+            ''')
+            conn.commit()
+        finally:
+            conn.close()
+
+    def add(self, name, city=None, location=None, min_price=None, max_price=None,
+            min_rooms=None, max_rooms=None):
+        """
+        שומר חיפוש חדש ורושם אותו באינדקס
+
+        Returns:
+            SavedSearch
+        """
+        search = SavedSearch(None, name, city, location, min_price, max_price, min_rooms, max_rooms)
+
+        conn = sqlite3.connect(self.db_path)
+        try:
+            cursor = conn.execute('''
+                INSERT INTO saved_searches (name, city, location, min_price, max_price, min_rooms, max_rooms)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            ''', (search.name, search.city, search.location, search.min_price, search.max_price,
+                  search.min_rooms, search.max_rooms))
+            conn.commit()
+            search.id = cursor.lastrowid
+        finally:
+            conn.close()
+
+        self.percolator.add(search)
+        return search
+
+    def remove(self, search_id):
+        """מוחק חיפוש"""
+        conn = sqlite3.connect(self.db_path)
+        try:
+            conn.execute('DELETE FROM saved_searches WHERE id = ?', (search_id,))
+            conn.commit()
+        finally:
+            conn.close()
+
+        self.percolator.remove(search_id)
+
+    def set_active(self, search_id, active):
+        """השהיה/הפעלה של חיפוש (חיפוש מושהה לא נמצא באינדקס)"""
+        conn = sqlite3.connect(self.db_path)
+        try:
+            conn.execute('UPDATE saved_searches SET active = ? WHERE id = ?', (1 if active else 0, search_id))
+            conn.commit()
+        finally:
+            conn.close()
+
+        self.percolator.remove(search_id)
+        search = self.get(search_id)
+        if active and search:
+            self.percolator.add(search)
+
+    def get(self, search_id):
+        """חיפוש לפי id (או None)"""
+        conn = sqlite3.connect(self.db_path)
+        try:
+            row = conn.execute(f"SELECT {', '.join(SavedSearch.FIELDS)} FROM saved_searches WHERE id = ?",
+                               (search_id,)).fetchone()
+        finally:
+            conn.close()
+        return SavedSearch(*row) if row else None
+
+    def list(self, active_only=True):
+        """כל החיפושים השמורים (list של SavedSearch)"""
+        sql = f"SELECT {', '.join(SavedSearch.FIELDS)} FROM saved_searches"
+        if active_only:
+            sql += ' WHERE active = 1'
+        sql += ' ORDER BY id'
+
+        conn = sqlite3.connect(self.db_path)
+        try:
+            return [SavedSearch(*row) for row in conn.execute(sql).fetchall()]
+        finally:
+            conn.close()
+
+    def match(self, post):
+        """קיצור דרך ל-percolator.match"""
+        return self.percolator.match(post)
+
+
+def alert_payload(search, post):
+    """ה-payload של אירוע SEARCH_MATCHED"""
+    return {
+        'search_id': search.id,
+        'search_name': search.name,
+        'post_url': post.get('post_url'),
+        'city': post.get('city'),
+        'location': post.get('location'),
+        'price': post.get('price'),
+        'rooms': post.get('rooms'),
+        'matched_at': datetime.now()
+    }
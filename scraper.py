@@ -6,9 +6,15 @@ scraper.py - סורק פייסבוק ללא גלילה (מצב זהיר)
 import undetected_chromedriver as uc
 from selenium.webdriver.common.by import By
 import time
-import json
 import os
 from settings_manager import SettingsManager  # ← הוספנו!
+import snapshot
+
+# --- קריאה עמוקה (הגדרות: scraper.deep_read.*) ---
+DEEP_MAX_POSTS = 60        # תקרת פוסטים לקבוצה
+DEEP_MAX_SCROLLS = 20      # תקרת גלילות
+DEEP_TIME_BUDGET = 90      # שניות לקבוצה (כולל טעינת הדף)
+DEEP_SCROLL_PAUSE = 1.5    # המתנה אחרי גלילה לטעינת articles חדשים
 
 
 class FacebookScraper:
@@ -18,26 +24,10 @@ class FacebookScraper:
         """אתחול הסורק"""
         self.driver = None
 
-        # ישן - נשאר לביטחון (נמחק בשלב 4)
-        self.config = self._load_config(config_path)
-
-        # חדש - זה מה שנשתמש בו
+        # כל ההגדרות דרך ה-SettingsManager המשותף (בלי קריאה נוספת של config.json)
         self.settings = SettingsManager(config_path)
-
-    def _load_config(self, config_path):
-        """טוען הגדרות - ישן, נשאר לביטחון"""
-        if os.path.exists(config_path):
-            with open(config_path, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        else:
-            # ברירת מחדל
-            return {
-                "chrome_profile_path": "",
-                "scraper": {
-                    "page_load_wait": 5,
-                    "max_time_on_facebook": 15
-                }
-            }
+        self._page_load_wait = self.settings.accessor('scraper.page_load_wait', 5, float)
+        self.snapshots = snapshot.writer_from_env()  # צילום דפים (HOMERADAR_SNAPSHOT_CAPTURE)
 
     def _clean_noise(self, text):
         """
@@ -61,19 +51,21 @@ class FacebookScraper:
 
         return text.strip()
 
-    def create_driver(self):
-        """יוצר דפדפן"""
+    def create_driver(self, profile_path=None):
+        """
+        יוצר דפדפן
+
+        Args:
+            profile_path: תיקיית פרופיל Chrome (ברירת מחדל: chrome_profile_path מההגדרות)
+        """
         try:
             options = uc.ChromeOptions()
             options.add_argument('--disable-blink-features=AutomationControlled')
             options.add_argument('--disable-dev-shm-usage')
             options.add_argument('--no-sandbox')
 
-            # חדש - משתמשים ב-settings
-            profile_path = self.settings.get('chrome_profile_path', '')
-
-            # ישן - מוערת
-            # profile_path = self.config.get("chrome_profile_path")
+            if not profile_path:
+                profile_path = self.settings.get('chrome_profile_path', '')
 
             if not profile_path:
                 profile_path = os.path.join(os.getcwd(), "fb_bot_profile")
@@ -97,119 +89,208 @@ class FacebookScraper:
             # כניסה לקבוצה
             self.driver.get(group_url)
 
-            # חדש - משתמשים ב-settings
-            page_load_wait = self.settings.get('scraper.page_load_wait', 5)
-
-            # ישן - מוערת
-            # page_load_wait = self.config.get("scraper", {}).get("page_load_wait", 5)
-
-            time.sleep(page_load_wait)
+            time.sleep(self._page_load_wait())
 
             # קריאת פוסטים
             posts = self.driver.find_elements(By.CSS_SELECTOR, 'div[role="article"]')
 
+            if self.snapshots:
+                self.snapshots.save(group_url, self._capture_page())
+
             if not posts:
                 return []
 
             # מעבד רק את הפוסטים הראשונים
             for idx, post in enumerate(posts[:max_posts], 1):
                 try:
-                    # לחיצה על "עוד"
-                    try:
-                        see_more = post.find_element(By.XPATH, ".//*[contains(text(), 'עוד') or contains(text(), 'See more')]")
-                        self.driver.execute_script("arguments[0].click();", see_more)
-                        time.sleep(0.5)
-                    except:
-                        pass
+                    post_data = self._parse_article(post, idx)
+                    if post_data:
+                        posts_data.append(post_data)
+                    time.sleep(0.2)
 
-                    # תוכן
-                    try:
-                        content = post.text.strip()
-                        content = self._clean_noise(content)
-                    except:
-                        content = ""
+                except Exception as e:
+                    continue
 
-                    # ========================================
-                    # ✨ סינון פרסומות רשמיות (גלובלי ומקצועי)
-                    # ========================================
+            return posts_data
 
-                    post_html = post.get_attribute('innerHTML')
+        except Exception as e:
+            raise Exception(f"שגיאה בקריאת פוסטים: {str(e)}")
 
-                    if 'sponsored' in post_html.lower() or 'ממומן' in post_html.lower():
-                        print(f"⚡ פרסומת רשמית - דילוג על פוסט #{idx}")
-                        continue
+    def deep_read_posts(self, group_url, stop_ids=(), max_posts=DEEP_MAX_POSTS, max_scrolls=DEEP_MAX_SCROLLS,
+                        time_budget=DEEP_TIME_BUDGET, scroll_pause=DEEP_SCROLL_PAUSE):
+        """
+        קריאה עמוקה עם גלילה הדרגתית (השלמה אחרי הפסקה) - generator:
+        כל פוסט מוחזר מיד כשהוא מפוענח, בלי לחכות לסוף הגלילה.
 
-                    # ✅ אם הגענו לכאן - זה לא פרסומת רשמית
-                    # השאר ל-AI לטפל בספאם ומתווכים מוסתרים
+        עוצר כשמגיעים לפוסט מוכר (stop_ids - הוא מוחזר אחרון), או אחרי max_posts פוסטים /
+        max_scrolls גלילות / time_budget שניות, או כשגלילה לא הביאה אף article חדש.
 
-                    # קישור
-                    post_url = "לא נמצא"
-                    post_id = None
+        Args:
+            stop_ids: post_id-ים שכבר נראו (ה-cursor של הקבוצה)
+        """
+        try:
+            self.driver.get(group_url)
+            time.sleep(self._page_load_wait())
+        except Exception as e:
+            raise Exception(f"שגיאה בקריאת פוסטים: {str(e)}")
 
+        stop_ids = set(filter(None, stop_ids))
+        deadline = time.monotonic() + time_budget
+        handled = set()     # articles שכבר עובדו (WebElement.id - יציב בתוך הדף)
+        seen_urls = set()   # פייסבוק ממחזר DOM בגלילה - אותו פוסט יכול להופיע שוב
+        captured = []       # outerHTML לצילום (נשמר כשהקריאה נגמרת או נעצרת)
+        yielded = 0
+        scrolls = 0
+        idx = 0
+
+        try:
+            while True:
+                try:
+                    articles = self.driver.find_elements(By.CSS_SELECTOR, 'div[role="article"]')
+                except Exception as e:
+                    raise Exception(f"שגיאה בקריאת פוסטים: {str(e)}")
+                if self.snapshots:
+                    captured.extend(self._capture_page())
+
+                fresh = [article for article in articles if article.id not in handled]
+                for article in fresh:
+                    handled.add(article.id)
+                    idx += 1
                     try:
-                        link_elements = post.find_elements(By.TAG_NAME, "a")
-                        for link in link_elements:
-                            href = link.get_attribute("href")
-                            if href and ("/posts/" in href or "/permalink/" in href):
-                                post_url = href.split("?")[0]
-                                if "/posts/" in post_url:
-                                    post_id = post_url.split("/posts/")[-1]
-                                elif "/permalink/" in post_url:
-                                    post_id = post_url.split("/permalink/")[-1]
-                                break
-                    except:
-                        pass
-
-                    # חילוץ שם מפרסם
-                    author = "לא ידוע"
-                    try:
-                        titles = post.find_elements(By.TAG_NAME, "h2")
-                        if not titles:
-                            titles = post.find_elements(By.TAG_NAME, "h3")
-
-                        if titles:
-                            raw_text = titles[0].text.strip()
-                            author = raw_text.split('\n')[0]
-
-                        if author == "לא ידוע":
-                            strongs = post.find_elements(By.TAG_NAME, "strong")
-                            if strongs:
-                                author = strongs[0].text.strip()
-                    except:
-                        pass
-
-                    # שמירה
-                    # ✨ חילוץ תמונות (חדש!)
-                    images = []
-                    try:
-                        img_elements = post.find_elements(By.TAG_NAME, 'img')
-                        for img in img_elements:
-                            img_url = img.get_attribute('src')
-                            # רק תמונות אמיתיות (לא אייקונים)
-                            if img_url and 'scontent' in img_url:
-                                images.append(img_url)
-                    except:
-                        pass
-
-                    # שמירה
-                    if content and len(content) > 10:
-                        posts_data.append({
-                            'post_url': post_url,
-                            'post_id': post_id,
-                            'content': content,
-                            'author': author,
-                            'images': images  # ← חדש!
-                        })
+                        post_data = self._parse_article(article, idx)
+                    except Exception:
+                        continue
+                    if not post_data:
+                        continue
+                    if post_data['post_id']:
+                        if post_data['post_url'] in seen_urls:
+                            continue
+                        seen_urls.add(post_data['post_url'])
+
+                    if post_data['post_id'] in stop_ids:
+                        print(f"⏹️ הגענו לפוסט מוכר אחרי {yielded} פוסטים")
+                        yield post_data  # גם הפוסט המוכר - כך הקורא רואה שהגענו ל-cursor
+                        return
+
+                    yield post_data
+                    yielded += 1
+                    if yielded >= max_posts:
+                        print(f"⏹️ תקרת פוסטים ({max_posts})")
+                        return
+
+                if not fresh and scrolls:
+                    print(f"⏹️ אין פוסטים נוספים אחרי {scrolls} גלילות")
+                    return
+                if scrolls >= max_scrolls or time.monotonic() >= deadline:
+                    print(f"⏹️ תקציב גלילה נגמר ({scrolls} גלילות, {yielded} פוסטים)")
+                    return
+
+                self.driver.execute_script("window.scrollBy(0, Math.floor(window.innerHeight * 0.9));")
+                scrolls += 1
+                time.sleep(scroll_pause)
+        finally:
+            if self.snapshots:
+                self.snapshots.save(group_url, captured)
+
+    def _capture_page(self):
+        """outerHTML של ה-articles העליונים בדף (לצילום); כישלון לא עוצר את הסריקה"""
+        try:
+            return self.driver.execute_script(snapshot.CAPTURE_SCRIPT) or []
+        except Exception as e:
+            print(f"⚠️ צילום נכשל: {e}")
+            return []
 
-                    time.sleep(0.2)
+    def _parse_article(self, post, idx):
+        """
+        article אחד → dict של פוסט, או None (פרסומת / תוכן קצר מדי)
+        משותף לקריאה המהירה ולעמוקה
+        """
+        # לחיצה על "עוד"
+        try:
+            see_more = post.find_element(By.XPATH, ".//*[contains(text(), 'עוד') or contains(text(), 'See more')]")
+            self.driver.execute_script("arguments[0].click();", see_more)
+            time.sleep(0.5)
+        except:
+            pass
 
-                except Exception as e:
-                    continue
+        # תוכן
+        try:
+            content = post.text.strip()
+            content = self._clean_noise(content)
+        except:
+            content = ""
 
-            return posts_data
+        # ========================================
+        # ✨ סינון פרסומות רשמיות (גלובלי ומקצועי)
+        # ========================================
 
-        except Exception as e:
-            raise Exception(f"שגיאה בקריאת פוסטים: {str(e)}")
+        post_html = post.get_attribute('innerHTML')
+
+        if 'sponsored' in post_html.lower() or 'ממומן' in post_html.lower():
+            print(f"⚡ פרסומת רשמית - דילוג על פוסט #{idx}")
+            return None
+
+        # ✅ אם הגענו לכאן - זה לא פרסומת רשמית
+        # השאר ל-AI לטפל בספאם ומתווכים מוסתרים
+
+        # קישור
+        post_url = "לא נמצא"
+        post_id = None
+
+        try:
+            link_elements = post.find_elements(By.TAG_NAME, "a")
+            for link in link_elements:
+                href = link.get_attribute("href")
+                if href and ("/posts/" in href or "/permalink/" in href):
+                    post_url = href.split("?")[0]
+                    if "/posts/" in post_url:
+                        post_id = post_url.split("/posts/")[-1]
+                    elif "/permalink/" in post_url:
+                        post_id = post_url.split("/permalink/")[-1]
+                    break
+        except:
+            pass
+
+        # חילוץ שם מפרסם
+        author = "לא ידוע"
+        try:
+            titles = post.find_elements(By.TAG_NAME, "h2")
+            if not titles:
+                titles = post.find_elements(By.TAG_NAME, "h3")
+
+            if titles:
+                raw_text = titles[0].text.strip()
+                author = raw_text.split('\n')[0]
+
+            if author == "לא ידוע":
+                strongs = post.find_elements(By.TAG_NAME, "strong")
+                if strongs:
+                    author = strongs[0].text.strip()
+        except:
+            pass
+
+        # ✨ חילוץ תמונות (חדש!)
+        images = []
+        try:
+            img_elements = post.find_elements(By.TAG_NAME, 'img')
+            for img in img_elements:
+                img_url = img.get_attribute('src')
+                # רק תמונות אמיתיות (לא אייקונים)
+                if img_url and 'scontent' in img_url:
+                    images.append(img_url)
+        except:
+            pass
+
+        # שמירה
+        if content and len(content) > 10:
+            return {
+                'post_url': post_url,
+                'post_id': post_id,
+                'content': content,
+                'author': author,
+                'images': images  # ← חדש!
+            }
+        return None
 
     def close(self):
         """סוגר דפדפן"""
@@ -217,4 +298,48 @@ class FacebookScraper:
             try:
                 self.driver.quit()
             except:
-                pass
\ No newline at end of file
+                pass
+
+
+class ReplayScraper(FacebookScraper):
+    """
+    אותו ממשק כמו FacebookScraper, מעל צילומים מקומיים (snapshot.py) - בלי פייסבוק ובלי רשת.
+    backend 'files': DOM מדומה (בלי Chrome); 'chrome': Chrome headless מול שרת HTTP מקומי.
+    """
+
+    def __init__(self, directory, backend=snapshot.BACKEND_FILES, page_load_wait=None, config_path="config.json"):
+        super().__init__(config_path)
+        self.directory = directory
+        self.backend = backend
+        self.snapshots = None  # לא מצלמים את ההשמעה
+        if page_load_wait is None and backend == snapshot.BACKEND_FILES:
+            page_load_wait = 0  # אין מה לטעון
+        if page_load_wait is not None:
+            self._page_load_wait = lambda: page_load_wait
+
+    def create_driver(self, profile_path=None):
+        if self.backend == snapshot.BACKEND_FILES:
+            self.driver = snapshot.ReplayDriver(self.directory)
+            return True
+
+        server = snapshot.SnapshotServer(self.directory)
+        try:
+            options = uc.ChromeOptions()
+            options.add_argument('--headless=new')
+            options.add_argument('--disable-dev-shm-usage')
+            options.add_argument('--no-sandbox')
+            self.driver = snapshot.RewritingDriver(uc.Chrome(options=options), server)
+            return True
+        except Exception as e:
+            server.close()
+            raise Exception(f"שגיאה ביצירת דפדפן: {str(e)}")
+
+
+def create_scraper(config_path="config.json"):
+    """FacebookScraper, או ReplayScraper כש-HOMERADAR_SNAPSHOT_REPLAY מוגדר"""
+    directory = os.getenv(snapshot.ENV_REPLAY)
+    if directory:
+        backend = os.getenv(snapshot.ENV_BACKEND, snapshot.BACKEND_FILES)
+        print(f"▶️ השמעת צילומים מ-{directory} ({backend})")
+        return ReplayScraper(directory, backend=backend, config_path=config_path)
+    return FacebookScraper(config_path)
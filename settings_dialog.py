@@ -369,12 +369,13 @@ class SettingsDialog:
                 messagebox.showerror("שגיאה", "פוסטים לקריאה: 1-20!")
                 return
 
-            # שמירה!
-            self.settings.set('listener.check_interval_min', check_min)
-            self.settings.set('listener.check_interval_max', check_max)
-            self.settings.set('listener.active_hours_start', hour_start)
-            self.settings.set('listener.active_hours_end', hour_end)
-            self.settings.set('listener.posts_to_read', posts_read)
+            # שמירה! (כתיבה אחת והודעה אחת לכל השינויים)
+            with self.settings.batch():
+                self.settings.set('listener.check_interval_min', check_min)
+                self.settings.set('listener.check_interval_max', check_max)
+                self.settings.set('listener.active_hours_start', hour_start)
+                self.settings.set('listener.active_hours_end', hour_end)
+                self.settings.set('listener.posts_to_read', posts_read)
 
             # הודעה
             messagebox.showinfo("✅ הצלחה", "ההגדרות נשמרו ועודכנו!\n\nהשינויים ייכנסו לתוקף בבדיקה הבאה.")
@@ -1,11 +1,94 @@
 """
 settings_manager.py - ניהול הגדרות מרכזי
+כתיבה לקובץ היא אטומית (קובץ זמני + fsync + rename) - קריסה באמצע לא משאירה config.json קטוע.
+כמה שינויים ביחד:
+    with settings.batch():
+        settings.set('listener.check_interval_min', 300)
+        settings.set('listener.check_interval_max', 400)
+→ כתיבה אחת והודעה אחת ל-listeners עם כל השינויים.
+עריכות מהירות מה-UI: set(..., debounce=True) - הערך זמין מיד ב-get, הכתיבה וההודעה
+נדחות עד DEBOUNCE_SECONDS בלי שינוי נוסף (או עד flush()).
+reload() בודק mtime/גודל/hash של הקובץ - אם לא השתנה, לא קורא ולא מפרסר. עריכה חיצונית
+→ on_change עם המפתחות שהשתנו בלבד.
+מפתחות שנקראים בלולאות חמות: accessor() מחזיר handle מקומפל - המפתח מפוצל פעם אחת,
+והערך (אחרי המרה לטיפוס) נשמר עד שה-version של ההגדרות משתנה:
+    blacklist = settings.accessor('search_settings.blacklist', [], lowered)
+    for word in blacklist(): ...
 """
 
+import atexit
+import copy
+import hashlib
 import json
 import os
+import tempfile
+import threading
+from contextlib import contextmanager
 from datetime import datetime
 
+DEBOUNCE_SECONDS = 0.5
+
+_MISSING = object()
+
+
+def diff_settings(old, new, prefix=''):
+    """
+    מפתחות (בכתיב נקודות) שהערך שלהם שונה בין שני configs
+
+    Returns:
+        dict של מפתח → ערך חדש (None למפתח שנמחק)
+    """
+    changes = {}
+    for k in set(old) | set(new):
+        key = f"{prefix}{k}"
+        a, b = old.get(k, _MISSING), new.get(k, _MISSING)
+        if isinstance(a, dict) and isinstance(b, dict):
+            changes.update(diff_settings(a, b, key + '.'))
+        elif a != b:
+            changes[key] = None if b is _MISSING else b
+    return changes
+
+
+class SettingAccessor:
+    """handle מקומפל למפתח אחד: accessor() → הערך (מומר לטיפוס), מחושב מחדש רק כשה-version משתנה"""
+
+    __slots__ = ('key', 'default', 'cast', '_keys', '_settings', '_version', '_value')
+
+    def __init__(self, settings, key, default=None, cast=None):
+        self.key = key
+        self.default = default
+        self.cast = cast
+        self._keys = tuple(key.split('.'))
+        self._settings = settings
+        self._version = -1
+        self._value = None
+
+    def __call__(self):
+        settings = self._settings
+        if self._version != settings.version:
+            version = settings.version
+            self._value = self._resolve(settings.config)
+            self._version = version
+        return self._value
+
+    def _resolve(self, config):
+        value = config
+        try:
+            for k in self._keys:
+                value = value[k]
+        except (KeyError, TypeError):
+            return self.default
+        if self.cast is None:
+            return value
+        try:
+            return self.cast(value)
+        except (TypeError, ValueError, AttributeError):
+            print(f"⚠️ ערך לא תקין ל-{self.key}: {value!r} - משתמש בברירת מחדל")
+            return self.default
+
+    def __repr__(self):
+        return f"<SettingAccessor {self.key}>"
+
 
 class SettingsManager:
     """
@@ -29,16 +112,26 @@ class SettingsManager:
 
         self.config_path = config_path
         self.config = {}
-        self.change_listeners = []  # ← הוסף שורה זו!
+        self.change_listeners = []
+        self._lock = threading.RLock()
+        self._batch_depth = 0
+        self._pending = {}            # מפתח → ערך: שינויים שעוד לא נכתבו / לא הודעו
+        self._debounce_timer = None
+        self._file_state = None       # (mtime_ns, size, sha256) של הקובץ כפי שנקרא/נכתב לאחרונה
+        self.version = 0              # עולה בכל שינוי ב-config (accessors בודקים אותו)
+        self._accessors = {}
         self.load()
         self._initialized = True
+        atexit.register(self.flush)
 
     def load(self):
         """טוען הגדרות מקובץ JSON"""
         try:
             if os.path.exists(self.config_path):
-                with open(self.config_path, 'r', encoding='utf-8') as f:
-                    self.config = json.load(f)
+                data = self._read_file()
+                self.config = json.loads(data)
+                self._remember_file(data)
+                self.version += 1
                 print(f"✅ הגדרות נטענו מ-{self.config_path}")
             else:
                 print(f"⚠️ קובץ {self.config_path} לא נמצא - יוצר ברירת מחדל")
@@ -65,20 +158,60 @@ class SettingsManager:
             },
             "scraper": {
                 "page_load_wait": 5,
-                "max_time_on_facebook": 15
+                "max_time_on_facebook": 15,
+                "read_mode": "auto",
+                "deep_read": {
+                    "after_idle_min": 30,
+                    "max_posts": 60,
+                    "max_scrolls": 20,
+                    "time_budget_sec": 90,
+                    "scroll_pause": 1.5
+                }
+            },
+            "browser": {
+                "max_pages": 150,
+                "max_rss_mb": 1500,
+                "health_interval_sec": 60,
+                "standby": False,
+                "standby_profile_path": ""
+            },
+            "ai": {
+                "mode": "combined",
+                "pre_classifier": {
+                    "enabled": True,
+                    "threshold": 0.9,
+                    "model_path": "pre_classifier_model.json"
+                },
+                "images": {
+                    "max_per_post": 3,
+                    "min_side": 120,
+                    "thumbnail_side": 512,
+                    "send": "thumbnail"
+                }
             }
         }
         self.save()
 
     def save(self):
-        """שומר הגדרות לקובץ JSON"""
+        """שומר הגדרות לקובץ JSON (אטומי: קובץ זמני באותה תיקייה → fsync → rename)"""
+        directory = os.path.dirname(os.path.abspath(self.config_path))
+        tmp_path = None
         try:
-            with open(self.config_path, 'w', encoding='utf-8') as f:
-                json.dump(self.config, f, indent=2, ensure_ascii=False)
+            with self._lock:
+                data = json.dumps(self.config, indent=2, ensure_ascii=False).encode('utf-8')
+                fd, tmp_path = tempfile.mkstemp(prefix='.config-', suffix='.tmp', dir=directory)
+                with os.fdopen(fd, 'wb') as f:
+                    f.write(data)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp_path, self.config_path)
+                self._remember_file(data)  # הכתיבה שלנו לא תיחשב בהמשך כעריכה חיצונית
             print(f"💾 הגדרות נשמרו ב-{self.config_path}")
             return True
         except Exception as e:
             print(f"❌ שגיאה בשמירת הגדרות: {e}")
+            if tmp_path and os.path.exists(tmp_path):
+                os.remove(tmp_path)
             return False
 
     def get(self, key, default=None):
@@ -101,52 +234,177 @@ class SettingsManager:
         except (KeyError, TypeError):
             return default
 
-    def set(self, key, value):
+    def set(self, key, value, debounce=False):
         """
         מגדיר ערך הגדרה
 
+        Args:
+            debounce: True - הכתיבה וההודעה נדחות (עריכות מהירות מה-UI)
+
         Examples:
             set('groups_urls', ['https://...'])
             set('listener.check_interval_min', 300)
         """
         keys = key.split('.')
 
-        # Navigate to the nested dict
-        current = self.config
-        for k in keys[:-1]:
-            if k not in current:
-                current[k] = {}
-            current = current[k]
+        with self._lock:
+            # Navigate to the nested dict
+            current = self.config
+            for k in keys[:-1]:
+                if k not in current:
+                    current[k] = {}
+                current = current[k]
 
-        # Set the value
-        current[keys[-1]] = value
+            # Set the value
+            current[keys[-1]] = value
+            self._pending[key] = value
+            self.version += 1
 
-        # Auto-save
-        self.save()
-        self._notify_listeners(key, value)  # ← שורה חדשה!
+            if self._batch_depth:
+                return True  # נכתב ביציאה מה-batch
 
+            if debounce:
+                self._schedule_flush()
+                return True
+
+        self.flush()
         return True
 
+    @contextmanager
+    def batch(self):
+        """
+        כל ה-set בתוך הבלוק → כתיבה אטומית אחת והודעה אחת (אפשר לקנן).
+        חריגה בתוך הבלוק → ההגדרות חוזרות למצב שלפניו, בלי כתיבה ובלי הודעה.
+        """
+        with self._lock:
+            if self._batch_depth == 0:
+                snapshot = (copy.deepcopy(self.config), dict(self._pending))
+            self._batch_depth += 1
+        try:
+            yield self
+        except BaseException:
+            with self._lock:
+                self._batch_depth -= 1
+                if self._batch_depth == 0:
+                    self.config, self._pending = snapshot
+                    self.version += 1
+            raise
+        with self._lock:
+            self._batch_depth -= 1
+            outermost = self._batch_depth == 0
+        if outermost:
+            self.flush()
+
+    def flush(self):
+        """כותב ומודיע על כל השינויים שממתינים (debounce / batch)"""
+        with self._lock:
+            if self._debounce_timer is not None:
+                self._debounce_timer.cancel()
+                self._debounce_timer = None
+            if self._batch_depth or not self._pending:
+                return False
+            changes, self._pending = self._pending, {}
+            saved = self.save()
+        # ההודעה מחוץ ל-lock - listener יכול לקרוא get/set בלי deadlock בין threads
+        self._notify_listeners(changes)
+        return saved
+
+    def _schedule_flush(self):
+        """מאתחל את טיימר ה-debounce (נקרא תחת lock)"""
+        if self._debounce_timer is not None:
+            self._debounce_timer.cancel()
+        self._debounce_timer = threading.Timer(DEBOUNCE_SECONDS, self.flush)
+        self._debounce_timer.daemon = True
+        self._debounce_timer.start()
+
     def get_all(self):
         """מחזיר את כל ההגדרות"""
         return self.config.copy()
 
     def reload(self):
-        """טוען מחדש את ההגדרות מהקובץ"""
-        print("🔄 טוען הגדרות מחדש...")
-        self.load()
-        return True
+        """
+        טוען מחדש את ההגדרות מהקובץ - רק אם הקובץ השתנה (mtime/גודל, ואז hash).
+        שינויים שממתינים נכתבים קודם.
+
+        Returns:
+            dict של המפתחות שהשתנו (ריק אם הקובץ לא השתנה)
+        """
+        self.flush()
+        with self._lock:
+            try:
+                stat = os.stat(self.config_path)
+            except OSError:
+                print(f"⚠️ קובץ {self.config_path} לא נמצא - ממשיך עם ההגדרות הנוכחיות")
+                return {}
+
+            state = self._file_state
+            if state and (stat.st_mtime_ns, stat.st_size) == state[:2]:
+                return {}
+
+            try:
+                data = self._read_file()
+                if state and hashlib.sha256(data).hexdigest() == state[2]:
+                    self._remember_file(data)  # touch בלי שינוי תוכן
+                    return {}
+                config = json.loads(data)
+            except (OSError, ValueError) as e:
+                # למשל עורך שבאמצע שמירה - נשארים עם הקיים, וננסה שוב בפעם הבאה
+                print(f"❌ שגיאה בטעינת הגדרות מחדש: {e}")
+                return {}
+
+            changes = diff_settings(self.config, config)
+            self.config = config
+            self._remember_file(data)
+            if changes:
+                self.version += 1
+
+        if changes:
+            print(f"🔄 הגדרות נטענו מחדש ({len(changes)} שינויים: {', '.join(sorted(changes))})")
+            self._notify_listeners(changes)
+        return changes
+
+    def _read_file(self):
+        with open(self.config_path, 'rb') as f:
+            return f.read()
+
+    def _remember_file(self, data):
+        """שומר את חתימת הקובץ כפי שהוא עכשיו על הדיסק"""
+        try:
+            stat = os.stat(self.config_path)
+        except OSError:
+            self._file_state = None
+            return
+        self._file_state = (stat.st_mtime_ns, stat.st_size, hashlib.sha256(data).hexdigest())
+
+    def accessor(self, key, default=None, cast=None):
+        """
+        handle מקומפל למפתח חם (במקום get בכל קריאה)
+
+        Args:
+            key: מפתח בכתיב נקודות ('listener.active_hours_start')
+            default: ערך אם המפתח חסר או שההמרה נכשלה
+            cast: המרה שרצה פעם אחת לכל שינוי (int, float, lowered...)
+
+        Returns:
+            SettingAccessor - קריאה: accessor()
+        """
+        with self._lock:
+            cache_key = (key, repr(default), cast)
+            handle = self._accessors.get(cache_key)
+            if handle is None:
+                handle = self._accessors[cache_key] = SettingAccessor(self, key, default, cast)
+            return handle
 
     def on_change(self, callback):
         """
         נרשם לקבלת עדכונים על שינויים בהגדרות
 
         Args:
-            callback: פונקציה שתקרא כש-setting משתנה
-                      החתימה: callback(key, value)
+            callback: פונקציה שתקרא כשהגדרות משתנות - פעם אחת לכל כתיבה
+                      החתימה: callback(changes) - dict של מפתח → ערך חדש
 
         Example:
-            settings.on_change(lambda k, v: print(f"Changed: {k} = {v}"))
+            settings.on_change(lambda changes: print(f"Changed: {changes}"))
         """
         if callback not in self.change_listeners:
             self.change_listeners.append(callback)
@@ -158,17 +416,16 @@ class SettingsManager:
             self.change_listeners.remove(callback)
             print(f"➖ הוסר listener (נשארו: {len(self.change_listeners)})")
 
-    def _notify_listeners(self, key, value):
+    def _notify_listeners(self, changes):
         """
         מודיע לכל ה-listeners על שינוי
 
         Args:
-            key: המפתח שהשתנה
-            value: הערך החדש
+            changes: dict של מפתח → ערך חדש
         """
-        for callback in self.change_listeners:
+        for callback in list(self.change_listeners):
             try:
-                callback(key, value)
+                callback(changes)
             except Exception as e:
                 print(f"⚠️ שגיאה ב-listener: {e}")
 
@@ -204,23 +461,53 @@ class SettingsManager:
 
         return (len(errors) == 0, errors)
 
-    def add_group(self, url):
+    def get_groups(self, active_only=False):
+        """
+        הקבוצות מ-groups_urls / groups_names / groups_active, מיושרות לאותו אורך
+        (שם חסר → "קבוצה N", active חסר → True). מהזיכרון - בלי קריאה מהדיסק.
+
+        Returns:
+            list של {'url', 'name', 'active'} (עותקים - שינוי בהם לא נוגע ב-config)
+        """
+        with self._lock:
+            urls = list(self.get('groups_urls', []) or [])
+            names = list(self.get('groups_names', []) or [])
+            active = list(self.get('groups_active', []) or [])
+
+        groups = []
+        for i, url in enumerate(urls):
+            groups.append({
+                'url': url,
+                'name': names[i] if i < len(names) and names[i] else f"קבוצה {i + 1}",
+                'active': bool(active[i]) if i < len(active) else True
+            })
+        if active_only:
+            groups = [g for g in groups if g['active']]
+        return groups
+
+    def set_groups(self, groups):
+        """שומר רשימת קבוצות ({'url', 'name', 'active'}) - כתיבה אחת והודעה אחת"""
+        with self.batch():
+            self.set('groups_urls', [g['url'] for g in groups])
+            self.set('groups_names', [g['name'] for g in groups])
+            self.set('groups_active', [bool(g.get('active', True)) for g in groups])
+        return True
+
+    def add_group(self, url, name=None):
         """מוסיף קבוצה לרשימה"""
-        groups = self.get('groups_urls', [])
-        if url not in groups:
-            groups.append(url)
-            self.set('groups_urls', groups)
-            return True
-        return False
+        groups = self.get_groups()
+        if any(g['url'] == url for g in groups):
+            return False
+        groups.append({'url': url, 'name': name or f"קבוצה {len(groups) + 1}", 'active': True})
+        return self.set_groups(groups)
 
     def remove_group(self, url):
-        """מסיר קבוצה מהרשימה"""
-        groups = self.get('groups_urls', [])
-        if url in groups:
-            groups.remove(url)
-            self.set('groups_urls', groups)
-            return True
-        return False
+        """מסיר קבוצה מהרשימה (יחד עם השם והמצב שלה)"""
+        groups = self.get_groups()
+        remaining = [g for g in groups if g['url'] != url]
+        if len(remaining) == len(groups):
+            return False
+        return self.set_groups(remaining)
 
     def add_blacklist_word(self, word):
         """מוסיף מילה ל-blacklist"""
@@ -253,6 +540,11 @@ def get_settings():
     return SettingsManager()
 
 
+def lowered(words):
+    """cast ל-accessor: רשימת מחרוזות → (מקור, באותיות קטנות)"""
+    return [(word, word.lower()) for word in words]
+
+
 # ==========================================
 #              בדיקה מהירה
 # ==========================================
@@ -266,8 +558,8 @@ if __name__ == "__main__":
 
 
     # הגדרת listener
-    def on_setting_changed(key, value):
-        print(f"🔔 שינוי התקבל! {key} = {value}")
+    def on_setting_changed(changes):
+        print(f"🔔 שינוי התקבל! {changes}")
 
 
     print("📝 נרשם ל-listener...")
@@ -276,7 +568,9 @@ if __name__ == "__main__":
     print("\n🔧 משנה הגדרה...")
     settings.set('listener.check_interval_min', 300)
 
-    print("\n🔧 משנה עוד הגדרה...")
-    settings.set('listener.posts_to_read', 5)
+    print("\n🔧 משנה שתי הגדרות ביחד...")
+    with settings.batch():
+        settings.set('listener.check_interval_max', 480)
+        settings.set('listener.posts_to_read', 5)
 
     print("\n✅ Event System עובד!")
\ No newline at end of file
@@ -0,0 +1,481 @@
+"""
+snapshot.py - צילום דפי קבוצות ל-HTML מקומי, והשמעה חוזרת בלי פייסבוק
+capture - הסורק שומר את ה-DOM של ה-articles בכל דף קבוצה (מנוקה: בלי script/style,
+          בלי מאפייני מעקב, קישורים בלי query) - קובץ HTML לכל קבוצה + manifest.json
+replay  - ReplayScraper (ב-scraper.py) מממש את אותו ממשק (quick_read_posts / deep_read_posts)
+          מעל הקבצים: backend 'files' - עץ DOM מדומה בלי Chrome בכלל,
+          backend 'chrome' - שרת HTTP מקומי + Chrome headless (אותו קוד selenium כמו בפייסבוק)
+כך אפשר להריץ, למדוד ולעשות profiling למחזור listener מלא על מחשב בלי רשת.
+
+הפעלה בלי לשנות קוד (משתני סביבה, נקראים כשהסורק נוצר):
+  HOMERADAR_SNAPSHOT_CAPTURE=snapshots     - צילום תוך כדי סריקה רגילה
+  HOMERADAR_SNAPSHOT_REPLAY=snapshots      - השמעה (הסורק לא פותח את פייסבוק)
+  HOMERADAR_SNAPSHOT_BACKEND=chrome        - files (ברירת מחדל) / chrome
+
+הרצה:
+  python snapshot.py stats snapshots
+  python snapshot.py read snapshots [--deep] [--profile]
+"""
+
+import argparse
+import hashlib
+import html
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+from functools import partial
+from html.parser import HTMLParser
+from urllib.parse import urlsplit, urlunsplit
+
+ENV_CAPTURE = 'HOMERADAR_SNAPSHOT_CAPTURE'
+ENV_REPLAY = 'HOMERADAR_SNAPSHOT_REPLAY'
+ENV_BACKEND = 'HOMERADAR_SNAPSHOT_BACKEND'
+
+BACKEND_FILES = 'files'
+BACKEND_CHROME = 'chrome'
+
+MANIFEST = 'manifest.json'
+
+# articles עליונים בלבד (תגובות הן article בתוך article), עם href מוחלט (מאפיין ה-DOM)
+CAPTURE_SCRIPT = """
+return Array.from(document.querySelectorAll('div[role="article"]'))
+    .filter(a => !a.parentElement.closest('div[role="article"]'))
+    .map(a => {
+        const copy = a.cloneNode(true);
+        copy.querySelectorAll('a[href]').forEach((link, i) =>
+            link.setAttribute('href', a.querySelectorAll('a[href]')[i].href));
+        return copy.outerHTML;
+    });
+"""
+
+DROP_TAGS = {'script', 'style', 'noscript', 'svg', 'iframe', 'link', 'meta', 'input', 'form'}
+KEEP_ATTRS = {'href', 'src', 'role', 'alt', 'dir', 'aria-label'}
+VOID_TAGS = {'img', 'br', 'hr', 'input', 'meta', 'link', 'source', 'wbr'}
+BLOCK_TAGS = {'div', 'p', 'br', 'li', 'ul', 'ol', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6',
+              'section', 'article', 'header', 'footer', 'blockquote', 'table', 'tr'}
+
+
+# =========================================================
+#  ניקוי
+# =========================================================
+
+def _clean_url(url):
+    """קישור בלי query/fragment (פרמטרי מעקב של פייסבוק: __cft__, __tn__...)"""
+    parts = urlsplit(url)
+    if parts.scheme not in ('', 'http', 'https'):
+        return '#'  # javascript: / mailto: וכו'
+    return urlunsplit((parts.scheme, parts.netloc, parts.path, '', ''))
+
+
+class _Sanitizer(HTMLParser):
+    """HTML → HTML מצומצם: רק תגיות תוכן ומאפיינים שהסורק קורא"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.out = []
+        self._dropping = 0  # עומק בתוך תגית שנזרקת
+
+    def handle_starttag(self, tag, attrs):
+        if self._dropping or tag in DROP_TAGS:
+            if tag not in VOID_TAGS:
+                self._dropping += 1
+            return
+        kept = []
+        for name, value in attrs:
+            if name not in KEEP_ATTRS or value is None:
+                continue
+            if name == 'href':
+                value = _clean_url(value)
+            kept.append(f' {name}="{html.escape(value, quote=True)}"')
+        self.out.append(f"<{tag}{''.join(kept)}>")
+
+    def handle_startendtag(self, tag, attrs):
+        if self._dropping or tag in DROP_TAGS:
+            return
+        self.handle_starttag(tag, attrs)
+        if tag not in VOID_TAGS:
+            self.out.append(f"</{tag}>")
+
+    def handle_endtag(self, tag):
+        if tag in VOID_TAGS:
+            return
+        if self._dropping:
+            self._dropping -= 1
+            return
+        self.out.append(f"</{tag}>")
+
+    def handle_data(self, data):
+        if not self._dropping:
+            self.out.append(html.escape(data, quote=False))
+
+
+def sanitize(markup):
+    parser = _Sanitizer()
+    parser.feed(markup)
+    parser.close()
+    return ''.join(parser.out)
+
+
+def snapshot_name(url):
+    """שם קובץ יציב לקבוצה: החלק הקריא של הנתיב + hash קצר (שלא יתנגשו)"""
+    readable = re.sub(r'[^0-9A-Za-z]+', '_', urlsplit(url).path).strip('_')[:60] or 'page'
+    return f"{readable}_{hashlib.sha1(url.encode('utf-8')).hexdigest()[:8]}.html"
+
+
+def render_page(url, articles):
+    body = '\n'.join(articles)
+    return ('<!DOCTYPE html>\n<html lang="he" dir="rtl"><head><meta charset="utf-8">'
+            f'<title>{html.escape(url)}</title></head>\n<body><div role="feed">\n{body}\n</div></body></html>\n')
+
+
+# =========================================================
+#  צילום
+# =========================================================
+
+class SnapshotWriter:
+    """שומר דפי קבוצות לתיקייה (דף לכל קבוצה, הצילום האחרון מחליף את הקודם)"""
+
+    def __init__(self, directory):
+        self.directory = directory
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def save(self, group_url, articles_html):
+        """
+        Args:
+            articles_html: outerHTML של articles (גם עם כפילויות - צילומים חופפים בגלילה)
+
+        Returns:
+            מספר ה-articles שנשמרו
+        """
+        articles = list(dict.fromkeys(sanitize(markup) for markup in articles_html if markup))
+        name = snapshot_name(group_url)
+        with self._lock:
+            self._write(name, render_page(group_url, articles))
+            manifest = load_manifest(self.directory)
+            manifest[group_url] = {'file': name, 'articles': len(articles),
+                                   'captured_at': time.strftime('%Y-%m-%d %H:%M:%S')}
+            self._write(MANIFEST, json.dumps(manifest, ensure_ascii=False, indent=2))
+        print(f"📸 צילום: {len(articles)} articles → {name}")
+        return len(articles)
+
+    def _write(self, name, text):
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(text)
+        os.replace(tmp_path, os.path.join(self.directory, name))
+
+
+def load_manifest(directory):
+    path = os.path.join(directory, MANIFEST)
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def writer_from_env():
+    directory = os.getenv(ENV_CAPTURE)
+    if not directory:
+        return None
+    print(f"📸 צילום דפי קבוצות ל-{directory}")
+    return SnapshotWriter(directory)
+
+
+# =========================================================
+#  השמעה - backend 'files' (DOM מדומה)
+# =========================================================
+
+class NoSuchElement(LookupError):
+    """find_element בלי תוצאה (כמו NoSuchElementException של selenium)"""
+
+
+_SELECTOR = re.compile(r'^(\w+)?(?:\[(\w[\w-]*)(?:="([^"]*)")?\])?$')
+_XPATH_TEXT = re.compile(r"contains\(text\(\),\s*'([^']*)'\)")
+
+
+class ReplayElement:
+    """
+    אלמנט מדומה - רק מה ש-FacebookScraper משתמש בו:
+    id, text, get_attribute, find_element(s) לפי TAG_NAME / CSS_SELECTOR פשוט / XPATH של contains(text())
+    """
+
+    def __init__(self, tag, attrs, element_id):
+        self.tag = tag
+        self.attrs = attrs
+        self.id = element_id
+        self.children = []  # ReplayElement או str
+
+    # --- טקסט ---
+
+    @property
+    def text(self):
+        chunks = []
+        self._collect_text(chunks)
+        lines = (' '.join(line.split()) for line in ''.join(chunks).split('\n'))
+        return '\n'.join(line for line in lines if line)
+
+    def _collect_text(self, chunks):
+        block = self.tag in BLOCK_TAGS
+        if block:
+            chunks.append('\n')
+        for child in self.children:
+            if isinstance(child, str):
+                chunks.append(child)
+            else:
+                child._collect_text(chunks)
+        if block:
+            chunks.append('\n')
+
+    # --- מאפיינים ---
+
+    def get_attribute(self, name):
+        if name == 'innerHTML':
+            return ''.join(_serialize(child) for child in self.children)
+        if name == 'outerHTML':
+            return _serialize(self)
+        return self.attrs.get(name)
+
+    # --- חיפוש ---
+
+    def iter_descendants(self):
+        for child in self.children:
+            if isinstance(child, ReplayElement):
+                yield child
+                yield from child.iter_descendants()
+
+    def find_elements(self, by, value):
+        if by == 'tag name':
+            return [e for e in self.iter_descendants() if e.tag == value]
+        if by == 'css selector':
+            return [e for e in self.iter_descendants() if _matches_selector(e, value)]
+        if by == 'xpath':
+            needles = _XPATH_TEXT.findall(value)
+            return [e for e in self.iter_descendants()
+                    if any(needle in child for child in e.children if isinstance(child, str) for needle in needles)]
+        raise ValueError(f"unsupported locator in replay: {by}")
+
+    def find_element(self, by, value):
+        found = self.find_elements(by, value)
+        if not found:
+            raise NoSuchElement(value)
+        return found[0]
+
+
+def _matches_selector(element, selector):
+    match = _SELECTOR.match(selector.strip())
+    if not match:
+        raise ValueError(f"unsupported selector in replay: {selector}")
+    tag, attr, expected = match.groups()
+    if tag and element.tag != tag:
+        return False
+    if attr and (attr not in element.attrs or (expected is not None and element.attrs[attr] != expected)):
+        return False
+    return True
+
+
+def _serialize(node):
+    if isinstance(node, str):
+        return html.escape(node, quote=False)
+    attrs = ''.join(f' {k}="{html.escape(v, quote=True)}"' for k, v in node.attrs.items())
+    if node.tag in VOID_TAGS:
+        return f"<{node.tag}{attrs}>"
+    return f"<{node.tag}{attrs}>{''.join(_serialize(c) for c in node.children)}</{node.tag}>"
+
+
+class _TreeBuilder(HTMLParser):
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.root = ReplayElement('#document', {}, 'replay-0')
+        self._stack = [self.root]
+        self._count = 0
+
+    def handle_starttag(self, tag, attrs):
+        self._count += 1
+        element = ReplayElement(tag, {k: v or '' for k, v in attrs}, f"replay-{self._count}")
+        self._stack[-1].children.append(element)
+        if tag not in VOID_TAGS:
+            self._stack.append(element)
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+        if tag not in VOID_TAGS:
+            self._stack.pop()
+
+    def handle_endtag(self, tag):
+        for depth in range(len(self._stack) - 1, 0, -1):  # סוגר עד התגית המתאימה (HTML לא מאוזן)
+            if self._stack[depth].tag == tag:
+                del self._stack[depth:]
+                return
+
+    def handle_data(self, data):
+        self._stack[-1].children.append(data)
+
+
+def parse_page(markup):
+    builder = _TreeBuilder()
+    builder.feed(markup)
+    builder.close()
+    return builder.root
+
+
+class ReplayDriver:
+    """מחליף את ה-WebDriver: get(url) טוען את הצילום של הקבוצה, find_elements מחפש בו"""
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.manifest = load_manifest(directory)
+        self.current_url = 'about:blank'
+        self.service = None
+        self._document = ReplayElement('#document', {}, 'replay-0')
+        self._pages = {}  # file → markup (נקרא מהדיסק פעם אחת)
+
+    def get(self, url):
+        entry = self.manifest.get(url)
+        if entry is None:
+            raise RuntimeError(f"no snapshot for {url} in {self.directory}")
+        name = entry['file']
+        if name not in self._pages:
+            with open(os.path.join(self.directory, name), encoding='utf-8') as f:
+                self._pages[name] = f.read()
+        self._document = parse_page(self._pages[name])  # עץ חדש - כמו טעינת דף
+        self.current_url = url
+
+    def find_elements(self, by, value):
+        return self._document.find_elements(by, value)
+
+    def find_element(self, by, value):
+        return self._document.find_element(by, value)
+
+    def execute_script(self, script, *args):
+        return None  # גלילה / לחיצה על "עוד" - הצילום כבר מלא
+
+    def maximize_window(self):
+        pass
+
+    def quit(self):
+        self._document = None
+
+
+# =========================================================
+#  השמעה - backend 'chrome' (שרת HTTP מקומי)
+# =========================================================
+
+class SnapshotServer:
+    """מגיש את תיקיית הצילומים ב-127.0.0.1 (פורט פנוי) ב-thread ברקע"""
+
+    def __init__(self, directory):
+        from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+        class QuietHandler(SimpleHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+        self.directory = directory
+        self.manifest = load_manifest(directory)
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), partial(QuietHandler, directory=directory))
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+
+    @property
+    def base_url(self):
+        return f"http://127.0.0.1:{self.httpd.server_address[1]}"
+
+    def local_url(self, group_url):
+        entry = self.manifest.get(group_url)
+        if entry is None:
+            raise RuntimeError(f"no snapshot for {group_url} in {self.directory}")
+        return f"{self.base_url}/{entry['file']}"
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+class RewritingDriver:
+    """עוטף WebDriver אמיתי: get(url של קבוצה) → הצילום בשרת המקומי; כל השאר עובר כמו שהוא"""
+
+    def __init__(self, driver, server):
+        self._driver = driver
+        self._server = server
+
+    def get(self, url):
+        self._driver.get(self._server.local_url(url))
+
+    def quit(self):
+        try:
+            self._driver.quit()
+        finally:
+            self._server.close()
+
+    def __getattr__(self, name):
+        return getattr(self._driver, name)
+
+
+# =========================================================
+#  CLI
+# =========================================================
+
+def print_stats(directory):
+    manifest = load_manifest(directory)
+    if not manifest:
+        print(f"⚠️ אין צילומים ב-{directory}")
+        return
+    total = sum(entry['articles'] for entry in manifest.values())
+    print(f"📸 {len(manifest)} קבוצות, {total} articles")
+    for url, entry in manifest.items():
+        print(f"  {entry['articles']:4d}  {entry['captured_at']}  {url}")
+
+
+def read_bench(directory, deep, profile):
+    """קורא את כל הצילומים דרך ReplayScraper (בלי Chrome) ומודד"""
+    from scraper import ReplayScraper
+
+    scraper = ReplayScraper(directory, page_load_wait=0)
+    scraper.create_driver()
+    urls = list(scraper.driver.manifest)
+
+    def run():
+        count = 0
+        for url in urls:
+            posts = scraper.deep_read_posts(url, scroll_pause=0) if deep else scraper.quick_read_posts(url, max_posts=1000)
+            count += sum(1 for _ in posts)
+        return count
+
+    started = time.perf_counter()
+    if profile:
+        import cProfile
+        import pstats
+        profiler = cProfile.Profile()
+        count = profiler.runcall(run)
+        pstats.Stats(profiler).sort_stats('cumulative').print_stats(20)
+    else:
+        count = run()
+    elapsed = time.perf_counter() - started
+    print(f"📊 {len(urls)} קבוצות, {count} פוסטים ב-{elapsed:.2f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="צילום והשמעה של דפי קבוצות")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    stats = sub.add_parser('stats', help='סיכום הצילומים')
+    stats.add_argument('directory')
+
+    read = sub.add_parser('read', help='קריאת כל הצילומים דרך ReplayScraper')
+    read.add_argument('directory')
+    read.add_argument('--deep', action='store_true', help='deep_read_posts במקום quick_read_posts')
+    read.add_argument('--profile', action='store_true')
+
+    args = parser.parse_args()
+    if args.command == 'stats':
+        print_stats(args.directory)
+    else:
+        read_bench(args.directory, args.deep, args.profile)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+"""
+startup_profile.py - מדידת זמן עליית התוכנה
+1. פרופיל imports: מריץ python -X importtime ומפרסר לדוח (מה הכי כבד)
+2. זמן עד פריים ראשון: מתהליך חדש (cold start) ועד שהחלון הראשי צויר
+
+הרצה: python startup_profile.py [--top 15]
+"""
+
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+# תקציב זמן לעלייה קרה עד פריים ראשון (שניות) - הטסט נכשל מעליו
+STARTUP_BUDGET_SEC = 3.0
+
+PROJECT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+FIRST_FRAME_MARKER = "FIRST_FRAME"
+
+# הקוד שרץ בתהליך הילד: בונה את GuardianGUI, מצייר פריים אחד ויוצא
+_FIRST_FRAME_SCRIPT = f"""
+import tkinter as tk
+import main
+root = tk.Tk()
+app = main.GuardianGUI(root)
+root.update()
+print("{FIRST_FRAME_MARKER}", flush=True)
+root.destroy()
+"""
+
+
+# =========================================================
+#  פרופיל imports
+# =========================================================
+
+def parse_importtime(stderr_text):
+    """
+    מפרסר את הפלט של python -X importtime
+
+    שורה לדוגמה:
+        import time:      1131 |     541935 |           anthropic._client
+
+    Returns:
+        list של dict: {'module', 'self_us', 'cumulative_us', 'depth'}
+    """
+    rows = []
+    for line in stderr_text.splitlines():
+        if not line.startswith('import time:'):
+            continue
+
+        parts = line[len('import time:'):].split('|')
+        if len(parts) != 3:
+            continue
+
+        self_us, cumulative_us, name = parts
+        try:
+            row = {
+                'module': name.strip(),
+                'self_us': int(self_us.strip()),
+                'cumulative_us': int(cumulative_us.strip()),
+                # כל רמת קינון = 2 רווחים אחרי הרווח הראשון
+                'depth': (len(name) - len(name.lstrip(' ')) - 1) // 2
+            }
+        except ValueError:
+            continue  # שורת הכותרת ("self [us] | cumulative | ...")
+        rows.append(row)
+
+    return rows
+
+
+def profile_imports(module='main'):
+    """מריץ import של המודול בתהליך נקי ומחזיר את השורות המפורסרות"""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=PROJECT_DIR, capture_output=True, text=True, encoding='utf-8'
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"import {module} נכשל:\n{result.stderr[-2000:]}")
+    return parse_importtime(result.stderr)
+
+
+def format_import_report(rows, top=15):
+    """בונה דוח טקסט: סה"כ, המודולים הכי כבדים (מצטבר) והכי כבדים בעצמם"""
+    if not rows:
+        return "אין נתוני importtime"
+
+    # השורה האחרונה ברמה 0 היא המודול שביקשנו - הזמן שלה הוא הסה"כ
+    top_level = [r for r in rows if r['depth'] == 0]
+    total_ms = top_level[-1]['cumulative_us'] / 1000 if top_level else 0
+
+    lines = [f"⏱️ זמן import כולל: {total_ms:.1f}ms ({len(rows)} מודולים)", ""]
+
+    lines.append(f"📦 {top} הכבדים ביותר (מצטבר):")
+    for r in sorted(rows, key=lambda r: r['cumulative_us'], reverse=True)[:top]:
+        lines.append(f"  {r['cumulative_us'] / 1000:9.1f}ms  {r['module']}")
+
+    lines.append("")
+    lines.append(f"🔍 {top} הכבדים ביותר (self):")
+    for r in sorted(rows, key=lambda r: r['self_us'], reverse=True)[:top]:
+        lines.append(f"  {r['self_us'] / 1000:9.1f}ms  {r['module']}")
+
+    return "\n".join(lines)
+
+
+# =========================================================
+#  זמן עד פריים ראשון
+# =========================================================
+
+def measure_first_frame(timeout=60):
+    """
+    מודד cold start: מהפעלת תהליך python חדש ועד שהחלון הראשי צויר.
+    רץ בתיקייה זמנית כדי לא ליצור posts.db / config.json בתיקיית הפרויקט.
+
+    Returns:
+        float: שניות עד פריים ראשון
+
+    Raises:
+        RuntimeError: אם התהליך נכשל (למשל אין DISPLAY)
+    """
+    env = dict(os.environ)
+    env['PYTHONPATH'] = PROJECT_DIR + os.pathsep + env.get('PYTHONPATH', '')
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        start = time.perf_counter()
+        proc = subprocess.Popen(
+            [sys.executable, '-c', _FIRST_FRAME_SCRIPT],
+            cwd=work_dir, env=env,
+            stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, encoding='utf-8'
+        )
+
+        elapsed = None
+        for line in proc.stdout:
+            if line.strip() == FIRST_FRAME_MARKER:
+                elapsed = time.perf_counter() - start
+                break
+
+        try:
+            _, stderr = proc.communicate(timeout=timeout)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+            _, stderr = proc.communicate()
+
+    if elapsed is None:
+        raise RuntimeError(f"החלון לא עלה:\n{stderr[-2000:]}")
+    return elapsed
+
+
+# ==========================================
+#              הרצה ישירה
+# ==========================================
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="פרופיל זמן עלייה")
+    parser.add_argument('--module', default='main', help='מודול לפרופיל (ברירת מחדל: main)')
+    parser.add_argument('--top', type=int, default=15, help='כמה מודולים להציג')
+    args = parser.parse_args()
+
+    print("=" * 70)
+    print(format_import_report(profile_imports(args.module), top=args.top))
+    print("=" * 70)
+
+    try:
+        seconds = measure_first_frame()
+        status = "✅" if seconds <= STARTUP_BUDGET_SEC else "❌"
+        print(f"{status} פריים ראשון אחרי {seconds:.2f}s (תקציב: {STARTUP_BUDGET_SEC}s)")
+    except RuntimeError as e:
+        print(f"⚠️ לא ניתן למדוד פריים ראשון: {e}")
@@ -0,0 +1,134 @@
+"""
+synthetic_data.py - יצירת דאטאבייס סינתטי גדול לבנצ'מרקים
+פוסטים בעברית מתבניות (עיר, שכונה, מחיר, חדרים) על פני טווח ימים - דטרמיניסטי לפי seed.
+
+הרצה: python synthetic_data.py bench.db 100000
+"""
+
+import json
+import os
+import random
+import sqlite3
+from datetime import datetime, timedelta
+
+from database import PostDatabase
+
+_TEMPLATES = [
+    "דירת {rooms} חדרים למכירה ב{city} בשכונת {hood}, קומה {floor}, מחיר {price:,} ₪ טלפון 050-{phone}",
+    "להשכרה ב{city}! {rooms} חד' משופצת באזור {hood} {price} ש\"ח כולל ועד. לפרטים 052-{phone}",
+    "דירה מהממת ב{hood}, {rooms} חדרים, מרפסת שמש ומעלית. מבוקש: {price:,} ₪",
+    "מחפש דירה {rooms} חדרים ב{city} עד {price:,} ₪",
+    "הובלות ושיפוצים במחירים הכי טובים ב{city}! התקשרו 054-{phone}",
+    "מישהו יודע מה המחירים היום ב{hood}? שוקלים לקנות {rooms} חדרים",
+]
+
+_CATEGORIES = ['RELEVANT', 'RELEVANT', 'RELEVANT', 'WANTED', 'SPAM', 'QUESTION']
+
+_AUTHORS = ['משה כהן', 'שרה לוי', 'דוד מזרחי', 'רחל פרץ', 'יוסי ביטון', 'משרד תיווך', 'נועה אברהם']
+
+
+def _load_places():
+    """ערים ושכונות מ-locations.json (רק ערים עם שכונות מוגדרות)"""
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'locations.json')
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    return [(city, hoods) for city, hoods in data['neighborhoods'].items() if hoods]
+
+
+def generate_posts(count, days=90, seed=42):
+    """
+    מייצר פוסטים סינתטיים (generator - בלי להחזיק הכל בזיכרון)
+
+    Yields:
+        tuple בסדר העמודות של INSERT_COLUMNS
+    """
+    rng = random.Random(seed)
+    places = _load_places()
+    now = datetime.now()
+
+    for i in range(count):
+        city, hoods = rng.choice(places)
+        hood = rng.choice(hoods)
+        template_idx = rng.randrange(len(_TEMPLATES))
+        category = _CATEGORIES[template_idx]
+
+        rooms = rng.choice([1, 2, 2.5, 3, 3.5, 4, 4.5, 5, 6])
+        is_rent = rng.random() < 0.4
+        price = rng.randrange(3000, 15000, 100) if is_rent else rng.randrange(900000, 6000000, 10000)
+
+        content = _TEMPLATES[template_idx].format(
+            rooms=rooms, city=city, hood=hood, floor=rng.randint(0, 12),
+            price=price, phone=f"{rng.randint(1000000, 9999999)}")
+
+        relevant = category == 'RELEVANT'
+        scanned_at = now - timedelta(seconds=rng.randint(0, days * 86400))
+
+        yield (
+            f"https://www.facebook.com/groups/synthetic/posts/{i}",
+            str(i),
+            content,
+            rng.choice(_AUTHORS),
+            city if relevant else None,
+            hood if relevant else None,
+            str(price) if relevant else None,
+            str(rooms) if relevant else None,
+            f"05{rng.randint(10000000, 99999999)}",
+            f"קבוצה סינתטית {i % 8 + 1}",
+            1 if relevant else 0,
+            category,
+            1 if rng.random() < 0.2 else 0,
+            round(rng.uniform(0.6, 1.0), 2),
+            scanned_at.strftime('%Y-%m-%d %H:%M:%S')
+        )
+
+
+INSERT_COLUMNS = (
+    'post_url', 'post_id', 'content', 'author', 'city', 'location', 'price', 'rooms', 'phone',
+    'group_name', 'is_relevant', 'category', 'is_broker', 'ai_confidence', 'scanned_at'
+)
+
+
+def make_synthetic_db(db_path, count, days=90, seed=42, batch_size=10000):
+    """
+    יוצר (או מוסיף ל-) דאטאבייס עם count פוסטים סינתטיים.
+    הטבלאות וה-triggers נוצרים דרך PostDatabase - כך שגם טבלאות הסיכום מתמלאות.
+
+    Returns:
+        PostDatabase על הקובץ
+    """
+    db = PostDatabase(db_path)
+
+    placeholders = ', '.join('?' for _ in INSERT_COLUMNS)
+    sql = f"INSERT OR IGNORE INTO posts ({', '.join(INSERT_COLUMNS)}) VALUES ({placeholders})"
+
+    conn = sqlite3.connect(db_path)
+    try:
+        batch = []
+        for row in generate_posts(count, days=days, seed=seed):
+            batch.append(row)
+            if len(batch) >= batch_size:
+                conn.executemany(sql, batch)
+                conn.commit()
+                batch = []
+        if batch:
+            conn.executemany(sql, batch)
+            conn.commit()
+    finally:
+        conn.close()
+
+    return db
+
+
+# ==========================================
+#              הרצה ישירה
+# ==========================================
+
+if __name__ == "__main__":
+    import sys
+
+    if len(sys.argv) < 3:
+        print("שימוש: python synthetic_data.py <db_path> <count>")
+        sys.exit(1)
+
+    make_synthetic_db(sys.argv[1], int(sys.argv[2]))
+    print(f"✅ נוצרו {int(sys.argv[2]):,} פוסטים סינתטיים ב-{sys.argv[1]}")
@@ -4,8 +4,43 @@ test_system.py - טסטים למערכת Facebook Guardian
 """
 
 import unittest
+import csv
+import os
+import subprocess
+import sys
+import sqlite3
+import tempfile
+import time
+import json
+import io
+import base64
+from types import SimpleNamespace
+from unittest import mock
+import database
 from database import PostDatabase
-from ai_agents import AIAgents
+from ai_agents import AIAgents, AIFailedError, AI_MODE_COMBINED, AI_MODE_TWO_CALL
+import startup_profile
+import exporter
+import synthetic_data
+from analytics import Analytics
+from events import EventBus, CYCLE_FINISHED, SEARCH_MATCHED
+from live_stats import LiveStats
+from saved_searches import SavedSearchStore
+import groups_store
+import snapshot
+from groups_store import GroupStore
+from browser_manager import BrowserManager
+from batch_enrichment import BatchEnricher, LocalBatchClient
+from circuit_breaker import CircuitBreaker, CLOSED, OPEN, HALF_OPEN
+import pre_classifier
+from pre_classifier import PreClassifier, TfidfLogistic, split_holdout, evaluate
+import image_pipeline
+from image_pipeline import ImagePipeline
+import ai_recorder
+from ai_recorder import RecordingClient, ReplayMissError
+import bench_percolator
+import settings_manager
+from settings_manager import SettingsManager
 
 
 class TestRegexExtraction(unittest.TestCase):
@@ -186,6 +221,1395 @@ class TestLocationSplitting(unittest.TestCase):
         self.assertEqual(street, "-")
 
 
+class TestStartupBudget(unittest.TestCase):
+    """טסטים לזמן עליית התוכנה"""
+
+    def test_core_imports_are_light(self):
+        """import של main לא מושך anthropic / selenium / dotenv"""
+        code = ("import sys, main; "
+                "heavy = ['anthropic', 'selenium', 'undetected_chromedriver', 'dotenv', 'pandas']; "
+                "print(','.join(m for m in heavy if m in sys.modules))")
+        result = subprocess.run([sys.executable, '-c', code], cwd=startup_profile.PROJECT_DIR,
+                                capture_output=True, text=True, encoding='utf-8')
+
+        print(f"✅ מודולים כבדים שנטענו: '{result.stdout.strip()}'")
+        self.assertEqual(result.returncode, 0, result.stderr)
+        self.assertEqual(result.stdout.strip(), '')
+
+    def test_parse_importtime(self):
+        """פרסור פלט importtime"""
+        stderr = ("import time: self [us] | cumulative | imported package\n"
+                  "import time:       120 |        120 |   json.decoder\n"
+                  "import time:       300 |        420 | json\n")
+        rows = startup_profile.parse_importtime(stderr)
+
+        self.assertEqual(len(rows), 2)
+        self.assertEqual(rows[0]['depth'], 1)
+        self.assertEqual(rows[1]['module'], 'json')
+        self.assertEqual(rows[1]['cumulative_us'], 420)
+
+    def test_cold_start_within_budget(self):
+        """cold start עד פריים ראשון בתוך התקציב"""
+        try:
+            seconds = startup_profile.measure_first_frame()
+        except RuntimeError as e:
+            # מדלגים רק כשאין תצוגה גרפית - כל כשל אחר (import שבור, חריגה ב-GUI) הוא באג
+            message = str(e)
+            if 'TclError' in message and any(hint in message for hint in ('no display', '$DISPLAY', "couldn't connect to display")):
+                self.skipTest(f"אין תצוגה גרפית: {message.splitlines()[-1]}")
+            self.fail(f"החלון הראשי לא עלה:\n{message}")
+
+        print(f"✅ פריים ראשון: {seconds:.2f}s")
+        self.assertLessEqual(seconds, startup_profile.STARTUP_BUDGET_SEC)
+
+
+class TempDatabaseTestCase(unittest.TestCase):
+    """בסיס לטסטים שצריכים DB זמני (לא נוגעים ב-posts.db האמיתי)"""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.tmp_dir.name, 'test_posts.db')
+        self.bus = EventBus()
+        self.db = PostDatabase(self.db_path, event_bus=self.bus)
+        self.db.ai_agents = None  # בלי קריאות API בטסטים
+        self.db.pre_classifier = None  # ולא סיווג מקומי (כל טסט מחליט בעצמו)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def save(self, idx, content, **extra):
+        """שומר פוסט פשוט ומחזיר את תוצאת save_post"""
+        post = {
+            'post_url': f'https://facebook.com/groups/1/posts/{idx}',
+            'post_id': str(idx),
+            'content': content,
+            'author': 'בודק',
+            'group_name': 'קבוצת בדיקה',
+            **extra
+        }
+        return self.db.save_post(post)
+
+
+class TestLiveStats(TempDatabaseTestCase):
+    """טסטים למונים של הדשבורד (Event Bus)"""
+
+    def test_counters_follow_events(self):
+        """שמירת פוסט מעדכנת את המונים בלי לשאול את ה-DB"""
+        stats = LiveStats(self.bus)
+        stats.seed(self.db, Analytics(self.db_path))
+        self.assertEqual(stats.snapshot()['today'], 0)
+
+        self.save(1, "דירה למכירה בירושלים 2,000,000 ₪ 4 חדרים")
+        self.save(2, "דירה בירושלים 3,000,000 ₪")
+        self.save(3, "מחפש דירה", blacklist_match='מחפש דירה', is_relevant=0)
+        self.bus.publish(CYCLE_FINISHED, {'checks_today': 1})
+
+        snapshot = stats.snapshot()
+        print(f"✅ מונים: {snapshot}")
+        self.assertEqual(snapshot['today'], 3)
+        self.assertEqual(snapshot['week'], 2)
+        self.assertEqual(snapshot['avg_price'], 2500000)
+        self.assertEqual(snapshot['popular_city'], "ירושלים (2)")
+        self.assertEqual(snapshot['checks_today'], 1)
+
+    def test_seed_matches_events(self):
+        """זריעה מחדש מה-DB נותנת אותם ערכים כמו הצבירה מאירועים"""
+        live = LiveStats(self.bus)
+        self.save(1, "דירה למכירה בירושלים 2,000,000 ₪")
+        self.save(2, "דירה להשכרה בחיפה 5000 ₪")
+
+        seeded = LiveStats(EventBus())
+        seeded.seed(self.db, Analytics(self.db_path))
+
+        for key in ('today', 'week', 'avg_price'):
+            self.assertEqual(live.snapshot()[key], seeded.snapshot()[key])
+
+    def test_listener_events_do_not_touch_tk(self):
+        """אירוע מה-thread של ה-listener רק מסמן; ה-poll על ה-main loop מרענן פעם אחת לכל פרץ"""
+        import main
+        import threading
+        gui = main.GuardianGUI.__new__(main.GuardianGUI)
+        gui.root = mock.Mock()
+        gui._refresh_dashboard = mock.Mock()
+        gui._dashboard_dirty = threading.Event()
+
+        worker = threading.Thread(target=lambda: [gui._on_stats_event({}) for _ in range(5)])
+        worker.start()
+        worker.join()
+        gui.root.after.assert_not_called()
+
+        gui._poll_dashboard()
+        gui._poll_dashboard()
+        self.assertEqual(gui._refresh_dashboard.call_count, 1)
+        gui.root.after.assert_called_with(main.DASHBOARD_POLL_MS, gui._poll_dashboard)
+
+
+class TestCityCardsDiff(unittest.TestCase):
+    """טסטים ל-diff של כרטיסיות עיר-שכונה (בלי Tk)"""
+
+    def test_only_changes_are_reported(self):
+        """מספר שהשתנה / שכונה חדשה / שכונה שהתרוקנה - והשאר לא נוגעים"""
+        from main import diff_neighborhood_cards
+        cards = {('ירושלים', 'גילה'): {'index': 0, 'count': 5},
+                 ('ירושלים', 'רמות'): {'index': 1, 'count': 3},
+                 ('בית שמש', 'רמה א'): {'index': 0, 'count': 2}}
+        stats = {'ירושלים': {'גילה': 5, 'רמות': 4, 'תלפיות': 1}}
+
+        added, updated, removed = diff_neighborhood_cards(cards, stats)
+
+        self.assertEqual(added, {('ירושלים', 'תלפיות'): (2, 1)})
+        self.assertEqual(updated, {('ירושלים', 'רמות'): (1, 4)})
+        self.assertEqual(removed, [('בית שמש', 'רמה א')])
+
+        cards = {key: {'index': i, 'count': c} for key, (i, c) in {**added, **updated}.items()}
+        cards[('ירושלים', 'גילה')] = {'index': 0, 'count': 5}
+        self.assertEqual(diff_neighborhood_cards(cards, stats), ({}, {}, []))
+
+
+class FakeTree:
+    """Treeview מדומה: insert / delete / selection / item"""
+
+    def __init__(self):
+        self.rows = {}
+        self.inserted = 0
+
+    def insert(self, parent, index, values, tags=()):
+        self.inserted += 1
+        item = f"I{self.inserted:03}"
+        self.rows[item] = {'values': values, 'tags': tags}
+        return item
+
+    def delete(self, *items):
+        for item in items:
+            del self.rows[item]
+
+    def get_children(self):
+        return list(self.rows)
+
+    def selection(self):
+        return [list(self.rows)[1]]
+
+    def item(self, item, option):
+        return self.rows[item][option]
+
+
+class TestApartmentsTableRows(unittest.TestCase):
+    """מספור ופסים בטבלת הדירות אחרי מחיקה (בלי Tk)"""
+
+    @staticmethod
+    def page(start, count):
+        return [{'id': i, 'author': f'מפרסם {i}', 'price': None, 'rooms': None, 'phone': None,
+                 'post_url': f'https://facebook.com/groups/1/posts/{i}'} for i in range(start, start + count)]
+
+    def test_next_page_after_delete_keeps_numbering(self):
+        """מחיקת שורה ואז דף נוסף: אין מספר כפול, והפסים ממשיכים להתחלף"""
+        from apartments_window import ApartmentsWindow
+        window = ApartmentsWindow.__new__(ApartmentsWindow)
+        window.db = mock.Mock()
+        window.db.count_posts.return_value = 6
+        window.db.get_posts_page.side_effect = [(self.page(1, 3), 'cursor'), (self.page(4, 3), None)]
+        window.tree = FakeTree()
+        window.status_var = mock.Mock()
+        window.query, window.city, window.sort, window.descending = None, None, 'scanned_at', True
+
+        window.reload()
+        with mock.patch('apartments_window.messagebox') as box:
+            box.askyesno.return_value = True
+            window.delete_selected_post()
+        window.load_more()
+
+        rows = list(window.tree.rows.values())
+        numbers = [row['values'][0] for row in rows]
+        tags = [row['tags'][0] for row in rows]
+        self.assertEqual(numbers, [1, 3, 4, 5, 6])
+        self.assertEqual(tags, ['evenrow', 'evenrow', 'oddrow', 'evenrow', 'oddrow'])
+        window.db.delete_post.assert_called_once_with(2)
+        window.status_var.set.assert_called_with("מוצגות: 5 מתוך 5 דירות")
+
+
+class TestDailyStats(TempDatabaseTestCase):
+    """טסטים לטבלת הסיכומים daily_stats"""
+
+    def raw_city_counts(self):
+        """החישוב הישן - ישירות על posts"""
+        conn = sqlite3.connect(self.db_path)
+        rows = conn.execute(
+            "SELECT city, location, COUNT(*) FROM posts WHERE is_relevant = 1 "
+            "AND city IS NOT NULL AND location IS NOT NULL GROUP BY city, location").fetchall()
+        conn.close()
+        return {(c, l): n for c, l, n in rows}
+
+    def rollup_city_counts(self):
+        stats = Analytics(self.db_path).get_city_neighborhood_stats(min_apartments=1)
+        return {(c, l): n for c, hoods in stats.items() for l, n in hoods.items()}
+
+    def test_triggers_follow_insert_update_delete(self):
+        """הסיכום נשאר זהה לחישוב על posts אחרי הוספה, עדכון ומחיקה"""
+        self.save(1, "דירה בירושלים בשכונת קטמון 2,000,000 ₪ 4 חדרים")
+        self.save(2, "דירה בירושלים בשכונת קטמון 3,000,000 ₪ 3 חדרים")
+        self.save(3, "דירה בירושלים בשכונת גילה 1,500,000 ₪")
+        self.save(4, "מחפש דירה בירושלים", blacklist_match='מחפש דירה', is_relevant=0)
+        self.assertEqual(self.rollup_city_counts(), self.raw_city_counts())
+
+        conn = sqlite3.connect(self.db_path)
+        conn.execute("UPDATE posts SET location = 'גילה' WHERE post_id = '2'")
+        conn.execute("DELETE FROM posts WHERE post_id = '3'")
+        conn.commit()
+        conn.close()
+
+        print(f"✅ סיכום: {self.rollup_city_counts()}")
+        self.assertEqual(self.rollup_city_counts(), self.raw_city_counts())
+        self.assertEqual(self.db.get_stats(), {'total': 3, 'relevant': 2, 'blacklisted': 1, 'today': 3})
+
+        trends = Analytics(self.db_path).get_trends_today()
+        self.assertEqual(trends['avg_price'], 2500000)
+        self.assertEqual(trends['avg_rooms'], 3.5)
+
+    def test_rebuild_matches_incremental(self):
+        """בנייה מחדש נותנת בדיוק את מה שה-triggers צברו"""
+        self.save(1, "דירה בירושלים בשכונת קטמון 2,000,000 ₪")
+        self.save(2, "דירה בחיפה 5000 ₪ 2 חדרים")
+
+        conn = sqlite3.connect(self.db_path)
+        before = conn.execute("SELECT * FROM daily_stats ORDER BY 1, 2, 3, 4, 5").fetchall()
+        conn.close()
+
+        self.db.rebuild_daily_stats()
+
+        conn = sqlite3.connect(self.db_path)
+        after = conn.execute("SELECT * FROM daily_stats ORDER BY 1, 2, 3, 4, 5").fetchall()
+        conn.close()
+        self.assertEqual(before, after)
+
+
+class TestSettingsManager(unittest.TestCase):
+    """טסטים ל-SettingsManager (config זמני, instance חדש לכל טסט)"""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp_dir.name, 'config.json')
+        with open(self.path, 'w', encoding='utf-8') as f:
+            json.dump({'listener': {'check_interval_min': 360}}, f)
+        self._saved_instance, SettingsManager._instance = SettingsManager._instance, None
+        self.settings = SettingsManager(self.path)
+        self.changes = []
+        self.settings.on_change(self.changes.append)
+
+    def tearDown(self):
+        self.settings.flush()
+        SettingsManager._instance = self._saved_instance
+        self.tmp_dir.cleanup()
+
+    def on_disk(self):
+        with open(self.path, encoding='utf-8') as f:
+            return json.load(f)
+
+    def test_batch_writes_once(self):
+        """batch → כתיבה אחת, הודעה אחת עם כל השינויים, בלי קבצים זמניים"""
+        with mock.patch.object(self.settings, 'save', wraps=self.settings.save) as save:
+            with self.settings.batch():
+                self.settings.set('listener.check_interval_min', 300)
+                self.settings.set('listener.posts_to_read', 5)
+                self.assertEqual(save.call_count, 0)
+        self.assertEqual(save.call_count, 1)
+        self.assertEqual(self.changes, [{'listener.check_interval_min': 300, 'listener.posts_to_read': 5}])
+        self.assertEqual(self.on_disk()['listener'], {'check_interval_min': 300, 'posts_to_read': 5})
+        self.assertEqual(os.listdir(self.tmp_dir.name), ['config.json'])
+
+    def test_failed_batch_rolls_back(self):
+        """חריגה בתוך batch → ההגדרות חוזרות, לא נכתב ולא הודע כלום"""
+        with self.assertRaises(RuntimeError):
+            with self.settings.batch():
+                self.settings.set('listener.check_interval_min', 1)
+                raise RuntimeError("boom")
+        self.assertEqual(self.settings.get('listener.check_interval_min'), 360)
+        self.assertEqual(self.changes, [])
+        self.assertEqual(self.on_disk()['listener']['check_interval_min'], 360)
+
+    def test_debounce_coalesces(self):
+        """עריכות מהירות: get רואה מיד, הכתיבה וההודעה רק אחרי השקט"""
+        with mock.patch.object(settings_manager, 'DEBOUNCE_SECONDS', 0.05):
+            for value in (1, 2, 3):
+                self.settings.set('listener.posts_to_read', value, debounce=True)
+            self.assertEqual(self.settings.get('listener.posts_to_read'), 3)
+            self.assertNotIn('posts_to_read', self.on_disk()['listener'])
+            time.sleep(0.3)
+        self.assertEqual(self.changes, [{'listener.posts_to_read': 3}])
+        self.assertEqual(self.on_disk()['listener']['posts_to_read'], 3)
+
+
+    def test_reload_only_when_file_changed(self):
+        """קובץ שלא השתנה לא נקרא; עריכה חיצונית → on_change עם המפתחות שהשתנו בלבד"""
+        with mock.patch.object(self.settings, '_read_file', wraps=self.settings._read_file) as read:
+            self.assertEqual(self.settings.reload(), {})
+            self.assertEqual(read.call_count, 0)
+
+        config = self.on_disk()
+        config['listener']['check_interval_min'] = 200
+        config['groups_urls'] = ['https://facebook.com/groups/1']
+        with open(self.path, 'w', encoding='utf-8') as f:
+            json.dump(config, f)
+        os.utime(self.path, ns=(time.time_ns(), time.time_ns() + 10 ** 9))  # mtime שונה גם במערכות קבצים גסות
+
+        expected = {'listener.check_interval_min': 200, 'groups_urls': ['https://facebook.com/groups/1']}
+        self.assertEqual(self.settings.reload(), expected)
+        self.assertEqual(self.changes, [expected])
+        self.assertEqual(self.settings.reload(), {})
+
+    def test_accessor_follows_changes(self):
+        """accessor מחזיר ערך מומר, ומתעדכן אחרי set"""
+        start = self.settings.accessor('listener.check_interval_min', 0, int)
+        missing = self.settings.accessor('listener.nope', 7, int)
+        self.assertIs(start, self.settings.accessor('listener.check_interval_min', 0, int))
+        self.assertEqual((start(), missing()), (360, 7))
+
+        self.settings.set('listener.check_interval_min', '300')
+        self.assertEqual(start(), 300)
+        self.settings.set('listener.check_interval_min', 'abc')
+        self.assertEqual(start(), 0)
+
+
+    def test_groups_are_aligned(self):
+        """שמות/מצב חסרים מושלמים, שמירה = הודעה אחת, ומחיקה מסירה גם את השם"""
+        self.settings.set('groups_urls', ['u1', 'u2', 'u3'])
+        self.settings.set('groups_names', ['א'])
+        self.settings.set('groups_active', [True, False])
+        self.changes.clear()
+
+        groups = self.settings.get_groups()
+        self.assertEqual([g['name'] for g in groups], ['א', 'קבוצה 2', 'קבוצה 3'])
+        self.assertEqual([g['url'] for g in self.settings.get_groups(active_only=True)], ['u1', 'u3'])
+
+        self.assertTrue(self.settings.remove_group('u1'))
+        self.assertEqual(len(self.changes), 1)
+        self.assertEqual(self.on_disk()['groups_names'], ['קבוצה 2', 'קבוצה 3'])
+        self.assertEqual(self.on_disk()['groups_active'], [False, True])
+
+
+class TestSearch(TempDatabaseTestCase):
+    """טסטים לחיפוש החופשי (FTS5)"""
+
+    def setUp(self):
+        super().setUp()
+        self.save(1, "דירה מהממת בקטמון עם מרפסת שמש, 3 חדרים")
+        self.save(2, "להשכרה בגילה: 4 חדרים ומרפסת")
+        self.save(3, "מחפש דירה בקטמון", blacklist_match='מחפש דירה', is_relevant=0)
+
+    def found_ids(self, query, filters=None):
+        return sorted(int(r['post_url'].rsplit('/', 1)[1]) for r in self.db.search(query, filters))
+
+    def test_prefix_letters(self):
+        """'קטמון' מוצא 'בקטמון', 'ומרפסת' מוצא 'מרפסת'"""
+        self.assertEqual(self.found_ids("קטמון"), [1])
+        self.assertEqual(self.found_ids("ומרפסת"), [1, 2])
+        self.assertEqual(self.found_ids("מרפסת קטמון"), [1])
+
+    def test_filters_and_snippet(self):
+        """מסנן רלוונטיות + סימון המילה שנמצאה"""
+        self.assertEqual(self.found_ids("קטמון", {'relevant_only': False}), [1, 3])
+
+        snippet = self.db.search("מרפסת", highlight=('[', ']'))[0]['snippet']
+        print(f"✅ snippet: {snippet}")
+        self.assertIn('מרפסת]', snippet)
+
+        with self.assertRaises(ValueError):
+            self.db.search("דירה", {'price': 5})
+
+    def test_index_follows_delete(self):
+        """מחיקת פוסט מוציאה אותו מהאינדקס"""
+        post_id = self.db.search("גילה")[0]['id']
+        self.db.delete_post(post_id)
+        self.assertEqual(self.found_ids("גילה"), [])
+
+
+class TestSavedSearches(TempDatabaseTestCase):
+    """טסטים לחיפושים שמורים (Percolator)"""
+
+    def test_store_and_match(self):
+        """'ירושלים, קטמון, 3-4 חדרים, עד 2.5 מיליון'"""
+        store = SavedSearchStore(self.db_path)
+        katamon = store.add("קטמון", city="ירושלים", location="קטמון", max_price=2500000,
+                            min_rooms=3, max_rooms=4)
+        store.add("חיפה", city="חיפה")
+
+        post = {'city': 'ירושלים', 'location': 'קטמון, רחוב הרצל', 'price': '2,300,000', 'rooms': '3.5'}
+        self.assertEqual([s.id for s in store.match(post)], [katamon.id])
+        self.assertEqual(store.match({**post, 'price': '2600000'}), [])
+        self.assertEqual(store.match({**post, 'rooms': None}), [])
+
+        # השהיה ומחיקה מוציאות מהאינדקס, וטעינה מחדש מה-DB משחזרת אותו
+        store.set_active(katamon.id, False)
+        self.assertEqual(store.match(post), [])
+        store.set_active(katamon.id, True)
+        self.assertEqual(len(SavedSearchStore(self.db_path).match(post)), 1)
+        store.remove(katamon.id)
+        self.assertEqual(store.match(post), [])
+
+    def test_alert_uses_stored_details(self):
+        """ההתראה והכרטיסייה מקבלות את מה שנשמר (כולל מה שה-AI השלים), לא Regex בלבד"""
+        from listener import FacebookListener
+        with mock.patch.dict(os.environ, {'ANTHROPIC_API_KEY': 'test-key'}):
+            agents = AIAgents(mode=AI_MODE_COMBINED)
+        agents.min_delay = 0
+        agents.client = FakeAnthropic({'category': 'RELEVANT', 'is_broker': False, 'confidence': 0.9,
+                                       'reason': 'דירה', 'price': '2400000', 'city': 'ירושלים',
+                                       'location': 'קטמון', 'rooms': '4'})
+        self.db.ai_agents = agents
+
+        listener = FacebookListener.__new__(FacebookListener)
+        listener.db, listener.events = self.db, self.bus
+        listener.saved_searches = SavedSearchStore(self.db_path)
+        listener._whitelist = listener._blacklist = lambda: []
+        listener.status_callback = None
+        cards = []
+        listener.new_post_callback = cards.append
+        search = listener.saved_searches.add("קטמון", city="ירושלים", location="קטמון", max_price=2500000)
+        alerts = []
+        self.bus.subscribe(SEARCH_MATCHED, alerts.append)
+
+        post = {'post_url': 'https://facebook.com/groups/1/posts/1', 'post_id': '1', 'author': 'בודק',
+                'content': "דירה מהממת, מרפסת שמש ומעלית, פרטים בפרטי"}  # ל-Regex אין כאן כלום
+        self.assertEqual(listener._process_post(post, 'קבוצת בדיקה'), (1, 0))
+
+        self.assertEqual(len(alerts), 1)
+        self.assertEqual(alerts[0]['search_id'], search.id)
+        self.assertEqual((cards[0]['city'], cards[0]['location'], cards[0]['price']), ('ירושלים', 'קטמון', '2400000'))
+
+    def test_same_as_naive(self):
+        """האינדקס מחזיר בדיוק את מה שבדיקה של כל החיפושים מחזירה"""
+        searches = bench_percolator.make_searches(500)
+        percolator = bench_percolator.Percolator(searches)
+
+        for post in bench_percolator.make_posts(300):
+            fast = sorted(s.id for s in percolator.match(post))
+            slow = sorted(s.id for s in bench_percolator.naive_match(searches, post))
+            self.assertEqual(fast, slow)
+
+
+class TestGroupStore(TempDatabaseTestCase):
+    """טסטים לטבלת groups (מצב סריקה לכל קבוצה)"""
+
+    def test_cursor_and_scan_state(self):
+        """cursor התחלתי מ-posts, עדכון בזיכרון, וכתיבה ב-flush"""
+        self.save(7, "דירה בירושלים")  # group_name='קבוצת בדיקה'
+        store = GroupStore(self.db_path)
+        states = store.sync([{'url': 'u1', 'name': 'קבוצת בדיקה', 'active': True},
+                             {'url': 'u2', 'name': 'אחרת', 'active': False}])
+
+        self.assertEqual([(s['last_post_id'], s['active']) for s in states], [('7', 1), (None, 0)])
+
+        store.record_scan('u1', 2.0, last_post_id='9')
+        store.record_scan('u1', 4.0, last_post_id='10')
+        store.record_scan('u2', 1.0, ok=False)
+        self.assertEqual(store.flush(), 2)
+        self.assertEqual(store.flush(), 0)
+
+        reloaded = GroupStore(self.db_path)
+        u1, u2 = reloaded.get('u1'), reloaded.get('u2')
+        self.assertEqual((u1['last_post_id'], u1['scans'], u1['consecutive_failures']), ('10', 2, 0))
+        self.assertAlmostEqual(u1['avg_scan_seconds'], 2.6)
+        self.assertEqual(u2['consecutive_failures'], 1)
+
+        # שינוי שם/מצב בהגדרות לא מאפס את ה-cursor
+        reloaded.sync([{'url': 'u1', 'name': 'שם חדש', 'active': False}])
+        self.assertEqual(GroupStore(self.db_path).get('u1')['last_post_id'], '10')
+        self.assertEqual(GroupStore(self.db_path).get('u1')['active'], 0)
+
+
+    def test_quarantine_and_probe(self):
+        """3 כישלונות → הסגר; אחרי שנגמר - probe אחד למחזור; הצלחה מחזירה לסריקה"""
+        from datetime import datetime, timedelta
+        now = [datetime(2026, 1, 1, 12, 0)]
+        store = GroupStore(self.db_path, clock=lambda: now[0])
+        groups = [{'url': u, 'name': u, 'active': True} for u in ('a', 'b', 'c')]
+        store.sync(groups)
+
+        for _ in range(groups_store.QUARANTINE_AFTER):
+            for url in ('a', 'b'):
+                store.record_scan(url, 1.0, ok=False, error="login wall")
+        self.assertEqual(store.health('a'), groups_store.QUARANTINED)
+        to_scan, skipped = store.plan(groups)
+        self.assertEqual([g['url'] for g in to_scan], ['c'])
+        self.assertEqual(len(skipped), 2)
+        self.assertEqual(store.health_summary()[groups_store.QUARANTINED], 2)
+
+        now[0] += timedelta(minutes=groups_store.QUARANTINE_BASE_MINUTES + 1)
+        to_scan, skipped = store.plan(groups)
+        self.assertEqual([g['url'] for g in to_scan], ['c', 'a'])  # רגילות קודם, אחריהן probe אחד
+        self.assertEqual([g['url'] for g in skipped], ['b'])
+
+        store.record_scan('a', 1.0, ok=True, last_post_id='5')   # probe הצליח
+        store.record_scan('b', 1.0, ok=False)                     # probe נכשל → הסגר כפול
+        self.assertEqual(store.health('a'), groups_store.HEALTHY)
+        until = datetime.fromisoformat(store.get('b')['quarantined_until'])
+        self.assertEqual(until - now[0], timedelta(minutes=2 * groups_store.QUARANTINE_BASE_MINUTES))
+
+        store.flush()
+        self.assertEqual(GroupStore(self.db_path).get('b')['consecutive_failures'], groups_store.QUARANTINE_AFTER + 1)
+
+
+class FakeScraper:
+    """סורק מדומה לטסטי BrowserManager (driver.current_url נכשל אחרי crash())"""
+
+    def __init__(self, role):
+        self.role = role
+        self.driver = SimpleNamespace(current_url='about:blank')
+        self.closed = False
+
+    def crash(self):
+        self.driver = SimpleNamespace()  # אין current_url → AttributeError
+
+    def close(self):
+        self.closed = True
+
+
+class TestBrowserManager(unittest.TestCase):
+    """טסטים למחזור החיים של הדפדפן"""
+
+    def make(self, **kwargs):
+        self.created = []
+
+        def factory(profile):
+            # כמו Chrome: פרופיל שדפדפן פתוח מחזיק נעול
+            if any(s.role == profile and not s.closed for s in self.created):
+                raise RuntimeError(f"profile {profile} locked")
+            scraper = FakeScraper(profile)
+            self.created.append(scraper)
+            return scraper
+
+        kwargs.setdefault('health_interval', 0)
+        return BrowserManager(factory, log=lambda message: None, **kwargs)
+
+    def test_reuse_restart_and_recycle(self):
+        """דפדפן חי נשמר; דפדפן שנפל מוחלף; מחזור אחרי max_pages / RSS"""
+        rss = [100.0]
+        manager = self.make(max_pages=3, max_rss_mb=500, rss_reader=lambda s: rss[0])
+        first = manager.start()
+        self.assertIs(manager.start(), first)
+
+        first.crash()
+        manager.check_health()
+        second = manager.scraper
+        self.assertTrue(first.closed)
+        self.assertIsNot(second, first)
+
+        for _ in range(2):
+            manager.page_loaded()
+        self.assertIsNone(manager.maybe_recycle())
+        manager.page_loaded()
+        self.assertIsNotNone(manager.maybe_recycle())
+        self.assertTrue(second.closed)
+
+        rss[0] = 800.0
+        self.assertIn('MB', manager.maybe_recycle())
+
+        metrics = manager.metrics()
+        print(f"✅ מדדי דפדפן: {metrics}")
+        self.assertEqual((metrics['starts'], metrics['restarts'], metrics['recycles']), (4, 1, 2))
+        manager.close()
+        self.assertTrue(all(s.closed for s in self.created))
+
+    def test_standby_failover(self):
+        """standby מחומם מחליף מיד את הראשי שנפל, ו-standby חדש מתחמם"""
+        manager = self.make(standby=True, max_rss_mb=0)
+        primary = manager.start()
+        deadline = time.time() + 2
+        while manager.standby is None and time.time() < deadline:
+            time.sleep(0.01)
+        standby = manager.standby
+        self.assertEqual(standby.role, 'standby')
+
+        primary.crash()
+        self.assertIs(manager.acquire(), standby)
+        self.assertEqual(manager.metrics()['failovers'], 1)
+
+        # ה-standby החדש מתחמם על הפרופיל שהתפנה (הראשי מחזיק עכשיו את 'standby')
+        deadline = time.time() + 2
+        while manager.standby is None and time.time() < deadline:
+            time.sleep(0.01)
+        self.assertIsNotNone(manager.standby)
+        self.assertEqual(manager.standby.role, 'primary')
+        self.assertTrue(manager.metrics()['standby_ready'])
+        self.assertEqual(manager.metrics()['primary_profile'], 'standby')
+        manager.close()
+
+
+class FakeAnthropic:
+    """
+    client מזויף: מחזיר תשובות מוכנות (לפי הסדר) ורושם את הבקשות.
+    dict → קריאה לכלי שנדרש ב-tool_choice; str → בלוק טקסט (תשובה שלא עברה דרך הכלי);
+    Exception → נזרקת (כמו שגיאת API)
+    """
+
+    def __init__(self, *replies, cache_read=0):
+        self.replies = list(replies)
+        self.requests = []
+        self.messages = self
+        self.cache_read = cache_read
+
+    def create(self, **params):
+        self.requests.append(params)
+        reply = self.replies.pop(0)
+        if isinstance(reply, Exception):
+            raise reply
+        if isinstance(reply, str):
+            block = SimpleNamespace(type='text', text=reply)
+        else:
+            block = SimpleNamespace(type='tool_use', id=f"toolu_{len(self.requests)}",
+                                    name=params['tool_choice']['name'], input=reply)
+        usage = SimpleNamespace(input_tokens=1000, output_tokens=50,
+                                cache_creation_input_tokens=0, cache_read_input_tokens=self.cache_read)
+        return SimpleNamespace(content=[block], usage=usage)
+
+
+class FakeArticle:
+    """div[role=article] מדומה: טקסט + קישור לפוסט"""
+
+    def __init__(self, post_id):
+        self.id = f"el-{post_id}"
+        self.text = f"להשכרה דירת 3 חדרים, פוסט מספר {post_id}"
+        self.href = f"https://www.facebook.com/groups/1/posts/{post_id}?ref=x"
+
+    def find_element(self, by, value):
+        raise LookupError(value)  # אין כפתור "עוד"
+
+    def find_elements(self, by, value):
+        return [SimpleNamespace(get_attribute=lambda name: self.href)] if value == 'a' else []
+
+    def get_attribute(self, name):
+        return ''
+
+
+class FakeFeedDriver:
+    """פיד מדומה: כל גלילה חושפת את ה-articles של 'המסך' הבא"""
+
+    def __init__(self, screens):
+        self.screens = screens
+        self.scrolls = 0
+
+    def get(self, url):
+        pass
+
+    def find_elements(self, by, value):
+        shown = self.screens[:self.scrolls + 1]
+        return [FakeArticle(post_id) for screen in shown for post_id in screen]
+
+    def execute_script(self, script, *args):
+        if 'scrollBy' in script:
+            self.scrolls += 1
+
+
+class TestDeepRead(unittest.TestCase):
+    """טסטים לקריאה העמוקה (גלילה הדרגתית + עצירה מוקדמת)"""
+
+    def make(self, screens):
+        import scraper
+        reader = scraper.FacebookScraper.__new__(scraper.FacebookScraper)
+        reader.driver = FakeFeedDriver(screens)
+        reader._page_load_wait = lambda: 0
+        reader.snapshots = None
+        patcher = mock.patch.object(scraper.time, 'sleep')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        return reader
+
+    def test_stops_at_known_post(self):
+        reader = self.make([['5', '4'], ['4', '3', '2'], ['1']])
+        ids = [p['post_id'] for p in reader.deep_read_posts('g', stop_ids=['2'], scroll_pause=0)]
+        self.assertEqual(ids, ['5', '4', '3', '2'])  # הפוסט המוכר מוחזר אחרון
+        self.assertEqual(reader.driver.scrolls, 1)
+
+    def test_budgets(self):
+        reader = self.make([['5', '4'], ['3', '2'], ['1']])
+        ids = [p['post_id'] for p in reader.deep_read_posts('g', max_posts=3, scroll_pause=0)]
+        self.assertEqual(ids, ['5', '4', '3'])
+
+        reader = self.make([['5', '4'], ['3'], ['2']])
+        ids = [p['post_id'] for p in reader.deep_read_posts('g', max_scrolls=1, scroll_pause=0)]
+        self.assertEqual(ids, ['5', '4', '3'])
+
+        reader = self.make([['5']])
+        ids = [p['post_id'] for p in reader.deep_read_posts('g', scroll_pause=0)]
+        self.assertEqual(ids, ['5'])  # גלילה בלי articles חדשים → סוף
+        self.assertEqual(reader.driver.scrolls, 1)
+
+
+class TestSnapshotReplay(unittest.TestCase):
+    """טסטים לצילום דפי קבוצות ולהשמעה (ReplayScraper על DOM מדומה)"""
+
+    GROUP = 'https://www.facebook.com/groups/12345'
+    ARTICLE = (
+        '<div role="article" class="x1y2" data-ft="tracking">'
+        '<script>window.secret = 1;</script>'
+        '<h2><strong><a href="/profile/9?__cft__=abc">דנה כהן</a></strong>\nאתמול</h2>'
+        '<div dir="auto" onclick="track()">להשכרה דירת 3 חדרים בפלורנטין, 5200 ש"ח</div>'
+        '<a href="https://www.facebook.com/groups/12345/posts/777?__cft__=xyz&amp;__tn__=R">אתמול</a>'
+        '<img src="https://scontent.xx/photo.jpg">'
+        '<div>לייק</div><div>תגובה</div>'
+        '</div>'
+    )
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        config_path = os.path.join(self.tmp_dir.name, 'config.json')
+        with open(config_path, 'w', encoding='utf-8') as f:
+            json.dump({}, f)
+        self._saved_instance, SettingsManager._instance = SettingsManager._instance, None
+        self.config_path = config_path
+        self.directory = os.path.join(self.tmp_dir.name, 'snapshots')
+
+    def tearDown(self):
+        SettingsManager._instance = self._saved_instance
+        self.tmp_dir.cleanup()
+
+    def test_capture_is_sanitized(self):
+        writer = snapshot.SnapshotWriter(self.directory)
+        self.assertEqual(writer.save(self.GROUP, [self.ARTICLE, self.ARTICLE]), 1)  # צילומים חופפים
+        with open(os.path.join(self.directory, snapshot.snapshot_name(self.GROUP)), encoding='utf-8') as f:
+            page = f.read()
+        for leaked in ('secret', 'onclick', 'data-ft', '__cft__', 'class='):
+            self.assertNotIn(leaked, page)
+        self.assertIn('href="https://www.facebook.com/groups/12345/posts/777"', page)
+        self.assertEqual(snapshot.load_manifest(self.directory)[self.GROUP]['articles'], 1)
+
+    def test_replay_reads_like_scraper(self):
+        snapshot.SnapshotWriter(self.directory).save(self.GROUP, [self.ARTICLE])
+        import scraper
+        reader = scraper.ReplayScraper(self.directory, config_path=self.config_path)
+        reader.create_driver()
+        with mock.patch.object(scraper.time, 'sleep'):
+            quick = reader.quick_read_posts(self.GROUP)
+            deep = list(reader.deep_read_posts(self.GROUP, scroll_pause=0))
+
+        self.assertEqual(quick, deep)
+        post = quick[0]
+        self.assertEqual(post['post_id'], '777')
+        self.assertEqual(post['author'], 'דנה כהן')
+        self.assertEqual(post['images'], ['https://scontent.xx/photo.jpg'])
+        self.assertIn('פלורנטין', post['content'])
+        self.assertNotIn('לייק', post['content'])  # _clean_noise עובד על הטקסט המדומה
+
+        with self.assertRaises(Exception):
+            reader.quick_read_posts('https://www.facebook.com/groups/unknown')
+        reader.close()
+
+
+class TestLoadTest(unittest.TestCase):
+    """טסטים ל-load_test (מחזורי listener אמיתיים מול סורק ו-AI מדומים)"""
+
+    def test_cycles_stop_at_cursor(self):
+        import load_test
+        results = load_test.run_scenario(2, 3, cycles=3, dup_rate=0.5, ai_latency=0, ai_min_delay=0)
+        self.assertEqual([r['fed_posts'] for r in results], [6, 4, 4])
+        self.assertEqual([r['processed_posts'] for r in results], [6, 4, 4])  # פוסטים מוכרים לא מגיעים ל-save_post
+        self.assertTrue(all(r['new_posts'] <= r['processed_posts'] for r in results))
+        self.assertEqual(set(results[0]['stages']), set(load_test.STAGES))
+        self.assertGreater(results[-1]['db_mb'], 0)
+
+    def test_fit_capacity(self):
+        import load_test
+        base, per_group, max_groups = load_test.fit_capacity([(10, 12.0), (20, 22.0), (40, 42.0)], 360)
+        self.assertAlmostEqual(base, 2.0)
+        self.assertAlmostEqual(per_group, 1.0)
+        self.assertEqual(max_groups, 358)
+
+
+class TestAIModes(TempDatabaseTestCase):
+    """טסטים למצב combined מול two_call (בלי API אמיתי)"""
+
+    RELEVANT = {'category': 'RELEVANT', 'is_broker': False, 'confidence': 0.9, 'reason': 'דירה'}
+
+    def make_agents(self, mode, *replies):
+        with mock.patch.dict(os.environ, {'ANTHROPIC_API_KEY': 'test-key'}):
+            agents = AIAgents(mode=mode)
+        agents.min_delay = 0
+        agents.client = FakeAnthropic(*replies)
+        return agents
+
+    def test_combined_is_one_call(self):
+        """combined: קריאה אחת שממלאת את מה ש-Regex לא מצא"""
+        self.db.ai_agents = self.make_agents(AI_MODE_COMBINED, {
+            **self.RELEVANT, 'price': '2,400,000', 'city': 'ירושלים', 'location': 'קטמון', 'rooms': 4})
+        self.assertTrue(self.save(1, "דירה יפה למכירה בקטמון, 4 חדרים"))
+
+        conn = sqlite3.connect(self.db_path)
+        row = conn.execute("SELECT city, location, rooms, category FROM posts").fetchone()
+        conn.close()
+
+        metrics = self.db.ai_agents.get_metrics()
+        print(f"✅ מדדים: {metrics['total']}")
+        self.assertEqual(row, ('ירושלים', 'קטמון', '4', 'RELEVANT'))
+        self.assertEqual(metrics['total']['calls'], 1)
+        self.assertEqual(metrics['combined']['input_tokens'], 1000)
+
+    def test_two_call_mode_still_available(self):
+        """two_call: סיווג ואז חילוץ - שתי קריאות"""
+        self.db.ai_agents = self.make_agents(AI_MODE_TWO_CALL, self.RELEVANT,
+                                             {'price': None, 'city': 'ירושלים', 'location': 'קטמון'})
+        self.assertTrue(self.save(1, "דירה יפה למכירה בקטמון"))
+        self.assertEqual(self.db.ai_agents.get_metrics()['total']['calls'], 2)
+
+    def test_static_prefix_is_cached(self):
+        """ההנחיות ב-system עם cache_control, הפוסט רק בסוף ההודעה"""
+        agents = self.make_agents(AI_MODE_TWO_CALL, self.RELEVANT, self.RELEVANT)
+        agents.client.cache_read = 3000
+        agents.classify_post("דירה ראשונה בקטמון", "משה")
+        agents.classify_post("דירה שנייה בגילה", "שרה")
+
+        first, second = agents.client.requests
+        self.assertEqual(first['system'], second['system'])
+        self.assertEqual(first['system'][-1]['cache_control'], {'type': 'ephemeral'})
+        self.assertNotIn("קטמון", json.dumps(first['system'], ensure_ascii=False))
+        self.assertIn("דירה ראשונה", first['messages'][-1]['content'][-1]['text'])
+
+        metrics = agents.get_metrics()['classify']
+        print(f"✅ cache: {metrics['cache_read_input_tokens']} טוקנים, {metrics['cache_hit_rate']:.0%}")
+        self.assertEqual(metrics['cache_read_input_tokens'], 6000)
+        self.assertAlmostEqual(metrics['cache_hit_rate'], 0.75)
+
+    def test_invalid_reply_gets_one_repair(self):
+        """תשובה שלא עומדת ב-schema → ניסיון תיקון אחד עם השגיאה"""
+        agents = self.make_agents(AI_MODE_TWO_CALL, {**self.RELEVANT, 'category': 'APARTMENT'}, self.RELEVANT)
+        result = agents.classify_post("דירה בקטמון", "משה")
+
+        repair = agents.client.requests[1]['messages']
+        self.assertEqual(result['category'], 'RELEVANT')
+        self.assertEqual(repair[-2]['role'], 'assistant')
+        self.assertTrue(repair[-1]['content'][0]['is_error'])
+        self.assertIn('APARTMENT', repair[-1]['content'][0]['content'])
+
+        metrics = agents.get_metrics()['classify']
+        self.assertEqual((metrics['parse_failures'], metrics['retries'], metrics['fallbacks']), (1, 1, 0))
+
+    def test_fallback_is_counted(self):
+        """גם התיקון נכשל → AIFailedError (בלי סיווג מזויף), לא יותר משתי קריאות"""
+        agents = self.make_agents(AI_MODE_COMBINED, '```json\n{"category": "SPAM"}\n```', {'category': 'SPAM'})
+        with self.assertRaises(AIFailedError):
+            agents.classify_and_extract("שיפוצים", "משה")
+
+        metrics = agents.get_metrics()['combined']
+        print(f"✅ מדדי איכות: {metrics['parse_failures']} / {metrics['retries']} / {metrics['fallbacks']}")
+        self.assertEqual(metrics['calls'], 2)
+        self.assertEqual((metrics['parse_failures'], metrics['retries'], metrics['fallbacks']), (2, 1, 1))
+
+
+    def test_failed_repair_is_reclassified_later(self):
+        """two_call: גם התיקון נכשל → נשמר עם ai_failed (בלי confidence 0.5 מזויף) וחוזר ל-batch"""
+        self.db.ai_agents = self.make_agents(AI_MODE_TWO_CALL, {**self.RELEVANT, 'category': 'APARTMENT'},
+                                             'לא יודע')
+        self.assertTrue(self.save(1, "דירה 4 חדרים בקטמון"))
+
+        conn = sqlite3.connect(self.db_path)
+        row = conn.execute("SELECT ai_confidence, ai_reason, ai_failed FROM posts").fetchone()
+        conn.close()
+        self.assertEqual(row, (None, None, 1))
+        self.assertEqual(len(self.db.ai_agents.client.requests), 2)  # בלי Agent 2 על פוסט שלא סווג
+
+        enricher = BatchEnricher(self.db_path, self.db.ai_agents, LocalBatchClient(lambda params: {}))
+        self.assertEqual([post[0] for post in enricher.pending_posts()], [1])
+
+
+class APIError(Exception):
+    """שגיאת API מזויפת עם status_code ו-retry-after (כמו ב-SDK)"""
+
+    def __init__(self, status_code, retry_after=None):
+        super().__init__(f"Error code: {status_code}")
+        self.status_code = status_code
+        headers = {'retry-after': str(retry_after)} if retry_after is not None else {}
+        self.response = SimpleNamespace(headers=headers)
+
+
+class TestCircuitBreaker(TempDatabaseTestCase):
+    """טסטים למפסק סביב קריאות ה-API"""
+
+    def setUp(self):
+        super().setUp()
+        self.now = 0.0
+        self.breaker = CircuitBreaker(min_calls=4, error_rate=0.5, base_delay=10, max_delay=60,
+                                      clock=lambda: self.now)
+
+    def test_opens_on_error_rate_and_probes(self):
+        """חלון מתגלגל → OPEN; אחרי ההמתנה קריאת ניסיון אחת; כישלון מכפיל את ההמתנה"""
+        for ok in (True, False, True, False):
+            self.assertTrue(self.breaker.allow())
+            self.breaker.record_success() if ok else self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, OPEN)
+        self.assertFalse(self.breaker.allow())
+
+        self.now = 10
+        self.assertTrue(self.breaker.allow())       # probe
+        self.assertEqual(self.breaker.state, HALF_OPEN)
+        self.assertFalse(self.breaker.allow())      # רק probe אחד במקביל
+        self.breaker.record_failure()
+        self.assertEqual(self.breaker.retry_in(), 20)
+
+        self.now = 30
+        self.assertTrue(self.breaker.allow())
+        self.breaker.record_success()
+        self.assertEqual(self.breaker.state, CLOSED)
+
+    def test_retry_after_is_honoured(self):
+        """429 עם retry-after פותח מיד, לפחות לזמן שה-API ביקש"""
+        self.breaker.record_failure(retry_after=45)
+        self.assertEqual(self.breaker.state, OPEN)
+        self.assertEqual(self.breaker.retry_in(), 45)
+
+    def test_save_post_marks_ai_failed_while_open(self):
+        """API למטה: אחרי שהמפסק נפתח אין עוד קריאות, והפוסטים נשמרים עם ai_failed"""
+        with mock.patch.dict(os.environ, {'ANTHROPIC_API_KEY': 'test-key'}):
+            agents = AIAgents(mode=AI_MODE_COMBINED)
+        agents.min_delay = 0
+        agents.client = FakeAnthropic(*[APIError(529) for _ in range(4)])
+        self.db.ai_agents = agents
+
+        for i in range(10):
+            self.assertTrue(self.save(i, f"דירה {i} חדרים בקטמון"))
+
+        conn = sqlite3.connect(self.db_path)
+        failed, reasons = conn.execute("SELECT SUM(ai_failed), COUNT(ai_reason) FROM posts").fetchone()
+        conn.close()
+
+        print(f"✅ מפסק: {agents.breaker.snapshot()}")
+        self.assertEqual(len(agents.client.requests), 4)
+        self.assertEqual((failed, reasons), (10, 0))
+        self.assertEqual(agents.breaker.snapshot()['rejected'], 6)
+
+        enricher = BatchEnricher(self.db_path, agents, LocalBatchClient(lambda params: {}))
+        self.assertEqual(len(enricher.pending_posts()), 10)
+
+    def test_invalid_key_trips_breaker(self):
+        """401 (מפתח שגוי): נספר ככישלון זמינות - המפסק נפתח, אין עוד קריאות, הפוסטים ai_failed"""
+        with mock.patch.dict(os.environ, {'ANTHROPIC_API_KEY': 'test-key'}):
+            agents = AIAgents(mode=AI_MODE_COMBINED)
+        agents.min_delay = 0
+        agents.client = FakeAnthropic(*[APIError(401) for _ in range(4)])
+        self.db.ai_agents = agents
+
+        for i in range(6):
+            self.assertTrue(self.save(i, f"דירה {i} חדרים בקטמון"))
+
+        conn = sqlite3.connect(self.db_path)
+        failed, reasons = conn.execute("SELECT SUM(ai_failed), COUNT(ai_reason) FROM posts").fetchone()
+        conn.close()
+        self.assertEqual(len(agents.client.requests), 4)
+        self.assertEqual(agents.breaker.state, OPEN)
+        self.assertEqual((failed, reasons), (6, 0))
+
+    def test_rejected_request_marks_ai_failed(self):
+        """400: לא תקלת זמינות (המפסק סגור), אבל הפוסט נשמר עם ai_failed ובלי סיבה מזויפת"""
+        with mock.patch.dict(os.environ, {'ANTHROPIC_API_KEY': 'test-key'}):
+            agents = AIAgents(mode=AI_MODE_COMBINED)
+        agents.min_delay = 0
+        agents.client = FakeAnthropic(APIError(400))
+        self.db.ai_agents = agents
+
+        self.assertTrue(self.save(1, "דירה 3 חדרים בקטמון"))
+
+        conn = sqlite3.connect(self.db_path)
+        row = conn.execute("SELECT category, ai_confidence, ai_reason, ai_failed FROM posts").fetchone()
+        conn.close()
+        self.assertEqual(row, ('RELEVANT', None, None, 1))
+        self.assertEqual(agents.breaker.state, CLOSED)
+        self.assertEqual(agents.get_metrics()['combined']['fallbacks'], 1)
+
+    def test_no_image_downloads_while_open(self):
+        """מפסק פתוח: התמונות לא מורדות (הקריאה תידחה בכל מקרה)"""
+        with mock.patch.dict(os.environ, {'ANTHROPIC_API_KEY': 'test-key'}):
+            agents = AIAgents(mode=AI_MODE_COMBINED)
+        agents.client = FakeAnthropic()
+        agents.breaker.record_failure(retry_after=60)
+        fetched = []
+        self.db.ai_agents = agents
+        self.db.image_pipeline = ImagePipeline(fetcher=lambda url: fetched.append(url) or b'')
+
+        self.assertTrue(self.save(1, "דירה 3 חדרים בקטמון", images=['https://scontent.example/a.jpg']))
+        self.assertEqual(fetched, [])
+        self.assertEqual(agents.client.requests, [])
+        self.assertFalse(agents.breaker.accepting())
+
+
+class TestPreClassifier(TempDatabaseTestCase):
+    """טסטים לסיווג המקומי שלפני ה-LLM"""
+
+    def test_rules_skip_only_obvious_posts(self):
+        """מחפש דירה / הובלות → דילוג (כשהסף מאפשר חוקים לבד); מודעה שמזכירה שיפוצים → ממשיכה ל-LLM"""
+        self.assertIsNone(PreClassifier().classify("הובלות במחירים הכי טובים בעיר!"))  # ברירת מחדל: חוק לבד לא מספיק
+
+        pre = PreClassifier(threshold=pre_classifier.RULES_ONLY_CONFIDENCE)
+        self.assertEqual(pre.classify("מחפשת דירת 3 חדרים בקטמון עד 6000")['category'], 'WANTED')
+        self.assertEqual(pre.classify("הובלות במחירים הכי טובים בעיר!")['category'], 'SPAM')
+        self.assertIsNone(pre.classify("דירה למכירה בגילה, אחרי שיפוצים כלליים, 4 חדרים"))
+        self.assertIsNone(pre.classify("דירת 4 חדרים בקטמון, 2,400,000"))
+        self.assertAlmostEqual(pre.skip_rate(), 0.5)
+
+    def test_listings_are_never_rule_filtered(self):
+        """מודעת דירה שמתחילה ב"מחפשים דירה?" / מזכירה "לקנות דירה" - וטו, ממשיכה ל-LLM"""
+        listings = ['מחפשים דירה? דירת 4 חדרים להשכרה בקטמון 7000 ש"ח',
+                    "דירה למכירה, מתאים למי שמעוניין לקנות דירה להשקעה"]
+        pre = PreClassifier(threshold=0.0)
+        for content in listings:
+            self.assertIsNone(PreClassifier.rule_category(content))
+            self.assertIsNone(pre.classify(content))
+
+    def test_model_agrees_with_llm_on_holdout(self):
+        """מודל שאומן על תוויות: דילוג משמעותי, התאמה גבוהה, אף רלוונטי לא מדולג"""
+        index = {name: i for i, name in enumerate(synthetic_data.INSERT_COLUMNS)}
+        rows = [(i + 1, row[index['content']], row[index['category']])
+                for i, row in enumerate(synthetic_data.generate_posts(2000))]
+        train, test = split_holdout(rows)
+        model = TfidfLogistic.train([r[1] for r in train], [r[2] for r in train])
+
+        report = evaluate(PreClassifier(model), test)
+        print(f"✅ דילוג {report['skip_rate']:.0%}, התאמה {report['agreement']:.0%}, "
+              f"{report['us_per_post']:.0f}µs לפוסט")
+        self.assertGreater(report['skip_rate'], 0.3)
+        self.assertGreaterEqual(report['agreement'], 0.95)
+        self.assertEqual(report['relevant_skipped'], 0)
+
+    def test_save_post_skips_llm(self):
+        """פוסט ברור נשמר כמסונן בלי קריאה ל-API"""
+        self.db.pre_classifier = PreClassifier(threshold=pre_classifier.RULES_ONLY_CONFIDENCE)
+        with mock.patch.dict(os.environ, {'ANTHROPIC_API_KEY': 'test-key'}):
+            self.db.ai_agents = AIAgents(mode=AI_MODE_COMBINED)
+        self.db.ai_agents.client = FakeAnthropic()
+
+        self.assertFalse(self.save(1, "מחפש דירה 3 חדרים בקטמון"))
+
+        conn = sqlite3.connect(self.db_path)
+        row = conn.execute("SELECT category, is_relevant, ai_reason FROM posts").fetchone()
+        conn.close()
+        self.assertEqual(row, ('WANTED', 0, 'pre-classifier (rules)'))
+        self.assertEqual(self.db.ai_agents.client.requests, [])
+
+
+class TestImagePipeline(unittest.TestCase):
+    """טסטים להכנת תמונות ל-AI (תמונות מקומיות מ-data/test_images)"""
+
+    FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'test_images')
+
+    def setUp(self):
+        if image_pipeline._import_pil() is None:
+            self.skipTest("Pillow לא מותקן")
+        self.fetched = []
+        self.pipeline = ImagePipeline(max_per_post=2, fetcher=self.fetch)
+
+    def fetch(self, url):
+        """'https://scontent.example/<name>' → הקובץ המקומי"""
+        self.fetched.append(url)
+        with open(os.path.join(self.FIXTURES, url.rsplit('/', 1)[-1]), 'rb') as f:
+            return f.read()
+
+    def urls(self, *names):
+        return [f"https://scontent.example/{name}" for name in names]
+
+    def test_icons_dropped_and_capped(self):
+        """אייקון יורד לפי מידות, ואחרי 2 תמונות מפסיקים (בלי להוריד את השאר)"""
+        sources = self.pipeline.prepare(self.urls('icon.png', 'apartment_1.jpg', 'flyer.png', 'apartment_2.jpg'))
+
+        self.assertEqual([s['type'] for s in sources], ['base64', 'base64'])
+        self.assertEqual(len(self.fetched), 3)
+        self.assertEqual((self.pipeline.stats['icons'], self.pipeline.stats['capped']), (1, 1))
+
+    def test_thumbnail_is_smaller(self):
+        """thumbnail מוקטן ב-base64 (צלע ארוכה ≤ thumbnail_side)"""
+        from PIL import Image
+        source, = self.pipeline.prepare(self.urls('apartment_1.jpg'))
+        thumbnail = Image.open(io.BytesIO(base64.b64decode(source['data'])))
+        self.assertEqual(source['media_type'], 'image/jpeg')
+        self.assertLessEqual(max(thumbnail.size), image_pipeline.THUMBNAIL_SIDE)
+
+    def test_reposted_image_is_skipped(self):
+        """אותה תמונה (מוקטנת ודחוסה מחדש) בפוסט אחר לא נשלחת שוב"""
+        self.assertEqual(len(self.pipeline.prepare(self.urls('apartment_1.jpg'))), 1)
+        sources = self.pipeline.prepare(self.urls('apartment_1_repost.jpg', 'apartment_2.jpg'))
+
+        print(f"✅ תמונות: {self.pipeline.stats}")
+        self.assertEqual(len(sources), 1)
+        self.assertEqual(self.pipeline.stats['duplicates'], 1)
+
+    def test_hashes_committed_only_after_success(self):
+        """pending: תמונה מקריאה שנכשלה נשלחת שוב; רק commit מסמן אותה כנשלחה"""
+        pending = []
+        self.assertEqual(len(self.pipeline.prepare(self.urls('apartment_1.jpg', 'apartment_1_repost.jpg'),
+                                                   pending=pending)), 1)  # כפולה בתוך אותו פוסט
+        self.assertEqual((len(pending), len(self.pipeline.seen)), (1, 0))
+
+        retry = []
+        self.assertEqual(len(self.pipeline.prepare(self.urls('apartment_1.jpg'), pending=retry)), 1)
+        self.pipeline.commit(retry)
+        self.assertEqual(self.pipeline.prepare(self.urls('apartment_1_repost.jpg')), [])
+
+
+class TestAIRecorder(TempDatabaseTestCase):
+    """הקלטה והשמעה של קריאות AI (בלי רשת ובלי API key)"""
+
+    REPLY = {'category': 'RELEVANT', 'is_broker': False, 'confidence': 0.9, 'reason': 'דירה',
+             'price': '2400000', 'city': 'ירושלים', 'location': 'קטמון', 'rooms': '4'}
+
+    def setUp(self):
+        super().setUp()
+        self.path = os.path.join(self.tmp_dir.name, 'recordings.jsonl')
+        self.env = mock.patch.dict(os.environ, {'ANTHROPIC_API_KEY': 'test-key'})
+        self.env.start()
+        self.addCleanup(self.env.stop)
+
+    def agents(self, client):
+        agents = AIAgents(mode=AI_MODE_COMBINED)
+        agents.min_delay = 0
+        agents.client = client
+        return agents
+
+    def test_record_then_replay(self):
+        """מה שהוקלט מוגש שוב זהה, בלי ה-client האמיתי, עם זמן התגובה שהוגדר"""
+        recorder = RecordingClient(self.path, 'record', inner=FakeAnthropic(self.REPLY))
+        recorded = self.agents(recorder).classify_and_extract("דירה בקטמון", "משה")
+
+        replay = RecordingClient(self.path, 'replay', latency=0.05)
+        agents = self.agents(replay)
+        started = time.perf_counter()
+        replayed = agents.classify_and_extract("דירה בקטמון", "משה")
+        elapsed = time.perf_counter() - started
+
+        self.assertEqual(replayed, recorded)
+        self.assertEqual(replay.stats['hits'], 1)
+        self.assertGreaterEqual(elapsed, 0.05)
+        self.assertEqual(agents.get_metrics()['combined']['input_tokens'], 1000)
+
+        with self.assertRaises(ReplayMissError):
+            replay.create(**agents.build_combined_params("פוסט אחר", "שרה"))
+
+    def test_replay_post_with_images_offline(self):
+        """פוסט עם תמונות שהוקלט (thumbnails) מוגש בהשמעה בלי להוריד תמונות; פוסט שלא הוקלט → ai_failed"""
+        images = ['https://scontent.example/apartment_1.jpg', 'https://scontent.example/apartment_2.jpg']
+        self.db.image_pipeline = mock.Mock()
+        self.db.image_pipeline.prepare.return_value = [
+            {'type': 'base64', 'media_type': 'image/jpeg', 'data': 'AAAA'}]
+        self.db.ai_agents = self.agents(RecordingClient(self.path, 'record', inner=FakeAnthropic(self.REPLY)))
+        self.assertTrue(self.save(1, "דירה בקטמון", images=images))
+
+        os.environ[ai_recorder.ENV_REPLAY] = self.path  # ברירת מחדל: on_miss='error'
+        replay_db = PostDatabase(os.path.join(self.tmp_dir.name, 'replay.db'), event_bus=self.bus)
+        replay_db.pre_classifier = None
+        replay_db.image_pipeline = mock.Mock()
+        replay_db.image_pipeline.prepare.side_effect = AssertionError("no downloads in replay")
+        replay_db.ai_agents = AIAgents(mode=AI_MODE_COMBINED)
+        replay_db.ai_agents.min_delay = 0
+
+        post = {'post_url': 'https://facebook.com/groups/1/posts/1', 'post_id': '1',
+                'content': "דירה בקטמון", 'author': 'בודק', 'group_name': 'קבוצת בדיקה', 'images': images}
+        self.assertTrue(replay_db.save_post(post))
+        replay_db.save_post({**post, 'post_url': 'https://facebook.com/groups/1/posts/2', 'post_id': '2',
+                             'content': "פוסט שלא הוקלט"})
+
+        print(f"✅ השמעה: {replay_db.ai_agents.client.stats}")
+        self.assertEqual(replay_db.ai_agents.client.stats, {'hits': 1, 'misses': 1, 'recorded': 0})
+        replay_db.image_pipeline.prepare.assert_not_called()
+        self.assertEqual(replay_db.ai_agents.breaker.snapshot()['window_calls'], 1)  # החטאה לא נספרת
+
+        conn = sqlite3.connect(replay_db.db_path)
+        rows = conn.execute("SELECT post_id, ai_reason, ai_failed FROM posts ORDER BY id").fetchall()
+        conn.close()
+        self.assertEqual(rows, [('1', 'דירה', 0), ('2', None, 1)])
+
+    def test_replay_from_env_without_api_key(self):
+        """HOMERADAR_AI_REPLAY: בלי API key, פוסטים שלא הוקלטו מקבלים תשובה סינתטית"""
+        os.environ.pop('ANTHROPIC_API_KEY')
+        os.environ[ai_recorder.ENV_REPLAY] = self.path
+        os.environ[ai_recorder.ENV_ON_MISS] = 'synthetic'
+
+        self.db.ai_agents = AIAgents(mode=AI_MODE_COMBINED)
+        self.db.ai_agents.min_delay = 0
+        self.assertTrue(self.save(1, "דירה יפה למכירה, 4 חדרים"))
+        self.assertIsInstance(self.db.ai_agents.client, RecordingClient)
+        self.assertEqual(self.db.ai_agents.client.stats['misses'], 1)
+
+
+class TestBatchEnrichment(TempDatabaseTestCase):
+    """טסטים להעשרה בצובר מול LocalBatchClient (בלי API)"""
+
+    @staticmethod
+    def responder(params):
+        """SPAM לשיפוצים, כישלון ל"שבור", אחרת דירה בקטמון"""
+        text = params['messages'][-1]['content'][-1]['text']
+        if 'שבור' in text:
+            raise RuntimeError('overloaded')
+        if 'שיפוצים' in text:
+            return {'category': 'SPAM', 'is_broker': False, 'confidence': 0.9, 'reason': 'פרסום',
+                    'price': None, 'city': None, 'location': None, 'rooms': None}
+        return {'category': 'RELEVANT', 'is_broker': True, 'confidence': 0.9, 'reason': 'דירה',
+                'price': '2400000', 'city': 'ירושלים', 'location': 'קטמון', 'rooms': '4'}
+
+    def setUp(self):
+        super().setUp()
+        self.save(1, "דירה יפה למכירה, 4 חדרים")
+        self.save(2, "שיפוצים במחירים הכי טובים")
+        self.save(3, "פוסט שבור")
+        self.save(4, "דירה בגילה", blacklist_match='גילה', is_relevant=0)
+
+        with mock.patch.dict(os.environ, {'ANTHROPIC_API_KEY': 'test-key'}):
+            self.agents = AIAgents(mode=AI_MODE_COMBINED)
+        self.client = LocalBatchClient(self.responder, polls_until_done=2)
+        self.enricher = BatchEnricher(self.db_path, self.agents, self.client)
+
+    def rows(self):
+        conn = sqlite3.connect(self.db_path)
+        rows = conn.execute(
+            "SELECT post_id, category, is_relevant, is_broker, city, rooms, ai_failed FROM posts ORDER BY id"
+        ).fetchall()
+        conn.close()
+        return rows
+
+    def test_run_applies_results(self):
+        """batch אחד לשלושת הפוסטים (בלי הרשימה השחורה), עדכון בבת אחת"""
+        total = self.enricher.run(interval=0)
+        print(f"✅ batch: {total}")
+
+        self.assertEqual(len(self.client._batches), 1)
+        self.assertEqual(total, {'batches': 1, 'applied': 2, 'filtered': 1, 'failed': 1})
+        self.assertEqual(self.rows(), [
+            ('1', 'RELEVANT', 1, 1, 'ירושלים', '4', 0),
+            ('2', 'SPAM', 0, 0, None, None, 0),
+            ('3', 'RELEVANT', 1, 0, None, None, 1),
+            ('4', 'RELEVANT', 0, 0, 'ירושלים', None, 0),  # רשימה שחורה - לא נשלח
+        ])
+
+    def test_retry_is_idempotent(self):
+        """הרצה שנקטעה ממשיכה את ה-batch הפתוח; batch מוחל פעם אחת"""
+        batch_id = self.enricher.submit()
+        self.assertIsNone(self.enricher.submit())  # הכל כבר ב-batch פתוח
+        self.assertIsNone(self.enricher.poll(batch_id, interval=0, timeout=0))
+
+        total = self.enricher.run(interval=0)
+        self.assertEqual(len(self.client._batches), 1)
+        self.assertEqual(total['applied'], 2)
+        self.assertIsNone(self.enricher.apply(batch_id))
+
+        # רק הפוסט שנכשל חוזר ל-batch הבא
+        self.assertEqual([row[0] for row in self.enricher.pending_posts()], [3])
+
+    def test_reclassified_post_gets_regex_details(self):
+        """פוסט שסונן והפך ל-RELEVANT מקבל פרטי Regex (כולל טלפון); AI ממלא רק את החסר"""
+        self.save(5, "דירה למכירה בתל אביב 3 חדרים 1,900,000 ₪ טלפון 050-1234567")
+        conn = sqlite3.connect(self.db_path)
+        # כמו שמירה של פוסט מסונן ב-save_post: בלי פרטים
+        conn.execute('''
+            UPDATE posts SET category = 'SPAM', is_relevant = 0, ai_confidence = 0.9,
+                city = NULL, location = NULL, price = NULL, rooms = NULL, phone = NULL
+            WHERE post_id = '5'
+        ''')
+        conn.commit()
+
+        self.enricher.run(interval=0, reclassify=True)
+
+        row = conn.execute(
+            "SELECT category, is_relevant, city, location, price, rooms, phone FROM posts WHERE post_id = '5'"
+        ).fetchone()
+        conn.close()
+        self.assertEqual(row, ('RELEVANT', 1, 'תל אביב', 'קטמון', '1900000', '3', '0501234567'))
+        self.assertEqual(self.agents.get_metrics()['batch']['calls'], 3)  # בלי ה-errored
+
+
+class TestStreamingExport(unittest.TestCase):
+    """טסטים לייצוא בזרימה"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.tmp_dir = tempfile.TemporaryDirectory()
+        cls.db_path = os.path.join(cls.tmp_dir.name, 'export.db')
+        synthetic_data.make_synthetic_db(cls.db_path, 12000)
+
+        conn = sqlite3.connect(cls.db_path)
+        cls.relevant = conn.execute("SELECT COUNT(*) FROM posts WHERE is_relevant = 1").fetchone()[0]
+        cls.jerusalem = conn.execute(
+            "SELECT COUNT(*) FROM posts WHERE is_relevant = 1 AND city = 'ירושלים'").fetchone()[0]
+        conn.close()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.tmp_dir.cleanup()
+
+    def test_csv_has_no_row_cap(self):
+        """כל השורות נכתבות (גם מעל 10,000) - בלי תקרה"""
+        filename = os.path.join(self.tmp_dir.name, 'all.csv')
+        rows = exporter.export_posts(self.db_path, filename, relevant_only=False, chunk_size=500)
+
+        with open(filename, encoding='utf-8-sig') as f:
+            lines = sum(1 for _ in csv.reader(f))
+
+        print(f"✅ יוצאו {rows} שורות")
+        self.assertEqual(rows, 12000)
+        self.assertEqual(lines, 12001)  # + כותרת
+
+    def test_filters(self):
+        """סינון לפי עיר"""
+        filename = os.path.join(self.tmp_dir.name, 'city.csv')
+        self.assertEqual(exporter.export_posts(self.db_path, filename, city='ירושלים'), self.jerusalem)
+
+    def test_no_rows_creates_no_file(self):
+        """אין נתונים → 0 ולא נוצר קובץ"""
+        filename = os.path.join(self.tmp_dir.name, 'empty.csv')
+        self.assertEqual(exporter.export_posts(self.db_path, filename, city='אין כזו עיר'), 0)
+        self.assertFalse(os.path.exists(filename))
+
+    def test_parquet_typed_columns(self):
+        """Parquet עם טיפוסים (אם pyarrow מותקן)"""
+        try:
+            import pyarrow.parquet as pq
+        except ImportError:
+            self.skipTest("pyarrow לא מותקן")
+
+        filename = os.path.join(self.tmp_dir.name, 'out.parquet')
+        rows = exporter.export_posts(self.db_path, filename)
+        table = pq.read_table(filename)
+
+        self.assertEqual(rows, self.relevant)
+        self.assertEqual(table.num_rows, self.relevant)
+        self.assertEqual(str(table.schema.field('price').type), 'int64')
+        self.assertEqual(str(table.schema.field('rooms').type), 'double')
+
+
+class TestPostsPage(unittest.TestCase):
+    """טסטים לדפדוף keyset בטבלת הדירות"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.tmp_dir = tempfile.TemporaryDirectory()
+        cls.db_path = os.path.join(cls.tmp_dir.name, 'page.db')
+        cls.db = synthetic_data.make_synthetic_db(cls.db_path, 3000)
+        cls.db.ai_agents = None
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.tmp_dir.cleanup()
+
+    def read_all(self, **kwargs):
+        ids, cursor = [], None
+        while True:
+            rows, cursor = self.db.get_posts_page(after=cursor, limit=97, **kwargs)
+            ids.extend(row['id'] for row in rows)
+            if cursor is None:
+                return ids
+
+    def test_pages_cover_all_rows_once(self):
+        """כל הדפים יחד = כל הדירות, בלי כפילויות - לכל מיון"""
+        total = self.db.count_posts()
+        for sort in database.PAGE_SORT_KEYS:
+            for descending in (True, False):
+                ids = self.read_all(sort=sort, descending=descending)
+                self.assertEqual(len(ids), total, sort)
+                self.assertEqual(len(set(ids)), total, sort)
+
+    def test_price_order_and_city_filter(self):
+        """מיון מחיר יורד + סינון עיר"""
+        city = self.db.get_cities()[0]
+        rows, _ = self.db.get_posts_page(limit=50, sort='price', city=city)
+        prices = [int(row['price']) for row in rows]
+
+        self.assertEqual(prices, sorted(prices, reverse=True))
+        self.assertTrue(all(row['city'] == city for row in rows))
+        self.assertEqual(len(self.read_all(city=city)), self.db.count_posts(city=city))
+
+
 def run_tests():
     """הרצת כל הטסטים"""
     print("=" * 70)
@@ -201,6 +1625,27 @@ def run_tests():
     suite.addTests(loader.loadTestsFromTestCase(TestRegexExtraction))
     suite.addTests(loader.loadTestsFromTestCase(TestAIClassification))
     suite.addTests(loader.loadTestsFromTestCase(TestLocationSplitting))
+    suite.addTests(loader.loadTestsFromTestCase(TestStartupBudget))
+    suite.addTests(loader.loadTestsFromTestCase(TestLiveStats))
+    suite.addTests(loader.loadTestsFromTestCase(TestCityCardsDiff))
+    suite.addTests(loader.loadTestsFromTestCase(TestApartmentsTableRows))
+    suite.addTests(loader.loadTestsFromTestCase(TestDailyStats))
+    suite.addTests(loader.loadTestsFromTestCase(TestSettingsManager))
+    suite.addTests(loader.loadTestsFromTestCase(TestSearch))
+    suite.addTests(loader.loadTestsFromTestCase(TestSavedSearches))
+    suite.addTests(loader.loadTestsFromTestCase(TestGroupStore))
+    suite.addTests(loader.loadTestsFromTestCase(TestBrowserManager))
+    suite.addTests(loader.loadTestsFromTestCase(TestDeepRead))
+    suite.addTests(loader.loadTestsFromTestCase(TestSnapshotReplay))
+    suite.addTests(loader.loadTestsFromTestCase(TestLoadTest))
+    suite.addTests(loader.loadTestsFromTestCase(TestAIModes))
+    suite.addTests(loader.loadTestsFromTestCase(TestCircuitBreaker))
+    suite.addTests(loader.loadTestsFromTestCase(TestPreClassifier))
+    suite.addTests(loader.loadTestsFromTestCase(TestImagePipeline))
+    suite.addTests(loader.loadTestsFromTestCase(TestAIRecorder))
+    suite.addTests(loader.loadTestsFromTestCase(TestBatchEnrichment))
+    suite.addTests(loader.loadTestsFromTestCase(TestStreamingExport))
+    suite.addTests(loader.loadTestsFromTestCase(TestPostsPage))
 
     # הרצה
     runner = unittest.TextTestRunner(verbosity=2)